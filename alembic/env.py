@@ -9,6 +9,7 @@
 
 # add your model's MetaData object here
 # for 'autogenerate' support
+from app.analytics.models import *  # noqa: F401, F403
 from app.courses.models import *  # noqa: F401, F403
 from app.shared.models.base_model import Base
 from app.training.models import *  # noqa: F401, F403
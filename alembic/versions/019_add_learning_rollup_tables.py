@@ -0,0 +1,136 @@
+"""Add learning rollup tables
+
+Revision ID: 019_add_learning_rollup_tables
+Revises: 0b145e45e096
+Create Date: 2025-03-10 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "019_add_learning_rollup_tables"
+down_revision = "0b145e45e096"
+branch_labels = None
+depends_on = None
+
+
+def _rollup_columns() -> list[sa.Column]:
+    """汇总度量字段 - 学生与班级/课程汇总表共用."""
+    return [
+        sa.Column("granularity", sa.String(length=10), nullable=False, comment="汇总粒度（hour/day）"),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False, comment="时间桶起始时间"),
+        sa.Column("training_type", sa.String(length=20), nullable=False, comment="训练类型"),
+        sa.Column("session_count", sa.Integer(), nullable=False, comment="训练会话数"),
+        sa.Column("completed_session_count", sa.Integer(), nullable=False, comment="已完成会话数"),
+        sa.Column("question_count", sa.Integer(), nullable=False, comment="答题数"),
+        sa.Column("correct_count", sa.Integer(), nullable=False, comment="答对数"),
+        sa.Column("answer_time_spent", sa.Integer(), nullable=False, comment="答题总用时（秒）"),
+        sa.Column("study_time_spent", sa.Integer(), nullable=False, comment="会话总用时（秒）"),
+        sa.Column("score_sum", sa.Float(), nullable=False, comment="得分总和"),
+        sa.Column(
+            "difficulty_histogram",
+            postgresql.JSON(astext_type=sa.Text()),
+            nullable=False,
+            comment="难度分布（难度等级 -> 答题数/答对数）",
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, comment="创建时间"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True, comment="更新时间"),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema - add learning rollup tables."""
+    # Create student_learning_rollups table
+    op.create_table(
+        "student_learning_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("student_id", sa.Integer(), nullable=False, comment="学生ID"),
+        *_rollup_columns(),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "granularity",
+            "student_id",
+            "bucket_start",
+            "training_type",
+            name="uq_student_learning_rollup",
+        ),
+        comment="学生学习汇总表",
+    )
+    op.create_index(
+        "idx_student_learning_rollups_bucket",
+        "student_learning_rollups",
+        ["granularity", "bucket_start"],
+        unique=False,
+    )
+
+    # Create group_learning_rollups table
+    op.create_table(
+        "group_learning_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("scope", sa.String(length=10), nullable=False, comment="汇总范围（class/course）"),
+        sa.Column("scope_id", sa.Integer(), nullable=False, comment="班级ID或课程ID"),
+        sa.Column("active_students", sa.Integer(), nullable=False, comment="活跃学生数"),
+        *_rollup_columns(),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "scope",
+            "scope_id",
+            "granularity",
+            "bucket_start",
+            "training_type",
+            name="uq_group_learning_rollup",
+        ),
+        comment="班级/课程学习汇总表",
+    )
+    op.create_index(
+        "idx_group_learning_rollups_bucket",
+        "group_learning_rollups",
+        ["scope", "granularity", "bucket_start"],
+        unique=False,
+    )
+
+    # Create rollup_watermarks table
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False, comment="汇总任务名称"),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=True, comment="已处理的最大变更时间"),
+        sa.Column("last_run_at", sa.DateTime(timezone=True), nullable=True, comment="最近执行时间"),
+        sa.Column("last_bucket_count", sa.Integer(), nullable=False, comment="最近一次重算的时间桶数"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, comment="创建时间"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True, comment="更新时间"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+        comment="汇总水位线表",
+    )
+
+    # 增量汇总按变更时间扫描原始数据
+    op.create_index(
+        "idx_training_records_changed_at",
+        "training_records",
+        [sa.text("coalesce(updated_at, created_at)")],
+        unique=False,
+    )
+    op.create_index(
+        "idx_training_sessions_changed_at",
+        "training_sessions",
+        [sa.text("coalesce(updated_at, created_at)")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop learning rollup tables."""
+    op.drop_index("idx_training_sessions_changed_at", table_name="training_sessions")
+    op.drop_index("idx_training_records_changed_at", table_name="training_records")
+
+    op.drop_table("rollup_watermarks")
+
+    op.drop_index("idx_group_learning_rollups_bucket", table_name="group_learning_rollups")
+    op.drop_table("group_learning_rollups")
+
+    op.drop_index("idx_student_learning_rollups_bucket", table_name="student_learning_rollups")
+    op.drop_table("student_learning_rollups")
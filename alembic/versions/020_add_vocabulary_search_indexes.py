@@ -0,0 +1,61 @@
+"""Add vocabulary search indexes
+
+Revision ID: 020_add_vocabulary_search_indexes
+Revises: 019_add_learning_rollup_tables
+Create Date: 2025-03-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "020_add_vocabulary_search_indexes"
+down_revision = "019_add_learning_rollup_tables"
+branch_labels = None
+depends_on = None
+
+# 索引名 -> 建索引语句
+VOCABULARY_INDEXES = {
+    # 包含匹配（ILIKE '%kw%'）使用三元组索引，覆盖单词、中文释义和英文释义
+    "idx_vocabulary_items_word_trgm": (
+        "USING gin (lower(word) gin_trgm_ops)"
+    ),
+    "idx_vocabulary_items_chinese_meaning_trgm": (
+        "USING gin (chinese_meaning gin_trgm_ops)"
+    ),
+    "idx_vocabulary_items_english_meaning_trgm": (
+        "USING gin (english_meaning gin_trgm_ops)"
+    ),
+    # 前缀匹配（LIKE 'kw%'）使用与排序规则无关的B树索引
+    "idx_vocabulary_items_word_prefix": (
+        "(library_id, lower(word) text_pattern_ops)"
+    ),
+    # 游标分页 - (资源库, 排序列, id)
+    "idx_vocabulary_items_library_created": "(library_id, created_at, id)",
+    "idx_vocabulary_items_library_word": "(library_id, word, id)",
+    "idx_vocabulary_items_library_frequency": "(library_id, frequency, id)",
+    "idx_vocabulary_items_library_mastery": "(library_id, mastery_level, id)",
+    "idx_vocabulary_items_library_difficulty": "(library_id, difficulty_level, id)",
+    # 自动补全的关键词列表
+    "idx_vocabulary_items_key_words": (
+        "(library_id, word) WHERE is_key_word"
+    ),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema - add trigram and keyset indexes for vocabulary search."""
+    # vocabulary_items 由模型元数据创建，未建表时跳过
+    if "vocabulary_items" not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, definition in VOCABULARY_INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON vocabulary_items {definition}")
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop vocabulary search indexes."""
+    for name in reversed(VOCABULARY_INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,48 @@
+"""Add document chunk search vector
+
+Revision ID: 021_add_document_chunk_search_vector
+Revises: 020_add_vocabulary_search_indexes
+Create Date: 2025-03-24 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "021_add_document_chunk_search_vector"
+down_revision = "020_add_vocabulary_search_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add tsvector column and GIN index for keyword search."""
+    # document_chunks 由模型元数据创建，未建表时跳过
+    inspector = sa.inspect(op.get_bind())
+    if "document_chunks" not in inspector.get_table_names():
+        return
+
+    columns = {column["name"] for column in inspector.get_columns("document_chunks")}
+    if "search_vector" not in columns:
+        op.add_column(
+            "document_chunks",
+            sa.Column(
+                "search_vector",
+                postgresql.TSVECTOR(),
+                nullable=True,
+                comment="全文检索向量",
+            ),
+        )
+    # 已有切片由 resources.rebuild_keyword_index 定时任务分批回填
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_document_chunks_search_vector "
+        "ON document_chunks USING gin (search_vector)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop keyword search column and index."""
+    op.execute("DROP INDEX IF EXISTS idx_document_chunks_search_vector")
+    op.execute("ALTER TABLE document_chunks DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,60 @@
+"""Add AI token usage rollups
+
+Revision ID: 022_add_ai_token_usage_rollups
+Revises: 021_add_document_chunk_search_vector
+Create Date: 2025-03-31 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "022_add_ai_token_usage_rollups"
+down_revision = "021_add_document_chunk_search_vector"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add ai_token_usage_rollups table."""
+    op.create_table(
+        "ai_token_usage_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False, comment="小时桶起始时间"),
+        sa.Column(
+            "scope_type",
+            sa.String(length=20),
+            nullable=False,
+            comment="统计维度（global/user/course/feature/api_key）",
+        ),
+        sa.Column("scope_value", sa.String(length=100), nullable=False, comment="维度取值"),
+        sa.Column("model_name", sa.String(length=50), nullable=False, comment="模型名称"),
+        sa.Column("request_count", sa.Integer(), nullable=False, comment="请求数"),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False, comment="输入token数"),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False, comment="输出token数"),
+        sa.Column("cost", sa.Float(), nullable=False, comment="成本(USD)"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, comment="创建时间"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True, comment="更新时间"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "bucket_start",
+            "scope_type",
+            "scope_value",
+            "model_name",
+            name="uq_ai_token_usage_rollup",
+        ),
+        comment="AI token用量小时汇总表",
+    )
+    op.create_index(
+        "ix_ai_token_usage_rollups_bucket_start",
+        "ai_token_usage_rollups",
+        ["bucket_start"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop ai_token_usage_rollups table."""
+    op.drop_index("ix_ai_token_usage_rollups_bucket_start", table_name="ai_token_usage_rollups")
+    op.drop_table("ai_token_usage_rollups")
@@ -0,0 +1,65 @@
+"""Add question inventory
+
+Revision ID: 023_add_question_inventory
+Revises: 022_add_ai_token_usage_rollups
+Create Date: 2025-04-07 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "023_add_question_inventory"
+down_revision = "022_add_ai_token_usage_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add stock bucket and sampling key to questions."""
+    op.add_column(
+        "questions",
+        sa.Column(
+            "stock_key",
+            sa.String(length=200),
+            nullable=True,
+            comment="库存桶（训练类型:难度:题型:知识点）",
+        ),
+    )
+    op.add_column(
+        "questions",
+        sa.Column(
+            "sampling_key",
+            sa.Float(),
+            server_default=sa.text("random()"),
+            nullable=False,
+            comment="随机抽样键",
+        ),
+    )
+    # 已有题目归入对应的通用库存桶
+    op.execute(
+        "UPDATE questions SET stock_key = training_type::text || ':' || "
+        "difficulty_level::text || ':' || question_type::text || ':*'"
+    )
+    op.create_index(
+        "idx_questions_stock_sampling",
+        "questions",
+        ["stock_key", "sampling_key"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+    )
+    op.create_index(
+        "idx_training_records_student_question",
+        "training_records",
+        ["student_id", "question_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop question inventory columns and indexes."""
+    op.drop_index("idx_training_records_student_question", table_name="training_records")
+    op.drop_index("idx_questions_stock_sampling", table_name="questions")
+    op.drop_column("questions", "sampling_key")
+    op.drop_column("questions", "stock_key")
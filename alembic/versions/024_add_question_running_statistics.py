@@ -0,0 +1,101 @@
+"""Add question running statistics
+
+Revision ID: 024_add_question_running_statistics
+Revises: 023_add_question_inventory
+Create Date: 2025-04-14 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "024_add_question_running_statistics"
+down_revision = "023_add_question_inventory"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add running aggregates and item indices to questions."""
+    op.add_column(
+        "questions",
+        sa.Column(
+            "correct_count",
+            sa.Integer(),
+            server_default="0",
+            nullable=False,
+            comment="答对次数",
+        ),
+    )
+    op.add_column(
+        "questions",
+        sa.Column(
+            "score_sum",
+            sa.Float(),
+            server_default="0",
+            nullable=False,
+            comment="得分总和",
+        ),
+    )
+    op.add_column(
+        "questions",
+        sa.Column(
+            "score_sq_sum",
+            sa.Float(),
+            server_default="0",
+            nullable=False,
+            comment="得分平方和",
+        ),
+    )
+    op.add_column(
+        "questions",
+        sa.Column(
+            "difficulty_index",
+            sa.Float(),
+            nullable=True,
+            comment="难度指数（平均得分率）",
+        ),
+    )
+    op.add_column(
+        "questions",
+        sa.Column(
+            "discrimination_index",
+            sa.Float(),
+            nullable=True,
+            comment="区分度指数（高分组与低分组正确率之差）",
+        ),
+    )
+    # 按已有答题记录回填累计值，避免增量写入按0值的累计量重算平均分和正确率；
+    # 区分度由 training.reconcile_question_statistics 任务计算
+    op.execute(
+        """
+        UPDATE questions AS q
+        SET usage_count = r.attempt_count,
+            correct_count = r.correct_count,
+            score_sum = r.score_sum,
+            score_sq_sum = r.score_sq_sum,
+            average_score = r.score_sum / r.attempt_count,
+            correct_rate = r.correct_count::float / r.attempt_count,
+            difficulty_index = r.score_sum / NULLIF(r.attempt_count * q.max_score, 0)
+        FROM (
+            SELECT question_id,
+                   count(*) AS attempt_count,
+                   count(*) FILTER (WHERE is_correct) AS correct_count,
+                   coalesce(sum(score), 0) AS score_sum,
+                   coalesce(sum(score * score), 0) AS score_sq_sum
+            FROM training_records
+            GROUP BY question_id
+        ) AS r
+        WHERE q.id = r.question_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop question running statistics."""
+    op.drop_column("questions", "discrimination_index")
+    op.drop_column("questions", "difficulty_index")
+    op.drop_column("questions", "score_sq_sum")
+    op.drop_column("questions", "score_sum")
+    op.drop_column("questions", "correct_count")
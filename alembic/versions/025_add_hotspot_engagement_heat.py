@@ -0,0 +1,37 @@
+"""Add hotspot engagement heat
+
+Revision ID: 025_add_hotspot_engagement_heat
+Revises: 024_add_question_running_statistics
+Create Date: 2025-04-21 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "025_add_hotspot_engagement_heat"
+down_revision = "024_add_question_running_statistics"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add the decayed engagement accumulator to hotspot resources."""
+    op.add_column(
+        "hotspot_resources",
+        sa.Column(
+            "engagement_heat",
+            sa.Float(),
+            server_default="0",
+            nullable=False,
+            comment="热度累计值（随时间衰减，不封顶）",
+        ),
+    )
+    # 以当前热度分数作为累计值的起点
+    op.execute("UPDATE hotspot_resources SET engagement_heat = popularity_score")
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop the engagement accumulator."""
+    op.drop_column("hotspot_resources", "engagement_heat")
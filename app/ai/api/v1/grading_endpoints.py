@@ -9,9 +9,11 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.ai.schemas.grading_schemas import (
+    BatchGradingRequest,
     GradingRequest,
     GradingResponse,
     StreamingGradingRequest,
@@ -19,8 +21,10 @@
 )
 from app.ai.utils.cet4_standards import CET4Standards
 from app.ai.utils.streaming_utils import StreamingGradingUtils
+from app.core.config import settings
 from app.core.database import get_db
 from app.shared.models.enums import QuestionType
+from app.shared.utils.priority_scheduler import TaskCategory
 from app.training.models.training_models import Question
 from app.training.services.grading_service import IntelligentGradingService
 from app.users.models.user_models import User
@@ -29,6 +33,14 @@
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/grading", tags=["智能批改"])
 
+# 批量批改优先级到AI调用准入类别的映射
+BATCH_PRIORITY_CATEGORIES: dict[str, TaskCategory] = {
+    "low": TaskCategory.BACKGROUND,
+    "normal": TaskCategory.BATCH,
+    "high": TaskCategory.INTERACTIVE,
+    "urgent": TaskCategory.INTERACTIVE,
+}
+
 
 # ==================== 流式批改端点 ====================
 
@@ -218,6 +230,87 @@ async def grade_answer(
         ) from e
 
 
+@router.post(
+    "/grade/batch/stream",
+    summary="整卷批量批改",
+    description="整卷或全班答卷批量批改，客观题即时评分，主观题并发AI批改，按完成顺序流式返回",
+)
+async def stream_batch_grading(
+    request: BatchGradingRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> StreamingResponse:
+    """整卷批量批改 - 流式返回每道题的批改结果."""
+    if len(request.grading_requests) > settings.GRADING_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"单次批量批改最多 {settings.GRADING_BATCH_MAX_ITEMS} 道题，请分批提交",
+        )
+
+    question_ids = {item.question_id for item in request.grading_requests}
+    result = await db.execute(select(Question).where(Question.id.in_(question_ids)))
+    questions = {question.id: question for question in result.scalars().all()}
+
+    missing_ids = question_ids - questions.keys()
+    if missing_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"题目不存在: {sorted(missing_ids)}",
+        )
+
+    grading_service = IntelligentGradingService(db)
+    items = [
+        (questions[item.question_id], item.user_answer)
+        for item in request.grading_requests
+    ]
+
+    async def generate_batch_response() -> AsyncGenerator[str, None]:
+        """生成批量批改响应."""
+        start_time = time.time()
+        graded_count = 0
+        try:
+            async for index, grading_result in grading_service.grade_submission_batch(
+                items, category=BATCH_PRIORITY_CATEGORIES[request.priority]
+            ):
+                graded_count += 1
+                chunk = {
+                    "type": "result",
+                    "index": index,
+                    "question_id": request.grading_requests[index].question_id,
+                    "grading_result": grading_result.model_dump(mode="json"),
+                    "progress": graded_count / len(items),
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+        except Exception as e:
+            logger.error(f"批量批改过程出错: {str(e)}")
+            error_chunk = {
+                "type": "error",
+                "error": str(e),
+                "message": "批量批改过程中出现错误",
+                "timestamp": time.time(),
+            }
+            yield f"data: {json.dumps(error_chunk, ensure_ascii=False)}\n\n"
+        finally:
+            end_chunk = {
+                "type": "end",
+                "total_count": len(items),
+                "graded_count": graded_count,
+                "processing_time": time.time() - start_time,
+            }
+            yield f"data: {json.dumps(end_chunk, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        generate_batch_response(),
+        media_type="text/plain",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 # ==================== 四级标准查询端点 ====================
 
 
@@ -3,7 +3,17 @@
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import JSON, Boolean, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.shared.models.base_model import BaseModel
@@ -373,6 +383,42 @@ class APIKeyUsage(BaseModel):
     )
 
 
+class AITokenUsageRollup(BaseModel):
+    """AI token用量小时汇总模型 - 由Redis计数器定期落库."""
+
+    __tablename__ = "ai_token_usage_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "bucket_start",
+            "scope_type",
+            "scope_value",
+            "model_name",
+            name="uq_ai_token_usage_rollup",
+        ),
+    )
+
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True, comment="小时桶起始时间"
+    )
+    scope_type: Mapped[str] = mapped_column(
+        String(20), nullable=False, comment="统计维度（global/user/course/feature/api_key）"
+    )
+    scope_value: Mapped[str] = mapped_column(
+        String(100), nullable=False, comment="维度取值"
+    )
+    model_name: Mapped[str] = mapped_column(String(50), nullable=False, comment="模型名称")
+    request_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="请求数"
+    )
+    prompt_tokens: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="输入token数"
+    )
+    completion_tokens: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="输出token数"
+    )
+    cost: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, comment="成本(USD)")
+
+
 class CostOptimizationLog(BaseModel):
     """成本优化日志模型."""
 
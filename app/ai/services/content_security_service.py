@@ -2,12 +2,24 @@
 
 import logging
 import re
+import threading
+from collections import Counter
+from collections.abc import Iterable, Mapping
 from datetime import datetime
 from enum import Enum
 from typing import Any
 
+from app.ai.utils.sensitive_matcher import SensitiveWordMatcher
+
 logger = logging.getLogger(__name__)
 
+# 白名单词在自动机中的分类标记，白名单命中覆盖的敏感词命中不计入
+WHITELIST_CATEGORY = "whitelist"
+
+# 不当内容模式（合并为一个正则，单次扫描）
+INAPPROPRIATE_PATTERNS = [r"作弊", r"抄袭", r"代写", r"答案泄露", r"考试泄题"]
+INAPPROPRIATE_REGEX = re.compile("|".join(INAPPROPRIATE_PATTERNS), re.IGNORECASE)
+
 
 class ContentType(Enum):
     """内容类型"""
@@ -33,17 +45,57 @@ class ContentSecurityService:
     def __init__(self) -> None:
         self.logger = logging.getLogger(__name__)
 
-        # 敏感词库
-        self.sensitive_words: set[str] = set()
+        # 敏感词库（词 -> 分类）和白名单
+        self.sensitive_words: dict[str, str] = {}
         self.whitelist_words: set[str] = set()
 
+        # 编译后的匹配器 - 词库变更时整体重建后替换引用，检查时无需加锁
+        self._matcher = SensitiveWordMatcher({})
+        self._rebuild_lock = threading.Lock()
+
         # 安全策略
         self.security_policies: dict[str, Any] = {}
 
         # 初始化
         self._load_sensitive_words()
+        self._rebuild_matcher()
         self._initialize_default_policies()
 
+    def update_sensitive_words(
+        self, words: Mapping[str, str] | Iterable[str], category: str = "custom"
+    ) -> None:
+        """新增或更新敏感词（可传 词->分类 映射，或使用统一分类的词列表）"""
+        if isinstance(words, Mapping):
+            new_words = dict(words)
+        else:
+            new_words = dict.fromkeys(words, category)
+        with self._rebuild_lock:
+            self.sensitive_words = {**self.sensitive_words, **new_words}
+            self._rebuild_matcher()
+
+    def remove_sensitive_words(self, words: Iterable[str]) -> None:
+        """删除敏感词"""
+        removed = set(words)
+        with self._rebuild_lock:
+            self.sensitive_words = {
+                word: category
+                for word, category in self.sensitive_words.items()
+                if word not in removed
+            }
+            self._rebuild_matcher()
+
+    def update_whitelist_words(self, words: Iterable[str]) -> None:
+        """新增白名单词"""
+        with self._rebuild_lock:
+            self.whitelist_words = self.whitelist_words | set(words)
+            self._rebuild_matcher()
+
+    def _rebuild_matcher(self) -> None:
+        """根据当前词库构建新的匹配器并原子替换"""
+        patterns = dict.fromkeys(self.whitelist_words, WHITELIST_CATEGORY)
+        patterns.update(self.sensitive_words)
+        self._matcher = SensitiveWordMatcher(patterns)
+
     async def check_content_security(
         self,
         content: str,
@@ -116,21 +168,42 @@ async def check_content_security(
             }
 
     def _check_sensitive_words(self, content: str) -> dict[str, Any]:
-        """检查敏感词"""
-        violations = []
-        risk_score = 0.0
-        matched_words = []
+        """检查敏感词 - 自动机单次扫描，忽略全角/大小写差异"""
+        hits = self._matcher.find_all(content)
+
+        # 白名单命中覆盖范围内的敏感词不计入
+        allowed_spans = [
+            (hit.start, hit.end) for hit in hits if hit.category == WHITELIST_CATEGORY
+        ]
+        matches = [
+            hit
+            for hit in hits
+            if hit.category != WHITELIST_CATEGORY
+            and not any(
+                start <= hit.start and hit.end <= end for start, end in allowed_spans
+            )
+        ]
 
-        for word in self.sensitive_words:
-            if word in content.lower():
-                matched_words.append(word)
-                violations.append(f"sensitive_word: {word}")
-                risk_score += 20.0  # 每个敏感词增加20分风险
+        matched_words = list(dict.fromkeys(hit.word for hit in matches))
+        violations = [f"sensitive_word: {word}" for word in matched_words]
+        risk_score = 20.0 * len(matched_words)  # 每个敏感词增加20分风险
 
         return {
             "violations": violations,
             "risk_score": min(risk_score, 80.0),  # 敏感词最多80分
-            "details": {"matched_words": matched_words},
+            "details": {
+                "matched_words": matched_words,
+                "matches": [
+                    {
+                        "word": hit.word,
+                        "category": hit.category,
+                        "start": hit.start,
+                        "end": hit.end,
+                    }
+                    for hit in matches
+                ],
+                "categories": dict(Counter(hit.category for hit in matches)),
+            },
         }
 
     def _check_content_quality(
@@ -202,14 +275,13 @@ def _check_educational_appropriateness(
         details = {}
 
         # 不当内容模式检查
-        inappropriate_patterns = [r"作弊", r"抄袭", r"代写", r"答案泄露", r"考试泄题"]
-
-        matched_patterns = []
-        for pattern in inappropriate_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                matched_patterns.append(pattern)
-                violations.append(f"inappropriate_content: {pattern}")
-                risk_score += 15.0
+        found = {match.group() for match in INAPPROPRIATE_REGEX.finditer(content)}
+        matched_patterns = [
+            pattern for pattern in INAPPROPRIATE_PATTERNS if pattern in found
+        ]
+        for pattern in matched_patterns:
+            violations.append(f"inappropriate_content: {pattern}")
+            risk_score += 15.0
 
         details["inappropriate_patterns"] = matched_patterns
 
@@ -257,24 +329,24 @@ def _determine_security_level(
 
     def _load_sensitive_words(self) -> None:
         """加载敏感词库"""
-        # 基础敏感词库
+        # 基础敏感词库（词 -> 分类）
         basic_sensitive_words = {
             # 政治敏感词
-            "政治敏感",
-            "政府机密",
-            "国家机密",
+            "政治敏感": "political",
+            "政府机密": "political",
+            "国家机密": "political",
             # 暴力词汇
-            "暴力行为",
-            "恐怖主义",
-            "极端主义",
+            "暴力行为": "violence",
+            "恐怖主义": "violence",
+            "极端主义": "violence",
             # 不当语言
-            "恶意攻击",
-            "人身攻击",
-            "网络暴力",
+            "恶意攻击": "abuse",
+            "人身攻击": "abuse",
+            "网络暴力": "abuse",
             # 教育不当
-            "考试作弊",
-            "学术造假",
-            "论文代写",
+            "考试作弊": "academic_misconduct",
+            "学术造假": "academic_misconduct",
+            "论文代写": "academic_misconduct",
         }
 
         self.sensitive_words.update(basic_sensitive_words)
@@ -318,6 +390,12 @@ def _initialize_default_policies(self) -> None:
         }
 
 
+_content_security_service: ContentSecurityService | None = None
+
+
 def get_content_security_service() -> ContentSecurityService:
-    """获取内容安全服务实例"""
-    return ContentSecurityService()
+    """获取内容安全服务实例（进程内共享，匹配器只构建一次）"""
+    global _content_security_service
+    if _content_security_service is None:
+        _content_security_service = ContentSecurityService()
+    return _content_security_service
@@ -18,6 +18,11 @@
 from loguru import logger
 from pydantic import BaseModel, Field
 
+from app.ai.services.token_metering_service import (
+    BudgetReservation,
+    UsageScope,
+    get_token_metering_service,
+)
 from app.core.exceptions import BusinessLogicError
 
 
@@ -215,6 +220,8 @@ async def _generate_content(
         """
         调用DeepSeek API生成内容
 
+        调用前预占token预算，成功时按真实用量结算，失败时归还预占。
+
         Args:
             prompt: 提示词
             max_tokens: 最大token数
@@ -222,7 +229,27 @@ async def _generate_content(
 
         Returns:
             ContentGenerationResponse: 生成响应
+
+        Raises:
+            BudgetExceededError: 内容生成的token预算不足
         """
+        meter = get_token_metering_service()
+        reservation = await meter.reserve(
+            UsageScope(feature="content_generation"), prompt, max_tokens, "deepseek-chat"
+        )
+        try:
+            return await self._request_content(prompt, max_tokens, temperature, reservation)
+        finally:
+            await meter.release(reservation)
+
+    async def _request_content(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        reservation: BudgetReservation,
+    ) -> ContentGenerationResponse | None:
+        """带重试和密钥轮换的API请求"""
         start_time = time.time()
 
         for attempt in range(self.max_retries):
@@ -258,6 +285,9 @@ async def _generate_content(
                             result = await response.json()
                             content = result["choices"][0]["message"]["content"]
                             usage = result.get("usage", {})
+                            await get_token_metering_service().settle(
+                                reservation, usage, api_key
+                            )
 
                             generation_time = time.time() - start_time
 
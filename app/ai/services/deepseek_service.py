@@ -9,9 +9,21 @@
 import aiohttp
 
 from app.ai.models.ai_models import AITaskLog
+from app.ai.services.fallback_service import get_circuit_breaker, get_fallback_service
+from app.ai.services.token_metering_service import (
+    BudgetExceededError,
+    BudgetReservation,
+    UsageScope,
+    get_token_metering_service,
+)
 from app.ai.utils.api_key_pool import APICallManager, get_api_stats, get_deepseek_pool
 from app.core.config import settings
 from app.core.database import get_db
+from app.shared.utils.priority_scheduler import (
+    AdmissionRejectedError,
+    TaskCategory,
+    get_admission_controller,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -60,16 +72,27 @@ async def generate_completion(
         max_tokens: int | None = None,
         user_id: int | None = None,
         task_type: str = "completion",
+        use_cache: bool | None = None,
+        category: TaskCategory = TaskCategory.INTERACTIVE,
+        course_id: int | None = None,
         **kwargs: Any,
     ) -> tuple[bool, dict[str, Any] | None, str | None]:
-        """生成AI补全."""
+        """生成AI补全.
+
+        相同提示词和生成参数的成功响应会被缓存（进程内+Redis）；use_cache 未指定时
+        只缓存温度不高于 AI_RESPONSE_CACHE_MAX_TEMPERATURE 的低温调用（批改、分析等），
+        采样生成（出题、作文点评等）每次都调用上游。
+        服务熔断期间不等待上游超时，由降级服务返回相同请求缓存过的响应，未命中时返回失败。
+        上游调用经过准入控制：category 决定排队优先级和最长等待，
+        批处理和后台调用不会占满并发槽位，超过截止时间的请求直接返回失败。
+        未命中缓存的调用先按用户、课程、功能（task_type）检查并预占token预算，
+        响应返回后按真实用量结算。
+        """
         start_time = time.time()
+        meter = get_token_metering_service()
+        reservation: BudgetReservation | None = None
 
         try:
-            # 获取密钥池和调用管理器
-            key_pool = await get_deepseek_pool()
-            call_manager = APICallManager(key_pool)
-
             # 准备请求参数
             request_params = self._prepare_request_params(
                 prompt=prompt,
@@ -79,16 +102,80 @@ async def generate_completion(
                 **kwargs,
             )
 
-            # 执行API调用
-            success, result, error_msg = await call_manager.execute_with_retry(
-                self._make_api_call,
-                request_params=request_params,
-                max_retries=3,
-            )
+            if use_cache is None:
+                use_cache = (
+                    request_params["temperature"] <= settings.AI_RESPONSE_CACHE_MAX_TEMPERATURE
+                )
+
+            # 查询响应缓存
+            fallback_service = get_fallback_service()
+            cache_request = {
+                "task_type": task_type,
+                "prompt": prompt,
+                "model_type": request_params["model"],
+                "parameters": {
+                    key: value
+                    for key, value in request_params.items()
+                    if key not in ("model", "messages")
+                },
+            }
+            if use_cache:
+                cached_response = await fallback_service.get_cached_response(cache_request)
+                if cached_response is not None:
+                    return True, cached_response, None
+
+            # 调用前检查并预占预算
+            try:
+                reservation = await meter.reserve(
+                    UsageScope(feature=task_type, user_id=user_id, course_id=course_id),
+                    prompt,
+                    request_params["max_tokens"],
+                    request_params["model"],
+                )
+            except BudgetExceededError as e:
+                logger.warning(f"AI调用超出预算: {e}")
+                return False, None, "AI调用额度已用完，请稍后再试"
+
+            try:
+                async with get_admission_controller().admit(category):
+                    # 熔断期间不调用上游，改用降级响应
+                    breaker = get_circuit_breaker("deepseek")
+                    if not breaker.allow_request():
+                        fallback = await fallback_service.get_fallback_response(cache_request)
+                        if fallback is not None:
+                            return True, fallback, None
+                        return False, None, "DeepSeek服务暂时不可用（已熔断），请稍后重试"
+
+                    try:
+                        # 获取密钥池和调用管理器
+                        key_pool = await get_deepseek_pool()
+                        call_manager = APICallManager(key_pool)
+
+                        # 执行API调用
+                        success, result, error_msg = await call_manager.execute_with_retry(
+                            self._make_api_call,
+                            request_params=request_params,
+                            reservation=reservation,
+                            max_retries=3,
+                        )
+                    except Exception:
+                        breaker.record_failure()
+                        raise
+            except AdmissionRejectedError as e:
+                logger.warning(f"AI调用被准入控制拒绝: {e}")
+                return False, None, "AI服务繁忙，请稍后重试"
 
             # 计算执行时间
             execution_time_ms = int((time.time() - start_time) * 1000)
 
+            # 更新熔断器并缓存成功响应
+            if success and result:
+                breaker.record_success()
+                if use_cache:
+                    await fallback_service.update_cache(cache_request, result)
+            else:
+                breaker.record_failure()
+
             # 记录统计
             tokens_used = 0
             if success and result:
@@ -119,6 +206,11 @@ async def generate_completion(
             logger.error(f"DeepSeek API调用失败: {str(e)}")
             return False, None, str(e)
 
+        finally:
+            # 未产生用量的调用（拒绝、熔断、失败）归还预占
+            if reservation is not None:
+                await meter.release(reservation)
+
     async def stream_completion(
         self,
         prompt: str,
@@ -129,7 +221,12 @@ async def stream_completion(
         task_type: str = "streaming",
         **kwargs: Any,
     ) -> AsyncGenerator[str, None]:
-        """流式生成AI补全."""
+        """流式生成AI补全.
+
+        请求上游在最后一个数据块中返回用量（stream_options.include_usage），用于结算预算预占。
+        """
+        meter = get_token_metering_service()
+        reservation: BudgetReservation | None = None
         try:
             # 获取密钥池
             key_pool = await get_deepseek_pool()
@@ -146,48 +243,68 @@ async def stream_completion(
                 temperature=temperature,
                 max_tokens=max_tokens,
                 stream=True,  # 启用流式输出
+                stream_options={"include_usage": True},
                 **kwargs,
             )
 
+            reservation = await meter.reserve(
+                UsageScope(feature=task_type, user_id=user_id),
+                prompt,
+                request_params["max_tokens"],
+                request_params["model"],
+            )
+
             # 构建请求头
             headers = {
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json",
             }
 
-            # 流式API调用
+            # 流式API调用，生成期间占用一个交互类别的准入槽位
             timeout = aiohttp.ClientTimeout(total=self.timeout)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=request_params,
-                ) as response:
-                    if response.status == 200:
-                        async for line in response.content:
-                            line_text = line.decode("utf-8").strip()
-                            if line_text.startswith("data: "):
-                                data_text = line_text[6:]  # 移除 'data: ' 前缀
-                                if data_text == "[DONE]":
-                                    break
-                                try:
-                                    data = json.loads(data_text)
-                                    if "choices" in data and len(data["choices"]) > 0:
-                                        delta = data["choices"][0].get("delta", {})
-                                        content = delta.get("content", "")
-                                        if content:
-                                            yield content
-                                except json.JSONDecodeError:
-                                    continue
-                    else:
-                        error_text = await response.text()
-                        yield f"[API错误: {response.status} - {error_text}]"
-
+            usage = None
+            async with get_admission_controller().admit(TaskCategory.INTERACTIVE):
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with session.post(
+                        f"{self.base_url}/chat/completions",
+                        headers=headers,
+                        json=request_params,
+                    ) as response:
+                        if response.status == 200:
+                            async for line in response.content:
+                                line_text = line.decode("utf-8").strip()
+                                if line_text.startswith("data: "):
+                                    data_text = line_text[6:]  # 移除 'data: ' 前缀
+                                    if data_text == "[DONE]":
+                                        break
+                                    try:
+                                        data = json.loads(data_text)
+                                        usage = data.get("usage") or usage
+                                        if "choices" in data and len(data["choices"]) > 0:
+                                            delta = data["choices"][0].get("delta", {})
+                                            content = delta.get("content", "")
+                                            if content:
+                                                yield content
+                                    except json.JSONDecodeError:
+                                        continue
+                        else:
+                            error_text = await response.text()
+                            yield f"[API错误: {response.status} - {error_text}]"
+
+            await meter.settle(reservation, usage, api_key)
+
+        except BudgetExceededError:
+            yield "[错误: AI调用额度已用完，请稍后再试]"
+        except AdmissionRejectedError:
+            yield "[错误: AI服务繁忙，请稍后重试]"
         except TimeoutError:
             yield "[错误: 请求超时]"
         except Exception as e:
             logger.error(f"流式API调用失败: {str(e)}")
             yield f"[错误: {str(e)}]"
+        finally:
+            if reservation is not None:
+                await meter.release(reservation)
 
     def _prepare_request_params(
         self,
@@ -220,9 +337,12 @@ def _prepare_request_params(
         return params
 
     async def _make_api_call(
-        self, api_key: str, request_params: dict[str, Any]
+        self,
+        api_key: str,
+        request_params: dict[str, Any],
+        reservation: BudgetReservation | None = None,
     ) -> dict[str, Any]:
-        """执行单次API调用."""
+        """执行单次API调用，成功时按响应中的真实用量结算预算预占."""
         headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
@@ -241,6 +361,10 @@ async def _make_api_call(
                     response_data = await response.json()
 
                     if response.status == 200:
+                        if reservation is not None:
+                            await get_token_metering_service().settle(
+                                reservation, response_data.get("usage"), api_key
+                            )
                         return response_data  # type: ignore[no-any-return]
                     else:
                         error_msg = response_data.get("error", {}).get(
@@ -370,6 +494,7 @@ async def get_api_status(self) -> dict[str, Any]:
                 prompt="Hello, this is a connectivity test.",
                 max_tokens=10,
                 temperature=0.1,
+                use_cache=False,
             )
 
             return {
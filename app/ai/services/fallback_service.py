@@ -1,16 +1,52 @@
 """降级服务 - AI服务故障时的降级处理."""
 
+import hashlib
+import json
 import logging
+import time
+import unicodedata
 from datetime import datetime
 from enum import Enum
 from typing import Any
 
+import redis.asyncio as redis
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.ai.models.ai_models import FallbackLog
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.shared.services.cache_service import LRUCache
 
 logger = logging.getLogger(__name__)
 
+RESPONSE_CACHE_PREFIX = "ai:response:"
+
+# 进程内共享的响应缓存（有界LRU，一级），Redis为跨进程共享的二级缓存
+_response_cache = LRUCache(max_size=settings.AI_RESPONSE_CACHE_SIZE)
+
+
+def canonicalize_prompt(prompt: str) -> str:
+    """规范化提示词 - 统一Unicode形式和换行，去掉行尾空白，不截断."""
+    text = unicodedata.normalize("NFC", prompt).replace("\r\n", "\n")
+    return "\n".join(line.rstrip() for line in text.strip().split("\n"))
+
+
+def build_response_cache_key(request: dict[str, Any]) -> str:
+    """根据任务类型、完整提示词、模型和生成参数构建缓存键."""
+    payload = json.dumps(
+        {
+            "task_type": request.get("task_type", ""),
+            "prompt": canonicalize_prompt(str(request.get("prompt", ""))),
+            "model": request.get("model_type") or "",
+            "parameters": request.get("parameters") or {},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
 
 class FallbackLevel(Enum):
     """降级级别"""
@@ -33,13 +69,106 @@ class FallbackReason(Enum):
     COST_LIMIT = "cost_limit"
 
 
+class CircuitState(Enum):
+    """熔断器状态"""
+
+    CLOSED = "closed"  # 正常放行
+    OPEN = "open"  # 熔断，直接降级
+    HALF_OPEN = "half_open"  # 试探恢复，只放行一个请求
+
+
+class CircuitBreaker:
+    """按服务提供方的熔断器 - 连续失败达到阈值后熔断，冷却后放行一个试探请求"""
+
+    def __init__(
+        self,
+        provider: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+    ) -> None:
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        """是否放行请求 - 熔断期间立即返回False，不等待上游超时"""
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._probe_in_flight = False
+        # 试探请求未返回（如被取消）超过冷却时间时允许再次试探
+        if (
+            self._probe_in_flight
+            and time.monotonic() - self.probe_started_at < self.recovery_timeout
+        ):
+            return False
+        self._probe_in_flight = True
+        self.probe_started_at = time.monotonic()
+        return True
+
+    def record_success(self) -> None:
+        """记录成功调用"""
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"熔断器恢复: {self.provider}")
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """记录失败调用"""
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if (
+            self.state == CircuitState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != CircuitState.OPEN:
+                logger.warning(
+                    f"熔断器打开: {self.provider}, 连续失败{self.consecutive_failures}次"
+                )
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    def get_status(self) -> dict[str, Any]:
+        """获取熔断器状态"""
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+_circuit_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """获取服务提供方的熔断器（进程内共享）"""
+    breaker = _circuit_breakers.get(provider)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            provider,
+            failure_threshold=settings.AI_CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=settings.AI_CIRCUIT_RECOVERY_SECONDS,
+        )
+        _circuit_breakers[provider] = breaker
+    return breaker
+
+
 class FallbackService:
     """降级服务"""
 
-    def __init__(self) -> None:
+    def __init__(self, redis_client: redis.Redis | None = None) -> None:
         self.logger = logging.getLogger(__name__)
         self.current_level = FallbackLevel.LEVEL_0
-        self.fallback_cache: dict[str, Any] = {}
+        self.fallback_cache = _response_cache
+        self._redis = redis_client
 
         # 预设响应模板
         self.preset_responses = {
@@ -65,6 +194,24 @@ def __init__(self) -> None:
             },
         }
 
+    @property
+    def redis(self) -> redis.Redis:
+        """Redis客户端（二级缓存），首次使用时创建"""
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    async def get_fallback_response(self, request: dict[str, Any]) -> dict[str, Any] | None:
+        """服务不可用时的降级响应 - 返回相同请求缓存过的响应，未命中时返回None
+
+        调用方未启用缓存时也读取：熔断期间，之前的响应好过直接失败。
+        """
+        cached_response = await self.get_cached_response(request)
+        if cached_response is None:
+            return None
+        self.logger.info(f"服务不可用，返回缓存的响应: {request.get('task_type', 'unknown')}")
+        return {**cached_response, "is_fallback": True}
+
     async def handle_fallback(
         self,
         db: AsyncSession,
@@ -142,21 +289,33 @@ async def _execute_fallback(
 
     async def _get_cached_response(self, request: dict[str, Any]) -> dict[str, Any]:
         """从缓存获取响应"""
+        cached_response = await self.get_cached_response(request)
+        if cached_response is not None:
+            return cached_response
+
+        # 缓存未命中，返回简化响应
+        return self._get_simplified_response(request.get("task_type", "unknown"))
+
+    async def get_cached_response(self, request: dict[str, Any]) -> dict[str, Any] | None:
+        """查询响应缓存 - 先查进程内缓存，未命中再查Redis并回填"""
         cache_key = self._generate_cache_key(request)
 
-        if cache_key in self.fallback_cache:
-            cached_response = self.fallback_cache[cache_key]
-            if isinstance(cached_response, dict):
-                cached_response["from_cache"] = True
-                return cached_response
-            else:
-                # 缓存数据格式错误，返回简化响应
-                return self._get_simplified_response(
-                    request.get("task_type", "unknown")
-                )
-        else:
-            # 缓存未命中，返回简化响应
-            return self._get_simplified_response(request.get("task_type", "unknown"))
+        cached_response = self.fallback_cache.get(cache_key)
+        if cached_response is None:
+            try:
+                raw = await self.redis.get(RESPONSE_CACHE_PREFIX + cache_key)
+            except RedisError as e:
+                self.logger.warning(f"读取Redis响应缓存失败: {e}")
+                raw = None
+            if raw is None:
+                return None
+            cached_response = json.loads(raw)
+            self.fallback_cache.set(cache_key, cached_response, ttl=settings.AI_RESPONSE_CACHE_TTL)
+
+        if not isinstance(cached_response, dict):
+            return None
+        # 返回副本，调用方修改不影响缓存
+        return {**cached_response, "from_cache": True}
 
     def _get_simplified_response(self, task_type: str) -> dict[str, Any]:
         """获取简化响应"""
@@ -179,17 +338,7 @@ def _get_preset_response(self, task_type: str) -> dict[str, Any]:
 
     def _generate_cache_key(self, request: dict[str, Any]) -> str:
         """生成缓存键"""
-        import hashlib
-
-        # 使用请求的关键参数生成缓存键
-        key_parts = [
-            request.get("task_type", ""),
-            str(request.get("prompt", ""))[:100],  # 只取前100个字符
-            request.get("model_type", ""),
-        ]
-
-        key_string = "|".join(key_parts)
-        return hashlib.md5(key_string.encode()).hexdigest()
+        return build_response_cache_key(request)
 
     async def _log_fallback(
         self,
@@ -214,23 +363,17 @@ async def _log_fallback(
             self.logger.error(f"记录降级日志失败: {e}")
             await db.rollback()
 
-    def update_cache(self, request: dict[str, Any], response: dict[str, Any]) -> None:
-        """更新降级缓存"""
+    async def update_cache(self, request: dict[str, Any], response: dict[str, Any]) -> None:
+        """更新降级缓存 - 写入进程内缓存和Redis（LRU淘汰，O(1)）"""
         try:
             cache_key = self._generate_cache_key(request)
-            self.fallback_cache[cache_key] = {
-                **response,
-                "cached_at": datetime.now().isoformat(),
-            }
-
-            # 限制缓存大小
-            if len(self.fallback_cache) > 1000:
-                # 删除最旧的缓存项
-                oldest_key = min(
-                    self.fallback_cache.keys(),
-                    key=lambda k: self.fallback_cache[k].get("cached_at", ""),
-                )
-                del self.fallback_cache[oldest_key]
+            entry = {**response, "cached_at": datetime.now().isoformat()}
+            self.fallback_cache.set(cache_key, entry, ttl=settings.AI_RESPONSE_CACHE_TTL)
+            await self.redis.set(
+                RESPONSE_CACHE_PREFIX + cache_key,
+                json.dumps(entry, ensure_ascii=False, default=str),
+                ex=settings.AI_RESPONSE_CACHE_TTL,
+            )
 
         except Exception as e:
             self.logger.error(f"更新降级缓存失败: {e}")
@@ -239,13 +382,23 @@ def get_service_status(self) -> dict[str, Any]:
         """获取服务状态"""
         return {
             "current_level": self.current_level.value,
-            "cache_size": len(self.fallback_cache),
+            "cache_size": len(self.fallback_cache.cache),
+            "circuit_breakers": {
+                provider: breaker.get_status()
+                for provider, breaker in _circuit_breakers.items()
+            },
             "status": (
                 "degraded" if self.current_level != FallbackLevel.LEVEL_0 else "normal"
             ),
         }
 
 
+_fallback_service: FallbackService | None = None
+
+
 def get_fallback_service() -> FallbackService:
     """获取降级服务实例"""
-    return FallbackService()
+    global _fallback_service
+    if _fallback_service is None:
+        _fallback_service = FallbackService()
+    return _fallback_service
@@ -0,0 +1,427 @@
+"""AI token用量计量与预算服务.
+
+- 调用前按 提示词估算token + max_tokens 在Redis中原子预占预算：
+  用户/课程/功能的每日token额度，全局的每日/每小时成本上限
+- 调用后用响应中的真实用量结算预占，并累加到按小时分桶的用量计数器
+  （全局、用户、课程、功能、API密钥指纹 五个维度）
+- 定时任务把已结束的小时桶汇总落库（ai_token_usage_rollups）
+
+预算计数键按天/小时过期，进程在预占后崩溃时未结算的预占量最多保留到当期结束。
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from redis.exceptions import RedisError
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai.models.ai_models import AITokenUsageRollup
+from app.ai.utils.cost_calculator import CostCalculator, get_cost_calculator
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.shared.models.enums import AIModelType
+
+logger = logging.getLogger(__name__)
+
+SCOPE_GLOBAL = "global"
+SCOPE_USER = "user"
+SCOPE_COURSE = "course"
+SCOPE_FEATURE = "feature"
+SCOPE_API_KEY = "api_key"
+
+BUDGET_KEY_PREFIX = "ai_budget"
+USAGE_KEY_PREFIX = "ai_usage"
+PENDING_BUCKETS_KEY = "ai_usage:pending"
+USAGE_KEY_TTL = 7 * 24 * 3600  # 未能及时落库的小时桶最多保留7天
+
+COST_SCALE = 1_000_000  # 成本按微美元整数计数，避免浮点累加误差
+USAGE_METRICS = ("requests", "prompt_tokens", "completion_tokens", "cost")
+
+# 预算预占：任一预算键超额则整体拒绝，否则全部预占
+# KEYS: 预算计数键；ARGV[1]: 过期秒数，之后每个键依次为 额度、预占量
+RESERVE_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[2 * i])
+    local amount = tonumber(ARGV[2 * i + 1])
+    local used = tonumber(redis.call('HGET', key, 'used') or '0')
+    local reserved = tonumber(redis.call('HGET', key, 'reserved') or '0')
+    if used + reserved + amount > limit then
+        return i
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('HINCRBY', key, 'reserved', ARGV[2 * i + 1])
+    redis.call('EXPIRE', key, ARGV[1])
+end
+return 0
+"""
+
+
+class BudgetExceededError(Exception):
+    """AI调用超出预算."""
+
+    def __init__(self, scope_type: str, scope_value: str, limit: int) -> None:
+        self.scope_type = scope_type
+        self.scope_value = scope_value
+        self.limit = limit
+        super().__init__(f"{scope_type}:{scope_value} 超出预算（额度 {limit}）")
+
+
+@dataclass
+class UsageScope:
+    """一次AI调用的计量维度."""
+
+    feature: str
+    user_id: int | None = None
+    course_id: int | None = None
+
+
+@dataclass
+class BudgetEntry:
+    """一个预算计数键上的预占."""
+
+    key: str
+    scope_type: str
+    scope_value: str
+    limit: int
+    amount: int
+    unit: str  # tokens 或 cost（微美元）
+
+
+@dataclass
+class BudgetReservation:
+    """调用前的预算预占，调用结束后结算或释放（只生效一次）."""
+
+    scope: UsageScope
+    model_name: str
+    model_type: AIModelType
+    estimated_prompt_tokens: int
+    entries: list[BudgetEntry] = field(default_factory=list)
+    settled: bool = False
+
+
+def api_key_fingerprint(api_key: str) -> str:
+    """API密钥指纹，计量中不保存明文密钥."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def parse_feature_budgets(raw: str) -> dict[str, int]:
+    """解析 "feature=limit,feature2=limit" 格式的功能预算配置."""
+    budgets: dict[str, int] = {}
+    for item in raw.split(","):
+        name, _, limit = item.partition("=")
+        if name.strip() and limit.strip():
+            try:
+                budgets[name.strip()] = int(limit)
+            except ValueError:
+                logger.warning(f"忽略无效的功能预算配置: {item}")
+    return budgets
+
+
+def hour_bucket(moment: datetime) -> str:
+    """小时桶标识（UTC）."""
+    return moment.strftime("%Y%m%d%H")
+
+
+class TokenMeteringService:
+    """AI token计量与预算服务."""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        cost_calculator: CostCalculator | None = None,
+    ) -> None:
+        self._redis = redis_client
+        self._reserve_script: Any = None
+        self.cost_calculator = cost_calculator or get_cost_calculator()
+        self.feature_budgets = parse_feature_budgets(settings.AI_FEATURE_DAILY_TOKEN_BUDGETS)
+
+    @property
+    def redis(self) -> Any:
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    def _model_type(self, model_name: str) -> AIModelType:
+        try:
+            return AIModelType(model_name)
+        except ValueError:
+            return AIModelType.DEEPSEEK_CHAT
+
+    def _budget_entries(
+        self, scope: UsageScope, tokens: int, cost: float, now: datetime
+    ) -> list[BudgetEntry]:
+        """按配置生成本次调用需要检查的预算，额度为0的维度不限制"""
+        day = now.strftime("%Y%m%d")
+        hour = hour_bucket(now)
+        cost_amount = int(cost * COST_SCALE)
+        candidates = [
+            (
+                f"{BUDGET_KEY_PREFIX}:day:{day}:{SCOPE_GLOBAL}:cost",
+                SCOPE_GLOBAL,
+                "day",
+                int(settings.AI_DAILY_COST_LIMIT * COST_SCALE),
+                cost_amount,
+                "cost",
+            ),
+            (
+                f"{BUDGET_KEY_PREFIX}:hour:{hour}:{SCOPE_GLOBAL}:cost",
+                SCOPE_GLOBAL,
+                "hour",
+                int(settings.AI_HOURLY_COST_LIMIT * COST_SCALE),
+                cost_amount,
+                "cost",
+            ),
+            (
+                f"{BUDGET_KEY_PREFIX}:day:{day}:{SCOPE_FEATURE}:{scope.feature}",
+                SCOPE_FEATURE,
+                scope.feature,
+                self.feature_budgets.get(scope.feature, 0),
+                tokens,
+                "tokens",
+            ),
+        ]
+        if scope.user_id is not None:
+            candidates.append(
+                (
+                    f"{BUDGET_KEY_PREFIX}:day:{day}:{SCOPE_USER}:{scope.user_id}",
+                    SCOPE_USER,
+                    str(scope.user_id),
+                    settings.AI_USER_DAILY_TOKEN_BUDGET,
+                    tokens,
+                    "tokens",
+                )
+            )
+        if scope.course_id is not None:
+            candidates.append(
+                (
+                    f"{BUDGET_KEY_PREFIX}:day:{day}:{SCOPE_COURSE}:{scope.course_id}",
+                    SCOPE_COURSE,
+                    str(scope.course_id),
+                    settings.AI_COURSE_DAILY_TOKEN_BUDGET,
+                    tokens,
+                    "tokens",
+                )
+            )
+
+        return [
+            BudgetEntry(key, scope_type, scope_value, limit, amount, unit)
+            for key, scope_type, scope_value, limit, amount, unit in candidates
+            if limit > 0
+        ]
+
+    async def reserve(
+        self, scope: UsageScope, prompt: str, max_tokens: int, model_name: str
+    ) -> BudgetReservation:
+        """调用前估算用量并预占预算
+
+        预占量按输出达到 max_tokens 的上限计算，结算时按真实用量修正。
+
+        Raises:
+            BudgetExceededError: 任一维度的预算不足
+        """
+        model_type = self._model_type(model_name)
+        prompt_tokens = self.cost_calculator.estimate_tokens(prompt, model_type)
+        cost = self.cost_calculator.calculate_cost(prompt_tokens, max_tokens, model_type)
+        entries = self._budget_entries(
+            scope, prompt_tokens + max_tokens, cost.total_cost, datetime.now(UTC)
+        )
+        reservation = BudgetReservation(scope, model_name, model_type, prompt_tokens)
+        if not entries:
+            return reservation
+
+        try:
+            if self._reserve_script is None:
+                self._reserve_script = self.redis.register_script(RESERVE_SCRIPT)
+            args: list[Any] = [2 * 24 * 3600]
+            for entry in entries:
+                args.extend([entry.limit, entry.amount])
+            exceeded = await self._reserve_script(
+                keys=[entry.key for entry in entries], args=args
+            )
+        except RedisError as e:
+            # 计量存储不可用时不阻断AI调用
+            logger.warning(f"预算检查不可用，跳过预占: {e}")
+            return reservation
+
+        if exceeded:
+            entry = entries[int(exceeded) - 1]
+            raise BudgetExceededError(entry.scope_type, entry.scope_value, entry.limit)
+
+        reservation.entries = entries
+        return reservation
+
+    async def settle(
+        self,
+        reservation: BudgetReservation,
+        usage: dict[str, Any] | None,
+        api_key: str | None = None,
+    ) -> None:
+        """用响应中的真实用量结算预占，并累加小时用量计数"""
+        if reservation.settled:
+            return
+        if not usage:
+            await self.release(reservation)
+            return
+        reservation.settled = True
+
+        prompt_tokens = int(usage.get("prompt_tokens", 0))
+        completion_tokens = int(usage.get("completion_tokens", 0))
+        self.cost_calculator.calibrate(
+            reservation.estimated_prompt_tokens, prompt_tokens, reservation.model_type
+        )
+        cost = self.cost_calculator.calculate_cost(
+            prompt_tokens, completion_tokens, reservation.model_type
+        )
+        cost_amount = int(cost.total_cost * COST_SCALE)
+        total_tokens = prompt_tokens + completion_tokens
+
+        scope = reservation.scope
+        dimensions = [(SCOPE_GLOBAL, "all"), (SCOPE_FEATURE, scope.feature)]
+        if scope.user_id is not None:
+            dimensions.append((SCOPE_USER, str(scope.user_id)))
+        if scope.course_id is not None:
+            dimensions.append((SCOPE_COURSE, str(scope.course_id)))
+        if api_key:
+            dimensions.append((SCOPE_API_KEY, api_key_fingerprint(api_key)))
+
+        bucket = hour_bucket(datetime.now(UTC))
+        usage_key = f"{USAGE_KEY_PREFIX}:{bucket}"
+        values = {
+            "requests": 1,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost": cost_amount,
+        }
+
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for entry in reservation.entries:
+                    actual = cost_amount if entry.unit == "cost" else total_tokens
+                    pipe.hincrby(entry.key, "reserved", -entry.amount)
+                    pipe.hincrby(entry.key, "used", actual)
+                for scope_type, scope_value in dimensions:
+                    prefix = f"{scope_type}|{scope_value}|{reservation.model_name}"
+                    for metric, value in values.items():
+                        pipe.hincrby(usage_key, f"{prefix}|{metric}", value)
+                pipe.expire(usage_key, USAGE_KEY_TTL)
+                pipe.sadd(PENDING_BUCKETS_KEY, bucket)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"记录AI用量失败: {e}")
+
+    async def release(self, reservation: BudgetReservation) -> None:
+        """调用未产生用量（失败、被拒绝）时释放预占"""
+        if reservation.settled:
+            return
+        reservation.settled = True
+        if not reservation.entries:
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for entry in reservation.entries:
+                    pipe.hincrby(entry.key, "reserved", -entry.amount)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"释放AI预算预占失败，等待计数过期: {e}")
+
+    async def get_budget_status(self, scope: UsageScope) -> list[dict[str, Any]]:
+        """查询当前各维度预算的已用量与预占量"""
+        entries = self._budget_entries(scope, 0, 0.0, datetime.now(UTC))
+        if not entries:
+            return []
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for entry in entries:
+                pipe.hgetall(entry.key)
+            results = await pipe.execute()
+
+        return [
+            {
+                "scope_type": entry.scope_type,
+                "scope_value": entry.scope_value,
+                "unit": entry.unit,
+                "limit": entry.limit,
+                "used": int(counters.get("used", 0)),
+                "reserved": int(counters.get("reserved", 0)),
+            }
+            for entry, counters in zip(entries, results, strict=True)
+        ]
+
+    async def rollup(self, db: AsyncSession, now: datetime | None = None) -> dict[str, int]:
+        """把已结束的小时用量桶汇总落库
+
+        按小时桶整体替换写入，落库后再删除Redis计数，重复执行结果不变。
+        """
+        now = now or datetime.now(UTC)
+        delay = timedelta(seconds=settings.AI_USAGE_ROLLUP_DELAY)
+        buckets = sorted(await self.redis.smembers(PENDING_BUCKETS_KEY))
+
+        bucket_count = 0
+        row_count = 0
+        for bucket in buckets:
+            bucket_start = datetime.strptime(bucket, "%Y%m%d%H").replace(tzinfo=UTC)
+            if bucket_start + timedelta(hours=1) + delay > now:
+                continue
+
+            usage_key = f"{USAGE_KEY_PREFIX}:{bucket}"
+            counters = await self.redis.hgetall(usage_key)
+            if not counters:
+                # 计数已过期或已落库，只清理待处理标记
+                await self.redis.srem(PENDING_BUCKETS_KEY, bucket)
+                continue
+
+            totals: dict[tuple[str, str, str], dict[str, int]] = {}
+            for field_name, value in counters.items():
+                scope_type, scope_value, model_name, metric = field_name.split("|")
+                if metric in USAGE_METRICS:
+                    metrics = totals.setdefault((scope_type, scope_value, model_name), {})
+                    metrics[metric] = int(value)
+
+            await db.execute(
+                delete(AITokenUsageRollup).where(
+                    AITokenUsageRollup.bucket_start == bucket_start
+                )
+            )
+            rows = [
+                {
+                    "bucket_start": bucket_start,
+                    "scope_type": scope_type,
+                    "scope_value": scope_value,
+                    "model_name": model_name,
+                    "request_count": metrics.get("requests", 0),
+                    "prompt_tokens": metrics.get("prompt_tokens", 0),
+                    "completion_tokens": metrics.get("completion_tokens", 0),
+                    "cost": metrics.get("cost", 0) / COST_SCALE,
+                }
+                for (scope_type, scope_value, model_name), metrics in totals.items()
+            ]
+            if rows:
+                await db.execute(insert(AITokenUsageRollup), rows)
+            await db.commit()
+
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(usage_key)
+                pipe.srem(PENDING_BUCKETS_KEY, bucket)
+                await pipe.execute()
+
+            bucket_count += 1
+            row_count += len(rows)
+
+        return {"bucket_count": bucket_count, "row_count": row_count}
+
+
+_token_metering_service: TokenMeteringService | None = None
+
+
+def get_token_metering_service() -> TokenMeteringService:
+    """获取AI token计量服务实例"""
+    global _token_metering_service
+    if _token_metering_service is None:
+        _token_metering_service = TokenMeteringService()
+    return _token_metering_service
@@ -0,0 +1,30 @@
+"""AI模块定时任务."""
+
+import logging
+from typing import Any
+
+from celery import shared_task
+
+from app.ai.services.token_metering_service import TokenMeteringService
+from app.shared.tasks.async_task import AsyncTask
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, base=AsyncTask, name="ai.rollup_token_usage")
+def rollup_token_usage(self: AsyncTask) -> dict[str, Any]:
+    """把已结束的小时token用量计数汇总落库."""
+    try:
+
+        async def _rollup() -> dict[str, int]:
+            service = TokenMeteringService(redis_client=self.redis_client)
+            async with self.session() as db:
+                return await service.rollup(db)
+
+        result = self.run_async(_rollup())
+        logger.info(f"AI用量汇总完成: {result}")
+        return {"status": "success", **result}
+
+    except Exception as e:
+        logger.error(f"AI用量汇总失败: {str(e)}")
+        return {"status": "failed", "error": str(e)}
@@ -9,13 +9,59 @@
 """
 
 import logging
+import math
+import os
+import re
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 from typing import Any
 
+from app.core.config import settings
 from app.shared.models.enums import AIModelType
 
+try:
+    from tokenizers import Tokenizer
+
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
+# 按字符类别估算token：中文约0.6个token/字，英文单词约1.3个token，
+# 数字每3位约1个token，标点等其他非空白字符约1个token
+CJK_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+WORD_PATTERN = re.compile(r"[A-Za-z]+")
+DIGITS_PATTERN = re.compile(r"\d{1,3}")
+SYMBOL_PATTERN = re.compile(r"[^\sA-Za-z\d\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
+# 校准系数范围，避免个别异常响应把估算带偏
+MIN_CALIBRATION_FACTOR = 0.5
+MAX_CALIBRATION_FACTOR = 2.0
+
+
+def _heuristic_tokens(text: str) -> float:
+    """按字符类别估算token数（正则扫描，不逐字符循环）"""
+    return (
+        len(CJK_PATTERN.findall(text)) * 0.6
+        + len(WORD_PATTERN.findall(text)) * 1.3
+        + len(DIGITS_PATTERN.findall(text))
+        + len(SYMBOL_PATTERN.findall(text))
+    )
+
+
+@lru_cache(maxsize=1)
+def _load_tokenizer() -> Any:
+    """加载本地tokenizer文件（AI_TOKENIZER_PATH），未配置或不可用时返回None"""
+    path = settings.AI_TOKENIZER_PATH
+    if not TOKENIZERS_AVAILABLE or not path or not os.path.exists(path):
+        return None
+    try:
+        return Tokenizer.from_file(path)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"加载tokenizer失败，使用规则估算: {e}")
+        return None
+
 
 class CostModel(Enum):
     """成本模型"""
@@ -116,40 +162,49 @@ def __init__(self) -> None:
             "efficiency_threshold": 0.1,  # 效率阈值
         }
 
+        # 估算校准系数（真实token数 / 估算token数），由实际用量持续更新
+        self.calibration_factors: dict[AIModelType, float] = {}
+
     def estimate_tokens(
         self, text: str, model_type: AIModelType = AIModelType.DEEPSEEK_CHAT
     ) -> int:
-        """估算文本的token数量"""
-        try:
-            # 简单的token估算（实际应用中应该使用更精确的tokenizer）
+        """估算文本的token数量
 
-            # 中文字符通常1个字符 = 1-2个token
-            chinese_chars = sum(1 for char in text if "\u4e00" <= char <= "\u9fff")
-
-            # 英文单词通常1个单词 = 1-2个token
-            english_words = len([word for word in text.split() if word.isascii()])
-
-            # 其他字符
-            other_chars = (
-                len(text)
-                - chinese_chars
-                - sum(len(word) for word in text.split() if word.isascii())
-            )
-
-            # 估算token数
-            estimated_tokens = int(
-                chinese_chars * 1.5  # 中文字符
-                + english_words * 1.3  # 英文单词
-                + other_chars * 0.5  # 其他字符
-            )
+        配置了本地tokenizer时按其分词计数，否则用正则按字符类别一次扫描估算；
+        两种结果都会乘以由真实用量校准的系数，使估算贴近上游实际计费。
+        """
+        try:
+            tokenizer = _load_tokenizer()
+            if tokenizer is not None:
+                raw_tokens = float(len(tokenizer.encode(text).ids))
+            else:
+                raw_tokens = _heuristic_tokens(text)
 
-            return max(1, estimated_tokens)
+            factor = self.calibration_factors.get(model_type, 1.0)
+            return max(1, math.ceil(raw_tokens * factor))
 
         except Exception as e:
             self.logger.error(f"Token估算失败: {e}")
             # 回退到简单估算
             return max(1, len(text) // 4)
 
+    def calibrate(
+        self,
+        estimated_tokens: int,
+        actual_tokens: int,
+        model_type: AIModelType = AIModelType.DEEPSEEK_CHAT,
+    ) -> None:
+        """用上游返回的真实输入token数校准估算系数（指数滑动平均）"""
+        if estimated_tokens <= 0 or actual_tokens <= 0:
+            return
+
+        factor = self.calibration_factors.get(model_type, 1.0)
+        ratio = actual_tokens / estimated_tokens * factor
+        factor = 0.9 * factor + 0.1 * ratio
+        self.calibration_factors[model_type] = min(
+            MAX_CALIBRATION_FACTOR, max(MIN_CALIBRATION_FACTOR, factor)
+        )
+
     def calculate_cost(
         self,
         input_tokens: int,
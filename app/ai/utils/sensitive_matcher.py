@@ -0,0 +1,121 @@
+"""敏感词多模式匹配工具模块
+
+基于Aho-Corasick自动机，一次扫描文本即可找出所有词库命中及其位置和分类，
+耗时与文本长度和命中数成正比，与词库大小无关。
+"""
+
+import unicodedata
+from collections import deque
+from collections.abc import Mapping
+from typing import NamedTuple
+
+
+class SensitiveMatch(NamedTuple):
+    """词库命中 - 位置为原文中的字符偏移 [start, end)"""
+
+    word: str
+    category: str
+    start: int
+    end: int
+
+
+def _normalize_char(char: str) -> str:
+    """单字符规范化 - 全角转半角、兼容字符折叠并转小写，保证长度不变."""
+    normalized = unicodedata.normalize("NFKC", char).lower()
+    if len(normalized) == 1:
+        return normalized
+    lowered = char.lower()
+    return lowered if len(lowered) == 1 else char
+
+
+def normalize_text(text: str) -> str:
+    """逐字符规范化文本，结果与原文等长，命中位置可直接对应原文."""
+    return "".join(_normalize_char(char) for char in text)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+class SensitiveWordMatcher:
+    """编译后的敏感词匹配器 - 构建后只读，可在多个协程间共享
+
+    纯英文数字的词按单词边界匹配（避免 "class" 命中 "ass"），
+    中文及中英混合的词按子串匹配。
+    """
+
+    def __init__(self, words: Mapping[str, str]) -> None:
+        """
+        Args:
+            words: 词 -> 分类
+        """
+        self._words: list[str] = []
+        self._categories: list[str] = []
+        self._bounded: list[bool] = []
+        self._lengths: list[int] = []
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[int, ...]] = [()]
+
+        for word, category in words.items():
+            pattern = normalize_text(word.strip())
+            if pattern:
+                self._add_pattern(word, category, pattern)
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def _add_pattern(self, word: str, category: str, pattern: str) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+
+        self._output[state] += (len(self._words),)
+        self._words.append(word)
+        self._categories.append(category)
+        self._bounded.append(all(_is_word_char(char) for char in pattern))
+        self._lengths.append(len(pattern))
+
+    def _build_failure_links(self) -> None:
+        """按层构建失败链接，并把失败链上的输出合并到当前状态."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> list[SensitiveMatch]:
+        """单次扫描返回全部命中，按结束位置排序."""
+        normalized = normalize_text(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        state = 0
+        for position, char in enumerate(normalized):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                end = position + 1
+                start = end - self._lengths[index]
+                if self._bounded[index] and (
+                    (start > 0 and _is_word_char(normalized[start - 1]))
+                    or (end < len(normalized) and _is_word_char(normalized[end]))
+                ):
+                    continue
+                matches.append(
+                    SensitiveMatch(self._words[index], self._categories[index], start, end)
+                )
+        return matches
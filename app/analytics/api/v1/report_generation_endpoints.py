@@ -9,7 +9,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.analytics.schemas.analytics_schemas import ReportRequest
-from app.analytics.services.custom_report_service import CustomReportService
+from app.analytics.services.custom_report_service import get_custom_report_service
 from app.analytics.services.report_service import ReportService
 from app.core.database import get_db
 from app.shared.models.enums import UserType
@@ -151,7 +151,7 @@ async def get_report_templates(
         )
 
     try:
-        service = CustomReportService()
+        service = get_custom_report_service()
         templates = await service.get_templates()
 
         logger.info(f"管理员 {current_user.id} 查看报表模板列表")
@@ -190,7 +190,7 @@ async def generate_custom_report(
             ReportFilter,
         )
 
-        service = CustomReportService()
+        service = get_custom_report_service()
 
         # 转换输出格式
         output_format_enums = []
@@ -245,6 +245,8 @@ async def generate_custom_report(
                 "custom_filters": generated_report.filters_applied.custom_filters,
             },
             "data": generated_report.data,
+            "row_count": generated_report.row_count,
+            "rows_per_second": generated_report.rows_per_second,
             "charts": [
                 {
                     "chart_type": chart.get("chart_type", ""),
@@ -285,7 +287,7 @@ async def get_report_schedules(
         )
 
     try:
-        service = CustomReportService()
+        service = get_custom_report_service()
         schedules = list(service.schedules.values())
 
         logger.info(f"管理员 {current_user.id} 查看报表调度列表")
@@ -335,7 +337,7 @@ async def run_scheduled_report(
         )
 
     try:
-        service = CustomReportService()
+        service = get_custom_report_service()
         await service._execute_scheduled_report(service.schedules[schedule_id])
 
         logger.info(f"管理员 {current_user.id} 手动执行调度报表: {schedule_id}")
@@ -375,7 +377,7 @@ async def get_report_history(
         )
 
     try:
-        service = CustomReportService()
+        service = get_custom_report_service()
         reports = service.generated_reports
 
         # 应用分页
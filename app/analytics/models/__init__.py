@@ -0,0 +1,9 @@
+"""数据分析模块模型."""
+
+from .rollup_models import GroupLearningRollup, RollupWatermark, StudentLearningRollup
+
+__all__ = [
+    "GroupLearningRollup",
+    "RollupWatermark",
+    "StudentLearningRollup",
+]
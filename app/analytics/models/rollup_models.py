@@ -0,0 +1,198 @@
+"""学习数据汇总（rollup）相关的SQLAlchemy模型定义."""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import (
+    JSON,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.shared.models.base_model import BaseModel
+
+
+class LearningRollupMixin:
+    """汇总度量字段 - 学生与班级/课程汇总表共用."""
+
+    granularity: Mapped[str] = mapped_column(
+        String(10),
+        nullable=False,
+        comment="汇总粒度（hour/day）",
+    )
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="时间桶起始时间",
+    )
+    training_type: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False,
+        comment="训练类型",
+    )
+
+    session_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="训练会话数",
+    )
+    completed_session_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="已完成会话数",
+    )
+    question_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="答题数",
+    )
+    correct_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="答对数",
+    )
+    answer_time_spent: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="答题总用时（秒）",
+    )
+    study_time_spent: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="会话总用时（秒）",
+    )
+    score_sum: Mapped[float] = mapped_column(
+        Float,
+        default=0.0,
+        nullable=False,
+        comment="得分总和",
+    )
+    difficulty_histogram: Mapped[dict[str, Any]] = mapped_column(
+        JSON,
+        default=dict,
+        nullable=False,
+        comment="难度分布（难度等级 -> 答题数/答对数）",
+    )
+
+
+class StudentLearningRollup(LearningRollupMixin, BaseModel):
+    """学生学习汇总 - 按学生、训练类型和时间桶预聚合的训练数据."""
+
+    __tablename__ = "student_learning_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity",
+            "student_id",
+            "bucket_start",
+            "training_type",
+            name="uq_student_learning_rollup",
+        ),
+        Index(
+            "idx_student_learning_rollups_bucket",
+            "granularity",
+            "bucket_start",
+        ),
+    )
+
+    student_id: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        comment="学生ID",
+    )
+
+    def __repr__(self) -> str:
+        """学生学习汇总字符串表示."""
+        return (
+            f"<StudentLearningRollup(student_id={self.student_id}, "
+            f"{self.granularity}={self.bucket_start}, type={self.training_type})>"
+        )
+
+
+class GroupLearningRollup(LearningRollupMixin, BaseModel):
+    """班级/课程学习汇总 - 由学生汇总按班级成员关系二次聚合."""
+
+    __tablename__ = "group_learning_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "scope",
+            "scope_id",
+            "granularity",
+            "bucket_start",
+            "training_type",
+            name="uq_group_learning_rollup",
+        ),
+        Index(
+            "idx_group_learning_rollups_bucket",
+            "scope",
+            "granularity",
+            "bucket_start",
+        ),
+    )
+
+    scope: Mapped[str] = mapped_column(
+        String(10),
+        nullable=False,
+        comment="汇总范围（class/course）",
+    )
+    scope_id: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        comment="班级ID或课程ID",
+    )
+    active_students: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="活跃学生数",
+    )
+
+    def __repr__(self) -> str:
+        """班级/课程学习汇总字符串表示."""
+        return (
+            f"<GroupLearningRollup({self.scope}={self.scope_id}, "
+            f"{self.granularity}={self.bucket_start}, type={self.training_type})>"
+        )
+
+
+class RollupWatermark(BaseModel):
+    """汇总水位线 - 记录增量汇总已处理到的数据变更时间."""
+
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(
+        String(100),
+        unique=True,
+        nullable=False,
+        comment="汇总任务名称",
+    )
+    watermark: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="已处理的最大变更时间",
+    )
+    last_run_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="最近执行时间",
+    )
+    last_bucket_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="最近一次重算的时间桶数",
+    )
+
+    def __repr__(self) -> str:
+        """汇总水位线字符串表示."""
+        return f"<RollupWatermark(name={self.name}, watermark={self.watermark})>"
@@ -256,6 +256,9 @@ class BackupInfo(BaseModel):
     tables_included: list[str] = Field(..., description="包含的表")
     compression_ratio: float | None = Field(None, description="压缩比")
     encryption_enabled: bool = Field(..., description="是否加密")
+    dump_format: str = Field(default="plain", description="转储格式：plain/directory")
+    parent_backup_id: str | None = Field(None, description="增量备份的上一级备份ID")
+    base_backup_id: str | None = Field(None, description="备份链的全量基准备份ID")
 
 
 class RestoreRequest(BaseModel):
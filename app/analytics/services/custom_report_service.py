@@ -6,16 +6,34 @@
 """
 
 import asyncio
-import csv
+import hashlib
 import json
 import logging
-from dataclasses import dataclass, field
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
 from typing import Any
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analytics.services.report_query_engine import (
+    compile_report_query,
+    get_report_source,
+    stream_report_rows,
+)
+from app.analytics.utils.report_writers import (
+    CSVReportWriter,
+    HTMLReportWriter,
+    JSONLinesReportWriter,
+    JSONReportWriter,
+    ParquetReportWriter,
+    ReportWriter,
+)
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
 
 
 class ReportType(Enum):
@@ -37,10 +55,22 @@ class OutputFormat(Enum):
     EXCEL = "excel"
     CSV = "csv"
     JSON = "json"
+    JSONL = "jsonl"  # JSON Lines，每行一条记录
+    PARQUET = "parquet"  # 列式存储，需安装pyarrow
     HTML = "html"
     PNG = "png"  # 图表图片
 
 
+# 支持流式写出的输出格式
+STREAMING_FORMATS = {
+    OutputFormat.CSV,
+    OutputFormat.JSON,
+    OutputFormat.JSONL,
+    OutputFormat.PARQUET,
+    OutputFormat.HTML,
+}
+
+
 class ScheduleFrequency(Enum):
     """调度频率枚举"""
 
@@ -133,10 +163,81 @@ class GeneratedReport:
     name: str
     generated_at: datetime
     filters_applied: ReportFilter
-    data: list[dict[str, Any]]
+    data: list[dict[str, Any]]  # 预览数据（最多 REPORT_PREVIEW_ROWS 行）
     charts: list[dict[str, Any]] = field(default_factory=list)
     file_paths: dict[OutputFormat, str] = field(default_factory=dict)
     generation_time: float = 0.0  # 生成耗时（秒）
+    row_count: int = 0  # 报表总行数
+    rows_per_second: float = 0.0  # 查询导出吞吐
+
+
+def compute_filter_hash(filters: ReportFilter) -> str:
+    """计算过滤条件哈希（列表按值排序，与传入顺序无关）"""
+    payload = asdict(filters)
+    for key, value in payload.items():
+        if isinstance(value, list):
+            payload[key] = sorted(value, key=str)
+    content = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+class ReportResultCache:
+    """报表结果缓存 - 按 (模板ID, 过滤条件哈希) 缓存已生成的报表"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: OrderedDict[tuple[str, str], tuple[float, GeneratedReport]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, template_id: str, filter_hash: str, output_formats: list[OutputFormat]
+    ) -> GeneratedReport | None:
+        """获取缓存的报表，过期或缺少请求的输出文件时视为未命中"""
+        key = (template_id, filter_hash)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        cached_at, report = entry
+        missing_file = any(
+            format_type not in report.file_paths
+            or not Path(report.file_paths[format_type]).exists()
+            for format_type in output_formats
+            if format_type in STREAMING_FORMATS
+        )
+        if time.monotonic() - cached_at > self.ttl_seconds or missing_file:
+            del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return report
+
+    def put(self, report: GeneratedReport, filter_hash: str) -> None:
+        """缓存报表，超出容量时淘汰最久未使用的条目"""
+        key = (report.template_id, filter_hash)
+        self.entries[key] = (time.monotonic(), report)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, template_id: str | None = None) -> int:
+        """使缓存失效，不指定模板时清空全部缓存"""
+        if template_id is None:
+            count = len(self.entries)
+            self.entries.clear()
+            return count
+
+        keys = [key for key in self.entries if key[0] == template_id]
+        for key in keys:
+            del self.entries[key]
+        return len(keys)
 
 
 class CustomReportService:
@@ -154,6 +255,19 @@ def __init__(self) -> None:
         # 生成的报表存储
         self.generated_reports: dict[str, GeneratedReport] = {}
 
+        # 报表结果缓存
+        self.report_cache = ReportResultCache(
+            settings.REPORT_CACHE_MAX_ENTRIES, settings.REPORT_CACHE_TTL_SECONDS
+        )
+
+        # 查询导出吞吐统计
+        self.export_stats: dict[str, Any] = {
+            "reports_generated": 0,
+            "rows_exported": 0,
+            "total_seconds": 0.0,
+            "last_rows_per_second": 0.0,
+        }
+
         # 报表输出目录
         self.output_dir = Path(getattr(settings, "REPORT_OUTPUT_DIR", "./reports"))
         self.output_dir.mkdir(exist_ok=True)
@@ -295,6 +409,7 @@ async def update_template(self, template_id: str, updates: dict[str, Any]) -> bo
             if hasattr(template, key):
                 setattr(template, key, value)
 
+        self.report_cache.invalidate(template_id)
         self.logger.info(f"更新报表模板: {template_id}")
         return True
 
@@ -302,6 +417,7 @@ async def delete_template(self, template_id: str) -> bool:
         """删除报表模板"""
         if template_id in self.templates:
             del self.templates[template_id]
+            self.report_cache.invalidate(template_id)
             self.logger.info(f"删除报表模板: {template_id}")
             return True
         return False
@@ -311,116 +427,132 @@ async def generate_report(
         template_id: str,
         filters: ReportFilter | None = None,
         output_formats: list[OutputFormat] | None = None,
+        db: AsyncSession | None = None,
     ) -> GeneratedReport:
-        """生成报表"""
+        """生成报表
+
+        查询结果通过服务端游标分块读取并同时写入各输出文件，内存中只保留预览数据；
+        相同模板和过滤条件的报表在缓存有效期内直接复用。
+        """
         if template_id not in self.templates:
             raise ValueError(f"报表模板不存在: {template_id}")
 
         template = self.templates[template_id]
-        start_time = datetime.now()
+        output_formats = output_formats or []
 
         # 使用提供的过滤条件或默认过滤条件
         applied_filters = filters or template.default_filters
+        filter_hash = compute_filter_hash(applied_filters)
 
-        # 生成报表数据
-        report_data = await self._generate_report_data(template, applied_filters)
-
-        # 生成图表
-        charts = await self._generate_charts(template, report_data)
+        cached_report = self.report_cache.get(template_id, filter_hash, output_formats)
+        if cached_report is not None:
+            self.logger.info(f"命中报表缓存: {cached_report.name}")
+            return cached_report
 
-        # 创建报表对象
-        report_id = f"{template_id}_{int(datetime.now().timestamp())}"
+        start_time = time.perf_counter()
+        generated_at = datetime.now()
         report = GeneratedReport(
-            report_id=report_id,
+            report_id=f"{template_id}_{int(generated_at.timestamp())}",
             template_id=template_id,
-            name=f"{template.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            generated_at=datetime.now(),
+            name=f"{template.name}_{generated_at.strftime('%Y%m%d_%H%M%S')}",
+            generated_at=generated_at,
             filters_applied=applied_filters,
-            data=report_data,
-            charts=charts,
-            generation_time=(datetime.now() - start_time).total_seconds(),
+            data=[],
         )
 
-        # 生成输出文件
-        if output_formats:
+        writers: dict[OutputFormat, ReportWriter] = {}
+        try:
             for format_type in output_formats:
-                file_path = await self._export_report(report, format_type)
-                report.file_paths[format_type] = file_path
+                writer = self._create_writer(template, report, format_type)
+                if writer is not None:
+                    writers[format_type] = writer
+
+            # 查询数据并流式写入输出文件
+            if db is None:
+                async with AsyncSessionLocal() as session:
+                    await self._stream_report_data(
+                        session, template, applied_filters, report, writers
+                    )
+            else:
+                await self._stream_report_data(
+                    db, template, applied_filters, report, writers
+                )
+        except Exception:
+            for writer in writers.values():
+                writer.abort()
+            raise
+
+        # 生成图表（基于预览数据）
+        report.charts = await self._generate_charts(template, report.data)
+
+        report.generation_time = time.perf_counter() - start_time
+        if report.generation_time > 0:
+            report.rows_per_second = report.row_count / report.generation_time
+
+        report_info = {
+            "id": report.report_id,
+            "name": report.name,
+            "generated_at": report.generated_at.isoformat(),
+            "generation_time": report.generation_time,
+            "row_count": report.row_count,
+            "rows_per_second": report.rows_per_second,
+            "charts": report.charts,
+        }
+        for format_type, writer in writers.items():
+            await asyncio.to_thread(writer.close, report_info)
+            report.file_paths[format_type] = str(writer.file_path)
 
         # 存储报表
-        self.generated_reports[report_id] = report
-
-        self.logger.info(f"生成报表完成: {report.name}, 耗时: {report.generation_time:.2f}秒")
+        self.generated_reports[report.report_id] = report
+        self.report_cache.put(report, filter_hash)
+        self._record_export_stats(report)
+
+        self.logger.info(
+            f"生成报表完成: {report.name}, {report.row_count}行, "
+            f"耗时: {report.generation_time:.2f}秒, "
+            f"{report.rows_per_second:.0f}行/秒"
+        )
         return report
 
-    async def _generate_report_data(
-        self, template: ReportTemplate, filters: ReportFilter
-    ) -> list[dict[str, Any]]:
-        """生成报表数据"""
-        # 这里应该根据报表类型和过滤条件从数据库或其他数据源获取数据
-        # 暂时返回模拟数据
-
-        if template.report_type == ReportType.LEARNING_PROGRESS:
-            return [
-                {
-                    "user_id": 1,
-                    "username": "张三",
-                    "total_study_time": 25.5,
-                    "sessions_count": 15,
-                    "avg_accuracy": 0.85,
-                    "progress_score": 78.5,
-                    "last_activity": "2024-01-15 14:30:00",
-                },
-                {
-                    "user_id": 2,
-                    "username": "李四",
-                    "total_study_time": 32.0,
-                    "sessions_count": 20,
-                    "avg_accuracy": 0.92,
-                    "progress_score": 85.2,
-                    "last_activity": "2024-01-15 16:45:00",
-                },
-            ]
-        elif template.report_type == ReportType.PERFORMANCE_ANALYSIS:
-            return [
-                {
-                    "timestamp": "2024-01-15 10:00:00",
-                    "cpu_usage": 45.2,
-                    "memory_usage": 62.8,
-                    "response_time": 250,
-                    "active_users": 125,
-                    "api_calls": 1580,
-                },
-                {
-                    "timestamp": "2024-01-15 11:00:00",
-                    "cpu_usage": 52.1,
-                    "memory_usage": 68.5,
-                    "response_time": 280,
-                    "active_users": 142,
-                    "api_calls": 1720,
-                },
-            ]
-        elif template.report_type == ReportType.CONTENT_EFFECTIVENESS:
-            return [
-                {
-                    "content_type": "词汇训练",
-                    "total_sessions": 450,
-                    "completion_rate": 0.87,
-                    "avg_score_improvement": 0.15,
-                    "engagement_level": 0.82,
-                    "effectiveness_score": 85.5,
-                },
-                {
-                    "content_type": "语法练习",
-                    "total_sessions": 320,
-                    "completion_rate": 0.79,
-                    "avg_score_improvement": 0.18,
-                    "engagement_level": 0.75,
-                    "effectiveness_score": 78.2,
-                },
-            ]
-        else:
-            return []
+    async def _stream_report_data(
+        self,
+        db: AsyncSession,
+        template: ReportTemplate,
+        filters: ReportFilter,
+        report: GeneratedReport,
+        writers: dict[OutputFormat, ReportWriter],
+    ) -> None:
+        """分块读取报表数据，写入输出文件并保留预览数据"""
+        if get_report_source(template.report_type) is None:
+            self.logger.warning(f"报表类型没有数据库数据源: {template.report_type.value}")
+            return
+
+        query = compile_report_query(template, filters)
+        preview_rows = settings.REPORT_PREVIEW_ROWS
+
+        async for rows in stream_report_rows(
+            db, query, settings.REPORT_QUERY_CHUNK_SIZE
+        ):
+            if writers:
+                await asyncio.to_thread(self._write_chunk, writers, rows)
+            if len(report.data) < preview_rows:
+                report.data.extend(rows[: preview_rows - len(report.data)])
+            report.row_count += len(rows)
+
+    @staticmethod
+    def _write_chunk(
+        writers: dict[OutputFormat, ReportWriter], rows: list[dict[str, Any]]
+    ) -> None:
+        """将一块数据写入所有输出文件"""
+        for writer in writers.values():
+            writer.write_rows(rows)
+
+    def _record_export_stats(self, report: GeneratedReport) -> None:
+        """记录查询导出吞吐"""
+        self.export_stats["reports_generated"] += 1
+        self.export_stats["rows_exported"] += report.row_count
+        self.export_stats["total_seconds"] += report.generation_time
+        self.export_stats["last_rows_per_second"] = report.rows_per_second
 
     async def _generate_charts(
         self, template: ReportTemplate, data: list[dict[str, Any]]
@@ -473,100 +605,40 @@ async def _generate_charts(
 
         return charts
 
-    async def _export_report(
-        self, report: GeneratedReport, format_type: OutputFormat
-    ) -> str:
-        """导出报表文件"""
-        file_name = f"{report.name}.{format_type.value}"
-        file_path = self.output_dir / file_name
+    def _create_writer(
+        self,
+        template: ReportTemplate,
+        report: GeneratedReport,
+        format_type: OutputFormat,
+    ) -> ReportWriter | None:
+        """创建输出格式对应的流式写入器"""
+        if format_type not in STREAMING_FORMATS:
+            self.logger.warning(f"暂不支持导出格式: {format_type.value}")
+            return None
+
+        file_path = self.output_dir / f"{report.name}.{format_type.value}"
+        visible_columns = [column for column in template.columns if column.is_visible]
+        columns = [column.name for column in visible_columns]
 
         if format_type == OutputFormat.CSV:
-            await self._export_csv(report, file_path)
-        elif format_type == OutputFormat.JSON:
-            await self._export_json(report, file_path)
-        elif format_type == OutputFormat.HTML:
-            await self._export_html(report, file_path)
-        # 其他格式的导出实现...
-
-        return str(file_path)
-
-    async def _export_csv(self, report: GeneratedReport, file_path: Path) -> None:
-        """导出CSV格式"""
-        if not report.data:
-            return
-
-        with open(file_path, "w", newline="", encoding="utf-8") as csvfile:
-            fieldnames = report.data[0].keys()
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(report.data)
-
-    async def _export_json(self, report: GeneratedReport, file_path: Path) -> None:
-        """导出JSON格式"""
-        export_data = {
-            "report_info": {
-                "id": report.report_id,
-                "name": report.name,
-                "generated_at": report.generated_at.isoformat(),
-                "generation_time": report.generation_time,
-            },
-            "data": report.data,
-            "charts": report.charts,
-        }
-
-        with open(file_path, "w", encoding="utf-8") as jsonfile:
-            json.dump(export_data, jsonfile, ensure_ascii=False, indent=2)
-
-    async def _export_html(self, report: GeneratedReport, file_path: Path) -> None:
-        """导出HTML格式"""
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>{report.name}</title>
-            <meta charset="utf-8">
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                table {{ border-collapse: collapse; width: 100%; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-                .header {{ margin-bottom: 20px; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>{report.name}</h1>
-                <p>生成时间: {report.generated_at.strftime("%Y-%m-%d %H:%M:%S")}</p>
-                <p>生成耗时: {report.generation_time:.2f}秒</p>
-            </div>
-
-            <h2>数据表格</h2>
-            <table>
-        """
-
-        if report.data:
-            # 表头
-            headers = report.data[0].keys()
-            html_content += "<tr>"
-            for header in headers:
-                html_content += f"<th>{header}</th>"
-            html_content += "</tr>"
-
-            # 数据行
-            for row in report.data:
-                html_content += "<tr>"
-                for value in row.values():
-                    html_content += f"<td>{value}</td>"
-                html_content += "</tr>"
-
-        html_content += """
-            </table>
-        </body>
-        </html>
-        """
+            return CSVReportWriter(file_path, columns)
+        if format_type == OutputFormat.JSON:
+            return JSONReportWriter(file_path, columns)
+        if format_type == OutputFormat.JSONL:
+            return JSONLinesReportWriter(file_path, columns)
+        if format_type == OutputFormat.HTML:
+            return HTMLReportWriter(file_path, columns, title=report.name)
+        return ParquetReportWriter(
+            file_path,
+            columns,
+            {column.name: column.data_type for column in visible_columns},
+        )
 
-        with open(file_path, "w", encoding="utf-8") as htmlfile:
-            htmlfile.write(html_content)
+    async def invalidate_report_cache(self, template_id: str | None = None) -> int:
+        """使报表缓存失效（数据批量变更后调用），返回失效的条目数"""
+        count = self.report_cache.invalidate(template_id)
+        self.logger.info(f"报表缓存失效: {template_id or '全部'}, {count}条")
+        return count
 
     async def create_schedule(self, schedule: ReportSchedule) -> str:
         """创建报表调度"""
@@ -698,7 +770,7 @@ async def get_reports(self, limit: int = 50) -> list[dict[str, Any]]:
                 "template_id": report.template_id,
                 "generated_at": report.generated_at.isoformat(),
                 "generation_time": report.generation_time,
-                "data_count": len(report.data),
+                "data_count": report.row_count,
                 "available_formats": list(report.file_paths.keys()),
             }
             for report in reports[:limit]
@@ -714,6 +786,20 @@ async def get_service_stats(self) -> dict[str, Any]:
                 [s for s in self.schedules.values() if s.is_active]
             ),
             "output_directory": str(self.output_dir),
+            "export_stats": {
+                **self.export_stats,
+                "average_rows_per_second": (
+                    self.export_stats["rows_exported"]
+                    / self.export_stats["total_seconds"]
+                    if self.export_stats["total_seconds"]
+                    else 0.0
+                ),
+            },
+            "cache_stats": {
+                "entries": len(self.report_cache.entries),
+                "hits": self.report_cache.hits,
+                "misses": self.report_cache.misses,
+            },
         }
 
 
@@ -17,10 +17,14 @@
 from enum import Enum
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.analytics.services.rollup_service import LearningRollupService, as_utc
+from app.core.config import settings
 from app.shared.models.enums import DifficultyLevel
+from app.shared.services.cache_service import LRUCache
 from app.shared.utils.metrics_collector import collect_metric
 from app.training.models.training_models import (
     Question,
@@ -131,15 +135,42 @@ class LearningTrend:
     confidence: float
 
 
+@dataclass
+class LearningAnalysisContext:
+    """学习分析上下文 - 一次加载分析窗口内的会话和答题记录，供各项分析共用"""
+
+    user_id: str
+    start_time: datetime
+    end_time: datetime
+    sessions: list[TrainingSession]
+    records: list[TrainingRecord]  # 已预加载 question 关系
+
+
+# 进程内共享的分析结果缓存（有界LRU），所有服务实例共用
+_analysis_cache = LRUCache(
+    max_size=settings.LEARNING_ANALYSIS_CACHE_SIZE,
+    max_memory=settings.LEARNING_ANALYSIS_CACHE_MAX_MEMORY_MB * 1024 * 1024,
+)
+
+
+def invalidate_user_analysis(user_id: int | str) -> int:
+    """使用户的分析缓存失效（有新的答题记录时调用），返回失效的条目数"""
+    prefix = f"user_analysis:{user_id}:"
+    keys = [key for key in _analysis_cache.cache if key.startswith(prefix)]
+    for key in keys:
+        _analysis_cache.delete(key)
+    return len(keys)
+
+
 class LearningAnalyticsService:
     """学习数据分析服务"""
 
     def __init__(self) -> None:
         self.logger = logging.getLogger(__name__)
 
-        # 分析缓存
-        self.analysis_cache: dict[str, Any] = {}
-        self.cache_ttl = 3600  # 1小时缓存
+        # 分析缓存（进程内共享，按用户、天数和数据版本区分）
+        self.analysis_cache = _analysis_cache
+        self.cache_ttl = settings.LEARNING_ANALYSIS_CACHE_TTL
 
         # 洞察历史
         self.insights_history: deque[LearningInsight] = deque(maxlen=10000)
@@ -160,31 +191,30 @@ async def analyze_user_learning(
     ) -> dict[str, Any]:
         """分析用户学习数据"""
         try:
-            # 检查缓存
-            cache_key = f"user_analysis_{user_id}_{days}"
-            if cache_key in self.analysis_cache:
-                cached_data = self.analysis_cache[cache_key]
-                if (
-                    datetime.utcnow() - cached_data["timestamp"]
-                ).total_seconds() < self.cache_ttl:
-                    return dict(cached_data["data"])
+            # 检查缓存（数据版本变化后自动失效，多进程下同样有效）
+            data_version = await self._get_data_version(user_id, db)
+            cache_key = f"user_analysis:{user_id}:{days}:{data_version}"
+            cached_data = self.analysis_cache.get(cache_key)
+            if cached_data is not None:
+                return dict(cached_data)
 
             # 获取时间范围
             end_time = datetime.utcnow()
             start_time = end_time - timedelta(days=days)
 
-            # 获取学习数据
-            learning_metrics = await self._calculate_learning_metrics(
+            # 一次加载分析窗口内的学习数据
+            context = await self._load_analysis_context(
                 user_id, db, start_time, end_time
             )
 
+            # 获取学习数据
+            learning_metrics = await self._calculate_learning_metrics(context, db)
+
             # 进行各类分析
             analyses = {}
 
             # 1. 学习行为分析
-            behavior_analysis = await self._analyze_learning_behavior(
-                user_id, db, start_time, end_time
-            )
+            behavior_analysis = await self._analyze_learning_behavior(context)
             analyses["behavior"] = behavior_analysis
 
             # 2. 学习表现分析
@@ -194,21 +224,17 @@ async def analyze_user_learning(
             analyses["performance"] = performance_analysis
 
             # 3. 学习进度分析
-            progress_analysis = await self._analyze_learning_progress(
-                user_id, db, start_time, end_time
-            )
+            progress_analysis = await self._analyze_learning_progress(context)
             analyses["progress"] = progress_analysis
 
             # 4. 难度适应性分析
             difficulty_analysis = await self._analyze_difficulty_adaptation(
-                user_id, db, learning_metrics
+                context, learning_metrics
             )
             analyses["difficulty"] = difficulty_analysis
 
             # 5. 时间模式分析
-            time_analysis = await self._analyze_time_patterns(
-                user_id, db, start_time, end_time
-            )
+            time_analysis = await self._analyze_time_patterns(context)
             analyses["time_patterns"] = time_analysis
 
             # 6. 知识点掌握分析
@@ -234,10 +260,7 @@ async def analyze_user_learning(
             }
 
             # 缓存结果
-            self.analysis_cache[cache_key] = {
-                "data": comprehensive_analysis,
-                "timestamp": datetime.utcnow(),
-            }
+            self.analysis_cache.set(cache_key, comprehensive_analysis, self.cache_ttl)
 
             # 更新统计
             total_analyses = self.analytics_stats.get("total_analyses", 0)
@@ -260,82 +283,123 @@ async def analyze_user_learning(
                 "timestamp": datetime.utcnow().isoformat(),
             }
 
-    async def _calculate_learning_metrics(
+    async def _get_data_version(self, user_id: str, db: AsyncSession) -> str:
+        """获取用户学习数据版本 - 新增或修改会话、答题记录后版本变化"""
+        student_id = int(user_id)
+        record_version = select(
+            func.count(TrainingRecord.id),
+            func.max(func.coalesce(TrainingRecord.updated_at, TrainingRecord.created_at)),
+        ).where(TrainingRecord.student_id == student_id)
+        session_version = select(
+            func.count(TrainingSession.id),
+            func.max(
+                func.coalesce(TrainingSession.updated_at, TrainingSession.created_at)
+            ),
+        ).where(TrainingSession.student_id == student_id)
+
+        record_count, record_changed = (await db.execute(record_version)).one()
+        session_count, session_changed = (await db.execute(session_version)).one()
+        changed_at = max(
+            (as_utc(value) for value in (record_changed, session_changed) if value),
+            default=None,
+        )
+        return (
+            f"{record_count}-{session_count}-"
+            f"{changed_at.timestamp() if changed_at else 0:.6f}"
+        )
+
+    async def _load_analysis_context(
         self, user_id: str, db: AsyncSession, start_time: datetime, end_time: datetime
-    ) -> LearningMetrics:
-        """计算学习指标"""
-        # 获取训练会话
-        sessions_query = select(TrainingSession).where(
-            TrainingSession.student_id == user_id,
-            TrainingSession.created_at >= start_time,
-            TrainingSession.created_at <= end_time,
+    ) -> LearningAnalysisContext:
+        """加载分析窗口内的会话和答题记录（预加载题目难度，避免逐条懒加载）"""
+        student_id = int(user_id)
+
+        sessions_result = await db.execute(
+            select(TrainingSession)
+            .where(
+                TrainingSession.student_id == student_id,
+                TrainingSession.created_at >= start_time,
+                TrainingSession.created_at <= end_time,
+            )
+            .order_by(TrainingSession.created_at)
+        )
+        records_result = await db.execute(
+            select(TrainingRecord)
+            .options(
+                selectinload(TrainingRecord.question).load_only(
+                    Question.difficulty_level
+                )
+            )
+            .where(
+                TrainingRecord.student_id == student_id,
+                TrainingRecord.created_at >= start_time,
+                TrainingRecord.created_at <= end_time,
+            )
+            .order_by(TrainingRecord.created_at)
+        )
+
+        return LearningAnalysisContext(
+            user_id=user_id,
+            start_time=start_time,
+            end_time=end_time,
+            sessions=list(sessions_result.scalars().all()),
+            records=list(records_result.scalars().all()),
         )
-        sessions_result = await db.execute(sessions_query)
-        sessions = sessions_result.scalars().all()
-
-        # 获取训练记录
-        records_query = select(TrainingRecord).where(
-            TrainingRecord.student_id == user_id,
-            TrainingRecord.created_at >= start_time,
-            TrainingRecord.created_at <= end_time,
+
+    async def _calculate_learning_metrics(
+        self, context: LearningAnalysisContext, db: AsyncSession
+    ) -> LearningMetrics:
+        """计算学习指标（读取预聚合的学习汇总，不重新聚合原始会话和记录）"""
+        user_id = context.user_id
+        start_time = context.start_time
+        end_time = context.end_time
+        totals = await LearningRollupService(db).get_student_totals(
+            int(user_id), start_time, end_time
         )
-        records_result = await db.execute(records_query)
-        records = records_result.scalars().all()
 
         # 计算基础指标
-        total_sessions = len(sessions)
-        total_questions = len(records)
-        correct_answers = sum(1 for record in records if record.is_correct)
+        total_sessions = sum(item.session_count for item in totals.values())
+        total_questions = sum(item.question_count for item in totals.values())
+        correct_answers = sum(item.correct_count for item in totals.values())
         accuracy_rate = (
             correct_answers / total_questions if total_questions > 0 else 0.0
         )
 
         # 计算平均答题时间
-        total_time = sum(record.time_spent or 0 for record in records)
+        total_time = sum(item.answer_time_spent for item in totals.values())
         average_time_per_question = (
             total_time / total_questions if total_questions > 0 else 0.0
         )
 
         # 计算总学习时间
-        total_study_time = sum(int(session.time_spent or 0) for session in sessions)
+        total_study_time = sum(item.study_time_spent for item in totals.values())
 
         # 难度分布
         difficulty_distribution: defaultdict[DifficultyLevel, int] = defaultdict(int)
-        for record in records:
-            if hasattr(record, "question") and record.question:
-                difficulty_distribution[record.question.difficulty_level] += 1
-
-        # 主题表现（简化实现）
-        topic_performance = {}
-        topic_stats: defaultdict[str, dict[str, int]] = defaultdict(
-            lambda: {"correct": 0, "total": 0}
-        )
-
-        for record in records:
-            if hasattr(record, "question") and record.question:
-                # 假设有主题字段
-                topic = getattr(record.question, "topic", "general")
-                topic_stats[topic]["total"] += 1
-                if record.is_correct:
-                    topic_stats[topic]["correct"] += 1
-
-        for topic, stats in topic_stats.items():
-            topic_performance[topic] = (
-                stats["correct"] / stats["total"] if stats["total"] > 0 else 0.0
-            )
+        for item in totals.values():
+            for level, counts in item.difficulty_histogram.items():
+                if level.isdigit():
+                    difficulty_distribution[DifficultyLevel(int(level))] += counts[
+                        "total"
+                    ]
+
+        # 主题表现（按训练类型统计正确率）
+        topic_performance = {
+            training_type: item.accuracy_rate
+            for training_type, item in totals.items()
+            if item.question_count > 0
+        }
 
         # 学习连续天数
         learning_streak = await self._calculate_learning_streak(user_id, db, end_time)
 
         # 最后活动时间
-        last_activity = max(
-            (session.created_at for session in sessions), default=start_time
+        last_activity = (
+            context.sessions[-1].created_at if context.sessions else start_time
         )
 
         # 改进率计算
-        improvement_rate = await self._calculate_improvement_rate(
-            user_id, db, start_time, end_time
-        )
+        improvement_rate = self._calculate_improvement_rate(context)
 
         return LearningMetrics(
             user_id=user_id,
@@ -353,17 +417,10 @@ async def _calculate_learning_metrics(
         )
 
     async def _analyze_learning_behavior(
-        self, user_id: str, db: AsyncSession, start_time: datetime, end_time: datetime
+        self, context: LearningAnalysisContext
     ) -> dict[str, Any]:
         """分析学习行为"""
-        # 获取学习会话数据
-        sessions_query = select(TrainingSession).where(
-            TrainingSession.student_id == user_id,
-            TrainingSession.created_at >= start_time,
-            TrainingSession.created_at <= end_time,
-        )
-        sessions_result = await db.execute(sessions_query)
-        sessions = sessions_result.scalars().all()
+        sessions = context.sessions
 
         if not sessions:
             return {"pattern": "no_data", "details": {}}
@@ -455,24 +512,24 @@ async def _analyze_learning_performance(
         }
 
     async def _analyze_learning_progress(
-        self, user_id: str, db: AsyncSession, start_time: datetime, end_time: datetime
+        self, context: LearningAnalysisContext
     ) -> dict[str, Any]:
         """分析学习进度"""
+        # 答题记录按周分组（从窗口起点起每7天一组）
+        window_start = as_utc(context.start_time)
+        records_by_week: defaultdict[int, list[TrainingRecord]] = defaultdict(list)
+        for record in context.records:
+            week_index = (as_utc(record.created_at) - window_start) // timedelta(days=7)
+            records_by_week[week_index].append(record)
+
         # 按周分析进度
         weekly_progress = {}
-        current_time = start_time
+        current_time = context.start_time
+        week_index = 0
 
-        while current_time < end_time:
-            week_end = min(current_time + timedelta(days=7), end_time)
-
-            # 获取该周的记录
-            week_records_query = select(TrainingRecord).where(
-                TrainingRecord.student_id == user_id,
-                TrainingRecord.created_at >= current_time,
-                TrainingRecord.created_at < week_end,
-            )
-            week_records_result = await db.execute(week_records_query)
-            week_records = week_records_result.scalars().all()
+        while current_time < context.end_time:
+            week_end = min(current_time + timedelta(days=7), context.end_time)
+            week_records = records_by_week.get(week_index, [])
 
             week_key = current_time.strftime("%Y-W%U")
             if week_records:
@@ -493,6 +550,7 @@ async def _analyze_learning_progress(
                 }
 
             current_time = week_end
+            week_index += 1
 
         # 计算进度趋势
         accuracies = [week["accuracy"] for week in weekly_progress.values()]
@@ -511,24 +569,23 @@ async def _analyze_learning_progress(
         }
 
     async def _analyze_difficulty_adaptation(
-        self, user_id: str, db: AsyncSession, metrics: LearningMetrics
+        self, context: LearningAnalysisContext, metrics: LearningMetrics
     ) -> dict[str, Any]:
         """分析难度适应性"""
+        # 按题目难度分组答题记录
+        records_by_difficulty: defaultdict[DifficultyLevel, list[TrainingRecord]] = (
+            defaultdict(list)
+        )
+        for record in context.records:
+            if record.question is not None:
+                records_by_difficulty[record.question.difficulty_level].append(record)
+
         difficulty_performance = {}
 
         for difficulty, count in metrics.difficulty_distribution.items():
             if count > 0:
                 # 获取该难度的准确率
-                difficulty_records_query = (
-                    select(TrainingRecord)
-                    .join(Question)
-                    .where(
-                        TrainingRecord.student_id == user_id,
-                        Question.difficulty_level == difficulty,
-                    )
-                )
-                difficulty_records_result = await db.execute(difficulty_records_query)
-                difficulty_records = difficulty_records_result.scalars().all()
+                difficulty_records = records_by_difficulty.get(difficulty, [])
 
                 if difficulty_records:
                     correct = sum(
@@ -560,16 +617,10 @@ async def _analyze_difficulty_adaptation(
         }
 
     async def _analyze_time_patterns(
-        self, user_id: str, db: AsyncSession, start_time: datetime, end_time: datetime
+        self, context: LearningAnalysisContext
     ) -> dict[str, Any]:
         """分析时间模式"""
-        sessions_query = select(TrainingSession).where(
-            TrainingSession.student_id == user_id,
-            TrainingSession.created_at >= start_time,
-            TrainingSession.created_at <= end_time,
-        )
-        sessions_result = await db.execute(sessions_query)
-        sessions = sessions_result.scalars().all()
+        sessions = context.sessions
 
         if not sessions:
             return {"pattern": "no_data"}
@@ -834,55 +885,41 @@ def _generate_overall_assessment(
     async def _calculate_learning_streak(
         self, user_id: str, db: AsyncSession, end_date: datetime
     ) -> int:
-        """计算学习连续天数"""
-        streak = 0
-        current_date = end_date.date()
-
-        for _ in range(365):  # 最多检查一年
-            day_start = datetime.combine(current_date, datetime.min.time())
-            day_end = day_start + timedelta(days=1)
-
-            # 检查当天是否有学习记录
-            daily_query = select(TrainingSession).where(
-                TrainingSession.student_id == user_id,
-                TrainingSession.created_at >= day_start,
-                TrainingSession.created_at < day_end,
+        """计算学习连续天数（最多检查一年，一次查询有学习记录的日期）"""
+        day_bucket = func.date_trunc("day", TrainingSession.created_at, "UTC")
+        days_result = await db.execute(
+            select(day_bucket)
+            .where(
+                TrainingSession.student_id == int(user_id),
+                TrainingSession.created_at >= end_date - timedelta(days=365),
+                TrainingSession.created_at <= end_date,
             )
-            daily_result = await db.execute(daily_query)
-            daily_sessions = daily_result.scalars().all()
+            .distinct()
+        )
+        study_days = {as_utc(day).date() for day in days_result.scalars().all()}
 
-            if daily_sessions:
-                streak += 1
-                current_date -= timedelta(days=1)
-            else:
-                break
+        streak = 0
+        current_date = end_date.date()
+        while current_date in study_days:
+            streak += 1
+            current_date -= timedelta(days=1)
 
         return streak
 
-    async def _calculate_improvement_rate(
-        self, user_id: str, db: AsyncSession, start_time: datetime, end_time: datetime
-    ) -> float:
+    def _calculate_improvement_rate(self, context: LearningAnalysisContext) -> float:
         """计算改进率"""
         # 将时间段分为前后两半
-        mid_time = start_time + (end_time - start_time) / 2
-
-        # 前半段准确率
-        early_records_query = select(TrainingRecord).where(
-            TrainingRecord.student_id == user_id,
-            TrainingRecord.created_at >= start_time,
-            TrainingRecord.created_at < mid_time,
+        mid_time = as_utc(
+            context.start_time + (context.end_time - context.start_time) / 2
         )
-        early_records_result = await db.execute(early_records_query)
-        early_records = early_records_result.scalars().all()
-
-        # 后半段准确率
-        late_records_query = select(TrainingRecord).where(
-            TrainingRecord.student_id == user_id,
-            TrainingRecord.created_at >= mid_time,
-            TrainingRecord.created_at <= end_time,
-        )
-        late_records_result = await db.execute(late_records_query)
-        late_records = late_records_result.scalars().all()
+
+        # 前半段、后半段答题记录
+        early_records = [
+            r for r in context.records if as_utc(r.created_at) < mid_time
+        ]
+        late_records = [
+            r for r in context.records if as_utc(r.created_at) >= mid_time
+        ]
 
         if not early_records or not late_records:
             return 0.0
@@ -1130,7 +1167,8 @@ def get_analytics_summary(self) -> dict[str, Any]:
         return {
             "timestamp": datetime.utcnow().isoformat(),
             "analytics_stats": self.analytics_stats,
-            "cache_size": len(self.analysis_cache),
+            "cache_size": len(self.analysis_cache.cache),
+            "cache_hit_rate": self.analysis_cache.stats.hit_rate,
             "insights_count": len(self.insights_history),
             "recommendations_count": len(self.recommendations_history),
         }
@@ -0,0 +1,310 @@
+"""
+报表查询引擎
+
+将报表模板的列定义（ReportColumn）和过滤条件（ReportFilter）编译为
+一条按维度分组的SQL聚合查询，并通过服务端游标分块读取结果。
+"""
+
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import Float, Integer, Select, case, cast, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import FromClause
+
+from app.shared.models.enums import DifficultyLevel, TrainingType, UserType
+from app.training.models.training_models import TrainingRecord, TrainingSession
+from app.users.models.user_models import User
+
+if TYPE_CHECKING:
+    from app.analytics.services.custom_report_service import (
+        ReportFilter,
+        ReportTemplate,
+        ReportType,
+    )
+
+# 报表查询只做聚合，直接使用表对象构造Core查询，读取时不经过ORM实体处理
+_sessions = TrainingSession.__table__
+_records = TrainingRecord.__table__
+_users = User.__table__
+
+AGGREGATIONS: dict[str, Callable[..., ColumnElement[Any]]] = {
+    "sum": func.sum,
+    "avg": func.avg,
+    "count": func.count,
+    "min": func.min,
+    "max": func.max,
+}
+
+
+class ReportQueryError(ValueError):
+    """报表模板无法编译为查询."""
+
+
+@dataclass(frozen=True)
+class ReportField:
+    """报表可用字段
+
+    aggregation 为空表示维度字段（参与GROUP BY），否则为度量字段的默认聚合方式；
+    ReportColumn.aggregation 可以覆盖默认聚合。
+    """
+
+    expression: ColumnElement[Any]
+    aggregation: str | None = None
+    enum_type: type[Enum] | None = None
+
+
+@dataclass(frozen=True)
+class ReportSource:
+    """报表数据源 - 查询的FROM子句、可用字段和过滤列."""
+
+    from_clause: FromClause
+    fields: dict[str, ReportField]
+    time_column: ColumnElement[Any]
+    user_column: ColumnElement[Any]
+    type_column: ColumnElement[Any] | None = None
+    difficulty_column: ColumnElement[Any] | None = None
+
+
+def _ratio(numerator: ColumnElement[Any], denominator: ColumnElement[Any]) -> Any:
+    """安全除法（分母为0时返回NULL）."""
+    return cast(numerator, Float) / func.nullif(denominator, 0, type_=Float)
+
+
+# 每行计1，count/sum 聚合都得到行数
+_one = literal_column("1", Integer)
+_completed = case((_sessions.c.status == "completed", 1.0), else_=0.0)
+
+# 会话粒度字段 - 学习进度、内容效果报表共用
+_SESSION_FIELDS = {
+    "user_id": ReportField(_sessions.c.student_id),
+    "username": ReportField(_users.c.username),
+    "content_type": ReportField(_sessions.c.session_type, enum_type=TrainingType),
+    "training_type": ReportField(_sessions.c.session_type, enum_type=TrainingType),
+    "difficulty_level": ReportField(
+        _sessions.c.difficulty_level, enum_type=DifficultyLevel
+    ),
+    "study_date": ReportField(func.date_trunc("day", _sessions.c.created_at)),
+    "study_week": ReportField(func.date_trunc("week", _sessions.c.created_at)),
+    "study_month": ReportField(func.date_trunc("month", _sessions.c.created_at)),
+    "total_study_time": ReportField(_sessions.c.time_spent / 3600.0, "sum"),
+    "sessions_count": ReportField(_one, "count"),
+    "total_sessions": ReportField(_one, "count"),
+    "completed_sessions": ReportField(_completed, "sum"),
+    "completion_rate": ReportField(_completed, "avg"),
+    "questions_answered": ReportField(_sessions.c.total_questions, "sum"),
+    "avg_accuracy": ReportField(
+        _ratio(_sessions.c.correct_answers, _sessions.c.total_questions),
+        "avg",
+    ),
+    "progress_score": ReportField(_sessions.c.total_score, "avg"),
+    "effectiveness_score": ReportField(_sessions.c.total_score, "avg"),
+    "avg_score_improvement": ReportField(
+        _ratio(
+            _sessions.c.final_level - _sessions.c.initial_level,
+            _sessions.c.initial_level,
+        ),
+        "avg",
+    ),
+    "engagement_level": ReportField(
+        func.least(
+            _ratio(_sessions.c.time_spent, _sessions.c.time_limit * 60), 1.0
+        ),
+        "avg",
+    ),
+    "last_activity": ReportField(_sessions.c.created_at, "max"),
+}
+
+_SESSION_SOURCE = ReportSource(
+    from_clause=_sessions.join(_users, _users.c.id == _sessions.c.student_id),
+    fields=_SESSION_FIELDS,
+    time_column=_sessions.c.created_at,
+    user_column=_sessions.c.student_id,
+    type_column=_sessions.c.session_type,
+    difficulty_column=_sessions.c.difficulty_level,
+)
+
+# 答题记录粒度字段 - 自定义查询报表
+_RECORD_SOURCE = ReportSource(
+    from_clause=_records.join(
+        _sessions, _sessions.c.id == _records.c.session_id
+    ).join(_users, _users.c.id == _records.c.student_id),
+    fields={
+        "user_id": ReportField(_records.c.student_id),
+        "username": ReportField(_users.c.username),
+        "question_id": ReportField(_records.c.question_id),
+        "session_id": ReportField(_records.c.session_id),
+        "training_type": ReportField(
+            _sessions.c.session_type, enum_type=TrainingType
+        ),
+        "difficulty_level": ReportField(
+            _sessions.c.difficulty_level, enum_type=DifficultyLevel
+        ),
+        "answer_date": ReportField(func.date_trunc("day", _records.c.created_at)),
+        "answer_week": ReportField(func.date_trunc("week", _records.c.created_at)),
+        "answer_month": ReportField(func.date_trunc("month", _records.c.created_at)),
+        "answers_count": ReportField(_one, "count"),
+        "correct_count": ReportField(
+            case((_records.c.is_correct.is_(True), 1), else_=0), "sum"
+        ),
+        "accuracy": ReportField(
+            case((_records.c.is_correct.is_(True), 1.0), else_=0.0), "avg"
+        ),
+        "avg_score": ReportField(_records.c.score, "avg"),
+        "total_time_spent": ReportField(_records.c.time_spent, "sum"),
+        "avg_time_spent": ReportField(_records.c.time_spent, "avg"),
+        "last_answer_at": ReportField(_records.c.created_at, "max"),
+    },
+    time_column=_records.c.created_at,
+    user_column=_records.c.student_id,
+    type_column=_sessions.c.session_type,
+    difficulty_column=_sessions.c.difficulty_level,
+)
+
+# 用户粒度字段 - 用户活动报表
+_USER_SOURCE = ReportSource(
+    from_clause=_users,
+    fields={
+        "user_id": ReportField(_users.c.id),
+        "username": ReportField(_users.c.username),
+        "user_type": ReportField(_users.c.user_type, enum_type=UserType),
+        "is_active": ReportField(_users.c.is_active),
+        "registration_date": ReportField(func.date_trunc("day", _users.c.created_at)),
+        "registration_month": ReportField(func.date_trunc("month", _users.c.created_at)),
+        "user_count": ReportField(_one, "count"),
+        "login_count": ReportField(_users.c.login_count, "sum"),
+        "last_login": ReportField(_users.c.last_login, "max"),
+    },
+    time_column=_users.c.created_at,
+    user_column=_users.c.id,
+)
+
+
+def get_report_source(report_type: "ReportType") -> ReportSource | None:
+    """获取报表类型对应的数据源，非数据库数据源的报表类型返回None."""
+    return {
+        "learning_progress": _SESSION_SOURCE,
+        "content_effectiveness": _SESSION_SOURCE,
+        "user_activity": _USER_SOURCE,
+        "custom_query": _RECORD_SOURCE,
+    }.get(report_type.value)
+
+
+def _coerce_enum(enum_type: type[Enum], value: Any) -> Enum:
+    """将过滤值转换为枚举成员（支持枚举值和枚举名）."""
+    if isinstance(value, enum_type):
+        return value
+    for candidate in (value, str(value).upper()):
+        try:
+            return enum_type(candidate)
+        except ValueError:
+            pass
+        try:
+            return enum_type[str(candidate)]
+        except KeyError:
+            pass
+    if issubclass(enum_type, int) and str(value).isdigit():
+        return enum_type(int(value))
+    raise ReportQueryError(f"无效的过滤值: {value}")
+
+
+def _match(
+    column: ColumnElement[Any], values: Any, enum_type: type[Enum] | None = None
+) -> ColumnElement[bool]:
+    """构造等值或IN条件."""
+    items = list(values) if isinstance(values, list | tuple | set) else [values]
+    if enum_type is not None:
+        items = [_coerce_enum(enum_type, item) for item in items]
+    if len(items) == 1:
+        return column == items[0]
+    return column.in_(items)
+
+
+def compile_report_query(template: "ReportTemplate", filters: "ReportFilter") -> Select:
+    """将报表模板编译为单条分组聚合查询."""
+    source = get_report_source(template.report_type)
+    if source is None:
+        raise ReportQueryError(f"报表类型不支持数据库查询: {template.report_type.value}")
+
+    selected: list[ColumnElement[Any]] = []
+    dimensions: list[ColumnElement[Any]] = []
+    for column in template.columns:
+        if not column.is_visible:
+            continue
+
+        report_field = source.fields.get(column.name)
+        if report_field is None:
+            raise ReportQueryError(f"报表字段不存在: {column.name}")
+
+        aggregation = column.aggregation or report_field.aggregation
+        if aggregation is None:
+            dimensions.append(report_field.expression)
+            selected.append(report_field.expression.label(column.name))
+            continue
+
+        aggregate = AGGREGATIONS.get(aggregation)
+        if aggregate is None:
+            raise ReportQueryError(f"不支持的聚合方式: {aggregation}")
+        selected.append(aggregate(report_field.expression).label(column.name))
+
+    if not selected:
+        raise ReportQueryError("报表模板没有可见列")
+
+    conditions: list[ColumnElement[bool]] = []
+    if filters.start_date:
+        conditions.append(source.time_column >= filters.start_date)
+    if filters.end_date:
+        conditions.append(source.time_column <= filters.end_date)
+    if filters.user_ids:
+        conditions.append(_match(source.user_column, filters.user_ids))
+    if filters.content_types:
+        if source.type_column is None:
+            raise ReportQueryError("该报表不支持按内容类型过滤")
+        conditions.append(
+            _match(source.type_column, filters.content_types, TrainingType)
+        )
+    if filters.difficulty_levels:
+        if source.difficulty_column is None:
+            raise ReportQueryError("该报表不支持按难度过滤")
+        conditions.append(
+            _match(source.difficulty_column, filters.difficulty_levels, DifficultyLevel)
+        )
+    for name, value in filters.custom_filters.items():
+        report_field = source.fields.get(name)
+        if report_field is None or report_field.aggregation is not None:
+            raise ReportQueryError(f"不支持按该字段过滤: {name}")
+        conditions.append(_match(report_field.expression, value, report_field.enum_type))
+
+    query = select(*selected).select_from(source.from_clause).where(*conditions)
+    if dimensions:
+        query = query.group_by(*dimensions).order_by(*dimensions)
+    return query
+
+
+def _normalize_value(value: Any) -> Any:
+    """将数据库返回值转换为可直接导出的值."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+async def stream_report_rows(
+    db: AsyncSession, query: Select, chunk_size: int
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """通过服务端游标分块读取查询结果."""
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+    keys = list(result.keys())
+    async for partition in result.partitions(chunk_size):
+        yield [
+            dict(zip(keys, map(_normalize_value, row), strict=True))
+            for row in partition
+        ]
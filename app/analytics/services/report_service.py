@@ -10,12 +10,23 @@
 from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.analytics.models.rollup_models import (
+    GroupLearningRollup,
+    StudentLearningRollup,
+)
 from app.analytics.schemas.analytics_schemas import (
     ReportRequest,
     ReportResponse,
     UserBehaviorReport,
 )
+from app.analytics.services.rollup_service import (
+    DAY,
+    LearningTotals,
+    as_utc,
+    truncate_bucket,
+)
 from app.analytics.utils.chart_utils import ChartGenerator
+from app.courses.models.course_models import Class
 from app.users.models.user_models import User
 
 logger = logging.getLogger(__name__)
@@ -87,28 +98,26 @@ async def generate_user_behavior_report(
     async def _get_user_statistics(self, base_conditions: list[Any]) -> dict[str, Any]:
         """获取用户统计数据."""
         try:
-            # 总用户数
-            total_users_query = select(func.count(User.id)).where(
-                and_(*base_conditions)
-            )
-            total_users_result = await self.db.execute(total_users_query)
-            total_users = total_users_result.scalar() or 0
-
-            # 按用户类型统计
-            user_type_stats = {}
-            for user_type in ["student", "teacher", "admin"]:
-                type_conditions = base_conditions + [User.user_type == user_type]
-                type_query = select(func.count(User.id)).where(and_(*type_conditions))
-                type_result = await self.db.execute(type_query)
-                user_type_stats[user_type] = type_result.scalar() or 0
-
-            # 活跃用户统计（最近30天有登录）
+            # 按用户类型一次分组统计总数和30天活跃数
             thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            active_users_query = select(func.count(User.id)).where(
-                and_(*base_conditions, User.last_login >= thirty_days_ago)
+            stats_query = (
+                select(
+                    User.user_type,
+                    func.count(User.id),
+                    func.count(User.id).filter(User.last_login >= thirty_days_ago),
+                )
+                .where(and_(*base_conditions))
+                .group_by(User.user_type)
             )
-            active_users_result = await self.db.execute(active_users_query)
-            active_users = active_users_result.scalar() or 0
+            stats_result = await self.db.execute(stats_query)
+
+            user_type_stats = {"student": 0, "teacher": 0, "admin": 0}
+            total_users = 0
+            active_users = 0
+            for user_type, type_count, type_active in stats_result.all():
+                user_type_stats[getattr(user_type, "value", user_type)] = type_count
+                total_users += type_count
+                active_users += type_active
 
             # 新用户增长趋势（按月）
             monthly_growth = await self._get_monthly_user_growth(base_conditions)
@@ -142,27 +151,31 @@ async def _get_user_statistics(self, base_conditions: list[Any]) -> dict[str, An
     async def _get_monthly_user_growth(
         self, base_conditions: list[Any]
     ) -> dict[str, int]:
-        """获取月度用户增长数据."""
-        monthly_growth = {}
-
-        # 获取最近12个月的数据
-        for i in range(12):
-            month_start = datetime.utcnow().replace(day=1) - timedelta(days=30 * i)
-            month_end = (month_start + timedelta(days=32)).replace(day=1)
-
-            month_conditions = base_conditions + [
-                User.created_at >= month_start,
-                User.created_at < month_end,
-            ]
-
-            month_query = select(func.count(User.id)).where(and_(*month_conditions))
-            month_result = await self.db.execute(month_query)
-            month_count = month_result.scalar() or 0
-
-            month_key = month_start.strftime("%Y-%m")
-            monthly_growth[month_key] = month_count
+        """获取月度用户增长数据（最近12个自然月，单次分组查询）."""
+        current_month = datetime.utcnow().replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        month_starts = [current_month]
+        for _ in range(11):
+            month_starts.append((month_starts[-1] - timedelta(days=1)).replace(day=1))
+
+        month_bucket = func.date_trunc("month", User.created_at)
+        month_query = (
+            select(month_bucket, func.count(User.id))
+            .where(and_(*base_conditions, User.created_at >= month_starts[-1]))
+            .group_by(month_bucket)
+        )
+        month_result = await self.db.execute(month_query)
+        month_counts = {
+            month.strftime("%Y-%m"): count for month, count in month_result.all()
+        }
 
-        return monthly_growth
+        return {
+            month_start.strftime("%Y-%m"): month_counts.get(
+                month_start.strftime("%Y-%m"), 0
+            )
+            for month_start in month_starts
+        }
 
     async def _analyze_login_behavior(
         self, base_conditions: list[Any], start_date: datetime, end_date: datetime
@@ -266,14 +279,69 @@ async def _analyze_learning_progress(
     async def _get_user_progress_stats(
         self, base_conditions: list[Any], start_date: datetime, end_date: datetime
     ) -> dict[str, Any]:
-        """获取用户进度统计."""
-        # 在实际实现中，这里会查询用户练习完成记录
-        # 现在返回模拟数据
+        """获取用户进度统计（读取学生天汇总）."""
+        rollup_query = (
+            select(
+                func.count(func.distinct(StudentLearningRollup.student_id)),
+                func.sum(StudentLearningRollup.session_count),
+                func.sum(StudentLearningRollup.completed_session_count),
+                func.sum(StudentLearningRollup.question_count),
+                func.sum(StudentLearningRollup.study_time_spent),
+            )
+            .join(User, User.id == StudentLearningRollup.student_id)
+            .where(
+                and_(*base_conditions),
+                StudentLearningRollup.granularity == DAY,
+                StudentLearningRollup.bucket_start >= truncate_bucket(start_date, DAY),
+                StudentLearningRollup.bucket_start <= as_utc(end_date),
+            )
+        )
+        row = (await self.db.execute(rollup_query)).one()
+        active_users, sessions, completed, questions, study_time = (
+            value or 0 for value in row
+        )
+
+        # 难度分布存放在JSON直方图中，按训练类型分组后合并
+        histogram_query = (
+            select(StudentLearningRollup.difficulty_histogram)
+            .join(User, User.id == StudentLearningRollup.student_id)
+            .where(
+                and_(*base_conditions),
+                StudentLearningRollup.granularity == DAY,
+                StudentLearningRollup.bucket_start >= truncate_bucket(start_date, DAY),
+                StudentLearningRollup.bucket_start <= as_utc(end_date),
+            )
+        )
+        difficulty_totals = LearningTotals()
+        for (histogram,) in (await self.db.execute(histogram_query)).all():
+            difficulty_totals.merge(LearningTotals(difficulty_histogram=histogram or {}))
+
+        difficulty_groups = {"easy": ("1", "2"), "medium": ("3",), "hard": ("4", "5")}
+        difficulty_progression = {}
+        for label, levels in difficulty_groups.items():
+            total = sum(
+                difficulty_totals.difficulty_histogram.get(level, {}).get("total", 0)
+                for level in levels
+            )
+            correct = sum(
+                difficulty_totals.difficulty_histogram.get(level, {}).get("correct", 0)
+                for level in levels
+            )
+            difficulty_progression[label] = (
+                round(correct / total * 100, 1) if total else 0.0
+            )
+
         return {
-            "average_completion_rate": 78.5,
-            "exercises_per_user": 24.3,
-            "time_spent_learning": 125.8,  # 分钟
-            "difficulty_progression": {"easy": 65.2, "medium": 45.8, "hard": 28.9},
+            "average_completion_rate": (
+                round(completed / sessions * 100, 1) if sessions else 0.0
+            ),
+            "exercises_per_user": (
+                round(questions / active_users, 1) if active_users else 0.0
+            ),
+            "time_spent_learning": (
+                round(study_time / 60 / active_users, 1) if active_users else 0.0
+            ),  # 分钟
+            "difficulty_progression": difficulty_progression,
         }
 
     async def _analyze_learning_effectiveness(
@@ -295,24 +363,35 @@ async def _analyze_learning_effectiveness(
     async def _get_completion_trends(
         self, start_date: datetime, end_date: datetime
     ) -> list[dict[str, Any]]:
-        """获取完成趋势."""
-        trends = []
-        current_date = start_date
-
-        while current_date <= end_date:
-            # 模拟每周的完成趋势数据
-            import random
-
-            trends.append(
-                {
-                    "week": current_date.strftime("%Y-W%U"),
-                    "completion_rate": random.uniform(70, 90),
-                    "active_users": random.randint(50, 200),
-                }
+        """获取完成趋势（按周汇总学生天汇总）."""
+        week_bucket = func.date_trunc("week", StudentLearningRollup.bucket_start)
+        trend_query = (
+            select(
+                week_bucket,
+                func.sum(StudentLearningRollup.session_count),
+                func.sum(StudentLearningRollup.completed_session_count),
+                func.count(func.distinct(StudentLearningRollup.student_id)),
+            )
+            .where(
+                StudentLearningRollup.granularity == DAY,
+                StudentLearningRollup.bucket_start >= truncate_bucket(start_date, DAY),
+                StudentLearningRollup.bucket_start <= as_utc(end_date),
             )
-            current_date += timedelta(weeks=1)
+            .group_by(week_bucket)
+            .order_by(week_bucket)
+        )
+        trend_result = await self.db.execute(trend_query)
 
-        return trends
+        return [
+            {
+                "week": week.strftime("%Y-W%U"),
+                "completion_rate": (
+                    round((completed or 0) / sessions * 100, 1) if sessions else 0.0
+                ),
+                "active_users": active_users,
+            }
+            for week, sessions, completed, active_users in trend_result.all()
+        ]
 
     async def _analyze_user_retention(
         self, start_date: datetime, end_date: datetime
@@ -464,7 +543,39 @@ async def _analyze_learning_outcomes(
         self, start_date: datetime, end_date: datetime, teacher_id: int | None
     ) -> dict[str, Any]:
         """分析学习成果."""
+        # 按训练类型汇总班级/课程天汇总，得到各技能正确率
+        skill_query = (
+            select(
+                GroupLearningRollup.training_type,
+                func.sum(GroupLearningRollup.question_count),
+                func.sum(GroupLearningRollup.correct_count),
+            )
+            .where(
+                GroupLearningRollup.granularity == DAY,
+                GroupLearningRollup.bucket_start >= truncate_bucket(start_date, DAY),
+                GroupLearningRollup.bucket_start <= as_utc(end_date),
+            )
+            .group_by(GroupLearningRollup.training_type)
+        )
+        if teacher_id is not None:
+            skill_query = skill_query.where(
+                GroupLearningRollup.scope == "class",
+                GroupLearningRollup.scope_id.in_(
+                    select(Class.id).where(Class.teacher_id == teacher_id)
+                ),
+            )
+        else:
+            skill_query = skill_query.where(GroupLearningRollup.scope == "course")
+
+        skill_result = await self.db.execute(skill_query)
+        skill_development = {
+            training_type: round((correct or 0) / questions * 100, 1)
+            for training_type, questions, correct in skill_result.all()
+            if questions
+        }
+
         return {
+            "skill_development": skill_development,
             "score_improvements": {
                 "average_improvement": 15.8,
                 "improvement_distribution": {
@@ -473,12 +584,6 @@ async def _analyze_learning_outcomes(
                     "minimal": 19.0,  # <10%提升
                 },
             },
-            "skill_development": {
-                "reading": 82.3,
-                "writing": 75.6,
-                "listening": 78.9,
-                "speaking": 71.2,
-            },
             "knowledge_retention": {"short_term": 87.5, "long_term": 72.8},
         }
 
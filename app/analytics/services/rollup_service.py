@@ -0,0 +1,662 @@
+"""学习数据汇总服务 - 维护按小时/天预聚合的学生、班级、课程学习汇总表.
+
+汇总表由定时任务增量维护：每次从水位线之后有变更（created_at/updated_at）的
+训练会话和训练记录中找出受影响的 (学生, 小时) 时间桶，整桶重算学生小时汇总，
+再由小时汇总重算天汇总，最后按班级成员关系重算班级/课程汇总。整桶重算是幂等的，
+重复执行或回填不会重复计数。
+"""
+
+import logging
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any, TypeVar
+
+from sqlalchemy import case, delete, func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analytics.models.rollup_models import (
+    GroupLearningRollup,
+    RollupWatermark,
+    StudentLearningRollup,
+)
+from app.core.config import settings
+from app.courses.models.course_models import Class, ClassStudent
+from app.training.models.training_models import (
+    Question,
+    TrainingRecord,
+    TrainingSession,
+)
+
+logger = logging.getLogger(__name__)
+
+LEARNING_ROLLUP_NAME = "learning_rollups"
+
+HOUR = "hour"
+DAY = "day"
+BUCKET_SPANS = {HOUR: timedelta(hours=1), DAY: timedelta(days=1)}
+
+# (学生ID或班级/课程ID, 时间桶起始时间)
+BucketKey = tuple[int, datetime]
+
+T = TypeVar("T")
+
+# 变更会影响汇总的学习活动表
+ACTIVITY_MODELS: tuple[type[Any], ...] = (TrainingRecord, TrainingSession)
+
+
+def as_utc(value: datetime) -> datetime:
+    """转换为UTC时间（无时区的时间按UTC处理）."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+def truncate_bucket(value: datetime, granularity: str) -> datetime:
+    """截断到时间桶起点（UTC）."""
+    value = as_utc(value).replace(minute=0, second=0, microsecond=0)
+    if granularity == DAY:
+        value = value.replace(hour=0)
+    return value
+
+
+def ceil_bucket(value: datetime, granularity: str) -> datetime:
+    """向上取整到时间桶起点（UTC）."""
+    truncated = truncate_bucket(value, granularity)
+    if truncated < as_utc(value):
+        truncated += BUCKET_SPANS[granularity]
+    return truncated
+
+
+def _chunks(items: Sequence[T], size: int) -> Iterable[Sequence[T]]:
+    for offset in range(0, len(items), size):
+        yield items[offset : offset + size]
+
+
+@dataclass
+class LearningTotals:
+    """学习汇总度量 - 可直接累加合并."""
+
+    session_count: int = 0
+    completed_session_count: int = 0
+    question_count: int = 0
+    correct_count: int = 0
+    answer_time_spent: int = 0
+    study_time_spent: int = 0
+    score_sum: float = 0.0
+    # 难度等级 -> {"total": 答题数, "correct": 答对数}
+    difficulty_histogram: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def accuracy_rate(self) -> float:
+        return self.correct_count / self.question_count if self.question_count else 0.0
+
+    @property
+    def is_active(self) -> bool:
+        return self.session_count > 0 or self.question_count > 0
+
+    def add_answers(
+        self,
+        difficulty: str,
+        count: int,
+        correct: int,
+        time_spent: int,
+        score_sum: float,
+    ) -> None:
+        """累加一组答题记录."""
+        self.question_count += count
+        self.correct_count += correct
+        self.answer_time_spent += time_spent
+        self.score_sum += score_sum
+        bucket = self.difficulty_histogram.setdefault(
+            difficulty, {"total": 0, "correct": 0}
+        )
+        bucket["total"] += count
+        bucket["correct"] += correct
+
+    def add_sessions(self, count: int, completed: int, time_spent: int) -> None:
+        """累加一组训练会话."""
+        self.session_count += count
+        self.completed_session_count += completed
+        self.study_time_spent += time_spent
+
+    def merge(self, other: "LearningTotals") -> None:
+        """合并另一组汇总度量."""
+        self.add_sessions(
+            other.session_count,
+            other.completed_session_count,
+            other.study_time_spent,
+        )
+        self.question_count += other.question_count
+        self.correct_count += other.correct_count
+        self.answer_time_spent += other.answer_time_spent
+        self.score_sum += other.score_sum
+        for difficulty, counts in other.difficulty_histogram.items():
+            bucket = self.difficulty_histogram.setdefault(
+                difficulty, {"total": 0, "correct": 0}
+            )
+            bucket["total"] += counts.get("total", 0)
+            bucket["correct"] += counts.get("correct", 0)
+
+    @classmethod
+    def from_rollup(
+        cls, rollup: StudentLearningRollup | GroupLearningRollup
+    ) -> "LearningTotals":
+        """从汇总表行构建."""
+        return cls(
+            session_count=rollup.session_count,
+            completed_session_count=rollup.completed_session_count,
+            question_count=rollup.question_count,
+            correct_count=rollup.correct_count,
+            answer_time_spent=rollup.answer_time_spent,
+            study_time_spent=rollup.study_time_spent,
+            score_sum=rollup.score_sum,
+            difficulty_histogram={
+                key: dict(value) for key, value in rollup.difficulty_histogram.items()
+            },
+        )
+
+    def to_columns(self) -> dict[str, Any]:
+        """转换为汇总表列值."""
+        return {
+            "session_count": self.session_count,
+            "completed_session_count": self.completed_session_count,
+            "question_count": self.question_count,
+            "correct_count": self.correct_count,
+            "answer_time_spent": self.answer_time_spent,
+            "study_time_spent": self.study_time_spent,
+            "score_sum": self.score_sum,
+            "difficulty_histogram": self.difficulty_histogram,
+        }
+
+
+class LearningRollupService:
+    """学习数据汇总服务."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        """初始化学习数据汇总服务."""
+        self.db = db
+        self.batch_size = settings.LEARNING_ROLLUP_BATCH_SIZE
+
+    # ==================== 汇总维护 ====================
+
+    async def refresh(self, lag_seconds: int | None = None) -> dict[str, Any]:
+        """增量刷新 - 重算水位线之后有数据变更的时间桶并推进水位线."""
+        lag = (
+            settings.LEARNING_ROLLUP_LAG_SECONDS if lag_seconds is None else lag_seconds
+        )
+        now = datetime.now(UTC)
+        high = now - timedelta(seconds=lag)
+
+        watermark = await self._get_watermark()
+        low = watermark.watermark
+        if low is not None and as_utc(low) >= high:
+            return {"previous_watermark": low.isoformat(), "bucket_count": 0}
+
+        hour_keys = await self._changed_hour_buckets(low, high)
+        bucket_count = await self.rebuild_buckets(hour_keys)
+
+        watermark.watermark = high
+        watermark.last_run_at = now
+        watermark.last_bucket_count = bucket_count
+        await self.db.commit()
+
+        logger.info(f"学习汇总增量刷新完成: {bucket_count} 个小时桶, 水位线 {high.isoformat()}")
+        return {
+            "previous_watermark": low.isoformat() if low else None,
+            "watermark": high.isoformat(),
+            "bucket_count": bucket_count,
+        }
+
+    async def backfill(self, start: datetime, end: datetime) -> dict[str, Any]:
+        """回填 - 按数据创建时间重算 [start, end) 内的全部时间桶，不移动水位线.
+
+        已有汇总但原始数据已被删除的时间桶也会被重算（结果为空时删除汇总行）。
+        """
+        start = truncate_bucket(start, HOUR)
+        end = ceil_bucket(end, HOUR)
+
+        hour_keys = await self._hour_buckets_in_range(start, end)
+        existing = await self.db.execute(
+            select(StudentLearningRollup.student_id, StudentLearningRollup.bucket_start)
+            .where(
+                StudentLearningRollup.granularity == HOUR,
+                StudentLearningRollup.bucket_start >= start,
+                StudentLearningRollup.bucket_start < end,
+            )
+            .distinct()
+        )
+        hour_keys.update((row[0], as_utc(row[1])) for row in existing.all())
+
+        bucket_count = await self.rebuild_buckets(hour_keys)
+        await self.db.commit()
+
+        logger.info(f"学习汇总回填完成: {start.isoformat()} ~ {end.isoformat()}, {bucket_count} 个小时桶")
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "bucket_count": bucket_count,
+        }
+
+    async def rebuild_buckets(self, hour_keys: set[BucketKey]) -> int:
+        """重算指定 (学生, 小时) 时间桶及其所属的天汇总和班级/课程汇总."""
+        if not hour_keys:
+            return 0
+
+        sorted_hours = sorted(hour_keys)
+        for chunk in _chunks(sorted_hours, self.batch_size):
+            await self._rebuild_student_buckets(HOUR, chunk)
+
+        day_keys = sorted({(sid, truncate_bucket(b, DAY)) for sid, b in hour_keys})
+        for chunk in _chunks(day_keys, self.batch_size):
+            await self._rebuild_student_buckets(DAY, chunk)
+
+        await self._rebuild_group_buckets(HOUR, sorted_hours)
+        await self._rebuild_group_buckets(DAY, day_keys)
+        return len(hour_keys)
+
+    async def _get_watermark(self) -> RollupWatermark:
+        """获取（必要时创建）汇总水位线，加行锁避免并发刷新."""
+        result = await self.db.execute(
+            select(RollupWatermark)
+            .where(RollupWatermark.name == LEARNING_ROLLUP_NAME)
+            .with_for_update()
+        )
+        watermark = result.scalar_one_or_none()
+        if watermark is None:
+            watermark = RollupWatermark(name=LEARNING_ROLLUP_NAME, last_bucket_count=0)
+            self.db.add(watermark)
+            await self.db.flush()
+        return watermark
+
+    async def get_watermark(self) -> datetime | None:
+        """获取当前水位线."""
+        result = await self.db.execute(
+            select(RollupWatermark.watermark).where(
+                RollupWatermark.name == LEARNING_ROLLUP_NAME
+            )
+        )
+        watermark = result.scalar_one_or_none()
+        return as_utc(watermark) if watermark else None
+
+    async def _changed_hour_buckets(
+        self, low: datetime | None, high: datetime
+    ) -> set[BucketKey]:
+        """查找 (low, high] 内有变更的会话和记录所在的 (学生, 小时) 时间桶."""
+        keys: set[BucketKey] = set()
+        for model in ACTIVITY_MODELS:
+            changed_at = func.coalesce(model.updated_at, model.created_at)
+            stmt = (
+                select(
+                    model.student_id,
+                    func.date_trunc(HOUR, model.created_at, "UTC"),
+                )
+                .where(changed_at <= high)
+                .distinct()
+            )
+            if low is not None:
+                stmt = stmt.where(changed_at > low)
+
+            result = await self.db.execute(stmt)
+            keys.update((row[0], as_utc(row[1])) for row in result.all())
+        return keys
+
+    async def _hour_buckets_in_range(
+        self, start: datetime, end: datetime
+    ) -> set[BucketKey]:
+        """查找 [start, end) 内创建的会话和记录所在的 (学生, 小时) 时间桶."""
+        keys: set[BucketKey] = set()
+        for model in ACTIVITY_MODELS:
+            result = await self.db.execute(
+                select(
+                    model.student_id,
+                    func.date_trunc(HOUR, model.created_at, "UTC"),
+                )
+                .where(model.created_at >= start, model.created_at < end)
+                .distinct()
+            )
+            keys.update((row[0], as_utc(row[1])) for row in result.all())
+        return keys
+
+    async def aggregate_raw(
+        self,
+        student_ids: Iterable[int],
+        start: datetime,
+        end: datetime,
+        granularity: str | None = None,
+        keys: Sequence[BucketKey] | None = None,
+    ) -> dict[tuple[int, datetime | None, str], LearningTotals]:
+        """在数据库中聚合原始会话和记录.
+
+        Args:
+            student_ids: 学生ID
+            start: 开始时间（包含）
+            end: 结束时间（不包含）
+            granularity: 时间桶粒度，为None时不按时间分组
+            keys: 只聚合这些 (学生, 时间桶)
+
+        Returns:
+            (学生ID, 时间桶, 训练类型) -> 汇总度量
+        """
+        students = list(set(student_ids))
+        totals: dict[tuple[int, datetime | None, str], LearningTotals] = defaultdict(
+            LearningTotals
+        )
+
+        # 答题记录：按学生、时间桶、训练类型、题目难度分组
+        record_bucket = (
+            func.date_trunc(granularity, TrainingRecord.created_at, "UTC")
+            if granularity
+            else None
+        )
+        record_groups: list[Any] = [
+            TrainingRecord.student_id,
+            TrainingSession.session_type,
+            Question.difficulty_level,
+        ]
+        if record_bucket is not None:
+            record_groups.append(record_bucket)
+
+        record_stmt = (
+            select(
+                *record_groups,
+                func.count(TrainingRecord.id),
+                func.sum(case((TrainingRecord.is_correct.is_(True), 1), else_=0)),
+                func.coalesce(func.sum(TrainingRecord.time_spent), 0),
+                func.coalesce(func.sum(TrainingRecord.score), 0.0),
+            )
+            .join(TrainingSession, TrainingSession.id == TrainingRecord.session_id)
+            .outerjoin(Question, Question.id == TrainingRecord.question_id)
+            .where(
+                TrainingRecord.student_id.in_(students),
+                TrainingRecord.created_at >= start,
+                TrainingRecord.created_at < end,
+            )
+            .group_by(*record_groups)
+        )
+        if keys and record_bucket is not None:
+            record_stmt = record_stmt.where(
+                tuple_(TrainingRecord.student_id, record_bucket).in_(keys)
+            )
+
+        for row in (await self.db.execute(record_stmt)).all():
+            student_id, training_type, difficulty = row[0], row[1], row[2]
+            bucket = as_utc(row[3]) if record_bucket is not None else None
+            count, correct, time_spent, score_sum = row[-4:]
+            totals[(student_id, bucket, _enum_value(training_type))].add_answers(
+                str(_enum_value(difficulty)) if difficulty is not None else "unknown",
+                int(count),
+                int(correct or 0),
+                int(time_spent or 0),
+                float(score_sum or 0.0),
+            )
+
+        # 训练会话：按学生、时间桶、训练类型分组
+        session_bucket = (
+            func.date_trunc(granularity, TrainingSession.created_at, "UTC")
+            if granularity
+            else None
+        )
+        session_groups: list[Any] = [
+            TrainingSession.student_id,
+            TrainingSession.session_type,
+        ]
+        if session_bucket is not None:
+            session_groups.append(session_bucket)
+
+        session_stmt = (
+            select(
+                *session_groups,
+                func.count(TrainingSession.id),
+                func.sum(case((TrainingSession.status == "completed", 1), else_=0)),
+                func.coalesce(func.sum(TrainingSession.time_spent), 0),
+            )
+            .where(
+                TrainingSession.student_id.in_(students),
+                TrainingSession.created_at >= start,
+                TrainingSession.created_at < end,
+            )
+            .group_by(*session_groups)
+        )
+        if keys and session_bucket is not None:
+            session_stmt = session_stmt.where(
+                tuple_(TrainingSession.student_id, session_bucket).in_(keys)
+            )
+
+        for row in (await self.db.execute(session_stmt)).all():
+            student_id, training_type = row[0], row[1]
+            bucket = as_utc(row[2]) if session_bucket is not None else None
+            count, completed, time_spent = row[-3:]
+            totals[(student_id, bucket, _enum_value(training_type))].add_sessions(
+                int(count), int(completed or 0), int(time_spent or 0)
+            )
+
+        return dict(totals)
+
+    async def _rebuild_student_buckets(
+        self, granularity: str, keys: Sequence[BucketKey]
+    ) -> None:
+        """整桶重算学生汇总（小时汇总读原始数据，天汇总读小时汇总）."""
+        students = {sid for sid, _ in keys}
+        start = min(bucket for _, bucket in keys)
+        end = max(bucket for _, bucket in keys) + BUCKET_SPANS[granularity]
+
+        if granularity == HOUR:
+            totals = await self.aggregate_raw(students, start, end, HOUR, keys)
+        else:
+            totals = defaultdict(LearningTotals)
+            day_expr = func.date_trunc(DAY, StudentLearningRollup.bucket_start, "UTC")
+            result = await self.db.execute(
+                select(StudentLearningRollup).where(
+                    StudentLearningRollup.granularity == HOUR,
+                    StudentLearningRollup.student_id.in_(students),
+                    StudentLearningRollup.bucket_start >= start,
+                    StudentLearningRollup.bucket_start < end,
+                    tuple_(StudentLearningRollup.student_id, day_expr).in_(keys),
+                )
+            )
+            for rollup in result.scalars().all():
+                totals[
+                    (
+                        rollup.student_id,
+                        truncate_bucket(rollup.bucket_start, DAY),
+                        rollup.training_type,
+                    )
+                ].merge(LearningTotals.from_rollup(rollup))
+
+        await self.db.execute(
+            delete(StudentLearningRollup).where(
+                StudentLearningRollup.granularity == granularity,
+                StudentLearningRollup.student_id.in_(students),
+                StudentLearningRollup.bucket_start >= start,
+                StudentLearningRollup.bucket_start < end,
+                tuple_(
+                    StudentLearningRollup.student_id, StudentLearningRollup.bucket_start
+                ).in_(keys),
+            )
+        )
+
+        rows = [
+            {
+                "granularity": granularity,
+                "student_id": student_id,
+                "bucket_start": bucket,
+                "training_type": training_type,
+                **item.to_columns(),
+            }
+            for (student_id, bucket, training_type), item in totals.items()
+            if item.is_active
+        ]
+        if rows:
+            await self.db.execute(insert(StudentLearningRollup), rows)
+
+    async def _rebuild_group_buckets(
+        self, granularity: str, student_keys: Sequence[BucketKey]
+    ) -> None:
+        """按班级成员关系重算受影响学生所在班级和课程的汇总."""
+        students = sorted({sid for sid, _ in student_keys})
+        memberships: dict[int, list[tuple[int, int]]] = defaultdict(list)
+        for chunk in _chunks(students, self.batch_size):
+            result = await self.db.execute(
+                select(ClassStudent.student_id, ClassStudent.class_id, Class.course_id)
+                .join(Class, Class.id == ClassStudent.class_id)
+                .where(ClassStudent.student_id.in_(chunk))
+            )
+            for student_id, class_id, course_id in result.all():
+                memberships[student_id].append((class_id, course_id))
+
+        if not memberships:
+            return
+
+        class_keys = sorted(
+            {
+                (class_id, bucket)
+                for sid, bucket in student_keys
+                for class_id, _ in memberships.get(sid, ())
+            }
+        )
+        course_keys = sorted(
+            {
+                (course_id, bucket)
+                for sid, bucket in student_keys
+                for _, course_id in memberships.get(sid, ())
+            }
+        )
+
+        for scope, scope_keys in (("class", class_keys), ("course", course_keys)):
+            for key_chunk in _chunks(scope_keys, self.batch_size):
+                await self._rebuild_scope_chunk(scope, granularity, key_chunk)
+
+    async def _rebuild_scope_chunk(
+        self, scope: str, granularity: str, keys: Sequence[BucketKey]
+    ) -> None:
+        """整桶重算一批班级或课程汇总."""
+        scope_ids = {scope_id for scope_id, _ in keys}
+        start = min(bucket for _, bucket in keys)
+        end = max(bucket for _, bucket in keys) + BUCKET_SPANS[granularity]
+        scope_column = ClassStudent.class_id if scope == "class" else Class.course_id
+
+        result = await self.db.execute(
+            select(StudentLearningRollup, scope_column)
+            .join(ClassStudent, ClassStudent.student_id == StudentLearningRollup.student_id)
+            .join(Class, Class.id == ClassStudent.class_id)
+            .where(
+                StudentLearningRollup.granularity == granularity,
+                StudentLearningRollup.bucket_start >= start,
+                StudentLearningRollup.bucket_start < end,
+                scope_column.in_(scope_ids),
+                tuple_(scope_column, StudentLearningRollup.bucket_start).in_(keys),
+            )
+        )
+
+        totals: dict[tuple[int, datetime, str], LearningTotals] = defaultdict(
+            LearningTotals
+        )
+        active_students: dict[tuple[int, datetime, str], set[int]] = defaultdict(set)
+        seen: set[tuple[int, int]] = set()
+        for rollup, scope_id in result.all():
+            # 学生在同一课程的多个班级中时只计一次
+            if (scope_id, rollup.id) in seen:
+                continue
+            seen.add((scope_id, rollup.id))
+
+            key = (scope_id, as_utc(rollup.bucket_start), rollup.training_type)
+            totals[key].merge(LearningTotals.from_rollup(rollup))
+            active_students[key].add(rollup.student_id)
+
+        await self.db.execute(
+            delete(GroupLearningRollup).where(
+                GroupLearningRollup.scope == scope,
+                GroupLearningRollup.granularity == granularity,
+                GroupLearningRollup.scope_id.in_(scope_ids),
+                GroupLearningRollup.bucket_start >= start,
+                GroupLearningRollup.bucket_start < end,
+                tuple_(
+                    GroupLearningRollup.scope_id, GroupLearningRollup.bucket_start
+                ).in_(keys),
+            )
+        )
+
+        rows = [
+            {
+                "scope": scope,
+                "scope_id": scope_id,
+                "granularity": granularity,
+                "bucket_start": bucket,
+                "training_type": training_type,
+                "active_students": len(active_students[(scope_id, bucket, training_type)]),
+                **item.to_columns(),
+            }
+            for (scope_id, bucket, training_type), item in totals.items()
+        ]
+        if rows:
+            await self.db.execute(insert(GroupLearningRollup), rows)
+
+    # ==================== 汇总查询 ====================
+
+    async def get_student_totals(
+        self, student_id: int, start: datetime, end: datetime
+    ) -> dict[str, LearningTotals]:
+        """按训练类型获取学生在时间范围内的学习汇总.
+
+        水位线之前的完整时间桶读取汇总表（整天读天汇总，首尾不足一天读小时汇总），
+        不足一小时的首尾部分和水位线之后的数据直接在数据库中聚合原始数据。
+        """
+        start, end = as_utc(start), as_utc(end)
+        watermark = await self.get_watermark()
+
+        rollup_start = ceil_bucket(start, HOUR)
+        rollup_end = truncate_bucket(end, HOUR)
+        if watermark is not None:
+            rollup_end = min(rollup_end, truncate_bucket(watermark, HOUR))
+
+        totals: dict[str, LearningTotals] = defaultdict(LearningTotals)
+        if watermark is None or rollup_end <= rollup_start:
+            raw_ranges = [(start, end)]
+        else:
+            raw_ranges = [(start, rollup_start), (rollup_end, end)]
+            for granularity, range_start, range_end in _split_rollup_range(
+                rollup_start, rollup_end
+            ):
+                result = await self.db.execute(
+                    select(StudentLearningRollup).where(
+                        StudentLearningRollup.granularity == granularity,
+                        StudentLearningRollup.student_id == student_id,
+                        StudentLearningRollup.bucket_start >= range_start,
+                        StudentLearningRollup.bucket_start < range_end,
+                    )
+                )
+                for rollup in result.scalars().all():
+                    totals[rollup.training_type].merge(LearningTotals.from_rollup(rollup))
+
+        for range_start, range_end in raw_ranges:
+            if range_end <= range_start:
+                continue
+            raw = await self.aggregate_raw([student_id], range_start, range_end)
+            for (_, _, training_type), item in raw.items():
+                totals[training_type].merge(item)
+
+        return dict(totals)
+
+
+def _split_rollup_range(
+    start: datetime, end: datetime
+) -> list[tuple[str, datetime, datetime]]:
+    """将整点时间范围拆分为整天部分（读天汇总）和首尾小时部分（读小时汇总）."""
+    day_start = ceil_bucket(start, DAY)
+    day_end = truncate_bucket(end, DAY)
+    if day_end <= day_start:
+        return [(HOUR, start, end)]
+
+    ranges = [(DAY, day_start, day_end)]
+    if start < day_start:
+        ranges.append((HOUR, start, day_start))
+    if day_end < end:
+        ranges.append((HOUR, day_end, end))
+    return ranges
+
+
+def _enum_value(value: Any) -> Any:
+    """取枚举值（数据库返回的可能是枚举或原始值）."""
+    return getattr(value, "value", value)
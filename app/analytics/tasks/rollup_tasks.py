@@ -0,0 +1,67 @@
+"""学习数据汇总定时任务."""
+
+import logging
+from datetime import UTC, date, datetime, time, timedelta
+from typing import Any
+
+from celery import shared_task
+
+from app.analytics.services.rollup_service import LearningRollupService
+from app.shared.tasks.async_task import AsyncTask
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, base=AsyncTask, name="analytics.refresh_learning_rollups")
+def refresh_learning_rollups(self: AsyncTask) -> dict[str, Any]:
+    """增量刷新学习汇总表 - 只重算水位线之后有变更的时间桶."""
+    try:
+
+        async def _refresh() -> dict[str, Any]:
+            async with self.session() as db:
+                return await LearningRollupService(db).refresh()
+
+        result = self.run_async(_refresh())
+        logger.info(f"学习汇总增量刷新完成: {result}")
+        return {"status": "success", **result}
+
+    except Exception as e:
+        logger.error(f"学习汇总增量刷新失败: {str(e)}")
+        return {"status": "failed", "error": str(e)}
+
+
+@shared_task(bind=True, base=AsyncTask, name="analytics.backfill_learning_rollups")
+def backfill_learning_rollups(
+    self: AsyncTask, start_date: str, end_date: str
+) -> dict[str, Any]:
+    """回填学习汇总表 - 按天逐段重算 [start_date, end_date] 内的时间桶."""
+    try:
+        current = date.fromisoformat(start_date)
+        last = date.fromisoformat(end_date)
+
+        async def _backfill_day(day: date) -> dict[str, Any]:
+            start = datetime.combine(day, time.min, tzinfo=UTC)
+            async with self.session() as db:
+                return await LearningRollupService(db).backfill(
+                    start, start + timedelta(days=1)
+                )
+
+        day_count = 0
+        bucket_count = 0
+        while current <= last:
+            # 每天单独提交，避免长事务并允许中断后从失败的日期继续
+            result = self.run_async(_backfill_day(current))
+            bucket_count += result.get("bucket_count", 0)
+            day_count += 1
+            current += timedelta(days=1)
+
+        logger.info(f"学习汇总回填完成: {day_count}天, {bucket_count}个时间桶")
+        return {
+            "status": "success",
+            "day_count": day_count,
+            "bucket_count": bucket_count,
+        }
+
+    except Exception as e:
+        logger.error(f"学习汇总回填失败: {str(e)}")
+        return {"status": "failed", "error": str(e)}
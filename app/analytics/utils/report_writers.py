@@ -0,0 +1,243 @@
+"""
+报表流式写入器
+
+报表数据按块写入文件，写入器只持有当前块，内存占用与报表总行数无关。
+支持 CSV、JSON、JSON Lines、HTML 和 Parquet（需安装 pyarrow）。
+"""
+
+import csv
+import html
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, TextIO
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+def _json_default(value: Any) -> Any:
+    """JSON序列化无法直接处理的值."""
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+class ReportWriter:
+    """报表写入器基类."""
+
+    def __init__(self, file_path: Path, columns: list[str]) -> None:
+        self.file_path = file_path
+        self.columns = columns
+        self.row_count = 0
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        """写入一块数据."""
+        raise NotImplementedError
+
+    def close(self, report_info: dict[str, Any]) -> None:
+        """写入尾部信息并关闭文件."""
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        """生成失败时关闭并删除未完成的文件."""
+        try:
+            self.close({})
+        except Exception:
+            pass
+        self.file_path.unlink(missing_ok=True)
+
+
+class _TextReportWriter(ReportWriter):
+    """基于文本文件的写入器."""
+
+    def __init__(self, file_path: Path, columns: list[str]) -> None:
+        super().__init__(file_path, columns)
+        self.file: TextIO = open(file_path, "w", newline="", encoding="utf-8")
+
+    def close(self, report_info: dict[str, Any]) -> None:
+        if not self.file.closed:
+            self.file.close()
+
+
+class CSVReportWriter(_TextReportWriter):
+    """CSV写入器."""
+
+    def __init__(self, file_path: Path, columns: list[str]) -> None:
+        super().__init__(file_path, columns)
+        self.writer = csv.DictWriter(self.file, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        self.writer.writerows(rows)
+        self.row_count += len(rows)
+
+
+class JSONLinesReportWriter(_TextReportWriter):
+    """JSON Lines写入器 - 每行一条记录."""
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        self.file.writelines(
+            json.dumps(row, ensure_ascii=False, default=_json_default) + "\n"
+            for row in rows
+        )
+        self.row_count += len(rows)
+
+
+class JSONReportWriter(_TextReportWriter):
+    """JSON写入器 - 数据数组流式写出，报表信息和图表在关闭时写入."""
+
+    def __init__(self, file_path: Path, columns: list[str]) -> None:
+        super().__init__(file_path, columns)
+        self.file.write('{\n  "data": [')
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        for row in rows:
+            self.file.write(",\n    " if self.row_count else "\n    ")
+            self.file.write(json.dumps(row, ensure_ascii=False, default=_json_default))
+            self.row_count += 1
+
+    def close(self, report_info: dict[str, Any]) -> None:
+        if self.file.closed:
+            return
+
+        charts = report_info.get("charts", [])
+        info = {key: value for key, value in report_info.items() if key != "charts"}
+        self.file.write("\n  ],\n")
+        for key, value in (("report_info", info), ("charts", charts)):
+            content = json.dumps(
+                value, ensure_ascii=False, indent=2, default=_json_default
+            ).replace("\n", "\n  ")
+            separator = ",\n" if key == "report_info" else "\n"
+            self.file.write(f'  "{key}": {content}{separator}')
+        self.file.write("}\n")
+        super().close(report_info)
+
+
+class HTMLReportWriter(_TextReportWriter):
+    """HTML写入器 - 表格行流式写出."""
+
+    def __init__(self, file_path: Path, columns: list[str], title: str = "") -> None:
+        super().__init__(file_path, columns)
+        header_cells = "".join(f"<th>{html.escape(column)}</th>" for column in columns)
+        self.file.write(
+            f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>{html.escape(title)}</title>
+    <meta charset="utf-8">
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; }}
+        table {{ border-collapse: collapse; width: 100%; }}
+        th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
+        th {{ background-color: #f2f2f2; }}
+        .header {{ margin-bottom: 20px; }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>{html.escape(title)}</h1>
+    </div>
+
+    <h2>数据表格</h2>
+    <table>
+        <tr>{header_cells}</tr>
+"""
+        )
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        self.file.writelines(
+            "        <tr>"
+            + "".join(
+                f"<td>{html.escape(str(row.get(column, '')))}</td>"
+                for column in self.columns
+            )
+            + "</tr>\n"
+            for row in rows
+        )
+        self.row_count += len(rows)
+
+    def close(self, report_info: dict[str, Any]) -> None:
+        if self.file.closed:
+            return
+
+        generated_at = report_info.get("generated_at", "")
+        generation_time = report_info.get("generation_time", 0.0)
+        self.file.write(
+            f"""    </table>
+    <p>共 {self.row_count} 行</p>
+    <p>生成时间: {html.escape(str(generated_at))}</p>
+    <p>生成耗时: {generation_time:.2f}秒</p>
+</body>
+</html>
+"""
+        )
+        super().close(report_info)
+
+
+class ParquetReportWriter(ReportWriter):
+    """Parquet写入器 - 每块数据写为一个行组."""
+
+    ARROW_TYPES = {
+        "number": "float64",
+        "string": "string",
+        "boolean": "bool",
+    }
+
+    def __init__(
+        self, file_path: Path, columns: list[str], data_types: dict[str, str]
+    ) -> None:
+        if not PARQUET_AVAILABLE:
+            raise ValueError("未安装pyarrow，无法导出Parquet格式")
+
+        super().__init__(file_path, columns)
+        self.schema = pa.schema(
+            [
+                (
+                    column,
+                    pa.timestamp("us", tz="UTC")
+                    if data_types.get(column) == "date"
+                    else pa.type_for_alias(
+                        self.ARROW_TYPES.get(data_types.get(column, ""), "string")
+                    ),
+                )
+                for column in columns
+            ]
+        )
+        self.writer = pq.ParquetWriter(str(file_path), self.schema)
+
+    def _convert(self, column: str, value: Any) -> Any:
+        """按列类型转换数值，无法转换的字符串列统一转为字符串."""
+        if value is None:
+            return None
+        field_type = self.schema.field(column).type
+        if pa.types.is_string(field_type) and not isinstance(value, str):
+            return str(value)
+        if pa.types.is_floating(field_type):
+            return float(value)
+        return value
+
+    def write_rows(self, rows: list[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        table = pa.Table.from_pydict(
+            {
+                column: [self._convert(column, row.get(column)) for row in rows]
+                for column in self.columns
+            },
+            schema=self.schema,
+        )
+        self.writer.write_table(table)
+        self.row_count += len(rows)
+
+    def close(self, report_info: dict[str, Any]) -> None:
+        if self.writer.is_open:
+            self.writer.close()
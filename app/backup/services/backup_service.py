@@ -1,13 +1,17 @@
 """数据备份服务 - 提供完整的数据库备份功能."""
 
+import asyncio
 import json
 import logging
 import os
+import shutil
+import tempfile
 import uuid
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.analytics.schemas.analytics_schemas import (
@@ -17,11 +21,14 @@
     BackupStatistics,
 )
 from app.backup.utils.backup_utils import (
+    COMPRESSION_EXTENSIONS,
     BackupCompression,
     BackupEncryption,
     BackupStorageManager,
     BackupValidator,
     DatabaseDumper,
+    StreamingBackupWriter,
+    archive_dump_directory,
 )
 from app.core.config import settings
 
@@ -128,61 +135,50 @@ def __init__(self, db_session: AsyncSession) -> None:
             }
         )
 
-    async def create_backup(self, request: BackupRequest) -> BackupInfo:
-        """创建数据库备份."""
+    async def create_backup(
+        self,
+        request: BackupRequest,
+        parent_backup: BackupInfo | None = None,
+        table_watermarks: dict[str, list[int]] | None = None,
+    ) -> BackupInfo:
+        """创建数据库备份.
+
+        parent_backup 不为空时创建增量备份：只导出 request.tables 中发生变化的表数据，
+        并在元数据清单中记录备份链关系。
+        """
         backup_id = str(uuid.uuid4())
         logger.info(f"开始创建备份: {backup_id} (类型: {request.backup_type})")
 
+        dump_format = settings.BACKUP_DUMP_FORMAT
+        if parent_backup is not None:
+            dump_format = parent_backup.dump_format
+
         try:
             # 生成备份文件路径
             backup_path = self.storage_manager.organize_backup_path(
                 backup_id, request.backup_type
             )
 
-            # 创建数据库备份
-            dump_result = self.db_dumper.create_postgresql_dump(
-                backup_path,
-                tables=request.tables if request.tables else None,
-                data_only=request.backup_type == "data_only",
-                schema_only=request.backup_type == "schema_only",
-            )
-
-            if not dump_result["success"]:
-                raise Exception(dump_result["error"])
+            # 导出前记录表变更水位，导出期间的修改会被下一次增量备份捕获
+            if table_watermarks is None:
+                table_watermarks = await self.collect_table_watermarks()
 
-            final_path = backup_path
-            compression_ratio = None
+            encryption = BackupEncryption() if request.encryption else None
 
-            # 压缩处理
-            if request.compression:
-                compressed_path = f"{backup_path}.gz"
-                compression_result = BackupCompression.compress_file(
-                    backup_path, compressed_path
+            if dump_format == "directory":
+                dump_result = await self._create_directory_backup(
+                    backup_path,
+                    request,
+                    encryption,
+                    data_only=parent_backup is not None,
+                )
+            else:
+                dump_result = await self._create_plain_backup(
+                    backup_path, request, encryption
                 )
-                compression_ratio = compression_result["compression_ratio"]
-
-                # 删除原始文件，使用压缩文件
-                os.unlink(backup_path)
-                final_path = compressed_path
-
-            # 加密处理
-            if request.encryption:
-                encryption = BackupEncryption()
-                encrypted_path = f"{final_path}.enc"
-                encryption.encrypt_file(final_path, encrypted_path)
-
-                # 保存加密密钥（在实际项目中应该安全存储）
-                key_path = f"{encrypted_path}.key"
-                with open(key_path, "wb") as key_file:
-                    key_file.write(encryption.key)
-
-                # 删除未加密文件，使用加密文件
-                os.unlink(final_path)
-                final_path = encrypted_path
 
-            # 计算文件校验和
-            checksum = BackupValidator.calculate_checksum(final_path)
-            file_size = os.path.getsize(final_path)
+            final_path = dump_result["file_path"]
+            file_size = dump_result["file_size"]
 
             # 创建备份信息
             backup_info = BackupInfo(
@@ -190,17 +186,26 @@ async def create_backup(self, request: BackupRequest) -> BackupInfo:
                 backup_type=request.backup_type,
                 file_path=final_path,
                 file_size=file_size,
-                checksum=checksum,
+                checksum=dump_result["checksum"],
                 created_at=datetime.now(),
                 expires_at=datetime.now() + timedelta(days=30),  # 默认30天过期
                 status="completed",
                 tables_included=request.tables or ["all"],
-                compression_ratio=compression_ratio,
+                compression_ratio=dump_result["compression_ratio"],
                 encryption_enabled=request.encryption,
+                dump_format=dump_format,
+                parent_backup_id=parent_backup.backup_id if parent_backup else None,
+                base_backup_id=(
+                    (parent_backup.base_backup_id or parent_backup.backup_id)
+                    if parent_backup
+                    else None
+                ),
             )
 
             # 保存备份元数据
-            await self._save_backup_metadata(backup_info, request.description)
+            await self._save_backup_metadata(
+                backup_info, request.description, table_watermarks
+            )
 
             logger.info(f"备份创建成功: {backup_id} (文件大小: {file_size / 1024 / 1024:.2f} MB)")
             return backup_info
@@ -220,14 +225,168 @@ async def create_backup(self, request: BackupRequest) -> BackupInfo:
                 tables_included=request.tables or [],
                 compression_ratio=None,
                 encryption_enabled=request.encryption,
+                dump_format=dump_format,
+                parent_backup_id=parent_backup.backup_id if parent_backup else None,
+                base_backup_id=(
+                    (parent_backup.base_backup_id or parent_backup.backup_id)
+                    if parent_backup
+                    else None
+                ),
             )
             await self._save_backup_metadata(backup_info, str(e))
             raise e
 
+    async def _create_plain_backup(
+        self,
+        backup_path: str,
+        request: BackupRequest,
+        encryption: BackupEncryption | None,
+    ) -> dict[str, Any]:
+        """单遍流式备份：pg_dump输出 → 压缩 → 分块加密 → 文件，同步计算校验和."""
+        compression = (
+            BackupCompression.resolve_algorithm(settings.BACKUP_COMPRESSION_ALGORITHM)
+            if request.compression
+            else None
+        )
+        final_path = backup_path
+        if compression:
+            final_path += COMPRESSION_EXTENSIONS[compression]
+        if encryption is not None:
+            final_path += ".enc"
+            self._save_encryption_key(final_path, encryption)
+
+        writer = StreamingBackupWriter(
+            final_path,
+            compression=compression,
+            compression_level=settings.BACKUP_COMPRESSION_LEVEL,
+            compression_threads=settings.BACKUP_COMPRESSION_THREADS,
+            encryption=encryption,
+            chunk_size=settings.BACKUP_STREAM_CHUNK_SIZE,
+        )
+        dump_result = await asyncio.to_thread(
+            self.db_dumper.stream_postgresql_dump,
+            writer,
+            tables=request.tables if request.tables else None,
+            data_only=request.backup_type == "data_only",
+            schema_only=request.backup_type == "schema_only",
+            chunk_size=settings.BACKUP_STREAM_CHUNK_SIZE,
+        )
+
+        if not dump_result["success"]:
+            self._remove_encryption_key(final_path)
+            raise Exception(dump_result["error"])
+
+        return dump_result
+
+    async def _create_directory_backup(
+        self,
+        backup_path: str,
+        request: BackupRequest,
+        encryption: BackupEncryption | None,
+        data_only: bool = False,
+    ) -> dict[str, Any]:
+        """目录格式并行备份：pg_dump -Fd -j N 后打包为单个（可加密的）归档文件."""
+        final_path = f"{backup_path}.tar"
+        if encryption is not None:
+            final_path += ".enc"
+            self._save_encryption_key(final_path, encryption)
+
+        dump_dir = tempfile.mkdtemp(
+            prefix="dump_", dir=str(self.storage_manager.base_path)
+        )
+        try:
+            # pg_dump要求目标目录不存在
+            os.rmdir(dump_dir)
+            dump_result = await asyncio.to_thread(
+                self.db_dumper.create_directory_dump,
+                dump_dir,
+                tables=request.tables if request.tables else None,
+                jobs=settings.BACKUP_DUMP_JOBS,
+                data_only=data_only or request.backup_type == "data_only",
+                schema_only=request.backup_type == "schema_only",
+                compression_level=(
+                    settings.BACKUP_COMPRESSION_LEVEL if request.compression else 0
+                ),
+            )
+            if not dump_result["success"]:
+                raise Exception(dump_result["error"])
+
+            # 目录内的表数据已由pg_dump压缩，归档时只做加密和校验
+            writer = StreamingBackupWriter(
+                final_path,
+                compression=None,
+                encryption=encryption,
+                chunk_size=settings.BACKUP_STREAM_CHUNK_SIZE,
+            )
+            try:
+                await asyncio.to_thread(archive_dump_directory, dump_dir, writer)
+            except Exception:
+                writer.abort()
+                raise
+            stream_stats = writer.close()
+
+            return {
+                "file_path": final_path,
+                "file_size": stream_stats["file_size"],
+                "checksum": stream_stats["checksum"],
+                "compression_ratio": None,
+                "duration": dump_result["duration"],
+            }
+
+        except Exception:
+            self._remove_encryption_key(final_path)
+            raise
+        finally:
+            shutil.rmtree(dump_dir, ignore_errors=True)
+
+    @staticmethod
+    def _save_encryption_key(backup_file_path: str, encryption: BackupEncryption) -> None:
+        """保存加密密钥（在实际项目中应该安全存储）."""
+        with open(f"{backup_file_path}.key", "wb") as key_file:
+            key_file.write(encryption.key)
+
+    @staticmethod
+    def _remove_encryption_key(backup_file_path: str) -> None:
+        """删除失败备份遗留的密钥文件."""
+        key_path = f"{backup_file_path}.key"
+        if os.path.exists(key_path):
+            os.unlink(key_path)
+
+    async def collect_table_watermarks(self) -> dict[str, list[int]]:
+        """采集每张表的变更水位（插入/更新/删除累计数和存活行数）.
+
+        基于 pg_stat_user_tables 的累计计数器，代价与表数量相关而与数据量无关；
+        计数器被重置时水位必然变化，最多导致多导出一张表，不会漏备份。
+        """
+        try:
+            result = await self.db.execute(
+                text(
+                    """
+                    SELECT schemaname, relname, n_tup_ins, n_tup_upd, n_tup_del, n_live_tup
+                    FROM pg_stat_user_tables
+                    """
+                )
+            )
+            return {
+                f"{row.schemaname}.{row.relname}": [
+                    int(row.n_tup_ins),
+                    int(row.n_tup_upd),
+                    int(row.n_tup_del),
+                    int(row.n_live_tup),
+                ]
+                for row in result
+            }
+        except Exception as e:
+            logger.warning(f"采集表变更水位失败: {e}")
+            return {}
+
     async def _save_backup_metadata(
-        self, backup_info: BackupInfo, description: str | None = None
+        self,
+        backup_info: BackupInfo,
+        description: str | None = None,
+        table_watermarks: dict[str, list[int]] | None = None,
     ) -> None:
-        """保存备份元数据."""
+        """保存备份元数据（备份清单）."""
         try:
             metadata = {
                 "backup_id": backup_info.backup_id,
@@ -245,13 +404,15 @@ async def _save_backup_metadata(
                 "tables_included": backup_info.tables_included,
                 "compression_ratio": backup_info.compression_ratio,
                 "encryption_enabled": backup_info.encryption_enabled,
+                "dump_format": backup_info.dump_format,
+                "parent_backup_id": backup_info.parent_backup_id,
+                "base_backup_id": backup_info.base_backup_id,
+                "table_watermarks": table_watermarks or {},
                 "description": description,
             }
 
             # 保存到metadata文件
-            metadata_dir = (
-                Path(settings.BACKUP_STORAGE_PATH or "/var/backups/cet") / "metadata"
-            )
+            metadata_dir = self._metadata_dir()
             metadata_dir.mkdir(parents=True, exist_ok=True)
 
             metadata_file = metadata_dir / f"{backup_info.backup_id}.json"
@@ -261,14 +422,56 @@ async def _save_backup_metadata(
         except Exception as e:
             logger.error(f"保存备份元数据失败: {e}")
 
+    @staticmethod
+    def _metadata_dir() -> Path:
+        """备份元数据目录."""
+        return Path(settings.BACKUP_STORAGE_PATH or "/var/backups/cet") / "metadata"
+
+    @staticmethod
+    def _metadata_to_backup_info(metadata: dict[str, Any]) -> BackupInfo:
+        """将元数据转换为备份信息."""
+        return BackupInfo(
+            backup_id=metadata["backup_id"],
+            backup_type=metadata["backup_type"],
+            file_path=metadata["file_path"],
+            file_size=metadata["file_size"],
+            checksum=metadata["checksum"],
+            created_at=datetime.fromisoformat(metadata["created_at"]),
+            expires_at=(
+                datetime.fromisoformat(metadata["expires_at"])
+                if metadata.get("expires_at")
+                else None
+            ),
+            status=metadata["status"],
+            tables_included=metadata["tables_included"],
+            compression_ratio=metadata.get("compression_ratio"),
+            encryption_enabled=metadata["encryption_enabled"],
+            dump_format=metadata.get("dump_format", "plain"),
+            parent_backup_id=metadata.get("parent_backup_id"),
+            base_backup_id=metadata.get("base_backup_id"),
+        )
+
+    async def get_backup_manifest(self, backup_id: str) -> dict[str, Any] | None:
+        """读取备份清单（完整元数据，包含表变更水位）."""
+        try:
+            metadata_file = self._metadata_dir() / f"{backup_id}.json"
+            if not metadata_file.exists():
+                return None
+
+            with open(metadata_file) as f:
+                manifest: dict[str, Any] = json.load(f)
+            return manifest
+
+        except Exception as e:
+            logger.error(f"读取备份清单失败: {backup_id} - {e}")
+            return None
+
     async def list_backups(
         self, backup_type: str | None = None, limit: int = 50
     ) -> list[BackupInfo]:
         """列出备份."""
         try:
-            metadata_dir = (
-                Path(settings.BACKUP_STORAGE_PATH or "/var/backups/cet") / "metadata"
-            )
+            metadata_dir = self._metadata_dir()
             if not metadata_dir.exists():
                 return []
 
@@ -281,24 +484,7 @@ async def list_backups(
                     if backup_type and metadata.get("backup_type") != backup_type:
                         continue
 
-                    backup_info = BackupInfo(
-                        backup_id=metadata["backup_id"],
-                        backup_type=metadata["backup_type"],
-                        file_path=metadata["file_path"],
-                        file_size=metadata["file_size"],
-                        checksum=metadata["checksum"],
-                        created_at=datetime.fromisoformat(metadata["created_at"]),
-                        expires_at=(
-                            datetime.fromisoformat(metadata["expires_at"])
-                            if metadata.get("expires_at")
-                            else None
-                        ),
-                        status=metadata["status"],
-                        tables_included=metadata["tables_included"],
-                        compression_ratio=metadata.get("compression_ratio"),
-                        encryption_enabled=metadata["encryption_enabled"],
-                    )
-                    backups.append(backup_info)
+                    backups.append(self._metadata_to_backup_info(metadata))
 
                 except Exception as e:
                     logger.warning(f"读取备份元数据失败: {metadata_file} - {e}")
@@ -315,40 +501,36 @@ async def list_backups(
     async def get_backup_info(self, backup_id: str) -> BackupInfo | None:
         """获取备份信息."""
         try:
-            metadata_file = (
-                Path(settings.BACKUP_STORAGE_PATH or "/var/backups/cet")
-                / "metadata"
-                / f"{backup_id}.json"
-            )
-
-            if not metadata_file.exists():
+            metadata = await self.get_backup_manifest(backup_id)
+            if metadata is None:
                 return None
 
-            with open(metadata_file) as f:
-                metadata = json.load(f)
-
-            return BackupInfo(
-                backup_id=metadata["backup_id"],
-                backup_type=metadata["backup_type"],
-                file_path=metadata["file_path"],
-                file_size=metadata["file_size"],
-                checksum=metadata["checksum"],
-                created_at=datetime.fromisoformat(metadata["created_at"]),
-                expires_at=(
-                    datetime.fromisoformat(metadata["expires_at"])
-                    if metadata.get("expires_at")
-                    else None
-                ),
-                status=metadata["status"],
-                tables_included=metadata["tables_included"],
-                compression_ratio=metadata.get("compression_ratio"),
-                encryption_enabled=metadata["encryption_enabled"],
-            )
+            return self._metadata_to_backup_info(metadata)
 
         except Exception as e:
             logger.error(f"获取备份信息失败: {backup_id} - {e}")
             return None
 
+    async def get_backup_chain(self, backup_id: str) -> list[BackupInfo]:
+        """获取备份链：从全量基准备份到指定备份，按回放顺序排列."""
+        chain: list[BackupInfo] = []
+        current_id: str | None = backup_id
+
+        while current_id:
+            backup_info = await self.get_backup_info(current_id)
+            if backup_info is None:
+                raise Exception(f"备份链不完整，缺少备份: {current_id}")
+            if backup_info.status != "completed":
+                raise Exception(f"备份链中的备份状态不正确: {current_id}")
+            if any(item.backup_id == current_id for item in chain):
+                raise Exception(f"备份链存在循环引用: {current_id}")
+
+            chain.append(backup_info)
+            current_id = backup_info.parent_backup_id
+
+        chain.reverse()
+        return chain
+
     async def delete_backup(self, backup_id: str) -> bool:
         """删除备份."""
         try:
@@ -367,11 +549,7 @@ async def delete_backup(self, backup_id: str) -> bool:
                     os.unlink(key_file)
 
             # 删除元数据文件
-            metadata_file = (
-                Path(settings.BACKUP_STORAGE_PATH or "/var/backups/cet")
-                / "metadata"
-                / f"{backup_id}.json"
-            )
+            metadata_file = self._metadata_dir() / f"{backup_id}.json"
 
             if metadata_file.exists():
                 metadata_file.unlink()
@@ -480,6 +658,10 @@ async def validate_backup(self, backup_id: str) -> dict[str, Any]:
             if not backup_info:
                 return {"valid": False, "error": "备份不存在"}
 
+            # 无变化的增量备份只有清单，没有数据文件
+            if not backup_info.file_path and backup_info.backup_type == "incremental":
+                return {"valid": True, "file_size": 0, "checksum": ""}
+
             if not os.path.exists(backup_info.file_path):
                 return {"valid": False, "error": "备份文件不存在"}
 
@@ -501,22 +683,105 @@ async def validate_backup(self, backup_id: str) -> dict[str, Any]:
             logger.error(f"备份验证异常: {backup_id} - {e}")
             return {"valid": False, "error": str(e)}
 
-    async def create_incremental_backup(self, base_backup_id: str) -> BackupInfo:
-        """创建增量备份（简化实现）."""
-        # 在实际实现中，增量备份需要更复杂的逻辑
-        # 这里提供一个基础框架
-        logger.info(f"开始创建增量备份，基于备份: {base_backup_id}")
+    async def create_incremental_backup(
+        self, base_backup_id: str | None = None
+    ) -> BackupInfo:
+        """创建增量备份 - 只导出自上一次备份以来发生变化的表.
+
+        未指定基准备份时使用最近一次可用于备份链的备份；没有可用基准、
+        基准不是目录格式或表结构发生增删时，自动改为全量备份开启新的备份链。
+        """
+        parent_backup = (
+            await self.get_backup_info(base_backup_id)
+            if base_backup_id
+            else await self._get_latest_chain_backup()
+        )
+        parent_manifest = (
+            await self.get_backup_manifest(parent_backup.backup_id)
+            if parent_backup
+            else None
+        )
+        parent_watermarks: dict[str, list[int]] = (
+            parent_manifest.get("table_watermarks", {}) if parent_manifest else {}
+        )
+
+        current_watermarks = await self.collect_table_watermarks()
+
+        if (
+            parent_backup is None
+            or parent_backup.status != "completed"
+            or parent_backup.dump_format != "directory"
+            or not parent_watermarks
+            or not current_watermarks
+            or parent_watermarks.keys() != current_watermarks.keys()
+        ):
+            logger.info("没有可用的增量基准备份或表结构已变化，改为执行全量备份")
+            return await self.create_backup(
+                BackupRequest(
+                    backup_type="full",
+                    tables=[],
+                    storage_location="local",
+                    description="增量备份基准缺失，自动执行全量备份",
+                ),
+                table_watermarks=current_watermarks,
+            )
+
+        changed_tables = sorted(
+            table
+            for table, watermark in current_watermarks.items()
+            if parent_watermarks.get(table) != watermark
+        )
+        logger.info(
+            f"开始创建增量备份，基于备份: {parent_backup.backup_id}，"
+            f"变化的表: {len(changed_tables)}/{len(current_watermarks)}"
+        )
 
-        # 对于PostgreSQL，可以使用WAL文件或者基于时间戳的增量备份
-        # 这里简化为一个常规备份
         request = BackupRequest(
             backup_type="incremental",
-            tables=[],
+            tables=changed_tables,
             storage_location="local",
-            description=f"增量备份，基于 {base_backup_id}",
+            description=f"增量备份，基于 {parent_backup.backup_id}",
+        )
+
+        if not changed_tables:
+            # 无变化时只记录清单，保持备份链连续
+            backup_info = BackupInfo(
+                backup_id=str(uuid.uuid4()),
+                backup_type="incremental",
+                file_path="",
+                file_size=0,
+                checksum="",
+                created_at=datetime.now(),
+                expires_at=datetime.now() + timedelta(days=30),
+                status="completed",
+                tables_included=[],
+                compression_ratio=None,
+                encryption_enabled=False,
+                dump_format=parent_backup.dump_format,
+                parent_backup_id=parent_backup.backup_id,
+                base_backup_id=parent_backup.base_backup_id or parent_backup.backup_id,
+            )
+            await self._save_backup_metadata(
+                backup_info, request.description, current_watermarks
+            )
+            return backup_info
+
+        return await self.create_backup(
+            request,
+            parent_backup=parent_backup,
+            table_watermarks=current_watermarks,
         )
 
-        return await self.create_backup(request)
+    async def _get_latest_chain_backup(self) -> BackupInfo | None:
+        """获取最近一次可作为增量基准的备份."""
+        for backup in await self.list_backups(limit=1000):
+            if (
+                backup.status == "completed"
+                and backup.backup_type in ("full", "incremental")
+                and backup.dump_format == "directory"
+            ):
+                return backup
+        return None
 
     def configure_backup_schedule(self, config: BackupConfig) -> None:
         """配置备份调度."""
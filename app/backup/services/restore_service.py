@@ -1,5 +1,6 @@
 """数据恢复服务 - 提供完整的数据库恢复功能."""
 
+import asyncio
 import logging
 import os
 import shutil
@@ -21,6 +22,8 @@
     BackupCompression,
     BackupEncryption,
     DatabaseDumper,
+    extract_dump_archive,
+    open_backup_stream,
 )
 from app.core.config import settings
 
@@ -82,6 +85,14 @@ async def restore_from_backup(self, request: RestoreRequest) -> RestoreInfo:
             # 更新状态为运行中
             restore_info.status = "running"
 
+            # 目录格式备份按备份链并行回放
+            if backup_info.dump_format == "directory":
+                await self._restore_backup_chain(backup_info, restore_info, request)
+                restore_info.status = "completed"
+                restore_info.completed_at = datetime.now()
+                logger.info(f"数据恢复成功: {restore_id}")
+                return restore_info
+
             # 准备恢复文件
             restore_file_path = await self._prepare_restore_file(backup_info)
 
@@ -120,46 +131,135 @@ async def restore_from_backup(self, request: RestoreRequest) -> RestoreInfo:
             return restore_info
 
     async def _prepare_restore_file(self, backup_info: BackupInfo) -> str:
-        """准备恢复文件（解密、解压等）."""
-        current_file = backup_info.file_path
+        """准备恢复文件 - 单遍流式解密、解压到临时SQL文件."""
+        encryption = self._load_encryption(backup_info)
 
-        # 如果文件加密，先解密
-        if backup_info.encryption_enabled:
-            logger.info("解密备份文件...")
-            key_file_path = f"{backup_info.file_path}.key"
-            if not os.path.exists(key_file_path):
-                raise Exception("加密密钥文件不存在")
+        compression = BackupCompression.detect_algorithm(backup_info.file_path)
 
-            with open(key_file_path, "rb") as key_file:
-                encryption_key = key_file.read()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".sql") as temp_file:
+            restore_path = temp_file.name
 
-            encryption = BackupEncryption(encryption_key)
+        logger.info(
+            f"流式准备恢复文件: {backup_info.file_path} "
+            f"(解密: {encryption is not None}, 压缩: {compression or '无'})"
+        )
+        try:
+            await asyncio.to_thread(
+                self._stream_restore_file,
+                backup_info.file_path,
+                restore_path,
+                compression,
+                encryption,
+            )
+        except Exception:
+            os.unlink(restore_path)
+            raise
 
-            # 创建临时解密文件
-            with tempfile.NamedTemporaryFile(
-                delete=False, suffix=".decrypted"
-            ) as temp_file:
-                decrypted_path = temp_file.name
+        return restore_path
 
-            encryption.decrypt_file(current_file, decrypted_path)
-            current_file = decrypted_path
+    def _load_encryption(self, backup_info: BackupInfo) -> BackupEncryption | None:
+        """读取备份的加密密钥."""
+        if not backup_info.encryption_enabled:
+            return None
 
-        # 如果文件压缩，解压
-        if current_file.endswith(".gz"):
-            logger.info("解压备份文件...")
+        key_file_path = f"{backup_info.file_path}.key"
+        if not os.path.exists(key_file_path):
+            raise Exception("加密密钥文件不存在")
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".sql") as temp_file:
-                decompressed_path = temp_file.name
+        with open(key_file_path, "rb") as key_file:
+            return BackupEncryption(key_file.read())
 
-            BackupCompression.decompress_file(current_file, decompressed_path)
+    async def _restore_backup_chain(
+        self, backup_info: BackupInfo, restore_info: RestoreInfo, request: RestoreRequest
+    ) -> None:
+        """按备份清单回放备份链：全量基准备份并行恢复，再依次应用增量备份."""
+        chain = await self.backup_service.get_backup_chain(backup_info.backup_id)
+
+        if request.restore_type == "point_in_time":
+            if not request.target_time:
+                raise Exception("时间点恢复需要指定目标时间")
+            # 回放到目标时间点之前的最后一个备份
+            chain = [item for item in chain if item.created_at <= request.target_time]
+            if not chain:
+                raise Exception("目标时间点之前没有可用的全量备份")
+            logger.info(f"时间点恢复将回放至备份: {chain[-1].backup_id}")
+        elif request.restore_type == "partial":
+            if not request.tables:
+                raise Exception("部分恢复需要指定表列表")
+        elif request.restore_type != "full":
+            raise Exception(f"不支持的恢复类型: {request.restore_type}")
+
+        if request.restore_type != "partial" and not request.confirm_overwrite:
+            raise Exception("完整恢复需要确认覆盖现有数据")
 
-            # 如果上一步创建了临时解密文件，删除它
-            if backup_info.encryption_enabled:
-                os.unlink(current_file)
+        if request.validate_before_restore:
+            for item in chain[:-1]:
+                validation_result = await self.backup_service.validate_backup(
+                    item.backup_id
+                )
+                if not validation_result["valid"]:
+                    raise Exception(
+                        f"备份链校验失败 {item.backup_id}: {validation_result.get('error')}"
+                    )
+
+        target_tables = request.tables if request.restore_type == "partial" else None
+        logger.info(f"开始回放备份链: {[item.backup_id for item in chain]}")
+
+        for index, item in enumerate(chain):
+            # 无变化的增量备份只有清单，没有数据文件
+            if not item.file_path:
+                continue
+
+            tables: list[str] | None = target_tables
+            if index > 0:
+                tables = [
+                    table
+                    for table in item.tables_included
+                    if target_tables is None
+                    or table in target_tables
+                    or table.split(".")[-1] in target_tables
+                ]
+                if not tables:
+                    continue
+
+            dump_dir = tempfile.mkdtemp(prefix="restore_")
+            try:
+                await asyncio.to_thread(
+                    extract_dump_archive,
+                    item.file_path,
+                    dump_dir,
+                    self._load_encryption(item),
+                )
+                restore_result = await asyncio.to_thread(
+                    self.db_dumper.restore_directory_dump,
+                    dump_dir,
+                    jobs=settings.BACKUP_DUMP_JOBS,
+                    tables=tables,
+                    data_only=index > 0,
+                )
+            finally:
+                shutil.rmtree(dump_dir, ignore_errors=True)
 
-            current_file = decompressed_path
+            if not restore_result["success"]:
+                raise Exception(f"回放备份 {item.backup_id} 失败: {restore_result['error']}")
 
-        return current_file
+        restore_info.tables_restored = target_tables or ["all"]
+        restore_info.records_restored = -1  # 并行恢复无法精确统计记录数
+
+    @staticmethod
+    def _stream_restore_file(
+        source_path: str,
+        restore_path: str,
+        compression: str | None,
+        encryption: BackupEncryption | None,
+    ) -> None:
+        """按块解密、解压备份文件并写出明文SQL."""
+        source, reader = open_backup_stream(source_path, compression, encryption)
+        try:
+            with open(restore_path, "wb") as output:
+                shutil.copyfileobj(reader, output, settings.BACKUP_STREAM_CHUNK_SIZE)
+        finally:
+            source.close()
 
     async def _perform_full_restore(
         self, restore_file_path: str, restore_info: RestoreInfo, request: RestoreRequest
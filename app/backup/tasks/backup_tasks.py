@@ -2,41 +2,30 @@
 
 import logging
 from datetime import datetime, timedelta
-from typing import Any
 
 from celery import shared_task
 
 from app.analytics.schemas.analytics_schemas import BackupRequest
 from app.backup.services.backup_service import BackupService
-from app.core.database import AsyncSessionLocal
+from app.shared.tasks.async_task import AsyncTask
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, name="backup.daily_incremental")
-def daily_incremental_backup(self: Any) -> dict[str, str | None]:
+@shared_task(bind=True, base=AsyncTask, name="backup.daily_incremental")
+def daily_incremental_backup(self: AsyncTask) -> dict[str, str | None]:
     """每日增量备份任务 - 需求9验收标准1."""
     try:
         logger.info("开始执行每日增量备份任务")
 
-        # 创建增量备份请求
-        backup_request = BackupRequest(
-            backup_type="incremental",
-            tables=[],  # 空列表表示所有表
-            storage_location="local",
-            compression=True,
-            encryption=True,
-            description="每日自动增量备份",
-        )
-
-        # 执行备份
-        result = _execute_backup_task(backup_request)
+        # 基于最近一次备份只导出发生变化的表，无可用基准时自动执行全量备份
+        result = _execute_incremental_backup_task(self)
 
         logger.info(f"每日增量备份完成: {result['backup_id']}")
         return {
             "status": "success",
             "backup_id": result["backup_id"],
-            "backup_type": "incremental",
+            "backup_type": result["backup_type"],
             "message": "每日增量备份成功",
         }
 
@@ -50,8 +39,8 @@ def daily_incremental_backup(self: Any) -> dict[str, str | None]:
         }
 
 
-@shared_task(bind=True, name="backup.weekly_full")
-def weekly_full_backup(self: Any) -> dict[str, str | None]:
+@shared_task(bind=True, base=AsyncTask, name="backup.weekly_full")
+def weekly_full_backup(self: AsyncTask) -> dict[str, str | None]:
     """每周全量备份任务 - 需求9验收标准1."""
     try:
         logger.info("开始执行每周全量备份任务")
@@ -67,7 +56,7 @@ def weekly_full_backup(self: Any) -> dict[str, str | None]:
         )
 
         # 执行备份
-        result = _execute_backup_task(backup_request)
+        result = _execute_backup_task(self, backup_request)
 
         logger.info(f"每周全量备份完成: {result['backup_id']}")
         return {
@@ -87,14 +76,14 @@ def weekly_full_backup(self: Any) -> dict[str, str | None]:
         }
 
 
-@shared_task(bind=True, name="backup.cleanup_old_backups")
-def cleanup_old_backups(self: Any, retention_days: int = 30) -> dict[str, str]:
+@shared_task(bind=True, base=AsyncTask, name="backup.cleanup_old_backups")
+def cleanup_old_backups(self: AsyncTask, retention_days: int = 30) -> dict[str, str]:
     """清理过期备份任务 - 需求9验收标准3."""
     try:
         logger.info(f"开始清理 {retention_days} 天前的备份")
 
         async def _cleanup_backups() -> dict[str, int]:
-            async with AsyncSessionLocal() as db:
+            async with self.session() as db:
                 service = BackupService(db)
 
                 # 计算过期时间
@@ -124,9 +113,7 @@ async def _cleanup_backups() -> dict[str, int]:
                 }
 
         # 执行清理
-        import asyncio
-
-        result = asyncio.run(_cleanup_backups())
+        result = self.run_async(_cleanup_backups())
 
         logger.info(f"备份清理完成: 删除 {result['deleted_count']} 个备份")
         return {
@@ -146,14 +133,14 @@ async def _cleanup_backups() -> dict[str, int]:
         }
 
 
-@shared_task(bind=True, name="backup.validate_backups")
-def validate_backup_integrity(self: Any) -> dict[str, str]:
+@shared_task(bind=True, base=AsyncTask, name="backup.validate_backups")
+def validate_backup_integrity(self: AsyncTask) -> dict[str, str]:
     """验证备份完整性任务 - 需求9验收标准2."""
     try:
         logger.info("开始验证备份完整性")
 
         async def _validate_backups() -> dict[str, int]:
-            async with AsyncSessionLocal() as db:
+            async with self.session() as db:
                 service = BackupService(db)
 
                 # 获取最近7天的备份
@@ -183,9 +170,7 @@ async def _validate_backups() -> dict[str, int]:
                 }
 
         # 执行验证
-        import asyncio
-
-        result = asyncio.run(_validate_backups())
+        result = self.run_async(_validate_backups())
 
         logger.info(
             f"备份验证完成: {result['valid_count']} 个有效，{result['invalid_count']} 个无效"
@@ -207,14 +192,14 @@ async def _validate_backups() -> dict[str, int]:
         }
 
 
-@shared_task(bind=True, name="backup.execute_scheduled")
-def execute_scheduled_backups(self: Any) -> dict[str, str]:
+@shared_task(bind=True, base=AsyncTask, name="backup.execute_scheduled")
+def execute_scheduled_backups(self: AsyncTask) -> dict[str, str]:
     """执行计划备份任务 - 需求9验收标准1."""
     try:
         logger.info("开始执行计划备份任务")
 
         async def _execute_scheduled() -> dict[str, int]:
-            async with AsyncSessionLocal() as db:
+            async with self.session() as db:
                 service = BackupService(db)
 
                 # 执行所有待执行的计划备份
@@ -230,9 +215,7 @@ async def _execute_scheduled() -> dict[str, int]:
                 }
 
         # 执行计划备份
-        import asyncio
-
-        result = asyncio.run(_execute_scheduled())
+        result = self.run_async(_execute_scheduled())
 
         logger.info(
             f"计划备份执行完成: {result['successful_count']} 成功，{result['failed_count']} 失败"
@@ -254,11 +237,13 @@ async def _execute_scheduled() -> dict[str, int]:
         }
 
 
-def _execute_backup_task(backup_request: BackupRequest) -> dict[str, str]:
+def _execute_backup_task(
+    task: AsyncTask, backup_request: BackupRequest
+) -> dict[str, str]:
     """执行备份任务的辅助函数."""
 
     async def _create_backup() -> dict[str, str]:
-        async with AsyncSessionLocal() as db:
+        async with task.session() as db:
             service = BackupService(db)
             backup_info = await service.create_backup(backup_request)
             return {
@@ -267,6 +252,21 @@ async def _create_backup() -> dict[str, str]:
                 "file_size": str(backup_info.file_size),
             }
 
-    import asyncio
+    return task.run_async(_create_backup())
+
+
+def _execute_incremental_backup_task(task: AsyncTask) -> dict[str, str]:
+    """执行增量备份任务的辅助函数."""
+
+    async def _create_incremental_backup() -> dict[str, str]:
+        async with task.session() as db:
+            service = BackupService(db)
+            backup_info = await service.create_incremental_backup()
+            return {
+                "backup_id": backup_info.backup_id,
+                "backup_type": backup_info.backup_type,
+                "file_path": backup_info.file_path,
+                "file_size": str(backup_info.file_size),
+            }
 
-    return asyncio.run(_create_backup())
+    return task.run_async(_create_incremental_backup())
@@ -1,19 +1,47 @@
 """数据备份工具类 - 提供数据备份的底层工具函数."""
 
+import base64
 import gzip
 import hashlib
 import logging
 import os
 import shutil
+import struct
 import subprocess
+import tarfile
+import tempfile
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, cast
 
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# 流式备份默认分块大小（4MB）
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# 分块加密文件格式：文件头 = 魔数 + 7字节随机nonce前缀；
+# 每个数据块 = 4字节密文长度 + 1字节结束标志 + AES-GCM密文（含16字节认证标签）
+STREAM_ENCRYPTION_MAGIC = b"CETENC1\n"
+_NONCE_PREFIX_SIZE = 7
+_FRAME_HEADER = struct.Struct(">IB")
+
+# 压缩算法对应的文件扩展名
+COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
 
 class BackupEncryption:
     """备份加密工具."""
@@ -26,15 +54,12 @@ def __init__(self, key: bytes | None = None) -> None:
         self.key = key
 
     def encrypt_file(self, file_path: str, encrypted_path: str) -> None:
-        """加密文件."""
+        """加密文件（分块流式加密）."""
         try:
-            with open(file_path, "rb") as file:
-                file_data = file.read()
-
-            encrypted_data = self.fernet.encrypt(file_data)
-
-            with open(encrypted_path, "wb") as encrypted_file:
-                encrypted_file.write(encrypted_data)
+            with open(file_path, "rb") as source, open(encrypted_path, "wb") as target:
+                writer = self.open_encrypted_writer(target)
+                shutil.copyfileobj(source, writer, DEFAULT_CHUNK_SIZE)
+                writer.close()
 
             logger.info(f"文件加密完成: {file_path} -> {encrypted_path}")
         except Exception as e:
@@ -42,21 +67,55 @@ def encrypt_file(self, file_path: str, encrypted_path: str) -> None:
             raise e
 
     def decrypt_file(self, encrypted_path: str, decrypted_path: str) -> None:
-        """解密文件."""
+        """解密文件，兼容整文件Fernet加密的旧格式."""
         try:
-            with open(encrypted_path, "rb") as encrypted_file:
-                encrypted_data = encrypted_file.read()
+            if self.is_stream_encrypted(encrypted_path):
+                with open(encrypted_path, "rb") as source, open(
+                    decrypted_path, "wb"
+                ) as target:
+                    shutil.copyfileobj(
+                        self.open_decrypted_reader(source), target, DEFAULT_CHUNK_SIZE
+                    )
+            else:
+                with open(encrypted_path, "rb") as encrypted_file:
+                    encrypted_data = encrypted_file.read()
 
-            decrypted_data = self.fernet.decrypt(encrypted_data)
+                decrypted_data = self.fernet.decrypt(encrypted_data)
 
-            with open(decrypted_path, "wb") as decrypted_file:
-                decrypted_file.write(decrypted_data)
+                with open(decrypted_path, "wb") as decrypted_file:
+                    decrypted_file.write(decrypted_data)
 
             logger.info(f"文件解密完成: {encrypted_path} -> {decrypted_path}")
         except Exception as e:
             logger.error(f"文件解密失败: {e}")
             raise e
 
+    def open_encrypted_writer(
+        self, sink: IO[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> "ChunkedEncryptionWriter":
+        """创建分块加密写入器."""
+        return ChunkedEncryptionWriter(sink, self._stream_key(), chunk_size)
+
+    def open_decrypted_reader(self, source: IO[bytes]) -> "ChunkedDecryptionReader":
+        """创建分块解密读取器."""
+        return ChunkedDecryptionReader(source, self._stream_key())
+
+    def _stream_key(self) -> bytes:
+        """从Fernet密钥派生分块加密使用的AES-256密钥."""
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b"cet-backup-stream-v1",
+        )
+        return hkdf.derive(base64.urlsafe_b64decode(self.key))
+
+    @staticmethod
+    def is_stream_encrypted(file_path: str) -> bool:
+        """判断文件是否为分块加密格式."""
+        with open(file_path, "rb") as file:
+            return file.read(len(STREAM_ENCRYPTION_MAGIC)) == STREAM_ENCRYPTION_MAGIC
+
     @classmethod
     def generate_key(cls) -> bytes:
         """生成新的加密密钥."""
@@ -64,9 +123,315 @@ def generate_key(cls) -> bytes:
         return key
 
 
+class ChunkedEncryptionWriter:
+    """分块认证加密写入器 - 每块独立AES-GCM加密，内存占用与分块大小相关."""
+
+    def __init__(self, sink: IO[bytes], key: bytes, chunk_size: int) -> None:
+        """初始化加密写入器并写入文件头."""
+        self.sink = sink
+        self.aesgcm = AESGCM(key)
+        self.chunk_size = chunk_size
+        self.nonce_prefix = os.urandom(_NONCE_PREFIX_SIZE)
+        self.counter = 0
+        self.buffer = bytearray()
+        self.closed = False
+
+        self.sink.write(STREAM_ENCRYPTION_MAGIC + self.nonce_prefix)
+
+    def write(self, data: bytes) -> int:
+        """写入明文数据，满一块即加密输出."""
+        self.buffer.extend(data)
+        # 缓冲区始终保留数据给close()作为结束块
+        while len(self.buffer) > self.chunk_size:
+            self._write_frame(bytes(self.buffer[: self.chunk_size]), final=False)
+            del self.buffer[: self.chunk_size]
+        return len(data)
+
+    def flush(self) -> None:
+        """刷新底层输出."""
+        self.sink.flush()
+
+    def close(self) -> None:
+        """写入带结束标志的最后一块，防止截断攻击."""
+        if self.closed:
+            return
+        self._write_frame(bytes(self.buffer), final=True)
+        self.buffer.clear()
+        self.sink.flush()
+        self.closed = True
+
+    def _write_frame(self, plaintext: bytes, final: bool) -> None:
+        """加密并写出一个数据块."""
+        flag = 1 if final else 0
+        nonce = self.nonce_prefix + struct.pack(">IB", self.counter, flag)
+        ciphertext = self.aesgcm.encrypt(nonce, plaintext, None)
+        self.sink.write(_FRAME_HEADER.pack(len(ciphertext), flag) + ciphertext)
+        self.counter += 1
+
+
+class ChunkedDecryptionReader:
+    """分块认证解密读取器 - 可作为解压器的输入流."""
+
+    def __init__(self, source: IO[bytes], key: bytes) -> None:
+        """初始化解密读取器并校验文件头."""
+        self.source = source
+        self.aesgcm = AESGCM(key)
+        header = source.read(len(STREAM_ENCRYPTION_MAGIC) + _NONCE_PREFIX_SIZE)
+        if not header.startswith(STREAM_ENCRYPTION_MAGIC):
+            raise ValueError("不是分块加密的备份文件")
+        self.nonce_prefix = header[len(STREAM_ENCRYPTION_MAGIC) :]
+        self.counter = 0
+        self.buffer = bytearray()
+        self.finished = False
+
+    def readable(self) -> bool:
+        """可读流标识."""
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        """读取解密后的明文."""
+        while not self.finished and (size < 0 or len(self.buffer) < size):
+            self._read_frame()
+
+        if size < 0 or size >= len(self.buffer):
+            data = bytes(self.buffer)
+            self.buffer.clear()
+        else:
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+        return data
+
+    def _read_frame(self) -> None:
+        """读取并解密一个数据块."""
+        header = self.source.read(_FRAME_HEADER.size)
+        if len(header) < _FRAME_HEADER.size:
+            raise ValueError("备份文件被截断：缺少结束数据块")
+
+        length, flag = _FRAME_HEADER.unpack(header)
+        ciphertext = self.source.read(length)
+        if len(ciphertext) < length:
+            raise ValueError("备份文件被截断：数据块不完整")
+
+        nonce = self.nonce_prefix + struct.pack(">IB", self.counter, flag)
+        try:
+            self.buffer.extend(self.aesgcm.decrypt(nonce, ciphertext, None))
+        except InvalidTag as e:
+            raise ValueError(f"备份数据块{self.counter}认证失败") from e
+
+        self.counter += 1
+        if flag:
+            self.finished = True
+
+
+class _CountingWriter:
+    """字节计数写入器，可选同时计算校验和."""
+
+    def __init__(self, sink: IO[bytes], algorithm: str | None = None) -> None:
+        """初始化计数写入器."""
+        self.sink = sink
+        self.hash_obj = hashlib.new(algorithm) if algorithm else None
+        self.bytes_written = 0
+
+    def write(self, data: bytes) -> int:
+        """写入数据并更新计数和校验和."""
+        if self.hash_obj is not None:
+            self.hash_obj.update(data)
+        self.bytes_written += len(data)
+        return self.sink.write(data) or len(data)
+
+    def flush(self) -> None:
+        """刷新底层输出."""
+        self.sink.flush()
+
+    def hexdigest(self) -> str:
+        """返回校验和."""
+        return self.hash_obj.hexdigest() if self.hash_obj is not None else ""
+
+
+class StreamingBackupWriter:
+    """单遍流式备份管道: 原始数据 → 压缩 → 分块加密 → 文件，同步计算校验和.
+
+    内存占用仅与分块大小相关，与备份数据总量无关。
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        compression: str | None = "gzip",
+        compression_level: int = 6,
+        compression_threads: int = 0,
+        encryption: BackupEncryption | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checksum_algorithm: str = "sha256",
+    ) -> None:
+        """初始化流式备份管道."""
+        self.output_path = output_path
+        self.compression = BackupCompression.resolve_algorithm(compression)
+        self.raw_size = 0
+        self.closed = False
+
+        self._file = open(output_path, "wb")
+        # 最终落盘数据的校验和，与calculate_checksum结果一致
+        self._file_writer = _CountingWriter(self._file, checksum_algorithm)
+
+        self._encryptor: ChunkedEncryptionWriter | None = None
+        sink: Any = self._file_writer
+        if encryption is not None:
+            self._encryptor = encryption.open_encrypted_writer(sink, chunk_size)
+            sink = self._encryptor
+
+        self._compressed_writer = _CountingWriter(sink)
+        self._compressor: Any = None
+        if self.compression == "zstd":
+            compressor = zstandard.ZstdCompressor(
+                level=compression_level, threads=compression_threads
+            )
+            self._compressor = compressor.stream_writer(
+                self._compressed_writer, closefd=False
+            )
+        elif self.compression == "gzip":
+            self._compressor = gzip.GzipFile(
+                fileobj=self._compressed_writer,  # type: ignore[arg-type]
+                mode="wb",
+                compresslevel=compression_level,
+            )
+
+    def write(self, data: bytes) -> int:
+        """写入原始数据."""
+        self.raw_size += len(data)
+        if self._compressor is not None:
+            self._compressor.write(data)
+        else:
+            self._compressed_writer.write(data)
+        return len(data)
+
+    def close(self) -> dict[str, Any]:
+        """结束管道并返回统计信息."""
+        if self._compressor is not None:
+            self._compressor.close()
+        if self._encryptor is not None:
+            self._encryptor.close()
+        self._file.close()
+        self.closed = True
+
+        compressed_size = self._compressed_writer.bytes_written
+        return {
+            "original_size": self.raw_size,
+            "compressed_size": compressed_size,
+            "file_size": self._file_writer.bytes_written,
+            "checksum": self._file_writer.hexdigest(),
+            "compression": self.compression,
+            "compression_ratio": (
+                compressed_size / self.raw_size
+                if self.compression and self.raw_size
+                else None
+            ),
+        }
+
+    def abort(self) -> None:
+        """中止管道并删除未完成的文件."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self._compressor is not None:
+                self._compressor.close()
+        except Exception as e:
+            logger.debug(f"关闭压缩流失败: {e}")
+        finally:
+            self._file.close()
+            if os.path.exists(self.output_path):
+                os.unlink(self.output_path)
+
+
+def open_backup_stream(
+    file_path: str,
+    compression: str | None = None,
+    encryption: BackupEncryption | None = None,
+) -> tuple[IO[bytes], Any]:
+    """打开备份文件的解密/解压读取流，返回 (原始文件对象, 明文读取流)."""
+    source = open(file_path, "rb")
+    try:
+        reader: Any = source
+        if encryption is not None:
+            if encryption.is_stream_encrypted(file_path):
+                reader = encryption.open_decrypted_reader(source)
+            else:
+                # 旧格式为整文件Fernet加密，只能整体解密
+                source.close()
+                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+                    decrypted_path = temp_file.name
+                encryption.decrypt_file(file_path, decrypted_path)
+                source = open(decrypted_path, "rb")
+                os.unlink(decrypted_path)
+                reader = source
+
+        if compression == "zstd":
+            reader = zstandard.ZstdDecompressor().stream_reader(reader)
+        elif compression == "gzip":
+            reader = gzip.GzipFile(fileobj=reader, mode="rb")
+
+        return source, reader
+    except Exception:
+        source.close()
+        raise
+
+
+def archive_dump_directory(dump_dir: str, writer: StreamingBackupWriter) -> None:
+    """将目录格式的转储打包写入流式备份管道（tar流，不落地中间文件）."""
+    with tarfile.open(fileobj=cast(IO[bytes], writer), mode="w|") as archive:
+        archive.add(dump_dir, arcname=".")
+
+
+def extract_dump_archive(
+    file_path: str,
+    output_dir: str,
+    encryption: BackupEncryption | None = None,
+) -> None:
+    """流式解密并解包目录格式的备份归档."""
+    source, reader = open_backup_stream(file_path, None, encryption)
+    try:
+        with tarfile.open(fileobj=reader, mode="r|") as archive:
+            if hasattr(tarfile, "data_filter"):
+                archive.extractall(output_dir, filter="data")
+            else:
+                # Python 3.11.4 之前没有解包过滤器：只允许目标目录内的普通文件和目录
+                root = os.path.realpath(output_dir)
+                for member in archive:
+                    target = os.path.realpath(os.path.join(root, member.name))
+                    if os.path.commonpath([root, target]) != root or not (
+                        member.isfile() or member.isdir()
+                    ):
+                        raise ValueError(f"备份归档包含不安全的条目: {member.name}")
+                    archive.extract(member, root)
+    finally:
+        source.close()
+
+
 class BackupCompression:
     """备份压缩工具."""
 
+    @staticmethod
+    def resolve_algorithm(algorithm: str | None) -> str | None:
+        """确定实际使用的压缩算法，zstd不可用时回退到gzip."""
+        if not algorithm:
+            return None
+        if algorithm == "zstd" and not ZSTD_AVAILABLE:
+            logger.warning("zstandard未安装，备份压缩回退到gzip")
+            return "gzip"
+        if algorithm not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"不支持的压缩算法: {algorithm}")
+        return algorithm
+
+    @staticmethod
+    def detect_algorithm(file_path: str) -> str | None:
+        """根据备份文件扩展名判断压缩算法."""
+        path = file_path.removesuffix(".enc")
+        for algorithm, extension in COMPRESSION_EXTENSIONS.items():
+            if path.endswith(extension):
+                return algorithm
+        return None
+
     @staticmethod
     def compress_file(
         source_path: str, compressed_path: str, compression_level: int = 6
@@ -208,6 +573,60 @@ def __init__(self, db_config: dict[str, Any]) -> None:
         """初始化数据库备份工具."""
         self.db_config = db_config
 
+    def _build_pg_dump_command(
+        self,
+        output_path: str | None = None,
+        tables: list[str] | None = None,
+        data_only: bool = False,
+        schema_only: bool = False,
+    ) -> list[str]:
+        """构建pg_dump命令，未指定输出文件时输出到stdout."""
+        pg_dump_cmd = [
+            "pg_dump",
+            f"--host={self.db_config.get('host', 'localhost')}",
+            f"--port={self.db_config.get('port', 5432)}",
+            f"--username={self.db_config.get('username')}",
+            f"--dbname={self.db_config.get('database')}",
+            "--no-password",  # 使用环境变量或.pgpass文件
+            "--verbose",
+            "--create",
+            "--clean",
+        ]
+        if output_path:
+            pg_dump_cmd.append(f"--file={output_path}")
+
+        # 添加额外选项
+        if data_only:
+            pg_dump_cmd.append("--data-only")
+        elif schema_only:
+            pg_dump_cmd.append("--schema-only")
+
+        # 指定表
+        if tables:
+            for table in tables:
+                pg_dump_cmd.extend(["--table", table])
+
+        return pg_dump_cmd
+
+    def _build_env(self) -> dict[str, str]:
+        """构建数据库命令的环境变量."""
+        env = os.environ.copy()
+        if self.db_config.get("password"):
+            env["PGPASSWORD"] = self.db_config["password"]
+        return env
+
+    @staticmethod
+    def _quote_table(table: str) -> str:
+        """为 schema.table 形式的表名加引号."""
+        return ".".join(f'"{part}"' for part in table.split("."))
+
+    @staticmethod
+    def _describe_backup_type(data_only: bool, schema_only: bool) -> str:
+        """备份类型描述."""
+        if data_only:
+            return "data_only"
+        return "schema_only" if schema_only else "full"
+
     def create_postgresql_dump(
         self,
         output_path: str,
@@ -216,6 +635,132 @@ def create_postgresql_dump(
         schema_only: bool = False,
     ) -> dict[str, Any]:
         """创建PostgreSQL数据库备份."""
+        try:
+            pg_dump_cmd = self._build_pg_dump_command(
+                output_path, tables, data_only, schema_only
+            )
+
+            # 执行备份命令
+            start_time = datetime.now()
+            result = subprocess.run(
+                pg_dump_cmd,
+                env=self._build_env(),
+                capture_output=True,
+                text=True,
+                timeout=3600,  # 1小时超时
+            )
+            end_time = datetime.now()
+
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(
+                    result.returncode, pg_dump_cmd, result.stderr
+                )
+
+            file_size = os.path.getsize(output_path)
+            duration = (end_time - start_time).total_seconds()
+
+            logger.info(f"PostgreSQL备份完成: {output_path} ({file_size} bytes)")
+
+            return {
+                "success": True,
+                "file_path": output_path,
+                "file_size": file_size,
+                "duration": duration,
+                "tables_included": tables or ["all"],
+                "backup_type": self._describe_backup_type(data_only, schema_only),
+            }
+
+        except subprocess.TimeoutExpired:
+            logger.error("数据库备份超时")
+            return {"success": False, "error": "备份操作超时"}
+        except subprocess.CalledProcessError as e:
+            logger.error(f"数据库备份失败: {e.stderr}")
+            return {"success": False, "error": f"pg_dump失败: {e.stderr}"}
+        except Exception as e:
+            logger.error(f"数据库备份异常: {e}")
+            return {"success": False, "error": str(e)}
+
+    def stream_postgresql_dump(
+        self,
+        writer: StreamingBackupWriter,
+        tables: list[str] | None = None,
+        data_only: bool = False,
+        schema_only: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        timeout: int = 3600,
+    ) -> dict[str, Any]:
+        """将pg_dump标准输出直接送入流式备份管道，不落地中间文件."""
+        pg_dump_cmd = self._build_pg_dump_command(None, tables, data_only, schema_only)
+
+        try:
+            # --verbose输出量大，写入临时文件避免stderr管道写满导致死锁
+            with tempfile.TemporaryFile() as stderr_file:
+                start_time = datetime.now()
+                process = subprocess.Popen(
+                    pg_dump_cmd,
+                    env=self._build_env(),
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file,
+                )
+                stdout = process.stdout
+                try:
+                    if stdout is None:
+                        raise RuntimeError("无法读取pg_dump输出")
+                    for chunk in iter(lambda: stdout.read(chunk_size), b""):
+                        writer.write(chunk)
+                        if (datetime.now() - start_time).total_seconds() > timeout:
+                            raise subprocess.TimeoutExpired(pg_dump_cmd, timeout)
+
+                    returncode = process.wait(timeout=timeout)
+                except Exception:
+                    process.kill()
+                    process.wait()
+                    raise
+
+                if returncode != 0:
+                    writer.abort()
+                    stderr_file.seek(0)
+                    stderr = stderr_file.read().decode("utf-8", errors="replace")
+                    logger.error(f"数据库备份失败: {stderr}")
+                    return {"success": False, "error": f"pg_dump失败: {stderr}"}
+
+            stream_stats = writer.close()
+            duration = (datetime.now() - start_time).total_seconds()
+
+            logger.info(
+                f"PostgreSQL流式备份完成: {writer.output_path} "
+                f"({stream_stats['original_size']} -> {stream_stats['file_size']} bytes)"
+            )
+
+            return {
+                "success": True,
+                "file_path": writer.output_path,
+                "duration": duration,
+                "tables_included": tables or ["all"],
+                "backup_type": self._describe_backup_type(data_only, schema_only),
+                **stream_stats,
+            }
+
+        except subprocess.TimeoutExpired:
+            writer.abort()
+            logger.error("数据库备份超时")
+            return {"success": False, "error": "备份操作超时"}
+        except Exception as e:
+            writer.abort()
+            logger.error(f"数据库备份异常: {e}")
+            return {"success": False, "error": str(e)}
+
+    def create_directory_dump(
+        self,
+        output_dir: str,
+        tables: list[str] | None = None,
+        jobs: int = 4,
+        data_only: bool = False,
+        schema_only: bool = False,
+        compression_level: int = 6,
+        timeout: int = 3600,
+    ) -> dict[str, Any]:
+        """创建目录格式的并行PostgreSQL备份（pg_dump -Fd -j N）."""
         try:
             pg_dump_cmd = [
                 "pg_dump",
@@ -223,63 +768,53 @@ def create_postgresql_dump(
                 f"--port={self.db_config.get('port', 5432)}",
                 f"--username={self.db_config.get('username')}",
                 f"--dbname={self.db_config.get('database')}",
-                "--no-password",  # 使用环境变量或.pgpass文件
-                "--verbose",
-                "--create",
-                "--clean",
-                f"--file={output_path}",
+                "--no-password",
+                "--format=directory",
+                f"--jobs={max(1, jobs)}",
+                f"--compress={compression_level}",
+                f"--file={output_dir}",
             ]
 
-            # 添加额外选项
             if data_only:
                 pg_dump_cmd.append("--data-only")
             elif schema_only:
                 pg_dump_cmd.append("--schema-only")
 
-            # 指定表
             if tables:
                 for table in tables:
                     pg_dump_cmd.extend(["--table", table])
 
-            # 设置环境变量
-            env = os.environ.copy()
-            if self.db_config.get("password"):
-                env["PGPASSWORD"] = self.db_config["password"]
-
-            # 执行备份命令
             start_time = datetime.now()
             result = subprocess.run(
                 pg_dump_cmd,
-                env=env,
+                env=self._build_env(),
                 capture_output=True,
                 text=True,
-                timeout=3600,  # 1小时超时
+                timeout=timeout,
             )
-            end_time = datetime.now()
+            duration = (datetime.now() - start_time).total_seconds()
 
             if result.returncode != 0:
                 raise subprocess.CalledProcessError(
                     result.returncode, pg_dump_cmd, result.stderr
                 )
 
-            file_size = os.path.getsize(output_path)
-            duration = (end_time - start_time).total_seconds()
-
-            logger.info(f"PostgreSQL备份完成: {output_path} ({file_size} bytes)")
+            dump_size = sum(
+                file.stat().st_size for file in Path(output_dir).rglob("*") if file.is_file()
+            )
+            logger.info(
+                f"PostgreSQL并行备份完成: {output_dir} "
+                f"({dump_size} bytes, {jobs} 个并行任务, 耗时 {duration:.1f}s)"
+            )
 
             return {
                 "success": True,
-                "file_path": output_path,
-                "file_size": file_size,
+                "dump_dir": output_dir,
+                "dump_size": dump_size,
                 "duration": duration,
+                "jobs": jobs,
                 "tables_included": tables or ["all"],
-                "backup_type": (
-                    "data_only"
-                    if data_only
-                    else "schema_only"
-                    if schema_only
-                    else "full"
-                ),
+                "backup_type": self._describe_backup_type(data_only, schema_only),
             }
 
         except subprocess.TimeoutExpired:
@@ -292,6 +827,121 @@ def create_postgresql_dump(
             logger.error(f"数据库备份异常: {e}")
             return {"success": False, "error": str(e)}
 
+    def restore_directory_dump(
+        self,
+        dump_dir: str,
+        jobs: int = 4,
+        tables: list[str] | None = None,
+        data_only: bool = False,
+        target_database: str | None = None,
+        timeout: int = 7200,
+    ) -> dict[str, Any]:
+        """并行恢复目录格式的备份（pg_restore -j N）.
+
+        完整恢复使用 --clean --if-exists 重建对象。增量恢复（data_only 且指定表）
+        需要先清空目标表再导入数据，两者必须在同一事务中完成，回放失败时整体回滚：
+        pg_restore 先把数据转换为SQL脚本，再由 psql --single-transaction 在复制模式下
+        清空目标表并执行脚本（--disable-triggers 需要超级用户权限）；这种方式不能并行。
+        """
+        try:
+            database = target_database or self.db_config.get("database")
+            start_time = datetime.now()
+
+            pg_restore_cmd = ["pg_restore"]
+            if data_only:
+                pg_restore_cmd.extend(["--data-only", "--disable-triggers"])
+            else:
+                pg_restore_cmd.extend(["--clean", "--if-exists"])
+
+            if tables:
+                for table in tables:
+                    # pg_restore的--table只接受不带模式名的表名
+                    pg_restore_cmd.extend(["--table", table.split(".")[-1]])
+
+            if data_only and tables:
+                self._restore_tables_in_transaction(
+                    pg_restore_cmd, dump_dir, tables, database, timeout
+                )
+            else:
+                pg_restore_cmd.extend(
+                    [
+                        f"--host={self.db_config.get('host', 'localhost')}",
+                        f"--port={self.db_config.get('port', 5432)}",
+                        f"--username={self.db_config.get('username')}",
+                        f"--dbname={database}",
+                        "--no-password",
+                        f"--jobs={max(1, jobs)}",
+                        dump_dir,
+                    ]
+                )
+                self._run_checked(pg_restore_cmd, timeout)
+
+            duration = (datetime.now() - start_time).total_seconds()
+            logger.info(f"PostgreSQL并行恢复完成: {dump_dir} -> {database}")
+
+            return {
+                "success": True,
+                "backup_path": dump_dir,
+                "target_database": database,
+                "duration": duration,
+            }
+
+        except subprocess.TimeoutExpired:
+            logger.error("数据库恢复超时")
+            return {"success": False, "error": "恢复操作超时"}
+        except subprocess.CalledProcessError as e:
+            logger.error(f"数据库恢复失败: {e.stderr}")
+            return {"success": False, "error": f"pg_restore失败: {e.stderr}"}
+        except Exception as e:
+            logger.error(f"数据库恢复异常: {e}")
+            return {"success": False, "error": str(e)}
+
+    def _restore_tables_in_transaction(
+        self,
+        pg_restore_cmd: list[str],
+        dump_dir: str,
+        tables: list[str],
+        database: str | None,
+        timeout: int,
+    ) -> None:
+        """在同一事务中清空目标表并导入转储数据."""
+        with tempfile.NamedTemporaryFile(
+            suffix=".sql", dir=os.path.dirname(os.path.abspath(dump_dir))
+        ) as script:
+            # 先完整生成数据脚本，避免 pg_restore 中途失败时 psql 提交了不完整的数据
+            self._run_checked([*pg_restore_cmd, f"--file={script.name}", dump_dir], timeout)
+
+            clear_sql = "SET session_replication_role = replica;\n" + "".join(
+                f"DELETE FROM {self._quote_table(table)};\n" for table in tables
+            )
+            self._run_checked(
+                [
+                    "psql",
+                    f"--host={self.db_config.get('host', 'localhost')}",
+                    f"--port={self.db_config.get('port', 5432)}",
+                    f"--username={self.db_config.get('username')}",
+                    f"--dbname={database}",
+                    "--no-password",
+                    "--set=ON_ERROR_STOP=1",
+                    "--single-transaction",
+                    f"--command={clear_sql}",
+                    f"--file={script.name}",
+                ],
+                timeout,
+            )
+
+    def _run_checked(self, cmd: list[str], timeout: int) -> None:
+        """执行数据库命令，失败时抛出 CalledProcessError."""
+        result = subprocess.run(
+            cmd,
+            env=self._build_env(),
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, cmd, result.stderr)
+
     def restore_postgresql_dump(
         self, backup_path: str, target_database: str | None = None
     ) -> dict[str, Any]:
@@ -310,16 +960,11 @@ def restore_postgresql_dump(
                 f"--file={backup_path}",
             ]
 
-            # 设置环境变量
-            env = os.environ.copy()
-            if self.db_config.get("password"):
-                env["PGPASSWORD"] = self.db_config["password"]
-
             # 执行恢复命令
             start_time = datetime.now()
             result = subprocess.run(
                 psql_cmd,
-                env=env,
+                env=self._build_env(),
                 capture_output=True,
                 text=True,
                 timeout=7200,  # 2小时超时
@@ -11,9 +11,12 @@
     backend=str(settings.REDIS_URL),
     include=[
         "app.shared.tasks.email_tasks",
+        "app.shared.tasks.hotspot_tasks",
         "app.ai.tasks",
         "app.training.tasks",
         "app.backup.tasks.backup_tasks",
+        "app.analytics.tasks.rollup_tasks",
+        "app.resources.tasks.search_index_tasks",
     ],
 )
 
@@ -94,4 +97,59 @@
         "task": "backup.execute_scheduled",
         "schedule": 60.0 * 60,  # 每小时检查一次
     },
+    # 学习数据汇总表增量刷新
+    "refresh-learning-rollups": {
+        "task": "analytics.refresh_learning_rollups",
+        "schedule": 60.0 * 5,  # 每5分钟刷新一次
+    },
+    # 文档切片全文检索向量回填（迁移后补齐存量切片）
+    "rebuild-keyword-index": {
+        "task": "resources.rebuild_keyword_index",
+        "schedule": 60.0 * 60 * 24,  # 每天执行一次
+    },
+    # AI token用量小时计数落库
+    "rollup-ai-token-usage": {
+        "task": "ai.rollup_token_usage",
+        "schedule": 60.0 * 15,  # 每15分钟执行一次
+    },
+    # 题库库存补货
+    "replenish-question-inventory": {
+        "task": "training.replenish_question_inventory",
+        "schedule": 60.0 * 5,  # 每5分钟执行一次
+    },
+    # 题目统计增量写入与对账
+    "flush-question-statistics": {
+        "task": "training.flush_question_statistics",
+        "schedule": 60.0,  # 每分钟执行一次
+    },
+    "reconcile-question-statistics": {
+        "task": "training.reconcile_question_statistics",
+        "schedule": 60.0 * 60 * 6,  # 每6小时执行一次
+    },
+    # 热点资源收集、互动计数写回与排行刷新
+    "collect-daily-hotspots": {
+        "task": "collect_daily_hotspots",
+        "schedule": 60.0 * 60 * 24,  # 每天执行一次
+    },
+    "flush-hotspot-engagement": {
+        "task": "flush_hotspot_engagement",
+        "schedule": 60.0,  # 每分钟执行一次
+    },
+    "refresh-hotspot-trending": {
+        "task": "refresh_hotspot_trending",
+        "schedule": 60.0 * 60,  # 每小时执行一次
+    },
+    "generate-daily-recommendations": {
+        "task": "generate_daily_recommendations",
+        "schedule": 60.0 * 60 * 24,  # 每天执行一次
+    },
+    "cleanup-expired-hotspots": {
+        "task": "cleanup_expired_hotspots",
+        "schedule": 60.0 * 60 * 24 * 7,  # 每周执行一次
+    },
+    # 班级智能训练闭环批量执行
+    "run-cohort-training-loops": {
+        "task": "training.run_cohort_training_loops",
+        "schedule": 60.0 * 60 * 24,  # 每天执行一次
+    },
 }
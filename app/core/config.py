@@ -118,6 +118,159 @@ def REDIS_URL(self) -> str:
 
     # Celery配置
     CELERY_EAGER_MODE: bool = os.getenv("CELERY_EAGER_MODE", "false").lower() == "true"
+    CELERY_WORKER_DB_POOL_SIZE: int = int(os.getenv("CELERY_WORKER_DB_POOL_SIZE", "5"))
+    CELERY_WORKER_DB_MAX_OVERFLOW: int = int(os.getenv("CELERY_WORKER_DB_MAX_OVERFLOW", "5"))
+    CELERY_WORKER_REDIS_MAX_CONNECTIONS: int = int(
+        os.getenv("CELERY_WORKER_REDIS_MAX_CONNECTIONS", "20")
+    )
+    CELERY_WORKER_HTTP_MAX_CONNECTIONS: int = int(
+        os.getenv("CELERY_WORKER_HTTP_MAX_CONNECTIONS", "50")
+    )
+
+    # 学习数据汇总配置
+    LEARNING_ROLLUP_LAG_SECONDS: int = int(
+        os.getenv("LEARNING_ROLLUP_LAG_SECONDS", "60")
+    )  # 水位线落后当前时间的秒数，避开未提交的事务
+    LEARNING_ROLLUP_BATCH_SIZE: int = int(os.getenv("LEARNING_ROLLUP_BATCH_SIZE", "500"))
+
+    # 学习分析缓存配置
+    LEARNING_ANALYSIS_CACHE_SIZE: int = int(os.getenv("LEARNING_ANALYSIS_CACHE_SIZE", "1000"))
+    LEARNING_ANALYSIS_CACHE_MAX_MEMORY_MB: int = int(
+        os.getenv("LEARNING_ANALYSIS_CACHE_MAX_MEMORY_MB", "50")
+    )
+    LEARNING_ANALYSIS_CACHE_TTL: int = int(os.getenv("LEARNING_ANALYSIS_CACHE_TTL", "3600"))
+
+    # 自定义报表配置
+    REPORT_QUERY_CHUNK_SIZE: int = int(os.getenv("REPORT_QUERY_CHUNK_SIZE", "5000"))
+    REPORT_PREVIEW_ROWS: int = int(os.getenv("REPORT_PREVIEW_ROWS", "1000"))
+    REPORT_CACHE_TTL_SECONDS: int = int(os.getenv("REPORT_CACHE_TTL_SECONDS", "600"))
+    REPORT_CACHE_MAX_ENTRIES: int = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "100"))
+
+    # 词汇搜索配置
+    VOCABULARY_EXACT_COUNT_LIMIT: int = int(
+        os.getenv("VOCABULARY_EXACT_COUNT_LIMIT", "10000")
+    )  # 超过该数量的搜索结果返回估算总数
+    VOCABULARY_PREFIX_INDEX_TTL: int = int(os.getenv("VOCABULARY_PREFIX_INDEX_TTL", "300"))
+    VOCABULARY_IMPORT_CHUNK_SIZE: int = int(
+        os.getenv("VOCABULARY_IMPORT_CHUNK_SIZE", "1000")
+    )
+
+    # RSS抓取配置
+    RSS_PER_HOST_CONCURRENCY: int = int(os.getenv("RSS_PER_HOST_CONCURRENCY", "4"))
+    RSS_PARSE_WORKERS: int = int(os.getenv("RSS_PARSE_WORKERS", "4"))
+    RSS_SEEN_ENTRY_TTL: int = int(
+        os.getenv("RSS_SEEN_ENTRY_TTL", str(30 * 24 * 3600))
+    )  # 已入库条目标记的保留时间（秒）
+
+    # 热点资源配置
+    HOTSPOT_POPULARITY_HALF_LIFE_HOURS: float = float(
+        os.getenv("HOTSPOT_POPULARITY_HALF_LIFE_HOURS", "24")
+    )
+    HOTSPOT_POPULARITY_MIN_SCORE: float = float(
+        os.getenv("HOTSPOT_POPULARITY_MIN_SCORE", "0.001")
+    )  # 低于该值的热度累计值不再衰减
+    HOTSPOT_ENGAGEMENT_FLUSH_BATCH_SIZE: int = int(
+        os.getenv("HOTSPOT_ENGAGEMENT_FLUSH_BATCH_SIZE", "500")
+    )
+    HOTSPOT_RANKING_SIZE: int = int(os.getenv("HOTSPOT_RANKING_SIZE", "200"))
+    HOTSPOT_RANKING_TTL: int = int(
+        os.getenv("HOTSPOT_RANKING_TTL", str(3 * 3600))
+    )  # 排行列表过期时间，刷新任务停止后回退到数据库查询
+    HOTSPOT_COLLECTION_LIBRARY_ID: int = int(
+        os.getenv("HOTSPOT_COLLECTION_LIBRARY_ID", "0")
+    )  # 每日抓取的热点资源写入的资源库，0表示只抓取不入库
+
+    # 混合检索配置
+    HYBRID_SEARCH_LEG_TIMEOUT: float = float(
+        os.getenv("HYBRID_SEARCH_LEG_TIMEOUT", "1.5")
+    )  # 单路检索截止时间（秒），超时的检索路结果丢弃
+    HYBRID_SEARCH_FUSION: str = os.getenv("HYBRID_SEARCH_FUSION", "rrf")  # rrf/weighted
+    HYBRID_SEARCH_RRF_K: int = int(os.getenv("HYBRID_SEARCH_RRF_K", "60"))
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2000"))
+    QUERY_EMBEDDING_CACHE_TTL: int = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+
+    # AI响应缓存与熔断配置
+    AI_RESPONSE_CACHE_SIZE: int = int(os.getenv("AI_RESPONSE_CACHE_SIZE", "1000"))
+    AI_RESPONSE_CACHE_TTL: int = int(os.getenv("AI_RESPONSE_CACHE_TTL", str(24 * 3600)))
+    AI_RESPONSE_CACHE_MAX_TEMPERATURE: float = float(
+        os.getenv("AI_RESPONSE_CACHE_MAX_TEMPERATURE", "0.3")
+    )  # 未指定 use_cache 时只缓存温度不高于该值的调用（批改、分析等低温调用），出题等采样生成不缓存
+    AI_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("AI_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    AI_CIRCUIT_RECOVERY_SECONDS: float = float(
+        os.getenv("AI_CIRCUIT_RECOVERY_SECONDS", "30")
+    )  # 熔断后等待多久放行试探请求
+
+    # 任务队列配置
+    QUEUE_BLOCK_TIMEOUT: float = float(os.getenv("QUEUE_BLOCK_TIMEOUT", "5"))  # 阻塞取任务的最长等待
+    QUEUE_VISIBILITY_GRACE: int = int(
+        os.getenv("QUEUE_VISIBILITY_GRACE", "60")
+    )  # 任务超时之外再等待多久才视为工作者崩溃
+    QUEUE_MAINTENANCE_INTERVAL: float = float(os.getenv("QUEUE_MAINTENANCE_INTERVAL", "1"))
+    QUEUE_MAINTENANCE_BATCH: int = int(os.getenv("QUEUE_MAINTENANCE_BATCH", "100"))
+
+    # AI调用准入控制配置
+    AI_MAX_INFLIGHT_CALLS: int = int(os.getenv("AI_MAX_INFLIGHT_CALLS", "8"))  # 单进程并发上限
+    AI_CLUSTER_MAX_INFLIGHT_CALLS: int = int(
+        os.getenv("AI_CLUSTER_MAX_INFLIGHT_CALLS", "32")
+    )  # 集群并发上限，0表示只做进程内限制
+    AI_INTERACTIVE_MAX_WAIT: float = float(os.getenv("AI_INTERACTIVE_MAX_WAIT", "10"))
+    AI_BATCH_MAX_WAIT: float = float(os.getenv("AI_BATCH_MAX_WAIT", "120"))
+    AI_BACKGROUND_MAX_WAIT: float = float(os.getenv("AI_BACKGROUND_MAX_WAIT", "600"))
+    GRADING_BATCH_MAX_ITEMS: int = int(
+        os.getenv("GRADING_BATCH_MAX_ITEMS", "200")
+    )  # 单次整卷批改请求允许的最大题目数
+
+    # AI用量计量与预算配置（token预算为每日额度，0表示不限制）
+    AI_TOKENIZER_PATH: str = os.getenv("AI_TOKENIZER_PATH", "")  # 本地tokenizer.json路径
+    AI_USER_DAILY_TOKEN_BUDGET: int = int(os.getenv("AI_USER_DAILY_TOKEN_BUDGET", "200000"))
+    AI_COURSE_DAILY_TOKEN_BUDGET: int = int(
+        os.getenv("AI_COURSE_DAILY_TOKEN_BUDGET", "5000000")
+    )
+    AI_FEATURE_DAILY_TOKEN_BUDGETS: str = os.getenv(
+        "AI_FEATURE_DAILY_TOKEN_BUDGETS", ""
+    )  # 按功能的每日额度，格式 "question_generation=2000000,grading=5000000"
+    AI_USAGE_ROLLUP_DELAY: int = int(
+        os.getenv("AI_USAGE_ROLLUP_DELAY", "300")
+    )  # 小时桶结束后等待多久再落库
+
+    # 题库库存配置
+    QUESTION_INVENTORY_LOW_WATER: int = int(
+        os.getenv("QUESTION_INVENTORY_LOW_WATER", "20")
+    )  # 库存桶低于该数量时补货
+    QUESTION_INVENTORY_HIGH_WATER: int = int(
+        os.getenv("QUESTION_INVENTORY_HIGH_WATER", "60")
+    )  # 补货目标数量
+    QUESTION_INVENTORY_MAX_STOCK: int = int(
+        os.getenv("QUESTION_INVENTORY_MAX_STOCK", "500")
+    )  # 单个库存桶上限
+    QUESTION_INVENTORY_MAX_PER_RUN: int = int(
+        os.getenv("QUESTION_INVENTORY_MAX_PER_RUN", "200")
+    )  # 单轮补货最多生成的题目数
+    QUESTION_INVENTORY_CONCURRENCY: int = int(
+        os.getenv("QUESTION_INVENTORY_CONCURRENCY", "4")
+    )  # 补货时并发的AI生成请求数
+
+    # 题目统计配置
+    QUESTION_STATS_RECONCILE_BATCH_SIZE: int = int(
+        os.getenv("QUESTION_STATS_RECONCILE_BATCH_SIZE", "500")
+    )  # 对账时每批重算的题目数
+    QUESTION_STATS_DISCRIMINATION_GROUP: float = float(
+        os.getenv("QUESTION_STATS_DISCRIMINATION_GROUP", "0.27")
+    )  # 区分度计算中高分组/低分组各占的比例
+
+    # 智能训练闭环批量执行配置
+    TRAINING_LOOP_BATCH_SIZE: int = int(
+        os.getenv("TRAINING_LOOP_BATCH_SIZE", "200")
+    )  # 每批采集和写入的学生数
+    TRAINING_LOOP_STUDENTS_PER_CALL: int = int(
+        os.getenv("TRAINING_LOOP_STUDENTS_PER_CALL", "4")
+    )  # 每次AI分析调用打包的学生数
+    TRAINING_LOOP_AI_CONCURRENCY: int = int(
+        os.getenv("TRAINING_LOOP_AI_CONCURRENCY", "4")
+    )  # 每批并发的AI分析请求数
+    TRAINING_LOOP_CHECKPOINT_TTL: int = int(
+        os.getenv("TRAINING_LOOP_CHECKPOINT_TTL", "172800")
+    )  # AI分析检查点保留时间（秒）
 
     # 邮件配置
     EMAIL_HOST: str = os.getenv("EMAIL_HOST", "smtp.gmail.com")
@@ -126,6 +279,11 @@ def REDIS_URL(self) -> str:
     EMAIL_PASSWORD: str = os.getenv("EMAIL_PASSWORD", "")
     EMAIL_FROM: str = os.getenv("EMAIL_FROM", "noreply@cet4learning.com")
     EMAIL_USE_TLS: bool = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
+    EMAIL_POOL_SIZE: int = int(os.getenv("EMAIL_POOL_SIZE", "4"))  # 每个工作进程的SMTP连接数
+    EMAIL_BULK_CHUNK_SIZE: int = int(os.getenv("EMAIL_BULK_CHUNK_SIZE", "200"))
+    EMAIL_DOMAIN_RATE_LIMIT: float = float(
+        os.getenv("EMAIL_DOMAIN_RATE_LIMIT", "10")
+    )  # 每个收件域名每秒最多发送数
 
     # 数据库详细配置（从DATABASE_URL解析获取）
     @property
@@ -174,6 +332,14 @@ def DATABASE_NAME(self) -> str:
     BACKUP_MAX_FILES: int = int(os.getenv("BACKUP_MAX_FILES", "50"))
     BACKUP_COMPRESSION: bool = os.getenv("BACKUP_COMPRESSION", "true").lower() == "true"
     BACKUP_ENCRYPTION: bool = os.getenv("BACKUP_ENCRYPTION", "true").lower() == "true"
+    BACKUP_COMPRESSION_ALGORITHM: str = os.getenv("BACKUP_COMPRESSION_ALGORITHM", "gzip")
+    BACKUP_COMPRESSION_LEVEL: int = int(os.getenv("BACKUP_COMPRESSION_LEVEL", "6"))
+    BACKUP_COMPRESSION_THREADS: int = int(os.getenv("BACKUP_COMPRESSION_THREADS", "0"))
+    BACKUP_STREAM_CHUNK_SIZE: int = int(
+        os.getenv("BACKUP_STREAM_CHUNK_SIZE", str(4 * 1024 * 1024))
+    )
+    BACKUP_DUMP_FORMAT: str = os.getenv("BACKUP_DUMP_FORMAT", "directory")
+    BACKUP_DUMP_JOBS: int = int(os.getenv("BACKUP_DUMP_JOBS", "4"))
 
     # 环境配置
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
@@ -5,6 +5,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
+from app.analytics.models import *  # noqa: F401, F403
 from app.courses.models import *  # noqa: F401, F403
 
 # 导入所有模型以确保表创建
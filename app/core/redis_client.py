@@ -0,0 +1,46 @@
+"""Redis客户端.
+
+各服务共用进程内的Redis客户端（连接池），首次使用时创建，响应统一解码为字符串。
+Celery任务在自己的事件循环中运行，使用 AsyncTask.redis_client，不使用这里的客户端。
+"""
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+# 把待写入的计数哈希整体换到写入中的键（KEYS[1] -> KEYS[2]）；上次写入失败遗留的计数优先重试。
+# 返回0表示没有需要写入的计数
+SWAP_HASH_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 1
+end
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+    return 1
+end
+return 0
+"""
+
+_redis_client: aioredis.Redis | None = None
+_sync_redis_client: redis.Redis | None = None
+
+
+def get_redis_client() -> aioredis.Redis:
+    """获取进程内共享的异步Redis客户端."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = aioredis.from_url(  # type: ignore[no-untyped-call]
+            settings.redis_url, encoding="utf-8", decode_responses=True
+        )
+    return _redis_client
+
+
+def get_sync_redis_client() -> redis.Redis:
+    """获取进程内共享的同步Redis客户端（供线程池中的同步代码使用）."""
+    global _sync_redis_client
+    if _sync_redis_client is None:
+        _sync_redis_client = redis.from_url(  # type: ignore[no-untyped-call]
+            settings.redis_url, encoding="utf-8", decode_responses=True
+        )
+    return _sync_redis_client
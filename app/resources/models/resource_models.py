@@ -5,7 +5,7 @@
 from typing import TYPE_CHECKING, Any
 
 from sqlalchemy import Boolean, DateTime, Enum, Float, ForeignKey, Integer, String, Text
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.dialects.postgresql import JSON, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.shared.models.base_model import BaseModel
@@ -467,6 +467,9 @@ class HotspotResource(BaseModel):
     popularity_score: Mapped[float] = mapped_column(
         Float, default=0.0, nullable=False, comment="热度分数"
     )
+    engagement_heat: Mapped[float] = mapped_column(
+        Float, default=0.0, nullable=False, comment="热度累计值（随时间衰减，不封顶）"
+    )
     relevance_score: Mapped[float] = mapped_column(
         Float, default=0.0, nullable=False, comment="相关性分数"
     )
@@ -638,6 +641,13 @@ class DocumentChunk(BaseModel):
     extra_metadata: Mapped[dict[str, Any] | None] = mapped_column(
         JSON, nullable=True, comment="额外元数据"
     )
+    # 中英文分词后的全文检索向量，入库时写入，延迟加载避免随切片读取
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR().with_variant(Text(), "sqlite"),
+        nullable=True,
+        deferred=True,
+        comment="全文检索向量",
+    )
 
     # 关系
     resource: Mapped[ResourceLibrary] = relationship("ResourceLibrary")
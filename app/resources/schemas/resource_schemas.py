@@ -122,10 +122,17 @@ class VocabularySearchRequest(BaseModel):
     difficulty_level: DifficultyLevel | None = Field(None, description="难度等级")
     tags: list[str] = Field(default_factory=list, description="标签筛选")
     is_key_word: bool | None = Field(None, description="是否只搜索关键词")
+    match_mode: str = Field(
+        default="contains", description="关键词匹配方式（contains/prefix）"
+    )
     sort_by: str = Field(default="created_at", description="排序字段")
     sort_order: str = Field(default="desc", description="排序方向")
     page: int = Field(default=1, description="页码", ge=1)
     page_size: int = Field(default=20, description="每页数量", ge=1, le=100)
+    cursor: str | None = Field(None, description="分页游标，传入时忽略页码")
+    count_mode: str = Field(
+        default="auto", description="总数统计方式（exact/auto）"
+    )
 
 
 class VocabularyListResponse(BaseModel):
@@ -135,6 +142,8 @@ class VocabularyListResponse(BaseModel):
 
     total: int = Field(..., description="总数量")
     items: list[VocabularyItemResponse] = Field(..., description="词汇列表")
+    is_estimate: bool = Field(default=False, description="总数是否为估算值")
+    next_cursor: str | None = Field(None, description="下一页游标")
 
 
 # ========== 知识点库schemas ==========
@@ -17,7 +17,7 @@
 
 from loguru import logger
 from pydantic import BaseModel, Field
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import BusinessLogicError, ResourceNotFoundError
@@ -26,6 +26,7 @@
     ProcessingStatus,
     ResourceLibrary,
 )
+from app.resources.utils.lexical_search import build_search_document
 from app.shared.services.cache_service import CacheService
 from app.shared.utils.file_utils import FileUtils
 from app.shared.utils.text_utils import TextUtils
@@ -717,6 +718,9 @@ async def _store_document_chunks(
                 vector_id=vector_id,
                 embedding_model="text-embedding-ada-002",  # 示例模型
                 metadata=chunk.metadata,
+                search_vector=func.to_tsvector(
+                    "simple", build_search_document(chunk.content)
+                ),
             )
             chunk_records.append(chunk_record)
 
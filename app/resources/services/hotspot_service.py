@@ -2,12 +2,32 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import logging
+import math
+import time
+from collections import defaultdict
+from datetime import datetime
 from typing import Any
 
-from sqlalchemy import and_, desc, func, or_, select
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from sqlalchemy import (
+    Float,
+    Table,
+    and_,
+    bindparam,
+    case,
+    cast,
+    desc,
+    func,
+    or_,
+    select,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.redis_client import SWAP_HASH_SCRIPT, get_redis_client
 from app.resources.models.resource_models import HotspotResource, ResourceLibrary
 from app.resources.schemas.resource_schemas import (
     HotspotResourceCreate,
@@ -16,17 +36,116 @@
 )
 from app.shared.models.enums import DifficultyLevel
 
+logger = logging.getLogger(__name__)
+
+_hotspots: Table = HotspotResource.__table__  # type: ignore[assignment]
+
+# 每次互动对热度累计值的贡献 - 权重与原指标公式一致（浏览/1000 + 点赞/100 + 分享/50 + 评论/20）
+ENGAGEMENT_WEIGHTS: dict[str, float] = {
+    "view": 1 / 1000,
+    "like": 1 / 100,
+    "share": 1 / 50,
+    "comment": 1 / 20,
+}
+
+# 热门判定阈值
+TRENDING_MIN_POPULARITY = 0.7
+TRENDING_MIN_ENGAGEMENT = 0.1
+TRENDING_MIN_VIEWS = 100
+
+ENGAGEMENT_PENDING_KEY = "hotspot:engagement:pending"
+ENGAGEMENT_FLUSHING_KEY = "hotspot:engagement:flushing"
+POPULARITY_DECAYED_AT_KEY = "hotspot:popularity:decayed_at"
+TRENDING_RANKING_KEY = "hotspot:ranking:trending:{scope}"
+RECOMMENDED_RANKING_KEY = "hotspot:ranking:recommended:{scope}"
+
+
+def _current_date() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def _not_expired(current_date: str) -> Any:
+    """未过期条件."""
+    return or_(_hotspots.c.expiry_date.is_(None), _hotspots.c.expiry_date > current_date)
+
+
+def _engagement_update_statement() -> Any:
+    """按主键累加互动计数的UPDATE语句（executemany 批量执行）.
+
+    参与度和热度在同一条语句中基于计数增量更新，不读取行数据。
+    加权增量累加到不封顶的热度累计值，热度分数由累计值推导（封顶为1），
+    持续有互动的资源在衰减后仍能保持热度。
+    """
+    heat: Any = sum(
+        (bindparam(f"d_{action}") * weight for action, weight in ENGAGEMENT_WEIGHTS.items()),
+        _hotspots.c.engagement_heat,
+    )
+    views = _hotspots.c.view_count + bindparam("d_view")
+    interactions = (
+        _hotspots.c.like_count
+        + bindparam("d_like")
+        + _hotspots.c.share_count
+        + bindparam("d_share")
+        + _hotspots.c.comment_count
+        + bindparam("d_comment")
+    )
+    return (
+        update(_hotspots)
+        .where(_hotspots.c.id == bindparam("b_id"))
+        .values(
+            view_count=views,
+            like_count=_hotspots.c.like_count + bindparam("d_like"),
+            share_count=_hotspots.c.share_count + bindparam("d_share"),
+            comment_count=_hotspots.c.comment_count + bindparam("d_comment"),
+            engagement_rate=case(
+                (views > 0, cast(interactions, Float) / views),
+                else_=_hotspots.c.engagement_rate,
+            ),
+            engagement_heat=heat,
+            popularity_score=func.least(heat, 1.0),
+        )
+    )
+
+
+def aggregate_engagement_counts(counts: dict[str, Any]) -> list[dict[str, Any]]:
+    """将Redis中的 "{id}:{action}" 计数汇总为每个资源一组UPDATE参数."""
+    deltas: dict[int, dict[str, int]] = defaultdict(
+        lambda: dict.fromkeys(ENGAGEMENT_WEIGHTS, 0)
+    )
+    for field, value in counts.items():
+        hotspot_id, _, action = field.partition(":")
+        if action in ENGAGEMENT_WEIGHTS:
+            deltas[int(hotspot_id)][action] += int(value)
+
+    return [
+        {"b_id": hotspot_id, **{f"d_{action}": count for action, count in delta.items()}}
+        for hotspot_id, delta in deltas.items()
+    ]
+
+
+def popularity_decay_factor(elapsed_seconds: float) -> float:
+    """热度分数按半衰期衰减的系数."""
+    half_life = settings.HOTSPOT_POPULARITY_HALF_LIFE_HOURS * 3600
+    return math.exp(-math.log(2) * max(elapsed_seconds, 0.0) / half_life)
+
 
 class HotspotService:
-    """热点资源池管理服务."""
+    """热点资源池管理服务.
+
+    互动计数先累加到Redis，由定时任务批量写回数据库；热度累计值随时间指数衰减，
+    写回时增量累加、定时任务整体衰减，热度分数由累计值推导，不再逐条重算。热门和推荐列表由定时任务
+    预先排好序存入Redis，读取时按ID回表。
+    """
 
-    def __init__(self, db: AsyncSession) -> None:
+    def __init__(self, db: AsyncSession, redis_client: redis.Redis | None = None) -> None:
         self.db = db
+        self.redis: Any = redis_client or get_redis_client()
+        self._swap_script: Any = None
 
     async def create_hotspot_resource(
-        self, hotspot_data: HotspotResourceCreate, user_id: int
+        self, hotspot_data: HotspotResourceCreate, user_id: int | None = None
     ) -> HotspotResource:
-        """创建热点资源."""
+        """创建热点资源（定时采集等系统操作不传 user_id）."""
         # 检查资源库是否存在
         library = await self._get_library_by_id(hotspot_data.library_id)
         if not library:
@@ -45,6 +164,7 @@ async def create_hotspot_resource(
         hotspot_dict.update(
             {
                 "popularity_score": popularity_score,
+                "engagement_heat": popularity_score,  # 初始热度作为累计值的起点
                 "relevance_score": relevance_score,
                 "engagement_rate": 0.0,  # 初始参与度为0
             }
@@ -200,7 +320,12 @@ async def search_hotspot_resources(
     async def get_trending_resources(
         self, library_id: int | None = None, limit: int = 10
     ) -> list[HotspotResource]:
-        """获取热门资源."""
+        """获取热门资源 - 优先读取预计算的排行列表."""
+        key = TRENDING_RANKING_KEY.format(scope=library_id or "all")
+        ranked = await self._get_ranked_resources(key, limit)
+        if ranked is not None:
+            return ranked
+
         stmt = select(HotspotResource).where(HotspotResource.is_trending)
 
         if library_id:
@@ -217,7 +342,16 @@ async def get_trending_resources(
     async def get_recommended_resources(
         self, library_id: int, user_preferences: dict[str, Any] | None = None
     ) -> list[HotspotResource]:
-        """获取推荐资源."""
+        """获取推荐资源 - 优先读取预计算的排行列表，再按用户偏好筛选."""
+        key = RECOMMENDED_RANKING_KEY.format(scope=library_id)
+        ranked = await self._get_ranked_resources(key, settings.HOTSPOT_RANKING_SIZE)
+        if ranked is not None:
+            return [
+                resource
+                for resource in ranked
+                if self._matches_preferences(resource, user_preferences)
+            ][:20]
+
         stmt = select(HotspotResource).where(
             and_(
                 HotspotResource.library_id == library_id,
@@ -254,82 +388,195 @@ async def update_engagement_metrics(
         action: str,
         user_id: int | None = None,
     ) -> bool:
-        """更新参与度指标."""
-        hotspot_resource = await self.get_hotspot_resource(hotspot_id)
-        if not hotspot_resource:
+        """更新参与度指标 - 计数累加到Redis，由 flush_engagement_metrics 批量写回."""
+        if action not in ENGAGEMENT_WEIGHTS:
             return False
 
-        # 根据操作类型更新对应指标
-        if action == "view":
-            hotspot_resource.view_count += 1
-        elif action == "like":
-            hotspot_resource.like_count += 1
-        elif action == "share":
-            hotspot_resource.share_count += 1
-        elif action == "comment":
-            hotspot_resource.comment_count += 1
-
-        # 重新计算参与度
-        total_interactions = (
-            hotspot_resource.like_count
-            + hotspot_resource.share_count
-            + hotspot_resource.comment_count
-        )
-
-        if hotspot_resource.view_count > 0:
-            hotspot_resource.engagement_rate = (
-                total_interactions / hotspot_resource.view_count
-            )
+        try:
+            await self.redis.hincrby(ENGAGEMENT_PENDING_KEY, f"{hotspot_id}:{action}", 1)
+            return True
+        except RedisError as e:
+            logger.warning(f"互动计数写入Redis失败，直接更新数据库: {str(e)}")
 
-        # 重新计算热度分数
-        hotspot_resource.popularity_score = (
-            await self._calculate_popularity_from_metrics(hotspot_resource)
+        params = aggregate_engagement_counts({f"{hotspot_id}:{action}": 1})
+        result = await self.db.execute(_engagement_update_statement(), params)
+        await self.db.commit()
+        return bool(result.rowcount)
+
+    async def flush_engagement_metrics(self, batch_size: int | None = None) -> int:
+        """将Redis中累加的互动计数分批写回数据库，返回更新的资源数.
+
+        待写回的计数先原子地整体换到处理中的键，新的计数继续累加到原键；
+        全部分批写入后一次提交，提交后才删除处理中的键。写入失败时处理中的键保留，
+        下次优先重试，不会与新计数重复累加。
+        """
+        batch_size = batch_size or settings.HOTSPOT_ENGAGEMENT_FLUSH_BATCH_SIZE
+
+        if self._swap_script is None:
+            self._swap_script = self.redis.register_script(SWAP_HASH_SCRIPT)
+        if not await self._swap_script(keys=[ENGAGEMENT_PENDING_KEY, ENGAGEMENT_FLUSHING_KEY]):
+            return 0
+
+        params = aggregate_engagement_counts(await self.redis.hgetall(ENGAGEMENT_FLUSHING_KEY))
+        params.sort(key=lambda row: row["b_id"])  # 按主键顺序加锁，避免并发写入互相死锁
+        statement = _engagement_update_statement()
+        for start in range(0, len(params), batch_size):
+            await self.db.execute(statement, params[start : start + batch_size])
+        if params:
+            await self.db.commit()
+        await self.redis.delete(ENGAGEMENT_FLUSHING_KEY)
+
+        return len(params)
+
+    async def decay_popularity_scores(self) -> None:
+        """按距上次衰减的时间整体衰减热度累计值，并重新推导热度分数（单条UPDATE）."""
+        now = time.time()
+        last_decayed_at = await self.redis.getset(POPULARITY_DECAYED_AT_KEY, now)
+        if last_decayed_at is None:
+            return
+
+        factor = popularity_decay_factor(now - float(last_decayed_at))
+        heat = _hotspots.c.engagement_heat * factor
+        # 已衰减到阈值以下的资源不再更新
+        await self.db.execute(
+            update(_hotspots)
+            .where(_hotspots.c.engagement_heat > settings.HOTSPOT_POPULARITY_MIN_SCORE)
+            .values(engagement_heat=heat, popularity_score=func.least(heat, 1.0))
         )
-
         await self.db.commit()
-        return True
 
     async def refresh_trending_status(self) -> None:
-        """刷新热门状态 - 定期任务."""
-        # 获取最近7天的热点资源
-        _seven_days_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-
-        # 重置所有资源的热门状态
-        stmt = select(HotspotResource)
-        result = await self.db.execute(stmt)
-        all_hotspots = list(result.scalars().all())
-
-        for hotspot in all_hotspots:
-            # 计算是否为热门
-            is_trending = (
-                hotspot.popularity_score > 0.7
-                and hotspot.engagement_rate > 0.1
-                and hotspot.view_count > 100
-            )
-
-            hotspot.is_trending = is_trending
-
+        """刷新热门状态 - 定期任务.
+
+        依次写回互动计数、衰减热度分数、用单条UPDATE更新热门标记，
+        最后重建热门和推荐排行列表。
+        """
+        try:
+            await self.flush_engagement_metrics()
+            await self.decay_popularity_scores()
+        except RedisError as e:
+            logger.warning(f"热点互动计数写回失败: {str(e)}")
+
+        is_trending = and_(
+            _hotspots.c.popularity_score > TRENDING_MIN_POPULARITY,
+            _hotspots.c.engagement_rate > TRENDING_MIN_ENGAGEMENT,
+            _hotspots.c.view_count > TRENDING_MIN_VIEWS,
+            _not_expired(_current_date()),
+        )
+        # 只更新状态发生变化的行
+        await self.db.execute(
+            update(_hotspots)
+            .where(_hotspots.c.is_trending.is_distinct_from(is_trending))
+            .values(is_trending=is_trending)
+        )
         await self.db.commit()
 
-    async def auto_expire_resources(self) -> None:
-        """自动过期资源 - 定期任务."""
-        current_date = datetime.now().strftime("%Y-%m-%d")
+        await self.rebuild_rankings()
 
-        stmt = select(HotspotResource).where(
-            and_(
-                HotspotResource.expiry_date.is_not(None),
-                HotspotResource.expiry_date <= current_date,
+    async def auto_expire_resources(self) -> None:
+        """自动过期资源 - 定期任务（单条UPDATE）."""
+        await self.db.execute(
+            update(_hotspots)
+            .where(
+                _hotspots.c.expiry_date.is_not(None),
+                _hotspots.c.expiry_date <= _current_date(),
+                or_(_hotspots.c.is_trending, _hotspots.c.is_recommended),
             )
+            .values(is_trending=False, is_recommended=False)
         )
+        await self.db.commit()
 
-        result = await self.db.execute(stmt)
-        expired_resources = list(result.scalars().all())
+    async def rebuild_rankings(self) -> None:
+        """重建热门和推荐排行列表（按资源库分组，每个列表保留前 HOTSPOT_RANKING_SIZE 个）."""
+        size = settings.HOTSPOT_RANKING_SIZE
+        current_date = _current_date()
+        rankings: dict[str, list[int]] = defaultdict(list)
+
+        trending_rows = await self.db.execute(
+            select(_hotspots.c.id, _hotspots.c.library_id)
+            .where(_hotspots.c.is_trending, _not_expired(current_date))
+            .order_by(
+                desc(_hotspots.c.popularity_score),
+                desc(_hotspots.c.view_count),
+                _hotspots.c.id,
+            )
+        )
+        for row in trending_rows:
+            for scope in ("all", row.library_id):
+                ranking = rankings[TRENDING_RANKING_KEY.format(scope=scope)]
+                if len(ranking) < size:
+                    ranking.append(row.id)
+
+        recommended_rows = await self.db.execute(
+            select(_hotspots.c.id, _hotspots.c.library_id)
+            .where(_hotspots.c.is_recommended, _not_expired(current_date))
+            .order_by(
+                desc(_hotspots.c.relevance_score),
+                desc(_hotspots.c.popularity_score),
+                _hotspots.c.id,
+            )
+        )
+        for row in recommended_rows:
+            ranking = rankings[RECOMMENDED_RANKING_KEY.format(scope=row.library_id)]
+            if len(ranking) < size:
+                ranking.append(row.id)
+
+        try:
+            stale_keys = []
+            for pattern in (
+                TRENDING_RANKING_KEY.format(scope="*"),
+                RECOMMENDED_RANKING_KEY.format(scope="*"),
+            ):
+                stale_keys.extend([key async for key in self.redis.scan_iter(match=pattern)])
+            async with self.redis.pipeline(transaction=True) as pipe:
+                if stale_keys:
+                    pipe.delete(*stale_keys)
+                for key, ids in rankings.items():
+                    pipe.rpush(key, *ids)
+                    pipe.expire(key, settings.HOTSPOT_RANKING_TTL)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"热点排行列表写入Redis失败: {str(e)}")
+
+    async def _get_ranked_resources(
+        self, key: str, limit: int
+    ) -> list[HotspotResource] | None:
+        """按预计算的排行列表读取资源，列表不存在或Redis不可用时返回None."""
+        try:
+            ids = await self.redis.lrange(key, 0, limit - 1)
+        except RedisError as e:
+            logger.warning(f"读取热点排行列表失败: {str(e)}")
+            return None
+        if not ids:
+            return None
 
-        for resource in expired_resources:
-            resource.is_trending = False
-            resource.is_recommended = False
+        ranked_ids = [int(hotspot_id) for hotspot_id in ids]
+        result = await self.db.execute(
+            select(HotspotResource).where(HotspotResource.id.in_(ranked_ids))
+        )
+        resources = {resource.id: resource for resource in result.scalars().all()}
+        return [resources[hotspot_id] for hotspot_id in ranked_ids if hotspot_id in resources]
 
-        await self.db.commit()
+    @staticmethod
+    def _matches_preferences(
+        resource: HotspotResource, user_preferences: dict[str, Any] | None
+    ) -> bool:
+        """资源是否符合用户偏好."""
+        if not user_preferences:
+            return True
+        if "difficulty_level" in user_preferences:
+            difficulty_level = str(user_preferences["difficulty_level"])
+            if difficulty_level.upper() != resource.difficulty_level.name and (
+                difficulty_level != str(resource.difficulty_level.value)
+            ):
+                return False
+        if "topics" in user_preferences and not set(user_preferences["topics"]) <= set(
+            resource.topics or []
+        ):
+            return False
+        if "language" in user_preferences:
+            return bool(resource.language == user_preferences["language"])
+        return True
 
     async def get_hotspot_statistics(
         self, library_id: int | None = None
@@ -460,34 +707,6 @@ async def _calculate_relevance_score(
 
         return min(score, 1.0)
 
-    async def _calculate_popularity_from_metrics(
-        self, hotspot: HotspotResource
-    ) -> float:
-        """基于指标计算热度分数."""
-        score = 0.0
-
-        # 浏览量权重
-        if hotspot.view_count > 0:
-            view_score = min(hotspot.view_count / 1000, 0.4)
-            score += view_score
-
-        # 点赞权重
-        if hotspot.like_count > 0:
-            like_score = min(hotspot.like_count / 100, 0.3)
-            score += like_score
-
-        # 分享权重
-        if hotspot.share_count > 0:
-            share_score = min(hotspot.share_count / 50, 0.2)
-            score += share_score
-
-        # 评论权重
-        if hotspot.comment_count > 0:
-            comment_score = min(hotspot.comment_count / 20, 0.1)
-            score += comment_score
-
-        return min(score, 1.0)
-
     async def _get_library_by_id(self, library_id: int) -> ResourceLibrary | None:
         """获取资源库."""
         stmt = select(ResourceLibrary).where(ResourceLibrary.id == library_id)
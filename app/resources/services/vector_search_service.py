@@ -9,20 +9,38 @@
 """
 
 import asyncio
+import hashlib
+import json
 import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Any
 
+import numpy as np
 from loguru import logger
 from pydantic import BaseModel, Field
-from sqlalchemy import or_, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Table, bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.core.config import settings
 from app.core.exceptions import BusinessLogicError
 from app.resources.models.resource_models import DocumentChunk, ResourceLibrary
-from app.shared.services.cache_service import CacheService
+from app.resources.utils.lexical_search import (
+    build_search_document,
+    build_tsquery,
+    extract_query_terms,
+    generate_snippet,
+)
+from app.shared.services.cache_service import CacheService, LRUCache
 from app.shared.utils.text_utils import TextUtils
 
+# 各检索路在融合时的权重
+LEG_WEIGHTS = {"vector": 1.0, "keyword": 1.0, "semantic": 0.5}
+
+# 进程内共享的查询向量缓存（有界LRU），所有服务实例共用
+_query_embedding_cache = LRUCache(max_size=settings.QUERY_EMBEDDING_CACHE_SIZE)
+
 
 class SearchResult(BaseModel):
     """搜索结果模型"""
@@ -81,6 +99,112 @@ class MilvusClusterConfig(BaseModel):
     dimension: int = 1536  # OpenAI embedding dimension
 
 
+def normalize_query_text(query_text: str) -> str:
+    """规范化查询文本 - 合并空白，用于缓存键"""
+    return " ".join(query_text.split())
+
+
+def build_search_cache_key(query: SearchQuery) -> str:
+    """构建检索结果缓存键 - 与进程无关的稳定摘要"""
+    payload = json.dumps(
+        {
+            "q": normalize_query_text(query.query_text),
+            "type": query.query_type,
+            "top_k": query.top_k,
+            "threshold": query.similarity_threshold,
+            "rerank": query.enable_rerank,
+            "filters": query.filters,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return f"search:{hashlib.sha1(payload.encode()).hexdigest()}"
+
+
+def fuse_search_results(
+    leg_results: dict[str, list[SearchResult]],
+    method: str = "rrf",
+    weights: dict[str, float] | None = None,
+    rrf_k: int = 60,
+) -> list[SearchResult]:
+    """
+    融合多路检索结果
+
+    rrf: 按各路排名累加 weight / (k + rank)，不依赖各路分数的量纲；
+    weighted: 各路分数做 min-max 归一化后按权重累加。
+    融合分数归一化到 [0, 1] 写入 relevance_score 和 final_score。
+
+    Args:
+        leg_results: 检索路名称 -> 该路结果
+        method: 融合方式
+        weights: 各路权重，缺省为 LEG_WEIGHTS
+        rrf_k: RRF平滑常数
+
+    Returns:
+        List[SearchResult]: 按融合分数降序的结果
+    """
+    weights = weights or LEG_WEIGHTS
+    index: dict[int, int] = {}
+    merged: list[SearchResult] = []
+    ranked_legs: list[tuple[str, list[SearchResult]]] = []
+
+    for leg, results in leg_results.items():
+        # 各路内按分数排序并按切片去重
+        seen: set[int] = set()
+        ranked = []
+        for result in sorted(results, key=lambda r: r.final_score, reverse=True):
+            if result.chunk_id in seen:
+                continue
+            seen.add(result.chunk_id)
+            ranked.append(result)
+            if result.chunk_id not in index:
+                index[result.chunk_id] = len(merged)
+                merged.append(result)
+                result.metadata["search_methods"] = []
+                result.metadata["leg_scores"] = {}
+        ranked_legs.append((leg, ranked))
+
+    if not merged:
+        return []
+
+    scores = np.zeros(len(merged))
+    for leg, ranked in ranked_legs:
+        if not ranked:
+            continue
+        positions = np.fromiter(
+            (index[r.chunk_id] for r in ranked), dtype=np.int64, count=len(ranked)
+        )
+        weight = weights.get(leg, 1.0)
+        if method == "weighted":
+            leg_scores = np.fromiter(
+                (r.final_score for r in ranked), dtype=np.float64, count=len(ranked)
+            )
+            span = leg_scores.max() - leg_scores.min()
+            normalized = (
+                (leg_scores - leg_scores.min()) / span if span > 0 else np.ones_like(leg_scores)
+            )
+            scores[positions] += weight * normalized
+        else:
+            scores[positions] += weight / (rrf_k + np.arange(1, len(ranked) + 1))
+
+        for result in ranked:
+            target = merged[index[result.chunk_id]]
+            target.metadata["search_methods"].append(leg)
+            target.metadata["leg_scores"][leg] = result.final_score
+            if result.highlight and not target.highlight:
+                target.highlight = result.highlight
+
+    scores /= scores.max()
+    fused = []
+    for position in np.argsort(-scores, kind="stable"):
+        result = merged[position]
+        result.relevance_score = float(scores[position])
+        result.final_score = result.relevance_score
+        fused.append(result)
+    return fused
+
+
 class VectorSearchService:
     """向量检索服务 - 支持TB级存储和百万级向量检索"""
 
@@ -89,10 +213,15 @@ def __init__(
         db: AsyncSession,
         cache_service: CacheService,
         milvus_config: MilvusClusterConfig | None = None,
+        session_factory: Callable[[], AsyncSession] | None = None,
     ) -> None:
         self.db = db
         self.cache_service = cache_service
         self.text_utils = TextUtils()
+        # 混合检索各路使用独立会话，AsyncSession 不支持并发使用
+        self.session_factory = session_factory or async_sessionmaker(
+            db.bind, expire_on_commit=False
+        )
 
         # Milvus配置
         self.milvus_config = milvus_config or MilvusClusterConfig()
@@ -166,9 +295,7 @@ async def hybrid_search(self, query: SearchQuery) -> SearchResponse:
 
         try:
             # 1. 缓存检查
-            cache_key = (
-                f"search:{hash(query.query_text)}:{query.query_type}:{query.top_k}"
-            )
+            cache_key = build_search_cache_key(query)
             cached_result = await self.cache_service.get(cache_key)
             if cached_result:
                 logger.info(f"Search cache hit for query: {query.query_text[:50]}")
@@ -242,63 +369,82 @@ async def _hybrid_search_implementation(
         Returns:
             List[SearchResult]: 搜索结果列表
         """
-        # 1. 并行执行多种检索策略
-        vector_task = self._vector_search(query)
-        keyword_task = self._keyword_search(query)
-        semantic_task = self._semantic_search(query)
-
-        vector_results, keyword_results, semantic_results = await asyncio.gather(
-            vector_task, keyword_task, semantic_task, return_exceptions=True
+        # 1. 并行执行多种检索策略 - 每路独立会话和截止时间，单路失败或超时不影响其他路
+        legs: dict[str, Callable[[SearchQuery, AsyncSession], Awaitable[list[SearchResult]]]]
+        legs = {
+            "vector": self._vector_search,
+            "keyword": self._keyword_search,
+            "semantic": self._semantic_search,
+        }
+        leg_results = await asyncio.gather(
+            *(self._run_search_leg(name, leg, query) for name, leg in legs.items())
         )
 
-        # 2. 处理异常结果
-        vector_results_safe: list[SearchResult] = []
-        keyword_results_safe: list[SearchResult] = []
-        semantic_results_safe: list[SearchResult] = []
-
-        if isinstance(vector_results, Exception):
-            logger.error(f"Vector search failed: {str(vector_results)}")
-        elif isinstance(vector_results, list):
-            vector_results_safe = vector_results
-
-        if isinstance(keyword_results, Exception):
-            logger.error(f"Keyword search failed: {str(keyword_results)}")
-        elif isinstance(keyword_results, list):
-            keyword_results_safe = keyword_results
-
-        if isinstance(semantic_results, Exception):
-            logger.error(f"Semantic search failed: {str(semantic_results)}")
-        elif isinstance(semantic_results, list):
-            semantic_results_safe = semantic_results
-
-        # 3. 结果融合和去重
-        merged_results = await self._merge_search_results(
-            vector_results_safe, keyword_results_safe, semantic_results_safe
+        # 2. 结果融合和去重，按融合得分排序
+        return fuse_search_results(
+            dict(zip(legs, leg_results, strict=True)),
+            method=settings.HYBRID_SEARCH_FUSION,
+            rrf_k=settings.HYBRID_SEARCH_RRF_K,
         )
 
-        # 4. 按综合得分排序
-        merged_results.sort(key=lambda x: x.final_score, reverse=True)
+    @asynccontextmanager
+    async def _leg_session(self) -> AsyncIterator[AsyncSession]:
+        """为单路检索创建独立会话"""
+        async with self.session_factory() as session:
+            yield session
 
-        return merged_results
+    async def _run_search_leg(
+        self,
+        name: str,
+        leg: Callable[[SearchQuery, AsyncSession], Awaitable[list[SearchResult]]],
+        query: SearchQuery,
+    ) -> list[SearchResult]:
+        """在独立会话中执行单路检索，超过截止时间则放弃该路结果"""
+
+        async def run() -> list[SearchResult]:
+            async with self._leg_session() as session:
+                return await leg(query, session)
+
+        start_time = time.perf_counter()
+        try:
+            return await asyncio.wait_for(run(), timeout=settings.HYBRID_SEARCH_LEG_TIMEOUT)
+        except TimeoutError:
+            logger.warning(
+                f"{name} search leg exceeded deadline",
+                extra={"timeout": settings.HYBRID_SEARCH_LEG_TIMEOUT},
+            )
+            return []
+        except Exception as e:
+            logger.error(f"{name} search leg failed: {str(e)}")
+            return []
+        finally:
+            logger.debug(
+                f"{name} search leg finished",
+                extra={"elapsed": time.perf_counter() - start_time},
+            )
 
-    async def _vector_search(self, query: SearchQuery) -> list[SearchResult]:
+    async def _vector_search(
+        self, query: SearchQuery, db: AsyncSession | None = None
+    ) -> list[SearchResult]:
         """
         向量检索 - 基于语义相似度
 
         Args:
             query: 搜索查询
+            db: 数据库会话，缺省使用服务会话
 
         Returns:
             List[SearchResult]: 向量检索结果
         """
         try:
-            # 1. 查询向量化
+            # 1. 查询向量化（带缓存），向量化失败时跳过向量检索
             query_vector = await self._vectorize_query(query.query_text)
+            if not any(query_vector):
+                return []
 
             # 2. Milvus向量检索
             search_params = {"metric_type": "L2", "params": {"nprobe": 16}}
 
-            # 模拟Milvus检索
             milvus_results = await self._milvus_search(
                 query_vector,
                 top_k=query.top_k * 2,  # 获取更多结果用于重排序
@@ -306,27 +452,34 @@ async def _vector_search(self, query: SearchQuery) -> list[SearchResult]:
                 filters=query.filters,
             )
 
-            # 3. 转换为SearchResult格式
+            # 3. 一次批量加载命中的切片，转换为SearchResult格式
+            hits = [
+                hit
+                for hit in milvus_results
+                if hit["distance"] <= (1 - query.similarity_threshold)
+            ]
+            chunks = await self._get_chunks_by_vector_ids(
+                db or self.db, [hit["id"] for hit in hits]
+            )
+
             results = []
-            for result in milvus_results:
-                if result["distance"] <= (1 - query.similarity_threshold):
-                    # 获取文档内容
-                    chunk = await self._get_chunk_by_vector_id(result["id"])
-                    if chunk:
-                        search_result = SearchResult(
-                            resource_id=chunk.resource_id,
-                            chunk_id=chunk.id,
-                            content=chunk.content,
-                            similarity_score=1 - result["distance"],  # 转换为相似度
-                            relevance_score=1 - result["distance"],
-                            final_score=1 - result["distance"],
-                            metadata={
-                                "search_type": "vector",
-                                "vector_id": result["id"],
-                                "distance": result["distance"],
-                            },
-                        )
-                        results.append(search_result)
+            for hit in hits:
+                chunk = chunks.get(hit["id"])
+                if chunk:
+                    search_result = SearchResult(
+                        resource_id=chunk.resource_id,
+                        chunk_id=chunk.id,
+                        content=chunk.content,
+                        similarity_score=1 - hit["distance"],  # 转换为相似度
+                        relevance_score=1 - hit["distance"],
+                        final_score=1 - hit["distance"],
+                        metadata={
+                            "search_type": "vector",
+                            "vector_id": hit["id"],
+                            "distance": hit["distance"],
+                        },
+                    )
+                    results.append(search_result)
 
             logger.info(
                 "Vector search completed",
@@ -343,29 +496,43 @@ async def _vector_search(self, query: SearchQuery) -> list[SearchResult]:
             logger.error(f"Vector search failed: {str(e)}")
             return []
 
-    async def _keyword_search(self, query: SearchQuery) -> list[SearchResult]:
+    async def _keyword_search(
+        self, query: SearchQuery, db: AsyncSession | None = None
+    ) -> list[SearchResult]:
         """
-        关键词检索 - 基于文本匹配
+        关键词检索 - 基于全文检索索引
+
+        查询与入库使用同一中英文分词器，通过 search_vector 的GIN索引匹配，
+        在数据库内按 ts_rank_cd 排序并截取 top-k，高亮摘要由词项偏移生成。
 
         Args:
             query: 搜索查询
+            db: 数据库会话，缺省使用服务会话
 
         Returns:
             List[SearchResult]: 关键词检索结果
         """
         try:
-            # 1. 关键词提取和处理
-            keywords = await self.text_utils.extract_keywords(query.query_text)
-
-            # 2. 构建SQL查询
-            search_conditions = []
-            for keyword in keywords:
-                search_conditions.append(DocumentChunk.content.ilike(f"%{keyword}%"))
-
-            # 3. 执行数据库查询
+            # 1. 分词得到查询词项
+            terms = extract_query_terms(query.query_text)
+            if not terms:
+                return []
+
+            # 2. 构建索引查询 - 只取需要的列，排序和截断在数据库内完成
+            ts_query = func.to_tsquery("simple", build_tsquery(terms))
+            rank = func.ts_rank_cd(DocumentChunk.search_vector, ts_query, 32).label(
+                "rank"
+            )
             stmt = (
-                select(DocumentChunk)
-                .where(or_(*search_conditions))
+                select(
+                    DocumentChunk.id,
+                    DocumentChunk.resource_id,
+                    DocumentChunk.chunk_index,
+                    DocumentChunk.content,
+                    rank,
+                )
+                .where(DocumentChunk.search_vector.op("@@")(ts_query))
+                .order_by(rank.desc(), DocumentChunk.id)
                 .limit(query.top_k * 2)
             )
 
@@ -373,41 +540,33 @@ async def _keyword_search(self, query: SearchQuery) -> list[SearchResult]:
             if query.filters:
                 stmt = await self._apply_filters(stmt, query.filters)
 
-            result = await self.db.execute(stmt)
-            chunks = result.scalars().all()
+            result = await (db or self.db).execute(stmt)
 
-            # 4. 计算关键词匹配得分
+            # 3. 构建结果 - 排序分数经归一化（rank/(rank+1)）落在 [0, 1)
             results = []
-            for chunk in chunks:
-                keyword_score = await self._calculate_keyword_score(
-                    chunk.content, keywords
-                )
-
-                if keyword_score > 0.1:  # 最低匹配阈值
-                    search_result = SearchResult(
-                        resource_id=chunk.resource_id,
-                        chunk_id=chunk.id,
-                        content=chunk.content,
+            for row in result:
+                keyword_score = float(row.rank)
+                results.append(
+                    SearchResult(
+                        resource_id=row.resource_id,
+                        chunk_id=row.id,
+                        content=row.content,
                         similarity_score=keyword_score,
                         relevance_score=keyword_score,
                         final_score=keyword_score,
                         metadata={
                             "search_type": "keyword",
-                            "matched_keywords": keywords,
+                            "matched_keywords": terms,
                             "keyword_score": keyword_score,
+                            "chunk_index": row.chunk_index,
                         },
-                        highlight=await self._generate_highlight(
-                            chunk.content, keywords
-                        ),
+                        highlight=generate_snippet(row.content, terms),
                     )
-                    results.append(search_result)
-
-            # 5. 按得分排序
-            results.sort(key=lambda x: x.final_score, reverse=True)
+                )
 
             logger.info(
                 "Keyword search completed",
-                extra={"keywords": keywords, "results_count": len(results)},
+                extra={"keywords": terms, "results_count": len(results)},
             )
 
             return results
@@ -416,12 +575,65 @@ async def _keyword_search(self, query: SearchQuery) -> list[SearchResult]:
             logger.error(f"Keyword search failed: {str(e)}")
             return []
 
-    async def _semantic_search(self, query: SearchQuery) -> list[SearchResult]:
+    async def rebuild_keyword_index(self, batch_size: int = 500) -> int:
+        """
+        分批回填缺失的全文检索向量
+
+        用于迁移后补齐存量切片，按主键顺序处理，每批单独提交。
+
+        Args:
+            batch_size: 每批处理的切片数量
+
+        Returns:
+            int: 回填的切片数量
+        """
+        chunks: Table = DocumentChunk.__table__  # type: ignore[assignment]
+        update_stmt = (
+            update(chunks)
+            .where(chunks.c.id == bindparam("b_id"))
+            .values(
+                search_vector=func.to_tsvector("simple", bindparam("b_document")),
+                # 回填不视为内容修改，保留原更新时间
+                updated_at=chunks.c.updated_at,
+            )
+        )
+
+        total = 0
+        last_id = 0
+        while True:
+            result = await self.db.execute(
+                select(chunks.c.id, chunks.c.content)
+                .where(chunks.c.search_vector.is_(None), chunks.c.id > last_id)
+                .order_by(chunks.c.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            await self.db.execute(
+                update_stmt,
+                [
+                    {"b_id": row.id, "b_document": build_search_document(row.content)}
+                    for row in rows
+                ],
+            )
+            await self.db.commit()
+            total += len(rows)
+            last_id = rows[-1].id
+
+        logger.info("Keyword index rebuilt", extra={"chunks_updated": total})
+        return total
+
+    async def _semantic_search(
+        self, query: SearchQuery, db: AsyncSession | None = None
+    ) -> list[SearchResult]:
         """
         语义检索 - 基于语义理解
 
         Args:
             query: 搜索查询
+            db: 数据库会话，缺省使用服务会话
 
         Returns:
             List[SearchResult]: 语义检索结果
@@ -437,7 +649,7 @@ async def _semantic_search(self, query: SearchQuery) -> list[SearchResult]:
             results = []
             for concept in expanded_concepts:
                 concept_results = await self._search_by_concept(
-                    concept, query.top_k // len(expanded_concepts)
+                    concept, query.top_k // len(expanded_concepts), db or self.db
                 )
                 results.extend(concept_results)
 
@@ -492,25 +704,24 @@ async def _intelligent_rerank(
             if len(results) <= 1:
                 return results
 
-            # 1. 多因子评分
+            # 1. 批量获取资源级特征
+            resource_ids = list({result.resource_id for result in results})
+            freshness_scores = await self._get_freshness_scores(resource_ids)
+            preference_scores = await self._get_preference_scores(resource_ids)
+
+            # 2. 多因子评分
             for result in results:
-                # 原始相似度得分 (40%)
-                similarity_factor = result.similarity_score * 0.4
+                # 检索相关度得分 (40%)，混合检索时为融合得分
+                similarity_factor = result.relevance_score * 0.4
 
                 # 内容质量得分 (30%)
-                quality_factor = (
-                    await self._calculate_content_quality(result.content) * 0.3
-                )
+                quality_factor = self._calculate_content_quality(result.content) * 0.3
 
                 # 新鲜度得分 (20%)
-                freshness_factor = (
-                    await self._calculate_freshness_score(result.resource_id) * 0.2
-                )
+                freshness_factor = freshness_scores.get(result.resource_id, 0.5) * 0.2
 
                 # 用户偏好得分 (10%)
-                preference_factor = (
-                    await self._calculate_preference_score(result.resource_id) * 0.1
-                )
+                preference_factor = preference_scores.get(result.resource_id, 0.5) * 0.1
 
                 # 综合得分
                 result.final_score = (
@@ -531,10 +742,10 @@ async def _intelligent_rerank(
                     }
                 )
 
-            # 2. 多样性调整
+            # 3. 多样性调整
             reranked_results = await self._apply_diversity_adjustment(results)
 
-            # 3. 最终排序
+            # 4. 最终排序
             reranked_results.sort(key=lambda x: x.final_score, reverse=True)
 
             logger.info(
@@ -712,7 +923,13 @@ async def _ensure_collection_exists(self) -> None:
             raise
 
     async def _vectorize_query(self, query_text: str) -> list[float]:
-        """查询向量化"""
+        """查询向量化 - 先查进程内缓存，未命中再调用embedding服务（其自身带共享缓存）"""
+        normalized = normalize_query_text(query_text)
+        cache_key = f"query_embedding:{hashlib.sha1(normalized.encode()).hexdigest()}"
+        cached: list[float] | None = _query_embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             from app.ai.services.deepseek_embedding_service import (
                 DeepSeekEmbeddingService,
@@ -722,7 +939,10 @@ async def _vectorize_query(self, query_text: str) -> list[float]:
             embedding_service = DeepSeekEmbeddingService(self.cache_service)
 
             # 向量化查询文本
-            embedding = await embedding_service.vectorize_text(query_text)
+            embedding = await embedding_service.vectorize_text(normalized)
+            _query_embedding_cache.set(
+                cache_key, embedding, ttl=settings.QUERY_EMBEDDING_CACHE_TTL
+            )
 
             logger.info(
                 "Query vectorization completed",
@@ -736,7 +956,7 @@ async def _vectorize_query(self, query_text: str) -> list[float]:
 
         except Exception as e:
             logger.error(f"Query vectorization failed: {str(e)}")
-            # 返回零向量作为fallback
+            # 返回零向量作为fallback（不缓存）
             return [0.0] * self.milvus_config.dimension
 
     async def _milvus_search(
@@ -754,8 +974,9 @@ async def _milvus_search(
             # 构建搜索表达式
             expr = self._build_search_expression(filters)
 
-            # 执行向量检索
-            search_results = self.milvus_client.search(
+            # 执行向量检索 - 同步客户端放到线程中，避免阻塞其他检索路
+            search_results = await asyncio.to_thread(
+                self.milvus_client.search,
                 data=[query_vector],
                 anns_field="embedding",
                 param=search_params,
@@ -820,43 +1041,32 @@ def _build_search_expression(self, filters: dict[str, Any]) -> str | None:
 
         return " and ".join(expressions) if expressions else None
 
-    async def _get_chunk_by_vector_id(self, vector_id: str) -> DocumentChunk | None:
-        """根据向量ID获取文档切片"""
-        stmt = select(DocumentChunk).where(DocumentChunk.vector_id == vector_id)
-        result = await self.db.execute(stmt)
-        chunk: DocumentChunk | None = result.scalar_one_or_none()
-        return chunk
+    async def _get_chunks_by_vector_ids(
+        self, db: AsyncSession, vector_ids: list[str]
+    ) -> dict[str, Any]:
+        """根据向量ID批量获取文档切片（一次IN查询），返回 向量ID -> 切片行"""
+        if not vector_ids:
+            return {}
+        stmt = select(
+            DocumentChunk.id,
+            DocumentChunk.resource_id,
+            DocumentChunk.content,
+            DocumentChunk.vector_id,
+        ).where(DocumentChunk.vector_id.in_(set(vector_ids)))
+        result = await db.execute(stmt)
+        return {row.vector_id: row for row in result}
 
     async def _apply_filters(self, stmt: Any, filters: dict[str, Any]) -> Any:
         """应用过滤器"""
-        # 根据过滤器条件修改查询
+        resource_ids = filters.get("resource_ids")
+        if isinstance(resource_ids, list) and resource_ids:
+            stmt = stmt.where(DocumentChunk.resource_id.in_(resource_ids))
+
         if "resource_type" in filters:
             # 需要join ResourceLibrary表
             pass
         return stmt
 
-    async def _calculate_keyword_score(
-        self, content: str, keywords: list[str]
-    ) -> float:
-        """计算关键词匹配得分"""
-        if not keywords:
-            return 0.0
-
-        content_lower = content.lower()
-        matches = sum(1 for keyword in keywords if keyword.lower() in content_lower)
-        return matches / len(keywords)
-
-    async def _generate_highlight(self, content: str, keywords: list[str]) -> str:
-        """生成高亮文本"""
-        highlighted = content
-        for keyword in keywords:
-            highlighted = highlighted.replace(
-                keyword,
-                f"<mark>{keyword}</mark>",
-                1,  # 只替换第一个匹配
-            )
-        return highlighted[:200] + "..." if len(highlighted) > 200 else highlighted
-
     async def _extract_semantic_concepts(self, query: str) -> list[str]:
         """提取语义概念"""
         # 简单的概念提取
@@ -873,7 +1083,9 @@ async def _expand_semantic_concepts(self, concepts: list[str]) -> list[str]:
             expanded.append(f"{concept}相关")
         return expanded
 
-    async def _search_by_concept(self, concept: str, limit: int) -> list[SearchResult]:
+    async def _search_by_concept(
+        self, concept: str, limit: int, db: AsyncSession
+    ) -> list[SearchResult]:
         """基于概念检索"""
         # 简化实现
         stmt = (
@@ -882,7 +1094,7 @@ async def _search_by_concept(self, concept: str, limit: int) -> list[SearchResul
             .limit(limit)
         )
 
-        result = await self.db.execute(stmt)
+        result = await db.execute(stmt)
         chunks = result.scalars().all()
 
         results = []
@@ -925,70 +1137,7 @@ async def _deduplicate_results(
 
         return unique_results
 
-    async def _merge_search_results(
-        self,
-        vector_results: list[SearchResult],
-        keyword_results: list[SearchResult],
-        semantic_results: list[SearchResult],
-    ) -> list[SearchResult]:
-        """融合多种检索结果"""
-        # 创建结果字典，以chunk_id为键
-        merged_dict = {}
-
-        # 处理向量检索结果
-        for result in vector_results:
-            chunk_id = result.chunk_id
-            if chunk_id not in merged_dict:
-                merged_dict[chunk_id] = result
-                merged_dict[chunk_id].metadata["search_methods"] = ["vector"]
-            else:
-                # 更新得分
-                merged_dict[chunk_id].final_score = max(
-                    merged_dict[chunk_id].final_score, result.final_score
-                )
-                merged_dict[chunk_id].metadata["search_methods"].append("vector")
-
-        # 处理关键词检索结果
-        for result in keyword_results:
-            chunk_id = result.chunk_id
-            if chunk_id not in merged_dict:
-                merged_dict[chunk_id] = result
-                merged_dict[chunk_id].metadata["search_methods"] = ["keyword"]
-            else:
-                # 融合得分
-                current_score = merged_dict[chunk_id].final_score
-                merged_dict[chunk_id].final_score = (
-                    current_score + result.final_score
-                ) / 2
-                merged_dict[chunk_id].metadata["search_methods"].append("keyword")
-                # 保留高亮
-                if result.highlight:
-                    merged_dict[chunk_id].highlight = result.highlight
-
-        # 处理语义检索结果
-        for result in semantic_results:
-            chunk_id = result.chunk_id
-            if chunk_id not in merged_dict:
-                merged_dict[chunk_id] = result
-                merged_dict[chunk_id].metadata["search_methods"] = ["semantic"]
-            else:
-                # 融合得分
-                current_score = merged_dict[chunk_id].final_score
-                merged_dict[chunk_id].final_score = (
-                    current_score + result.final_score
-                ) / 2
-                merged_dict[chunk_id].metadata["search_methods"].append("semantic")
-
-        # 为多方法匹配的结果加权
-        for result in merged_dict.values():
-            method_count = len(result.metadata["search_methods"])
-            if method_count > 1:
-                # 多方法匹配给予额外加权
-                result.final_score *= 1 + 0.1 * (method_count - 1)
-
-        return list(merged_dict.values())
-
-    async def _calculate_content_quality(self, content: str) -> float:
+    def _calculate_content_quality(self, content: str) -> float:
         """计算内容质量得分"""
         # 简化的内容质量评估
         factors = {
@@ -999,26 +1148,28 @@ async def _calculate_content_quality(self, content: str) -> float:
 
         return sum(factors.values()) / len(factors)
 
-    async def _calculate_freshness_score(self, resource_id: int) -> float:
-        """计算新鲜度得分"""
-        # 获取资源创建时间
-        stmt = select(ResourceLibrary.created_at).where(
-            ResourceLibrary.id == resource_id
+    async def _get_freshness_scores(self, resource_ids: list[int]) -> dict[int, float]:
+        """批量计算新鲜度得分（一次IN查询），缺失的资源按中性得分处理"""
+        if not resource_ids:
+            return {}
+        stmt = select(ResourceLibrary.id, ResourceLibrary.created_at).where(
+            ResourceLibrary.id.in_(resource_ids)
         )
         result = await self.db.execute(stmt)
-        created_at: datetime | None = result.scalar_one_or_none()
-
-        if not created_at:
-            return 0.5
-
-        # 计算时间衰减
-        days_old = (datetime.utcnow() - created_at).days
-        return max(0.1, 1.0 - (days_old / 365))  # 一年内线性衰减
 
-    async def _calculate_preference_score(self, resource_id: int) -> float:
-        """计算用户偏好得分"""
+        now = datetime.utcnow()
+        scores = {}
+        for resource_id, created_at in result:
+            if created_at:
+                # 计算时间衰减，一年内线性衰减
+                days_old = (now - created_at).days
+                scores[resource_id] = max(0.1, 1.0 - (days_old / 365))
+        return scores
+
+    async def _get_preference_scores(self, resource_ids: list[int]) -> dict[int, float]:
+        """批量计算用户偏好得分"""
         # 简化的偏好计算，可以基于用户历史行为
-        return 0.5  # 默认中性偏好
+        return dict.fromkeys(resource_ids, 0.5)  # 默认中性偏好
 
     async def _apply_diversity_adjustment(
         self, results: list[SearchResult]
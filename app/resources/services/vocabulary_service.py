@@ -2,11 +2,22 @@
 
 from __future__ import annotations
 
+import base64
+import json
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Any
 
-from sqlalchemy import and_, desc, func, or_, select
+from sqlalchemy import and_, desc, func, insert, literal, or_, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement, ColumnElement
 
+from app.core.config import settings
 from app.resources.models.resource_models import ResourceLibrary, VocabularyItem
 from app.resources.schemas.resource_schemas import (
     VocabularyBatchImport,
@@ -16,6 +27,111 @@
 )
 from app.shared.models.enums import DifficultyLevel
 
+# 可排序字段 - 每个字段都有 (library_id, 字段, id) 索引支撑游标分页
+SORT_COLUMNS: dict[str, InstrumentedAttribute[Any]] = {
+    "word": VocabularyItem.word,
+    "difficulty_level": VocabularyItem.difficulty_level,
+    "frequency": VocabularyItem.frequency,
+    "mastery_level": VocabularyItem.mastery_level,
+    "created_at": VocabularyItem.created_at,
+}
+
+
+@dataclass
+class VocabularySearchPage:
+    """词汇搜索结果页."""
+
+    items: list[VocabularyItem]
+    total: int
+    # count_mode=auto 且结果超出精确统计上限时，总数取自查询计划的估算行数
+    is_estimate: bool = False
+    next_cursor: str | None = None
+
+
+class ExplainStatement(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) 语句 - 用于读取查询计划的估算行数."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Any) -> None:
+        self.statement = statement
+
+
+@compiles(ExplainStatement)
+def _compile_explain(element: ExplainStatement, compiler: Any, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _escape_like(value: str) -> str:
+    """转义LIKE通配符（转义符为 /，避免反斜杠受 standard_conforming_strings 影响）."""
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def encode_search_cursor(
+    sort_by: str, sort_order: str, sort_value: Any, last_id: int
+) -> str:
+    """编码分页游标 - 记录上一页最后一条的排序值和id."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    elif isinstance(sort_value, DifficultyLevel):
+        sort_value = sort_value.value
+    payload = json.dumps([sort_by, sort_order, sort_value, last_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str, sort_by: str, sort_order: str) -> tuple[Any, int]:
+    """解码分页游标，游标与当前排序方式不一致时抛出 ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, cursor_order, sort_value, last_id = json.loads(
+            base64.urlsafe_b64decode(padded)
+        )
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid search cursor") from e
+
+    if cursor_sort_by != sort_by or cursor_order != sort_order:
+        raise ValueError("Search cursor does not match sort order")
+
+    if sort_by == "created_at":
+        sort_value = datetime.fromisoformat(sort_value)
+    elif sort_by == "difficulty_level":
+        sort_value = DifficultyLevel(sort_value)
+    return sort_value, int(last_id)
+
+
+class KeyWordPrefixIndex:
+    """关键词前缀索引 - 按小写单词排序，二分查找前缀."""
+
+    def __init__(self, items: list[tuple[int, str]]) -> None:
+        entries = sorted((word.lower(), vocabulary_id, word) for vocabulary_id, word in items)
+        self.keys = [entry[0] for entry in entries]
+        self.items = [(entry[1], entry[2]) for entry in entries]
+        self.built_at = time.monotonic()
+
+    def is_expired(self, ttl: float) -> bool:
+        """索引是否已超过有效期."""
+        return time.monotonic() - self.built_at > ttl
+
+    def lookup(self, prefix: str, limit: int) -> list[tuple[int, str]]:
+        """查找以 prefix 开头的关键词（不区分大小写）."""
+        key = prefix.strip().lower()
+        start = bisect_left(self.keys, key)
+        results: list[tuple[int, str]] = []
+        for position in range(start, min(start + limit, len(self.keys))):
+            if not self.keys[position].startswith(key):
+                break
+            results.append(self.items[position])
+        return results
+
+
+# 资源库ID -> 关键词前缀索引（进程内，按TTL重建，本进程写入时立即失效）
+_key_word_indexes: dict[int, KeyWordPrefixIndex] = {}
+
+
+def invalidate_key_word_index(library_id: int) -> None:
+    """使资源库的关键词前缀索引失效."""
+    _key_word_indexes.pop(library_id, None)
+
 
 class VocabularyService:
     """词汇库管理服务."""
@@ -47,6 +163,8 @@ async def create_vocabulary_item(
 
         # 更新资源库统计
         await self._update_library_stats(vocabulary_data.library_id)
+        if vocabulary_item.is_key_word:
+            invalidate_key_word_index(vocabulary_data.library_id)
 
         return vocabulary_item
 
@@ -74,6 +192,7 @@ async def update_vocabulary_item(
 
         await self.db.commit()
         await self.db.refresh(vocabulary_item)
+        invalidate_key_word_index(vocabulary_item.library_id)
         return vocabulary_item
 
     async def delete_vocabulary_item(self, vocabulary_id: int, user_id: int) -> bool:
@@ -88,78 +207,169 @@ async def delete_vocabulary_item(self, vocabulary_id: int, user_id: int) -> bool
 
         # 更新资源库统计
         await self._update_library_stats(library_id)
+        invalidate_key_word_index(library_id)
         return True
 
     async def search_vocabularies(
         self, search_request: VocabularySearchRequest
-    ) -> tuple[list[VocabularyItem], int]:
-        """搜索词汇条目."""
-        # 构建查询
-        stmt = select(VocabularyItem)
+    ) -> VocabularySearchPage:
+        """搜索词汇条目 - 支持游标分页和估算总数.
+
+        传入 cursor 时按 (排序列, id) 做键集分页，翻页代价与页码无关；
+        否则按页码偏移分页，兼容原有调用方式。总数为估算值时结果的 is_estimate 为真。
+        """
+        conditions = self._build_search_conditions(search_request)
+        total, is_estimate = await self._count_vocabularies(
+            conditions, search_request.count_mode
+        )
+
+        sort_by = (
+            search_request.sort_by
+            if search_request.sort_by in SORT_COLUMNS
+            else "created_at"
+        )
+        order_col = SORT_COLUMNS[sort_by]
+        descending = search_request.sort_order == "desc"
+
+        stmt = select(VocabularyItem).where(*conditions)
+        if descending:
+            stmt = stmt.order_by(desc(order_col), desc(VocabularyItem.id))
+        else:
+            stmt = stmt.order_by(order_col, VocabularyItem.id)
+
+        if search_request.cursor:
+            sort_value, last_id = decode_search_cursor(
+                search_request.cursor, sort_by, search_request.sort_order
+            )
+            position = tuple_(order_col, VocabularyItem.id)
+            boundary = tuple_(literal(sort_value, order_col.type), literal(last_id))
+            stmt = stmt.where(position < boundary if descending else position > boundary)
+        else:
+            stmt = stmt.offset((search_request.page - 1) * search_request.page_size)
+
+        # 多取一条判断是否还有下一页
+        stmt = stmt.limit(search_request.page_size + 1)
+        result = await self.db.execute(stmt)
+        vocabularies = list(result.scalars().all())
+
+        next_cursor = None
+        if len(vocabularies) > search_request.page_size:
+            vocabularies = vocabularies[: search_request.page_size]
+            last = vocabularies[-1]
+            next_cursor = encode_search_cursor(
+                sort_by,
+                search_request.sort_order,
+                getattr(last, sort_by),
+                last.id,
+            )
+
+        return VocabularySearchPage(
+            items=vocabularies,
+            total=total,
+            is_estimate=is_estimate,
+            next_cursor=next_cursor,
+        )
+
+    async def autocomplete_key_words(
+        self, library_id: int, prefix: str, limit: int = 10
+    ) -> list[dict[str, Any]]:
+        """关键词自动补全 - 从内存前缀索引中查找."""
+        index = _key_word_indexes.get(library_id)
+        if index is None or index.is_expired(settings.VOCABULARY_PREFIX_INDEX_TTL):
+            stmt = select(VocabularyItem.id, VocabularyItem.word).where(
+                VocabularyItem.library_id == library_id,
+                VocabularyItem.is_key_word.is_(True),
+            )
+            result = await self.db.execute(stmt)
+            index = KeyWordPrefixIndex([(row.id, row.word) for row in result])
+            _key_word_indexes[library_id] = index
+
+        return [
+            {"id": vocabulary_id, "word": word}
+            for vocabulary_id, word in index.lookup(prefix, limit)
+        ]
+
+    def _build_search_conditions(
+        self, search_request: VocabularySearchRequest
+    ) -> list[ColumnElement[bool]]:
+        """构建搜索过滤条件."""
+        conditions: list[ColumnElement[bool]] = []
 
-        # 添加筛选条件
         if search_request.library_id:
-            stmt = stmt.where(VocabularyItem.library_id == search_request.library_id)
+            conditions.append(VocabularyItem.library_id == search_request.library_id)
 
         if search_request.keyword:
-            keyword = f"%{search_request.keyword}%"
-            stmt = stmt.where(
-                or_(
-                    VocabularyItem.word.ilike(keyword),
-                    VocabularyItem.chinese_meaning.ilike(keyword),
-                    VocabularyItem.english_meaning.ilike(keyword),
+            keyword = _escape_like(search_request.keyword.strip().lower())
+            if search_request.match_mode == "prefix":
+                # 前缀匹配走 lower(word) text_pattern_ops 索引
+                conditions.append(
+                    func.lower(VocabularyItem.word).like(f"{keyword}%", escape="/")
+                )
+            else:
+                # 包含匹配走三元组索引
+                pattern = f"%{keyword}%"
+                conditions.append(
+                    or_(
+                        func.lower(VocabularyItem.word).like(pattern, escape="/"),
+                        VocabularyItem.chinese_meaning.ilike(pattern, escape="/"),
+                        VocabularyItem.english_meaning.ilike(pattern, escape="/"),
+                    )
                 )
-            )
 
         if search_request.difficulty_level:
-            stmt = stmt.where(
+            conditions.append(
                 VocabularyItem.difficulty_level == search_request.difficulty_level
             )
 
         if search_request.tags:
             # 使用PostgreSQL的JSON操作符
             for tag in search_request.tags:
-                stmt = stmt.where(VocabularyItem.tags.op("@>")([tag]))
+                conditions.append(VocabularyItem.tags.op("@>")([tag]))
 
         if search_request.is_key_word is not None:
-            stmt = stmt.where(VocabularyItem.is_key_word == search_request.is_key_word)
-
-        # 获取总数
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total_result = await self.db.execute(count_stmt)
-        total: int = total_result.scalar() or 0
-
-        # 添加排序
-        if search_request.sort_by == "word":
-            order_col = VocabularyItem.word
-        elif search_request.sort_by == "difficulty_level":
-            order_col = VocabularyItem.difficulty_level
-        elif search_request.sort_by == "frequency":
-            order_col = VocabularyItem.frequency
-        elif search_request.sort_by == "mastery_level":
-            order_col = VocabularyItem.mastery_level
-        else:
-            order_col = VocabularyItem.created_at
-
-        if search_request.sort_order == "desc":
-            stmt = stmt.order_by(desc(order_col))
-        else:
-            stmt = stmt.order_by(order_col)
-
-        # 分页
-        offset = (search_request.page - 1) * search_request.page_size
-        stmt = stmt.offset(offset).limit(search_request.page_size)
+            conditions.append(VocabularyItem.is_key_word == search_request.is_key_word)
+
+        return conditions
+
+    async def _count_vocabularies(
+        self, conditions: list[ColumnElement[bool]], count_mode: str
+    ) -> tuple[int, bool]:
+        """统计搜索结果总数，返回 (总数, 是否为估算值).
+
+        auto 模式下最多精确统计 VOCABULARY_EXACT_COUNT_LIMIT 行，
+        超出时改用查询计划的估算行数，避免大结果集全量计数。
+        """
+        id_stmt = select(VocabularyItem.id).where(*conditions)
+        if count_mode != "auto":
+            result = await self.db.execute(
+                select(func.count()).select_from(id_stmt.subquery())
+            )
+            return result.scalar() or 0, False
 
-        # 执行查询
-        result = await self.db.execute(stmt)
-        vocabularies = list(result.scalars().all())
+        limit = settings.VOCABULARY_EXACT_COUNT_LIMIT
+        result = await self.db.execute(
+            select(func.count()).select_from(id_stmt.limit(limit + 1).subquery())
+        )
+        total: int = result.scalar() or 0
+        if total <= limit:
+            return total, False
 
-        return vocabularies, total
+        connection = await self.db.connection()
+        plan = (await connection.execute(ExplainStatement(id_stmt))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimated = int(plan[0]["Plan"]["Plan Rows"])
+        return max(estimated, total), True
 
     async def batch_import_vocabularies(
         self, import_data: VocabularyBatchImport, user_id: int
     ) -> dict[str, Any]:
-        """批量导入词汇."""
+        """批量导入词汇.
+
+        按 VOCABULARY_IMPORT_CHUNK_SIZE 分块处理：每块一次查询已存在的单词，
+        新词一条多行INSERT写入，覆盖模式下已存在的词按主键批量UPDATE，
+        每块单独提交以缩短锁持有时间。返回汇总计数和逐条结果。
+        """
         # 检查资源库是否存在
         library = await self._get_library_by_id(import_data.library_id)
         if not library:
@@ -170,46 +380,122 @@ async def batch_import_vocabularies(
             "success": 0,
             "failed": 0,
             "skipped": 0,
+            "created": 0,
+            "updated": 0,
             "errors": [],
+            "items": [],
         }
 
-        for item_data in import_data.items:
+        chunk_size = settings.VOCABULARY_IMPORT_CHUNK_SIZE
+        for chunk_start in range(0, len(import_data.items), chunk_size):
+            chunk = import_data.items[chunk_start : chunk_start + chunk_size]
             try:
-                # 检查词汇是否已存在
-                existing = await self._check_vocabulary_exists(
-                    import_data.library_id, item_data.word
+                outcomes = await self._import_vocabulary_chunk(
+                    import_data.library_id,
+                    chunk,
+                    chunk_start,
+                    import_data.overwrite_existing,
                 )
-
-                if existing:
-                    if import_data.overwrite_existing:
-                        # 更新现有词汇
-                        for field, value in item_data.model_dump().items():
-                            if value is not None:
-                                setattr(existing, field, value)
-                        results["success"] += 1
-                    else:
-                        results["skipped"] += 1
-                        continue
-                else:
-                    # 创建新词汇
-                    vocabulary_item = VocabularyItem(
-                        library_id=import_data.library_id,
-                        **item_data.model_dump(),
+                await self.db.commit()
+            except Exception as e:
+                await self.db.rollback()
+                outcomes = [
+                    {
+                        "index": chunk_start + offset,
+                        "word": item_data.word,
+                        "status": "failed",
+                        "id": None,
+                        "error": str(e),
+                    }
+                    for offset, item_data in enumerate(chunk)
+                ]
+
+            for outcome in outcomes:
+                status = outcome["status"]
+                if status == "failed":
+                    results["failed"] += 1
+                    results["errors"].append(
+                        f"Word '{outcome['word']}': {outcome['error']}"
                     )
-                    self.db.add(vocabulary_item)
+                elif status == "skipped":
+                    results["skipped"] += 1
+                else:
                     results["success"] += 1
-
-            except Exception as e:
-                results["failed"] += 1
-                results["errors"].append(f"Word '{item_data.word}': {str(e)}")
-
-        await self.db.commit()
+                    results[status] += 1
+            results["items"].extend(outcomes)
 
         # 更新资源库统计
         await self._update_library_stats(import_data.library_id)
+        invalidate_key_word_index(import_data.library_id)
 
         return results
 
+    async def _import_vocabulary_chunk(
+        self,
+        library_id: int,
+        chunk: list[Any],
+        index_offset: int,
+        overwrite_existing: bool,
+    ) -> list[dict[str, Any]]:
+        """导入一块词汇，返回逐条结果（status: created/updated/skipped）.
+
+        同一块内重复的单词视为已存在：覆盖模式下后出现的非空字段覆盖先前的值。
+        """
+        words = {item_data.word for item_data in chunk}
+        existing_result = await self.db.execute(
+            select(VocabularyItem.id, VocabularyItem.word).where(
+                VocabularyItem.library_id == library_id,
+                VocabularyItem.word.in_(words),
+            )
+        )
+        existing_ids = {row.word: row.id for row in existing_result}
+
+        outcomes: list[dict[str, Any]] = []
+        inserts: dict[str, dict[str, Any]] = {}
+        updates: dict[int, dict[str, Any]] = {}
+        for offset, item_data in enumerate(chunk):
+            word = item_data.word
+            outcome: dict[str, Any] = {
+                "index": index_offset + offset,
+                "word": word,
+                "status": "skipped",
+                "id": existing_ids.get(word),
+                "error": None,
+            }
+            outcomes.append(outcome)
+
+            if word not in existing_ids and word not in inserts:
+                inserts[word] = {"library_id": library_id, **item_data.model_dump()}
+                outcome["status"] = "created"
+                continue
+            if not overwrite_existing:
+                continue
+
+            values = item_data.model_dump(exclude_none=True)
+            if word in inserts:
+                inserts[word].update(values)
+            else:
+                updates.setdefault(existing_ids[word], {}).update(values)
+            outcome["status"] = "updated"
+
+        if inserts:
+            insert_result = await self.db.execute(
+                insert(VocabularyItem).returning(VocabularyItem.id, VocabularyItem.word),
+                list(inserts.values()),
+            )
+            created_ids = {row.word: row.id for row in insert_result}
+            for outcome in outcomes:
+                if outcome["id"] is None:
+                    outcome["id"] = created_ids.get(outcome["word"])
+
+        if updates:
+            await self.db.execute(
+                update(VocabularyItem),
+                [{"id": vocabulary_id, **values} for vocabulary_id, values in updates.items()],
+            )
+
+        return outcomes
+
     async def get_vocabulary_statistics(
         self, library_id: int | None = None
     ) -> dict[str, Any]:
@@ -0,0 +1,32 @@
+"""文档检索索引定时任务."""
+
+import logging
+from typing import Any
+
+from celery import shared_task
+
+from app.core.redis_client import get_sync_redis_client
+from app.resources.services.vector_search_service import VectorSearchService
+from app.shared.services.cache_service import CacheService
+from app.shared.tasks.async_task import AsyncTask
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, base=AsyncTask, name="resources.rebuild_keyword_index")
+def rebuild_keyword_index(self: AsyncTask, batch_size: int = 500) -> dict[str, Any]:
+    """回填缺失全文检索向量的文档切片 - 迁移后补齐存量切片，之后只处理遗漏的切片."""
+    try:
+
+        async def _rebuild() -> int:
+            async with self.session() as db:
+                service = VectorSearchService(db, CacheService(db, get_sync_redis_client()))
+                return await service.rebuild_keyword_index(batch_size)
+
+        updated = self.run_async(_rebuild())
+        logger.info(f"关键词索引回填完成: {updated}个切片")
+        return {"status": "success", "chunks_updated": updated}
+
+    except Exception as e:
+        logger.error(f"关键词索引回填失败: {str(e)}")
+        return {"status": "failed", "error": str(e)}
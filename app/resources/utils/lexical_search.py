@@ -0,0 +1,112 @@
+"""关键词检索工具 - 中英文混合分词、全文检索文档与查询构建、摘要高亮.
+
+PostgreSQL 的 simple 配置只按空白和标点切分，无法处理中文。这里在入库和查询两侧
+使用同一个分词器：英文和数字按词小写切分，中文连续字符切成二元组（单字成词），
+分词结果以空格拼接后交给 to_tsvector('simple', ...)，保证索引词项与查询词项一致。
+"""
+
+import re
+from typing import NamedTuple
+
+# 英文/数字词，或连续的中日韩统一表意文字
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+# 查询词项数量上限，避免超长查询生成过大的tsquery
+MAX_QUERY_TERMS = 32
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+
+
+class Token(NamedTuple):
+    """分词结果 - 词项及其在原文中的位置"""
+
+    term: str
+    start: int
+    end: int
+
+
+def tokenize_with_offsets(text: str) -> list[Token]:
+    """中英文混合分词，返回词项及原文偏移."""
+    tokens: list[Token] = []
+    # lower() 对中英文都不改变字符串长度，偏移可直接对应原文
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        term, start = match.group(), match.start()
+        if term[0].isascii():
+            tokens.append(Token(term, start, match.end()))
+        elif len(term) == 1:
+            tokens.append(Token(term, start, start + 1))
+        else:
+            tokens.extend(
+                Token(term[i : i + 2], start + i, start + i + 2)
+                for i in range(len(term) - 1)
+            )
+    return tokens
+
+
+def build_search_document(text: str) -> str:
+    """生成写入 to_tsvector('simple', ...) 的分词文本."""
+    return " ".join(token.term for token in tokenize_with_offsets(text))
+
+
+def extract_query_terms(query_text: str) -> list[str]:
+    """提取去重后的查询词项."""
+    terms = dict.fromkeys(token.term for token in tokenize_with_offsets(query_text))
+    return list(terms)[:MAX_QUERY_TERMS]
+
+
+def build_tsquery(terms: list[str]) -> str:
+    """构建 to_tsquery('simple', ...) 的查询串 - 词项取或，由排序函数奖励覆盖度.
+
+    词项只含字母、数字和汉字，不会引入tsquery运算符。
+    """
+    return " | ".join(terms)
+
+
+def generate_snippet(content: str, terms: list[str], max_length: int = 200) -> str:
+    """根据词项偏移选取命中最密集的窗口并高亮."""
+    term_set = set(terms)
+    hits = [token for token in tokenize_with_offsets(content) if token.term in term_set]
+    if not hits:
+        return content[:max_length] + "..." if len(content) > max_length else content
+
+    # 以每个命中位置为窗口起点，选择覆盖不同词项最多的窗口（双指针扫描）
+    best_start, best_score = hits[0].start, 0
+    right = 0
+    window_terms: dict[str, int] = {}
+    for left, hit in enumerate(hits):
+        while right < len(hits) and hits[right].end - hit.start <= max_length:
+            window_terms[hits[right].term] = window_terms.get(hits[right].term, 0) + 1
+            right += 1
+        if len(window_terms) > best_score:
+            best_start, best_score = hit.start, len(window_terms)
+        if right > left:
+            term = hit.term
+            window_terms[term] -= 1
+            if not window_terms[term]:
+                del window_terms[term]
+        else:
+            right = left + 1
+
+    # 命中靠近文末时窗口向前扩展，尽量填满长度
+    start = max(0, min(best_start, len(content) - max_length))
+    end = min(len(content), start + max_length)
+
+    # 合并窗口内重叠或相邻的命中区间（中文二元组会互相重叠）
+    spans: list[list[int]] = []
+    for hit in hits:
+        if hit.start < start or hit.end > end:
+            continue
+        if spans and hit.start <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], hit.end)
+        else:
+            spans.append([hit.start, hit.end])
+
+    parts = ["..." if start > 0 else ""]
+    cursor = start
+    for span_start, span_end in spans:
+        parts.append(content[cursor:span_start])
+        parts.append(HIGHLIGHT_OPEN + content[span_start:span_end] + HIGHLIGHT_CLOSE)
+        cursor = span_end
+    parts.append(content[cursor:end])
+    if end < len(content):
+        parts.append("...")
+    return "".join(parts)
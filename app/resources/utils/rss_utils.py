@@ -3,29 +3,235 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
 import re
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from typing import Any, TypeVar
+from urllib.parse import urlsplit
 
 import aiohttp
 import feedparser
+import redis.asyncio as redis
 from bs4 import BeautifulSoup
 
+from app.core.config import settings
 from app.shared.models.enums import ContentType, DifficultyLevel
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# 常见的正文区域选择器
+CONTENT_SELECTORS = [
+    "article",
+    "main",
+    ".content",
+    ".post",
+    ".article",
+    "#content",
+    "#main",
+    ".entry-content",
+    ".post-content",
+]
+
+_parse_executor: ThreadPoolExecutor | None = None
+
+
+def get_parse_executor() -> ThreadPoolExecutor:
+    """获取RSS/HTML解析线程池（进程内共享）.
+
+    Celery prefork 工作进程不能再创建子进程，解析放在线程池中执行，
+    保证事件循环不被阻塞。
+    """
+    global _parse_executor
+    if _parse_executor is None:
+        _parse_executor = ThreadPoolExecutor(
+            max_workers=settings.RSS_PARSE_WORKERS, thread_name_prefix="rss-parse"
+        )
+    return _parse_executor
+
+
+def parse_feed_content(content: bytes) -> Any:
+    """解析RSS/Atom内容."""
+    return feedparser.parse(content)
+
+
+def extract_main_text(html_content: bytes | str) -> str | None:
+    """从网页中提取正文文本."""
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    # 移除脚本和样式
+    for script in soup(["script", "style"]):
+        script.decompose()
+
+    # 尝试找到主要内容区域
+    main_content = None
+    for selector in CONTENT_SELECTORS:
+        main_content = soup.select_one(selector)
+        if main_content:
+            break
+
+    if not main_content:
+        main_content = soup.find("body")
+
+    if main_content:
+        text = main_content.get_text(separator=" ", strip=True)
+        # 清理文本，限制长度
+        text = re.sub(r"\s+", " ", text)
+        return text[:10000] if text else None
+
+    return None
+
+
+def get_entry_hash(entry: Any) -> str:
+    """RSS条目唯一标识 - 优先使用GUID，其次使用链接."""
+    key = getattr(entry, "id", "") or getattr(entry, "link", "") or ""
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CrawlStats:
+    """抓取统计."""
+
+    feeds_fetched: int = 0
+    feeds_not_modified: int = 0
+    feeds_failed: int = 0
+    entries_seen: int = 0
+    entries_duplicate: int = 0
+    articles_fetched: int = 0
+    items_parsed: int = 0
+    bytes_downloaded: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> dict[str, Any]:
+        """转换为字典，附带耗时和吞吐量."""
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        return {
+            "feeds_fetched": self.feeds_fetched,
+            "feeds_not_modified": self.feeds_not_modified,
+            "feeds_failed": self.feeds_failed,
+            "entries_seen": self.entries_seen,
+            "entries_duplicate": self.entries_duplicate,
+            "articles_fetched": self.articles_fetched,
+            "items_parsed": self.items_parsed,
+            "bytes_downloaded": self.bytes_downloaded,
+            "elapsed_seconds": round(elapsed, 3),
+            "items_per_second": round(self.items_parsed / elapsed, 2),
+            "articles_per_second": round(self.articles_fetched / elapsed, 2),
+        }
 
-class RSSFeedParser:
-    """RSS源解析器."""
+
+class FeedStateStore:
+    """抓取状态存储 - 订阅源的条件请求校验值和已入库条目（进程内）."""
 
     def __init__(self) -> None:
-        self.session: aiohttp.ClientSession | None = None
+        self._validators: dict[str, dict[str, str]] = {}
+        self._seen: set[str] = set()
+
+    async def get_validators(self, feed_url: str) -> dict[str, str]:
+        """获取订阅源的 etag / last_modified."""
+        return dict(self._validators.get(feed_url, {}))
+
+    async def save_validators(self, feed_url: str, validators: dict[str, str]) -> None:
+        """保存订阅源的 etag / last_modified."""
+        self._validators[feed_url] = validators
+
+    async def filter_unseen(self, entry_hashes: list[str]) -> set[str]:
+        """返回尚未入库的条目."""
+        return {entry_hash for entry_hash in entry_hashes if entry_hash not in self._seen}
+
+    async def mark_seen(self, entry_hashes: Iterable[str]) -> None:
+        """标记条目已入库."""
+        self._seen.update(entry_hashes)
+
+
+class RedisFeedStateStore(FeedStateStore):
+    """基于Redis的抓取状态存储 - 跨任务、跨工作进程共享."""
+
+    KEY_PREFIX = "rss"
+
+    def __init__(self, redis_client: redis.Redis, seen_ttl: int | None = None) -> None:
+        super().__init__()
+        self.redis = redis_client
+        self.seen_ttl = seen_ttl or settings.RSS_SEEN_ENTRY_TTL
+
+    def _validators_key(self, feed_url: str) -> str:
+        digest = hashlib.sha1(feed_url.encode("utf-8")).hexdigest()
+        return f"{self.KEY_PREFIX}:validators:{digest}"
+
+    def _seen_key(self, entry_hash: str) -> str:
+        return f"{self.KEY_PREFIX}:seen:{entry_hash}"
+
+    async def get_validators(self, feed_url: str) -> dict[str, str]:
+        validators = await self.redis.hgetall(  # type: ignore[misc]
+            self._validators_key(feed_url)
+        )
+        return {
+            (key.decode() if isinstance(key, bytes) else key): (
+                value.decode() if isinstance(value, bytes) else value
+            )
+            for key, value in validators.items()
+        }
+
+    async def save_validators(self, feed_url: str, validators: dict[str, str]) -> None:
+        key = self._validators_key(feed_url)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if validators:
+                pipe.hset(key, mapping=validators)
+            await pipe.execute()
+
+    async def filter_unseen(self, entry_hashes: list[str]) -> set[str]:
+        if not entry_hashes:
+            return set()
+        values = await self.redis.mget([self._seen_key(h) for h in entry_hashes])
+        return {
+            entry_hash
+            for entry_hash, value in zip(entry_hashes, values, strict=True)
+            if value is None
+        }
+
+    async def mark_seen(self, entry_hashes: Iterable[str]) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for entry_hash in entry_hashes:
+                pipe.set(self._seen_key(entry_hash), 1, ex=self.seen_ttl)
+            await pipe.execute()
+
+
+class RSSFeedParser:
+    """RSS源解析器.
+
+    - 记录每个订阅源的 ETag/Last-Modified，发送条件请求，未变化时不重新下载
+      （新的校验值暂存在 fetched_validators 中，由调用方在条目入库后保存）
+    - 抓取正文前按 GUID/链接哈希过滤已入库条目
+    - 正文按主机限制并发抓取
+    - RSS和HTML解析在线程池中执行
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession | None = None,
+        state_store: FeedStateStore | None = None,
+        per_host_limit: int | None = None,
+    ) -> None:
+        # 传入的共享会话由调用方负责关闭
+        self.session: aiohttp.ClientSession | None = session
+        self.owns_session = session is None
         self.timeout = aiohttp.ClientTimeout(total=30)
+        self.state_store = state_store or FeedStateStore()
+        self.per_host_limit = per_host_limit or settings.RSS_PER_HOST_CONCURRENCY
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self.fetched_validators: dict[str, dict[str, str]] = {}
+        self.stats = CrawlStats()
 
     async def __aenter__(self) -> RSSFeedParser:
-        self.session = aiohttp.ClientSession(timeout=self.timeout)
+        if self.owns_session:
+            self.session = aiohttp.ClientSession(timeout=self.timeout)
         return self
 
     async def __aexit__(
@@ -34,9 +240,23 @@ async def __aexit__(
         exc_val: BaseException | None,
         exc_tb: type | None,
     ) -> None:
-        if self.session:
+        if self.session and self.owns_session:
             await self.session.close()
 
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """获取URL所在主机的并发信号量."""
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def _run_in_pool(self, func: Callable[..., T], *args: Any) -> T:
+        """在解析线程池中执行CPU密集操作."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_parse_executor(), func, *args)
+
     async def parse_rss_feed(
         self, feed_url: str, max_items: int = 20, language_filter: str | None = None
     ) -> list[dict[str, Any]]:
@@ -47,34 +267,77 @@ async def parse_rss_feed(
                     "RSSFeedParser must be used as async context manager"
                 )
 
+            # 条件请求 - 订阅源未变化时服务器返回304
+            validators = await self.state_store.get_validators(feed_url)
+            headers = {}
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
             # 获取RSS内容
-            async with self.session.get(feed_url) as response:
-                if response.status != 200:
-                    logger.warning(
-                        f"Failed to fetch RSS feed: {feed_url}, status: {response.status}"
-                    )
-                    return []
+            async with self._host_semaphore(feed_url):
+                async with self.session.get(feed_url, headers=headers) as response:
+                    if response.status == 304:
+                        self.stats.feeds_not_modified += 1
+                        return []
+                    if response.status != 200:
+                        self.stats.feeds_failed += 1
+                        logger.warning(
+                            f"Failed to fetch RSS feed: {feed_url}, status: {response.status}"
+                        )
+                        return []
+
+                    content = await response.read()
+                    new_validators = {
+                        key: value
+                        for key, value in (
+                            ("etag", response.headers.get("ETag")),
+                            ("last_modified", response.headers.get("Last-Modified")),
+                        )
+                        if value
+                    }
 
-                content = await response.text()
+            self.stats.feeds_fetched += 1
+            self.stats.bytes_downloaded += len(content)
 
             # 解析RSS
-            feed = feedparser.parse(content)
+            feed = await self._run_in_pool(parse_feed_content, content)
             if feed.bozo:
                 logger.warning(f"RSS feed parsing warning: {feed.bozo_exception}")
 
-            items = []
-            for entry in feed.entries[:max_items]:
-                try:
-                    item = await self._parse_rss_entry(entry, feed_url, language_filter)
-                    if item:
-                        items.append(item)
-                except Exception as e:
-                    logger.error(f"Error parsing RSS entry: {str(e)}")
-                    continue
+            # 抓取正文前过滤已入库条目
+            entries = feed.entries[:max_items]
+            entry_hashes = [get_entry_hash(entry) for entry in entries]
+            unseen = await self.state_store.filter_unseen(entry_hashes)
+            self.stats.entries_seen += len(entries)
+            self.stats.entries_duplicate += len(entries) - len(unseen)
+
+            candidates = [
+                (entry_hash, entry)
+                for entry_hash, entry in zip(entry_hashes, entries, strict=True)
+                if entry_hash in unseen
+            ]
+            parsed = await asyncio.gather(
+                *(
+                    self._parse_rss_entry(entry, feed_url, language_filter)
+                    for _, entry in candidates
+                )
+            )
 
+            items = []
+            for (entry_hash, _), item in zip(candidates, parsed, strict=True):
+                if item:
+                    item["entry_hash"] = entry_hash
+                    item["feed_url"] = feed_url
+                    items.append(item)
+            self.stats.items_parsed += len(items)
+
+            self.fetched_validators[feed_url] = new_validators
             return items
 
         except Exception as e:
+            self.stats.feeds_failed += 1
             logger.error(f"Error parsing RSS feed {feed_url}: {str(e)}")
             return []
 
@@ -101,14 +364,14 @@ async def _parse_rss_entry(
             if not title or not link:
                 return None
 
-            # 获取完整内容
-            full_content = await self._extract_full_content(link)
-
-            # 语言检测和过滤
+            # 语言检测和过滤（只依赖标题和摘要，先过滤再抓取正文）
             detected_language = await self._detect_language(title + " " + summary)
             if language_filter and detected_language != language_filter:
                 return None
 
+            # 获取完整内容
+            full_content = await self._extract_full_content(link)
+
             # 提取关键词和话题
             keywords = await self._extract_keywords(
                 title + " " + summary + " " + (full_content or "")
@@ -158,48 +421,16 @@ async def _extract_full_content(self, url: str) -> str | None:
             if not self.session:
                 return None
 
-            async with self.session.get(url) as response:
-                if response.status != 200:
-                    return None
-
-                html_content = await response.text()
-                soup = BeautifulSoup(html_content, "html.parser")
-
-                # 移除脚本和样式
-                for script in soup(["script", "style"]):
-                    script.decompose()
-
-                # 尝试找到主要内容区域
-                main_content = None
-
-                # 常见的内容选择器
-                content_selectors = [
-                    "article",
-                    "main",
-                    ".content",
-                    ".post",
-                    ".article",
-                    "#content",
-                    "#main",
-                    ".entry-content",
-                    ".post-content",
-                ]
-
-                for selector in content_selectors:
-                    main_content = soup.select_one(selector)
-                    if main_content:
-                        break
-
-                if not main_content:
-                    main_content = soup.find("body")
-
-                if main_content:
-                    text = main_content.get_text(separator=" ", strip=True)
-                    # 清理文本，限制长度
-                    text = re.sub(r"\s+", " ", text)
-                    return text[:10000] if text else None
+            async with self._host_semaphore(url):
+                async with self.session.get(url) as response:
+                    if response.status != 200:
+                        return None
 
-                return None
+                    html_content = await response.read()
+
+            self.stats.articles_fetched += 1
+            self.stats.bytes_downloaded += len(html_content)
+            return await self._run_in_pool(extract_main_text, html_content)
 
         except Exception as e:
             logger.error(f"Error extracting content from {url}: {str(e)}")
@@ -476,7 +707,17 @@ async def _generate_discussion_topics(self, title: str, summary: str) -> list[st
 class ExternalResourceCollector:
     """外部资源收集器."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        session: aiohttp.ClientSession | None = None,
+        state_store: FeedStateStore | None = None,
+    ) -> None:
+        self.session = session
+        self.state_store = state_store or FeedStateStore()
+        self.last_stats: CrawlStats | None = None
+        # 本轮抓取到的条目和订阅源校验值，入库提交后由 commit_feed_state 保存
+        self.pending_resources: list[dict[str, Any]] = []
+        self.pending_validators: dict[str, dict[str, str]] = {}
         self.rss_feeds = [
             "https://feeds.bbci.co.uk/news/rss.xml",
             "https://rss.cnn.com/rss/edition.rss",
@@ -490,16 +731,15 @@ async def collect_daily_resources(
         """每日收集外部资源."""
         all_resources: list[dict[str, Any]] = []
 
-        async with RSSFeedParser() as parser:
-            tasks = []
-            for feed_url in self.rss_feeds:
-                task = parser.parse_rss_feed(
-                    feed_url, max_items_per_feed, target_language
-                )
-                tasks.append(task)
-
+        async with RSSFeedParser(self.session, self.state_store) as parser:
             # 并发获取所有RSS源
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            results = await asyncio.gather(
+                *(
+                    parser.parse_rss_feed(feed_url, max_items_per_feed, target_language)
+                    for feed_url in self.rss_feeds
+                ),
+                return_exceptions=True,
+            )
 
             for result in results:
                 if isinstance(result, Exception):
@@ -510,20 +750,44 @@ async def collect_daily_resources(
                 typed_result: list[dict[str, Any]] = result  # type: ignore[assignment]
                 all_resources.extend(typed_result)
 
-        # 去重（基于URL）
-        seen_urls = set()
-        unique_resources = []
-        for resource in all_resources:
-            url = resource.get("source_url", "")
-            if url and url not in seen_urls:
-                seen_urls.add(url)
-                unique_resources.append(resource)
+            # 去重（基于URL）
+            seen_urls = set()
+            unique_resources = []
+            for resource in all_resources:
+                url = resource.get("source_url", "")
+                if url and url not in seen_urls:
+                    seen_urls.add(url)
+                    unique_resources.append(resource)
+
+            self.pending_resources = all_resources
+            self.pending_validators = parser.fetched_validators
+            self.last_stats = parser.stats
+            logger.info(f"RSS抓取统计: {parser.stats.to_dict()}")
 
         # 按发布时间排序
         unique_resources.sort(key=lambda x: x.get("publish_date", ""), reverse=True)
 
         return unique_resources
 
+    async def commit_feed_state(self, saved_urls: set[str]) -> None:
+        """记录已入库的条目和订阅源校验值，下次抓取时跳过.
+
+        须在资源入库提交成功后调用：未入库的条目不标记，所在订阅源也不保存校验值，
+        下次抓取时重新下载并处理。
+        """
+        saved = [r for r in self.pending_resources if r.get("source_url") in saved_urls]
+        unsaved_feeds = {
+            r["feed_url"] for r in self.pending_resources if r.get("source_url") not in saved_urls
+        }
+
+        await self.state_store.mark_seen(resource["entry_hash"] for resource in saved)
+        for feed_url, validators in self.pending_validators.items():
+            if feed_url not in unsaved_feeds:
+                await self.state_store.save_validators(feed_url, validators)
+
+        self.pending_resources = []
+        self.pending_validators = {}
+
     async def search_web_resources(
         self, query: str, max_results: int = 10, source_types: list[str] | None = None
     ) -> list[dict[str, Any]]:
@@ -6,6 +6,13 @@
 
 import numpy as np
 
+from app.shared.utils.vector_kernels import (
+    cosine_one_to_many,
+    minibatch_kmeans,
+    randomized_pca,
+    top_k_indices,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,20 +26,7 @@ def cosine_similarity(vector1: list[float], vector2: list[float]) -> float:
             if len(vector1) != len(vector2):
                 raise ValueError("向量维度不匹配")
 
-            # 转换为numpy数组
-            v1 = np.array(vector1)
-            v2 = np.array(vector2)
-
-            # 计算余弦相似度
-            dot_product = np.dot(v1, v2)
-            norm1 = np.linalg.norm(v1)
-            norm2 = np.linalg.norm(v2)
-
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-
-            similarity = dot_product / (norm1 * norm2)
-            return float(similarity)
+            return float(cosine_one_to_many(vector1, [vector2])[0])
 
         except Exception as e:
             logger.error(f"Cosine similarity calculation failed: {str(e)}")
@@ -191,16 +185,13 @@ def find_most_similar(
     ) -> list[tuple[int, float]]:
         """找到最相似的向量."""
         try:
-            similarities = []
-
-            for i, candidate in enumerate(candidate_vectors):
-                similarity = VectorUtils.cosine_similarity(query_vector, candidate)
-                similarities.append((i, similarity))
+            similarities = cosine_one_to_many(query_vector, candidate_vectors)
 
-            # 按相似度排序
-            similarities.sort(key=lambda x: x[1], reverse=True)
-
-            return similarities[:top_k]
+            # 部分排序取前top_k
+            return [
+                (int(i), float(similarities[i]))
+                for i in top_k_indices(similarities, top_k)
+            ]
 
         except Exception as e:
             logger.error(f"Finding most similar vectors failed: {str(e)}")
@@ -210,51 +201,22 @@ def find_most_similar(
     def cluster_vectors(
         vectors: list[list[float]], num_clusters: int = 5
     ) -> dict[str, Any]:
-        """简单的向量聚类."""
+        """向量聚类（Mini-batch K-means）."""
         try:
             if not vectors or num_clusters <= 0:
                 return {"clusters": [], "centroids": []}
 
-            # 使用K-means聚类（简化实现）
-            vectors_array = np.array(vectors)
-
-            # 随机初始化聚类中心
-            np.random.seed(42)
-            centroids = vectors_array[
-                np.random.choice(len(vectors), num_clusters, replace=False)
-            ]
-
-            max_iterations = 100
-            for _iteration in range(max_iterations):
-                # 分配点到最近的聚类中心
-                distances = np.sqrt(
-                    ((vectors_array - centroids[:, np.newaxis]) ** 2).sum(axis=2)
-                )
-                closest_cluster = np.argmin(distances, axis=0)
-
-                # 更新聚类中心
-                new_centroids = np.array(
-                    [
-                        vectors_array[closest_cluster == k].mean(axis=0)
-                        for k in range(num_clusters)
-                    ]
-                )
-
-                # 检查收敛
-                if np.allclose(centroids, new_centroids):
-                    break
-
-                centroids = new_centroids
+            labels, centroids, iterations = minibatch_kmeans(vectors, num_clusters)
 
             # 组织结果
-            clusters: list[list[int]] = [[] for _ in range(num_clusters)]
-            for i, cluster_id in enumerate(closest_cluster):
-                clusters[cluster_id].append(i)
+            order = np.argsort(labels, kind="stable")
+            bounds = np.cumsum(np.bincount(labels, minlength=len(centroids)))[:-1]
+            clusters = [members.tolist() for members in np.split(order, bounds)]
 
             return {
                 "clusters": clusters,
                 "centroids": list(centroids.tolist()),
-                "iterations": 1,  # 简化实现，返回固定值
+                "iterations": iterations,
             }
 
         except Exception as e:
@@ -367,25 +329,7 @@ def batch_cosine_similarity(
             if not vectors:
                 return []
 
-            query_array = np.array(query_vector)
-            vectors_array = np.array(vectors)
-
-            # 归一化
-            query_norm = np.linalg.norm(query_array)
-            vectors_norms = np.linalg.norm(vectors_array, axis=1)
-
-            if query_norm == 0:
-                return [0.0] * len(vectors)
-
-            # 计算点积
-            dot_products = np.dot(vectors_array, query_array)
-
-            # 计算余弦相似度
-            similarities = dot_products / (query_norm * vectors_norms)
-
-            # 处理除零情况
-            similarities = np.nan_to_num(similarities, nan=0.0)
-
+            similarities = cosine_one_to_many(query_vector, vectors)
             return list(similarities.tolist())
 
         except Exception as e:
@@ -396,7 +340,7 @@ def batch_cosine_similarity(
     def reduce_dimension_pca(
         vectors: list[list[float]], target_dimension: int
     ) -> list[list[float]]:
-        """使用PCA降维."""
+        """使用PCA降维（随机化SVD）."""
         try:
             if not vectors or target_dimension <= 0:
                 return vectors
@@ -407,22 +351,7 @@ def reduce_dimension_pca(
             if target_dimension >= original_dim:
                 return vectors
 
-            # 中心化数据
-            mean_vector = np.mean(vectors_array, axis=0)
-            centered_data = vectors_array - mean_vector
-
-            # 计算协方差矩阵
-            cov_matrix = np.cov(centered_data.T)
-
-            # 特征值分解
-            eigenvalues, eigenvectors = np.linalg.eigh(cov_matrix)
-
-            # 按特征值排序
-            sorted_indices = np.argsort(eigenvalues)[::-1]
-            top_eigenvectors = eigenvectors[:, sorted_indices[:target_dimension]]
-
-            # 投影到新空间
-            reduced_vectors = np.dot(centered_data, top_eigenvectors)
+            reduced_vectors, _ = randomized_pca(vectors_array, target_dimension)
 
             return [list(row) for row in reduced_vectors.tolist()]
 
@@ -92,6 +92,7 @@ class LRUCache:
     def __init__(
         self, max_size: int = 1000, max_memory: int = 100 * 1024 * 1024
     ) -> None:
+        self.logger = logging.getLogger(__name__)
         self.max_size = max_size
         self.max_memory = max_memory
         self.cache: OrderedDict[str, CacheEntry] = OrderedDict()
@@ -14,15 +14,17 @@
 import logging
 import time
 import uuid
-from collections import deque
+from collections import Counter, deque
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 from enum import Enum
 from typing import Any
 
-from redis import Redis
+import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
 from app.shared.models.enums import PriorityLevel, TaskStatus
 
 
@@ -152,10 +154,9 @@ async def start(self) -> None:
 
         while self.is_running:
             try:
-                # 获取任务
-                task = await self.queue_service.get_next_task()
+                # 获取任务（在Redis端阻塞等待，无任务时超时返回）
+                task = await self.queue_service.get_next_task(self.worker_id)
                 if not task:
-                    await asyncio.sleep(1)  # 没有任务时等待
                     continue
 
                 # 处理任务
@@ -238,6 +239,9 @@ async def _process_task(self, task: QueueTask) -> None:
     async def _handle_task_failure(self, task: QueueTask) -> None:
         """处理任务失败"""
         try:
+            # 记录失败状态并累加失败计数
+            await self.queue_service.update_task_status(task)
+
             processor = self.processors.get(task.task_type)
             if processor:
                 await processor.on_failure(
@@ -266,10 +270,80 @@ async def _handle_task_failure(self, task: QueueTask) -> None:
             self.logger.error(f"处理任务失败时出错: {e}")
 
 
+# 按优先级顺序排列的就绪队列，BLPOP 依次检查这些键
+READY_QUEUE_ORDER = (
+    QueueType.HIGH_PRIORITY,
+    QueueType.NORMAL_PRIORITY,
+    QueueType.LOW_PRIORITY,
+    QueueType.BATCH_PROCESSING,
+)
+
+# 在途任务：有序集合按可见性截止时间排序，两个哈希分别保存原始载荷和来源队列
+INFLIGHT_KEY = "queue:inflight"
+INFLIGHT_TASKS_KEY = "queue:inflight:tasks"
+INFLIGHT_QUEUES_KEY = "queue:inflight:queues"
+
+# 队列维护脚本：先把可见性超时的在途任务放回原队列队首，再把到期的延迟任务移入就绪队列。
+# 整个脚本在Redis中原子执行，任务不会在两次命令之间丢失或重复。
+# KEYS: 在途有序集合、在途载荷哈希、在途队列哈希，之后依次为 (延迟集合, 就绪队列) 键对
+# ARGV: 当前时间戳、每个集合单次最多处理的任务数
+# 返回: {提升的延迟任务数, 最早未到期的延迟任务时间（无则为空串）, 恢复任务的来源队列列表}
+MAINTENANCE_SCRIPT = """
+local now = ARGV[1]
+local limit = tonumber(ARGV[2])
+local recovered = {}
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, limit)
+for _, task_id in ipairs(expired) do
+    local data = redis.call('HGET', KEYS[2], task_id)
+    local queue = redis.call('HGET', KEYS[3], task_id)
+    if data and queue then
+        redis.call('LPUSH', queue, data)
+        table.insert(recovered, queue)
+    end
+    redis.call('ZREM', KEYS[1], task_id)
+    redis.call('HDEL', KEYS[2], task_id)
+    redis.call('HDEL', KEYS[3], task_id)
+end
+local promoted = 0
+local next_due = false
+for i = 4, #KEYS, 2 do
+    local due = redis.call('ZRANGEBYSCORE', KEYS[i], '-inf', now, 'LIMIT', 0, limit)
+    if #due > 0 then
+        redis.call('RPUSH', KEYS[i + 1], unpack(due))
+        redis.call('ZREM', KEYS[i], unpack(due))
+        promoted = promoted + #due
+    end
+    local head = redis.call('ZRANGE', KEYS[i], 0, 0, 'WITHSCORES')
+    if #head > 0 then
+        local score = tonumber(head[2])
+        if not next_due or score < next_due then
+            next_due = score
+        end
+    end
+end
+return {promoted, next_due and tostring(next_due) or '', recovered}
+"""
+
+
+def _queue_key(queue_type: QueueType) -> str:
+    return f"queue:{queue_type.value}"
+
+
+def _stats_key(queue_type: QueueType) -> str:
+    return f"queue:stats:{queue_type.value}"
+
+
 class QueueService:
-    """优先级队列服务"""
+    """优先级队列服务
 
-    def __init__(self, db: AsyncSession, redis: Redis) -> None:
+    任务以JSON载荷存放在Redis列表中，多个进程的工作者共享同一组队列：
+    - 取任务用跨优先级队列的阻塞 BLPOP，无任务时在Redis端等待而不是轮询
+    - 延迟任务和超时在途任务的搬移由Lua脚本原子完成
+    - 取出的任务登记为在途，超过 timeout + 宽限期仍未确认则视为工作者崩溃并重新入队
+    - 吞吐与失败统计以计数器形式存放在Redis中，集群内共享
+    """
+
+    def __init__(self, db: AsyncSession, redis: redis.Redis) -> None:
         self.db = db
         self.redis = redis
         self.logger = logging.getLogger(__name__)
@@ -283,8 +357,19 @@ def __init__(self, db: AsyncSession, redis: Redis) -> None:
             QueueType.DEAD_LETTER: {"max_size": 1000, "batch_size": 1},
         }
 
-        # 队列统计
-        self.queue_stats: dict[QueueType, QueueStats] = {}
+        # 阻塞等待、可见性宽限期和维护频率
+        self.block_timeout = settings.QUEUE_BLOCK_TIMEOUT
+        self.visibility_grace = settings.QUEUE_VISIBILITY_GRACE
+        self.maintenance_interval = settings.QUEUE_MAINTENANCE_INTERVAL
+        self.maintenance_batch = settings.QUEUE_MAINTENANCE_BATCH
+
+        self._maintenance_script = self.redis.register_script(MAINTENANCE_SCRIPT)
+        self._maintenance_keys = [INFLIGHT_KEY, INFLIGHT_TASKS_KEY, INFLIGHT_QUEUES_KEY]
+        for queue_type in READY_QUEUE_ORDER:
+            queue_key = _queue_key(queue_type)
+            self._maintenance_keys.extend([f"{queue_key}:delayed", queue_key])
+        self._last_maintenance = 0.0
+        self._next_delayed_due: float | None = None
 
         # 工作者管理
         self.workers: dict[str, QueueWorker] = {}
@@ -292,20 +377,6 @@ def __init__(self, db: AsyncSession, redis: Redis) -> None:
         # 任务处理器注册
         self.processors: dict[TaskType, TaskProcessor] = {}
 
-        # 初始化队列统计
-        for queue_type in QueueType:
-            self.queue_stats[queue_type] = QueueStats(
-                queue_type=queue_type,
-                total_tasks=0,
-                pending_tasks=0,
-                running_tasks=0,
-                completed_tasks=0,
-                failed_tasks=0,
-                average_processing_time=0.0,
-                throughput=0.0,
-                timestamp=datetime.utcnow(),
-            )
-
     def register_processor(self, task_type: TaskType, processor: TaskProcessor) -> None:
         """注册任务处理器"""
         self.processors[task_type] = processor
@@ -337,26 +408,11 @@ async def enqueue_task(
             # 选择队列
             queue_type = self._select_queue_by_priority(priority)
 
-            # 序列化任务
-            task_data = self._serialize_task(task)
-
-            # 添加到Redis队列
-            queue_key = f"queue:{queue_type.value}"
-
-            if scheduled_at and scheduled_at > datetime.utcnow():
-                # 延迟任务，添加到延迟队列
-                delay_score = scheduled_at.timestamp()
-                self.redis.zadd(f"{queue_key}:delayed", {task_data: delay_score})
-            else:
-                # 立即任务，根据优先级添加到队列
-                if priority == PriorityLevel.HIGH:
-                    self.redis.lpush(queue_key, task_data)  # 高优先级放在队列前面
-                else:
-                    self.redis.rpush(queue_key, task_data)  # 其他优先级放在队列后面
-
-            # 更新统计
-            self.queue_stats[queue_type].total_tasks += 1
-            self.queue_stats[queue_type].pending_tasks += 1
+            # 入队与计数在同一事务中提交
+            async with self.redis.pipeline(transaction=True) as pipe:
+                self._push_task(pipe, task, queue_type, front=priority == PriorityLevel.HIGH)
+                pipe.hincrby(_stats_key(queue_type), "enqueued", 1)
+                await pipe.execute()
 
             self.logger.info(
                 f"任务已入队: {task.task_id} ({task_type.value}, {priority.value})"
@@ -367,73 +423,89 @@ async def enqueue_task(
             self.logger.error(f"任务入队失败: {e}")
             raise
 
-    async def get_next_task(self, worker_id: str | None = None) -> QueueTask | None:
-        """获取下一个任务"""
-        try:
-            # 处理延迟任务
-            await self._process_delayed_tasks()
+    async def get_next_task(
+        self, worker_id: str | None = None, timeout: float | None = None
+    ) -> QueueTask | None:
+        """获取下一个任务
 
-            # 按优先级顺序检查队列
-            queue_order = [
-                QueueType.HIGH_PRIORITY,
-                QueueType.NORMAL_PRIORITY,
-                QueueType.LOW_PRIORITY,
-                QueueType.BATCH_PROCESSING,
-            ]
-
-            for queue_type in queue_order:
-                queue_key = f"queue:{queue_type.value}"
-
-                # 从队列中获取任务
-                task_data_raw = self.redis.lpop(queue_key)
-                if task_data_raw and isinstance(task_data_raw, str | bytes):
-                    task_data = task_data_raw
-                    task = self._deserialize_task(task_data)
-
-                    # 更新统计
-                    self.queue_stats[queue_type].pending_tasks -= 1
-                    self.queue_stats[queue_type].running_tasks += 1
-
-                    return task
+        在所有就绪队列上按优先级阻塞等待，最多等待 timeout 秒（默认 QUEUE_BLOCK_TIMEOUT）；
+        取到的任务登记为在途，处理结束后由 update_task_status / requeue_task /
+        move_to_dead_letter 确认；登记失败时任务放回原队列，无法解析的载荷移到死信队列。
+        """
+        try:
+            # 搬移到期的延迟任务、恢复超时的在途任务
+            await self._run_maintenance()
+
+            wait = self.block_timeout if timeout is None else timeout
+            if self._next_delayed_due is not None:
+                # 不越过下一个延迟任务的到期时间，保证它能按时被提升
+                wait = min(wait, self._next_delayed_due - time.time())
+            wait = max(wait, 0.01)  # BLPOP 超时为0表示无限等待
+
+            # Redis 6起BLPOP支持小数秒超时，redis-py的类型标注仍为整数
+            popped = await self.redis.blpop(  # type: ignore[misc]
+                [_queue_key(queue_type) for queue_type in READY_QUEUE_ORDER],
+                timeout=wait,  # type: ignore[arg-type]
+            )
+            if not popped:
+                return None
 
-            return None
+            queue_key, task_data = popped
+            try:
+                task = self._deserialize_task(task_data)
+            except (ValueError, KeyError, TypeError) as e:
+                # 无法解析的载荷不会再被成功取出，直接移到死信队列
+                self.logger.error(f"任务载荷无法解析，移到死信队列: {e}")
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.rpush(_queue_key(QueueType.DEAD_LETTER), task_data)
+                    pipe.hincrby(_stats_key(QueueType.DEAD_LETTER), "enqueued", 1)
+                    await pipe.execute()
+                return None
+
+            # 登记在途任务，超过可见性截止时间未确认将被重新入队
+            deadline = time.time() + task.timeout + self.visibility_grace
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.zadd(INFLIGHT_KEY, {task.task_id: deadline})
+                    pipe.hset(INFLIGHT_TASKS_KEY, task.task_id, task_data)
+                    pipe.hset(INFLIGHT_QUEUES_KEY, task.task_id, queue_key)
+                    await pipe.execute()
+            except Exception:
+                # 登记失败时任务已被弹出，放回原队列队首，避免丢失
+                await self.redis.lpush(queue_key, task_data)  # type: ignore[misc]
+                raise
+
+            if worker_id:
+                task.metadata["worker_id"] = worker_id
+            return task
 
         except Exception as e:
             self.logger.error(f"获取任务失败: {e}")
+            await asyncio.sleep(1)  # 避免Redis不可用时工作者空转
             return None
 
     async def update_task_status(self, task: QueueTask) -> None:
-        """更新任务状态"""
+        """更新任务状态，完成时确认在途任务，完成和失败均累加计数"""
         try:
-            # 将任务状态存储到Redis
-            task_key = f"task:{task.task_id}"
-            task_data = self._serialize_task(task)
-            self.redis.setex(task_key, 86400, task_data)  # 24小时过期
-
-            # 更新队列统计
             queue_type = self._select_queue_by_priority(task.priority)
-            stats = self.queue_stats[queue_type]
+            stats_key = _stats_key(queue_type)
 
-            if task.status == TaskStatus.COMPLETED:
-                stats.running_tasks -= 1
-                stats.completed_tasks += 1
+            async with self.redis.pipeline(transaction=True) as pipe:
+                # 将任务状态存储到Redis
+                pipe.setex(f"task:{task.task_id}", 86400, self._serialize_task(task))  # 24小时过期
 
-                # 更新平均处理时间
-                if task.started_at and task.completed_at:
-                    processing_time = (
-                        task.completed_at - task.started_at
-                    ).total_seconds()
-                    current_avg = stats.average_processing_time
-                    total_completed = stats.completed_tasks
-                    stats.average_processing_time = (
-                        current_avg * (total_completed - 1) + processing_time
-                    ) / total_completed
+                if task.status == TaskStatus.COMPLETED:
+                    self._ack_task(pipe, task)
+                    pipe.hincrby(stats_key, "completed", 1)
+                    if task.started_at and task.completed_at:
+                        processing_time = (task.completed_at - task.started_at).total_seconds()
+                        pipe.hincrbyfloat(stats_key, "processing_seconds", processing_time)
 
-            elif task.status == TaskStatus.FAILED:
-                stats.running_tasks -= 1
-                stats.failed_tasks += 1
+                elif task.status == TaskStatus.FAILED:
+                    # 失败任务由 requeue_task / move_to_dead_letter 确认，此处只计数
+                    pipe.hincrby(stats_key, "failed", 1)
 
-            stats.timestamp = datetime.utcnow()
+                await pipe.execute()
 
         except Exception as e:
             self.logger.error(f"更新任务状态失败: {e}")
@@ -442,19 +514,13 @@ async def requeue_task(self, task: QueueTask) -> None:
         """重新入队任务"""
         try:
             queue_type = self._select_queue_by_priority(task.priority)
-            queue_key = f"queue:{queue_type.value}"
-            task_data = self._serialize_task(task)
-
-            if task.scheduled_at and task.scheduled_at > datetime.utcnow():
-                # 延迟重试
-                delay_score = task.scheduled_at.timestamp()
-                self.redis.zadd(f"{queue_key}:delayed", {task_data: delay_score})
-            else:
-                # 立即重试，放在队列末尾
-                self.redis.rpush(queue_key, task_data)
 
-            # 更新统计
-            self.queue_stats[queue_type].pending_tasks += 1
+            # 确认原在途任务与重新入队在同一事务中完成
+            async with self.redis.pipeline(transaction=True) as pipe:
+                self._ack_task(pipe, task)
+                self._push_task(pipe, task, queue_type)
+                pipe.hincrby(_stats_key(queue_type), "retried", 1)
+                await pipe.execute()
 
         except Exception as e:
             self.logger.error(f"重新入队任务失败: {e}")
@@ -462,49 +528,67 @@ async def requeue_task(self, task: QueueTask) -> None:
     async def move_to_dead_letter(self, task: QueueTask) -> None:
         """移动到死信队列"""
         try:
-            dead_letter_key = f"queue:{QueueType.DEAD_LETTER.value}"
-            task_data = self._serialize_task(task)
-            self.redis.rpush(dead_letter_key, task_data)
-
-            # 更新统计
-            self.queue_stats[QueueType.DEAD_LETTER].total_tasks += 1
-            self.queue_stats[QueueType.DEAD_LETTER].pending_tasks += 1
+            async with self.redis.pipeline(transaction=True) as pipe:
+                self._ack_task(pipe, task)
+                pipe.rpush(_queue_key(QueueType.DEAD_LETTER), self._serialize_task(task))
+                pipe.hincrby(_stats_key(QueueType.DEAD_LETTER), "enqueued", 1)
+                await pipe.execute()
 
             self.logger.error(f"任务移到死信队列: {task.task_id}")
 
         except Exception as e:
             self.logger.error(f"移动到死信队列失败: {e}")
 
-    async def _process_delayed_tasks(self) -> None:
-        """处理延迟任务"""
-        try:
-            current_time = time.time()
-
-            for queue_type in QueueType:
-                if queue_type == QueueType.DEAD_LETTER:
-                    continue
-
-                delayed_key = f"queue:{queue_type.value}:delayed"
-                queue_key = f"queue:{queue_type.value}"
-
-                # 获取到期的延迟任务
-                expired_tasks_raw = self.redis.zrangebyscore(
-                    delayed_key, 0, current_time, withscores=True
-                )
-
-                # 确保expired_tasks_raw是可迭代的
-                if hasattr(expired_tasks_raw, "__iter__"):
-                    expired_tasks = expired_tasks_raw
-                else:
-                    expired_tasks = []
-
-                for task_data, _score in expired_tasks:
-                    # 移动到正常队列
-                    self.redis.rpush(queue_key, task_data)
-                    self.redis.zrem(delayed_key, task_data)
+    async def recover_expired_tasks(self) -> int:
+        """立即执行一次队列维护，返回恢复的在途任务数"""
+        return await self._run_maintenance(force=True)
+
+    async def _run_maintenance(self, force: bool = False) -> int:
+        """原子地提升到期延迟任务、恢复超时在途任务，按间隔限流"""
+        now = time.time()
+        if not force and now - self._last_maintenance < self.maintenance_interval:
+            due = self._next_delayed_due
+            if due is None or due > now:
+                return 0
+        self._last_maintenance = now
+
+        promoted, next_due, recovered = await self._maintenance_script(
+            keys=self._maintenance_keys, args=[now, self.maintenance_batch]
+        )
+        self._next_delayed_due = float(next_due) if next_due else None
+
+        if recovered:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for queue_key in recovered:
+                    stats_key = queue_key.replace("queue:", "queue:stats:", 1)
+                    pipe.hincrby(stats_key, "recovered", 1)
+                await pipe.execute()
+            self.logger.warning(f"已恢复 {len(recovered)} 个超时未确认的在途任务")
+        if promoted:
+            self.logger.debug(f"已提升 {promoted} 个到期延迟任务")
+        return len(recovered)
+
+    def _push_task(
+        self, pipe: Any, task: QueueTask, queue_type: QueueType, front: bool = False
+    ) -> None:
+        """把任务写入就绪队列或延迟集合（在管道中排队，不立即执行）"""
+        queue_key = _queue_key(queue_type)
+        task_data = self._serialize_task(task)
+
+        if task.scheduled_at and task.scheduled_at > datetime.utcnow():
+            # 延迟任务，添加到延迟队列
+            delay_score = task.scheduled_at.replace(tzinfo=UTC).timestamp()
+            pipe.zadd(f"{queue_key}:delayed", {task_data: delay_score})
+        elif front:
+            pipe.lpush(queue_key, task_data)  # 高优先级放在队列前面
+        else:
+            pipe.rpush(queue_key, task_data)  # 其他优先级放在队列后面
 
-        except Exception as e:
-            self.logger.error(f"处理延迟任务失败: {e}")
+    def _ack_task(self, pipe: Any, task: QueueTask) -> None:
+        """确认在途任务（在管道中排队，重复确认无副作用）"""
+        pipe.zrem(INFLIGHT_KEY, task.task_id)
+        pipe.hdel(INFLIGHT_TASKS_KEY, task.task_id)
+        pipe.hdel(INFLIGHT_QUEUES_KEY, task.task_id)
 
     def _select_queue_by_priority(self, priority: PriorityLevel) -> QueueType:
         """根据优先级选择队列"""
@@ -591,27 +675,57 @@ async def stop_worker(self, worker_id: str) -> None:
         if worker_id in self.workers:
             await self.workers[worker_id].stop()
 
-    def get_queue_stats(self) -> dict[str, Any]:
-        """获取队列统计"""
+    async def get_queue_stats(self) -> dict[str, Any]:
+        """获取队列统计（队列长度、在途数和累计计数均来自Redis，集群内共享）"""
         try:
+            queue_types = list(QueueType)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for queue_type in queue_types:
+                    queue_key = _queue_key(queue_type)
+                    pipe.llen(queue_key)
+                    pipe.zcard(f"{queue_key}:delayed")
+                    pipe.hgetall(_stats_key(queue_type))
+                pipe.hvals(INFLIGHT_QUEUES_KEY)
+                results = await pipe.execute()
+
+            running_by_queue = Counter(results[-1])
             stats_dict = {}
+            for index, queue_type in enumerate(queue_types):
+                ready, delayed, counters = results[index * 3 : index * 3 + 3]
+                completed = int(counters.get("completed", 0))
+                failed = int(counters.get("failed", 0))
+                processing_seconds = float(counters.get("processing_seconds", 0))
+                average_processing_time = (
+                    processing_seconds / completed if completed else 0.0
+                )
 
-            for queue_type, stats in self.queue_stats.items():
-                # 计算吞吐量
-                if stats.completed_tasks > 0 and stats.average_processing_time > 0:
-                    stats.throughput = 1.0 / stats.average_processing_time
+                stats = QueueStats(
+                    queue_type=queue_type,
+                    total_tasks=int(counters.get("enqueued", 0)),
+                    pending_tasks=ready + delayed,
+                    running_tasks=running_by_queue.get(_queue_key(queue_type), 0),
+                    completed_tasks=completed,
+                    failed_tasks=failed,
+                    average_processing_time=average_processing_time,
+                    throughput=(
+                        1.0 / average_processing_time if average_processing_time > 0 else 0.0
+                    ),
+                    timestamp=datetime.utcnow(),
+                )
 
                 stats_dict[queue_type.value] = {
                     "total_tasks": stats.total_tasks,
                     "pending_tasks": stats.pending_tasks,
+                    "delayed_tasks": delayed,
                     "running_tasks": stats.running_tasks,
                     "completed_tasks": stats.completed_tasks,
                     "failed_tasks": stats.failed_tasks,
+                    "retried_tasks": int(counters.get("retried", 0)),
+                    "recovered_tasks": int(counters.get("recovered", 0)),
                     "average_processing_time": stats.average_processing_time,
                     "throughput": stats.throughput,
                     "success_rate": (
-                        stats.completed_tasks
-                        / (stats.completed_tasks + stats.failed_tasks)
+                        stats.completed_tasks / (stats.completed_tasks + stats.failed_tasks)
                         if (stats.completed_tasks + stats.failed_tasks) > 0
                         else 0.0
                     ),
@@ -663,11 +777,9 @@ async def get_queue_service() -> QueueService:
 
     if _queue_service is None:
         from app.core.database import get_db
-        from app.core.redis import get_redis
 
         async for db in get_db():
-            redis = await get_redis()
-            _queue_service = QueueService(db, redis)
+            _queue_service = QueueService(db, get_redis_client())
             break
 
     if _queue_service is None:
@@ -37,6 +37,7 @@ async def delete_pattern(self, pattern: str) -> None:
     SimilarityResult,
     similarity_calculator,
 )
+from app.shared.utils.vector_kernels import similar_pairs
 
 logger = logging.getLogger(__name__)
 
@@ -327,21 +328,19 @@ async def find_duplicate_documents(
             all_docs = await self._get_all_documents(collection_type, batch_size)
 
             duplicates = []
-            for i in range(len(all_docs)):
-                for j in range(i + 1, len(all_docs)):
-                    doc1, doc2 = all_docs[i], all_docs[j]
-
-                    # 计算相似度
-                    similarity = (
-                        await self.similarity_calculator.compute_vector_similarity(
-                            doc1["vector"], doc2["vector"], "cosine"
-                        )
-                    )
-
-                    if similarity.score >= similarity_threshold:
-                        duplicates.append(
-                            (doc1["document_id"], doc2["document_id"], similarity.score)
-                        )
+            if len(all_docs) >= 2:
+                # 分块计算两两余弦相似度，只保留超过阈值的文档对
+                loop = asyncio.get_event_loop()
+                pairs = await loop.run_in_executor(
+                    None,
+                    similar_pairs,
+                    [doc["vector"] for doc in all_docs],
+                    similarity_threshold,
+                )
+                duplicates = [
+                    (all_docs[i]["document_id"], all_docs[j]["document_id"], score)
+                    for i, j, score in pairs
+                ]
 
             logger.info(f"Found {len(duplicates)} duplicate pairs in {collection_type}")
             return duplicates
@@ -0,0 +1,203 @@
+"""异步任务基类定义.
+
+每个工作进程维护一个常驻事件循环（运行在后台线程中），数据库引擎、Redis连接池
+和HTTP客户端都绑定在该循环上并在任务之间复用，避免每次任务都通过 asyncio.run
+新建事件循环、重新建立连接。
+"""
+
+import asyncio
+import os
+import threading
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+import aiohttp
+import redis.asyncio as redis
+from celery.signals import worker_process_shutdown
+from celery.utils.log import get_task_logger
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.core.config import settings
+from app.shared.tasks.base_task import BaseTask
+
+logger = get_task_logger(__name__)
+
+T = TypeVar("T")
+
+
+class WorkerAsyncRuntime:
+    """工作进程级异步运行时 - 常驻事件循环及绑定在其上的连接资源."""
+
+    def __init__(self) -> None:
+        """启动后台事件循环线程，连接资源在首次使用时创建."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self._run_loop, name="celery-async-loop", daemon=True
+        )
+        self.thread.start()
+
+        self._engine: AsyncEngine | None = None
+        self._session_factory: async_sessionmaker[AsyncSession] | None = None
+        self._redis_client: redis.Redis | None = None
+        self._http_session: aiohttp.ClientSession | None = None
+
+    def _run_loop(self) -> None:
+        """事件循环线程入口."""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """获取工作进程级数据库引擎（连接池只在本事件循环中使用）."""
+        if self._engine is None:
+            self._engine = create_async_engine(
+                str(settings.DATABASE_URL),
+                echo=settings.DEBUG,
+                pool_pre_ping=True,
+                pool_recycle=300,
+                pool_size=settings.CELERY_WORKER_DB_POOL_SIZE,
+                max_overflow=settings.CELERY_WORKER_DB_MAX_OVERFLOW,
+            )
+        return self._engine
+
+    @property
+    def session_factory(self) -> async_sessionmaker[AsyncSession]:
+        """获取工作进程级会话工厂."""
+        if self._session_factory is None:
+            self._session_factory = async_sessionmaker(
+                self.engine,
+                class_=AsyncSession,
+                expire_on_commit=False,
+                autocommit=False,
+                autoflush=False,
+            )
+        return self._session_factory
+
+    @property
+    def redis_client(self) -> redis.Redis:
+        """获取工作进程级Redis客户端（内部维护连接池）."""
+        if self._redis_client is None:
+            self._redis_client = redis.from_url(
+                settings.redis_url,
+                encoding="utf-8",
+                decode_responses=True,
+                max_connections=settings.CELERY_WORKER_REDIS_MAX_CONNECTIONS,
+            )
+        return self._redis_client
+
+    @property
+    def http_session(self) -> aiohttp.ClientSession:
+        """获取工作进程级HTTP客户端，需在事件循环内访问."""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=settings.AI_REQUEST_TIMEOUT),
+                connector=aiohttp.TCPConnector(
+                    limit=settings.CELERY_WORKER_HTTP_MAX_CONNECTIONS
+                ),
+            )
+        return self._http_session
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+        """在常驻事件循环中执行协程并阻塞等待结果."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # 超时或软超时（SoftTimeLimitExceeded）时取消循环中的协程
+            future.cancel()
+            raise
+
+    async def _close_resources(self) -> None:
+        """关闭连接资源."""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        if self._redis_client is not None:
+            await self._redis_client.aclose()
+        if self._engine is not None:
+            await self._engine.dispose()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """释放连接资源并停止事件循环."""
+        if self.loop.is_closed():
+            return
+
+        try:
+            self.run(self._close_resources(), timeout=timeout)
+        except Exception as e:
+            logger.warning(f"关闭异步任务运行时资源失败: {str(e)}")
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=timeout)
+            if not self.thread.is_alive():
+                self.loop.close()
+
+
+_runtime: WorkerAsyncRuntime | None = None
+_runtime_pid: int | None = None
+_runtime_lock = threading.Lock()
+
+
+def get_worker_runtime() -> WorkerAsyncRuntime:
+    """获取当前工作进程的异步运行时（fork后自动重建）."""
+    global _runtime, _runtime_pid
+
+    with _runtime_lock:
+        if _runtime is None or _runtime_pid != os.getpid():
+            # fork继承的运行时没有事件循环线程，直接丢弃
+            _runtime = WorkerAsyncRuntime()
+            _runtime_pid = os.getpid()
+        return _runtime
+
+
+def shutdown_worker_runtime() -> None:
+    """关闭当前工作进程的异步运行时."""
+    global _runtime, _runtime_pid
+
+    with _runtime_lock:
+        runtime, owner_pid = _runtime, _runtime_pid
+        _runtime, _runtime_pid = None, None
+
+    if runtime is not None and owner_pid == os.getpid():
+        runtime.shutdown()
+
+
+@worker_process_shutdown.connect  # type: ignore[misc]
+def _on_worker_process_shutdown(**_: Any) -> None:
+    """工作进程退出时释放连接资源."""
+    shutdown_worker_runtime()
+
+
+class AsyncTask(BaseTask):
+    """异步任务基类 - 在工作进程常驻事件循环中执行协程并复用连接资源."""
+
+    abstract = True
+
+    @property
+    def runtime(self) -> WorkerAsyncRuntime:
+        """当前工作进程的异步运行时."""
+        return get_worker_runtime()
+
+    def run_async(
+        self, coro: Coroutine[Any, Any, T], timeout: float | None = None
+    ) -> T:
+        """执行任务的异步主体."""
+        return self.runtime.run(coro, timeout)
+
+    def session(self) -> AsyncSession:
+        """创建绑定工作进程级引擎的数据库会话."""
+        return self.runtime.session_factory()
+
+    @property
+    def redis_client(self) -> redis.Redis:
+        """工作进程级Redis客户端."""
+        return self.runtime.redis_client
+
+    @property
+    def http_session(self) -> aiohttp.ClientSession:
+        """工作进程级HTTP客户端，需在协程内访问."""
+        return self.runtime.http_session
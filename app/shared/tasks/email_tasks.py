@@ -1,14 +1,18 @@
 """邮件发送相关任务."""
 
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from typing import Any
 
+from celery import chord
 from celery.utils.log import get_task_logger
 
 from app.core.celery_app import celery_app
 from app.core.config import settings
+from app.shared.utils.bulk_mailer import (
+    BulkMailSender,
+    build_message,
+    compile_template,
+    send_pooled_message,
+)
 
 logger = get_task_logger(__name__)
 
@@ -24,28 +28,10 @@ def send_email(
     """发送单个邮件任务."""
     try:
         # 创建邮件对象
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = settings.EMAIL_FROM
-        msg["To"] = to_email
+        msg = build_message(to_email, subject, html_content, text_content)
 
-        # 添加文本内容
-        if text_content:
-            text_part = MIMEText(text_content, "plain", "utf-8")
-            msg.attach(text_part)
-
-        # 添加HTML内容
-        html_part = MIMEText(html_content, "html", "utf-8")
-        msg.attach(html_part)
-
-        # 发送邮件
-        with smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT) as server:
-            if settings.EMAIL_USE_TLS:
-                server.starttls()
-            if settings.EMAIL_USERNAME and settings.EMAIL_PASSWORD:
-                server.login(settings.EMAIL_USERNAME, settings.EMAIL_PASSWORD)
-
-            server.send_message(msg)
+        # 通过工作进程的SMTP连接池发送邮件
+        send_pooled_message(msg)
 
         logger.info(f"邮件发送成功: {to_email}")
         return {
@@ -70,60 +56,84 @@ def send_bulk_email(
 ) -> dict[str, Any]:
     """批量发送邮件任务.
 
+    将收件人按块拆分为并行的 send_email_batch 任务（Celery chord），
+    各块完成后由 aggregate_bulk_email_results 汇总投递统计，本任务不等待发送结果。
+
     Args:
         email_list: 邮件列表，格式为 [{"email": "user@example.com", "name": "User Name", **context}]
         subject: 邮件主题
         html_template: HTML邮件模板
         text_template: 文本邮件模板（可选）
     """
-    success_count = 0
-    failed_count = 0
-    failed_emails = []
-
-    for email_data in email_list:
-        try:
-            to_email = email_data["email"]
-
-            # 渲染邮件内容（简单的字符串替换，实际项目中应使用模板引擎）
-            html_content = html_template
-            text_content = text_template
-
-            for key, value in email_data.items():
-                placeholder = f"{{{key}}}"
-                html_content = html_content.replace(placeholder, str(value))
-                if text_content:
-                    text_content = text_content.replace(placeholder, str(value))
-
-            # 发送单个邮件
-            result = send_email.apply_async(
-                args=[to_email, subject, html_content, text_content],
-                retry=False,  # 批量发送中不重试单个邮件
-            )
-
-            # 等待结果（短时间）
-            try:
-                result.get(timeout=30)
-                success_count += 1
-            except Exception as e:
-                failed_count += 1
-                failed_emails.append({"email": to_email, "error": str(e)})
-
-        except Exception as e:
-            failed_count += 1
-            failed_emails.append(
-                {"email": email_data.get("email", "unknown"), "error": str(e)}
-            )
+    chunk_size = max(1, settings.EMAIL_BULK_CHUNK_SIZE)
+    chunks = [
+        email_list[offset : offset + chunk_size]
+        for offset in range(0, len(email_list), chunk_size)
+    ]
+
+    if not chunks:
+        return {
+            "status": "completed",
+            "total": 0,
+            "success_count": 0,
+            "failed_count": 0,
+            "failed_emails": [],
+        }
+
+    chord_result = chord(
+        send_email_batch.s(chunk, subject, html_template, text_template)
+        for chunk in chunks
+    )(aggregate_bulk_email_results.s(len(email_list)))
+
+    logger.info(f"批量邮件已分发: {len(email_list)} 封，{len(chunks)} 个批次")
+    return {
+        "status": "dispatched",
+        "total": len(email_list),
+        "chunk_count": len(chunks),
+        "result_id": chord_result.id,
+    }
+
+
+@celery_app.task(bind=True, name="send_email_batch")  # type: ignore[misc]
+def send_email_batch(
+    self: Any,
+    email_list: list[dict[str, str]],
+    subject: str,
+    html_template: str,
+    text_template: str | None = None,
+) -> dict[str, Any]:
+    """发送一批邮件 - 复用连接池中的SMTP连接并发投递."""
+    stats = BulkMailSender().send(email_list, subject, html_template, text_template)
+    logger.info(
+        f"邮件批次发送完成: {stats['success_count']}/{stats['total']} "
+        f"(耗时 {stats['duration']:.1f}s)"
+    )
+    return stats
+
+
+@celery_app.task(bind=True, name="aggregate_bulk_email_results")  # type: ignore[misc]
+def aggregate_bulk_email_results(
+    self: Any, batch_results: list[dict[str, Any]], total: int
+) -> dict[str, Any]:
+    """汇总批量邮件各批次的投递统计."""
+    success_count = sum(result["success_count"] for result in batch_results)
+    failed_emails = [
+        failure for result in batch_results for failure in result["failed_emails"]
+    ]
+    failed_count = total - success_count
 
     bulk_result: dict[str, Any] = {
         "status": "completed",
-        "total": len(email_list),
+        "total": total,
         "success_count": success_count,
         "failed_count": failed_count,
         "failed_emails": failed_emails,
+        "batch_count": len(batch_results),
+        "send_duration": sum(result["duration"] for result in batch_results),
     }
 
     if failed_count > 0:
-        logger.warning(f"批量邮件发送部分失败: {failed_count}/{len(email_list)}")
+        logger.warning(f"批量邮件发送部分失败: {failed_count}/{total}")
     else:
         logger.info(f"批量邮件发送全部成功: {success_count}")
 
@@ -174,26 +184,21 @@ def send_notification_email(
         user_email = context.get("user_email", "user@example.com")
 
         # 渲染模板
-        subject = template["subject"]
-        html_content = template["html"]
-        text_content = template["text"]
-
-        for key, value in context.items():
-            placeholder = f"{{{key}}}"
-            subject = subject.replace(placeholder, str(value))
-            html_content = html_content.replace(placeholder, str(value))
-            text_content = text_content.replace(placeholder, str(value))
-
-        # 发送邮件
-        result = send_email.apply_async(
-            args=[user_email, subject, html_content, text_content]
-        ).get()
-
-        # 确保返回正确的类型
-        if isinstance(result, dict):
-            return result
-        else:
-            return {"status": "error", "message": "Unexpected result type"}
+        subject = compile_template(template["subject"]).render(context)
+        html_content = compile_template(template["html"]).render(context)
+        text_content = compile_template(template["text"]).render(context)
+
+        # 直接通过连接池发送，避免在任务内同步等待子任务
+        send_pooled_message(
+            build_message(user_email, subject, html_content, text_content)
+        )
+
+        logger.info(f"通知邮件发送成功: user_id={user_id}, type={notification_type}")
+        return {
+            "status": "success",
+            "to_email": user_email,
+            "subject": subject,
+        }
 
     except Exception as exc:
         logger.error(
@@ -6,48 +6,68 @@
 
 from celery import shared_task
 
-from app.core.database import get_async_session
+from app.core.config import settings
+from app.resources.schemas.resource_schemas import HotspotResourceCreate
 from app.resources.services.hotspot_service import HotspotService
-from app.resources.utils.rss_utils import ExternalResourceCollector
+from app.resources.utils.rss_utils import (
+    ExternalResourceCollector,
+    RedisFeedStateStore,
+)
+from app.shared.tasks.async_task import AsyncTask
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(name="collect_daily_hotspots")
-def collect_daily_hotspots() -> dict[str, Any]:
+@shared_task(bind=True, base=AsyncTask, name="collect_daily_hotspots")
+def collect_daily_hotspots(self: AsyncTask) -> dict[str, Any]:
     """每日收集热点资源定时任务."""
-    import asyncio
 
     async def _collect_hotspots() -> dict[str, Any]:
         """异步收集热点资源."""
         try:
             # 获取数据库会话
-            async with get_async_session() as _db:
-                collector = ExternalResourceCollector()
-                # hotspot_service = HotspotService(db)  # TODO: 实现热点服务功能
+            async with self.session() as db:
+                # 条件请求校验值和已入库条目记录在Redis中，跨任务共享
+                collector = ExternalResourceCollector(
+                    self.http_session, RedisFeedStateStore(self.redis_client)
+                )
+                hotspot_service = HotspotService(db, self.redis_client)
 
                 # 收集外部资源
                 resources = await collector.collect_daily_resources(
                     max_items_per_feed=10, target_language="en"
                 )
 
-                # 保存到数据库
-                saved_count = 0
-                for _resource_data in resources:
+                library_id = settings.HOTSPOT_COLLECTION_LIBRARY_ID
+                if not library_id:
+                    logger.warning("未配置热点资源库(HOTSPOT_COLLECTION_LIBRARY_ID)，跳过保存")
+
+                # 保存到数据库（逐条提交，单条失败不影响其他条目）
+                saved_urls: set[str] = set()
+                for resource_data in resources if library_id else []:
                     try:
-                        # 这里需要根据实际的schema调整
-                        # 暂时跳过保存，只记录收集结果
-                        saved_count += 1
+                        await hotspot_service.create_hotspot_resource(
+                            HotspotResourceCreate(library_id=library_id, **resource_data)
+                        )
+                        saved_urls.add(resource_data["source_url"])
                     except Exception as e:
+                        await db.rollback()
                         logger.error(f"保存热点资源失败: {str(e)}")
                         continue
 
+                # 入库提交后才记录已抓取条目和订阅源校验值，保存失败的条目下次重新抓取
+                await collector.commit_feed_state(saved_urls)
+                saved_count = len(saved_urls)
+
                 logger.info(f"每日热点收集完成: 收集 {len(resources)} 个，保存 {saved_count} 个")
 
                 return {
                     "success": True,
                     "collected_count": len(resources),
                     "saved_count": saved_count,
+                    "crawl_stats": (
+                        collector.last_stats.to_dict() if collector.last_stats else {}
+                    ),
                     "timestamp": datetime.now().isoformat(),
                 }
 
@@ -59,27 +79,26 @@ async def _collect_hotspots() -> dict[str, Any]:
                 "timestamp": datetime.now().isoformat(),
             }
 
-    # 运行异步任务
-    return asyncio.run(_collect_hotspots())
+    # 在工作进程常驻事件循环中运行异步任务
+    return self.run_async(_collect_hotspots())
 
 
-@shared_task(name="refresh_hotspot_trending")
-def refresh_hotspot_trending() -> dict[str, Any]:
+@shared_task(bind=True, base=AsyncTask, name="refresh_hotspot_trending")
+def refresh_hotspot_trending(self: AsyncTask) -> dict[str, Any]:
     """刷新热点资源热门状态定时任务."""
-    import asyncio
 
     async def _refresh_trending() -> dict[str, Any]:
         """异步刷新热门状态."""
         try:
-            async with get_async_session() as db:
-                hotspot_service = HotspotService(db)
-
-                # 刷新热门状态
-                await hotspot_service.refresh_trending_status()
+            async with self.session() as db:
+                hotspot_service = HotspotService(db, self.redis_client)
 
                 # 自动过期资源
                 await hotspot_service.auto_expire_resources()
 
+                # 刷新热门状态并重建排行列表
+                await hotspot_service.refresh_trending_status()
+
                 logger.info("热点资源状态刷新完成")
 
                 return {
@@ -96,19 +115,46 @@ async def _refresh_trending() -> dict[str, Any]:
                 "timestamp": datetime.now().isoformat(),
             }
 
-    return asyncio.run(_refresh_trending())
+    return self.run_async(_refresh_trending())
+
+
+@shared_task(bind=True, base=AsyncTask, name="flush_hotspot_engagement")
+def flush_hotspot_engagement(self: AsyncTask) -> dict[str, Any]:
+    """将Redis中累加的热点互动计数写回数据库定时任务."""
+
+    async def _flush_engagement() -> dict[str, Any]:
+        """异步写回互动计数."""
+        try:
+            async with self.session() as db:
+                hotspot_service = HotspotService(db, self.redis_client)
+                updated_count = await hotspot_service.flush_engagement_metrics()
+
+                return {
+                    "success": True,
+                    "updated_count": updated_count,
+                    "timestamp": datetime.now().isoformat(),
+                }
+
+        except Exception as e:
+            logger.error(f"热点互动计数写回失败: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
+
+    return self.run_async(_flush_engagement())
 
 
-@shared_task(name="generate_daily_recommendations")
-def generate_daily_recommendations() -> dict[str, Any]:
+@shared_task(bind=True, base=AsyncTask, name="generate_daily_recommendations")
+def generate_daily_recommendations(self: AsyncTask) -> dict[str, Any]:
     """生成每日推荐定时任务."""
-    import asyncio
 
     async def _generate_recommendations() -> dict[str, Any]:
         """异步生成推荐."""
         try:
-            async with get_async_session() as db:
-                hotspot_service = HotspotService(db)
+            async with self.session() as db:
+                hotspot_service = HotspotService(db, self.redis_client)
 
                 # 获取所有资源库
                 from sqlalchemy import select
@@ -138,6 +184,7 @@ async def _generate_recommendations() -> dict[str, Any]:
                         continue
 
                 await db.commit()
+                await hotspot_service.rebuild_rankings()
 
                 logger.info(f"每日推荐生成完成: 共推荐 {recommendation_count} 个资源")
 
@@ -156,18 +203,17 @@ async def _generate_recommendations() -> dict[str, Any]:
                 "timestamp": datetime.now().isoformat(),
             }
 
-    return asyncio.run(_generate_recommendations())
+    return self.run_async(_generate_recommendations())
 
 
-@shared_task(name="cleanup_expired_hotspots")
-def cleanup_expired_hotspots() -> dict[str, Any]:
+@shared_task(bind=True, base=AsyncTask, name="cleanup_expired_hotspots")
+def cleanup_expired_hotspots(self: AsyncTask) -> dict[str, Any]:
     """清理过期热点资源定时任务."""
-    import asyncio
 
     async def _cleanup_expired() -> dict[str, Any]:
         """异步清理过期资源."""
         try:
-            async with get_async_session() as db:
+            async with self.session() as db:
                 from datetime import datetime, timedelta
 
                 from sqlalchemy import delete, select
@@ -208,4 +254,4 @@ async def _cleanup_expired() -> dict[str, Any]:
                 "timestamp": datetime.now().isoformat(),
             }
 
-    return asyncio.run(_cleanup_expired())
+    return self.run_async(_cleanup_expired())
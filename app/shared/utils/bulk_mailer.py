@@ -0,0 +1,329 @@
+"""批量邮件发送引擎
+
+提供模板预编译、进程级SMTP连接池、按收件域名限速以及
+多连接并发发送能力，供批量邮件任务使用。
+域名限速的令牌桶保存在Redis中，并发的分块任务和所有工作进程共享同一速率。
+"""
+
+import logging
+import os
+import re
+import smtplib
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from functools import lru_cache
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis_client import get_sync_redis_client
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+DOMAIN_THROTTLE_KEY_PREFIX = "email:throttle:"
+
+# 按域名的令牌桶：ARGV = 速率, 容量；取得令牌返回0，否则返回需要等待的秒数
+# 使用Redis服务器时间，各工作进程的时钟偏差不影响限速
+DOMAIN_THROTTLE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+class CompiledTemplate:
+    """预编译的邮件模板 - 渲染时只做一次拼接."""
+
+    def __init__(self, template: str) -> None:
+        """将 {key} 占位符模板拆分为文本片段和字段名."""
+        parts = _PLACEHOLDER_PATTERN.split(template)
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+
+    def render(self, context: dict[str, Any]) -> str:
+        """渲染模板，缺失的字段保留原占位符."""
+        rendered = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:], strict=True):
+            value = context.get(field)
+            rendered.append(f"{{{field}}}" if value is None else str(value))
+            rendered.append(literal)
+        return "".join(rendered)
+
+
+@lru_cache(maxsize=128)
+def compile_template(template: str) -> CompiledTemplate:
+    """编译模板，同一模板在每个工作进程中只编译一次."""
+    return CompiledTemplate(template)
+
+
+def build_message(
+    to_email: str, subject: str, html_content: str, text_content: str | None = None
+) -> MIMEMultipart:
+    """构建邮件对象."""
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = settings.EMAIL_FROM
+    msg["To"] = to_email
+
+    # 添加文本内容
+    if text_content:
+        msg.attach(MIMEText(text_content, "plain", "utf-8"))
+
+    # 添加HTML内容
+    msg.attach(MIMEText(html_content, "html", "utf-8"))
+    return msg
+
+
+class DomainThrottle:
+    """按收件域名的令牌桶限速器，避免触发对方邮件服务器的频率限制.
+
+    传入Redis客户端时令牌桶保存在Redis中，跨分块任务和工作进程共享；
+    Redis不可用时退回进程内令牌桶。
+    """
+
+    def __init__(
+        self, rate_per_second: float, burst: int | None = None, redis_client: Any = None
+    ) -> None:
+        """初始化限速器."""
+        self.rate = rate_per_second
+        self.capacity = float(burst or max(1, int(rate_per_second)))
+        self.buckets: dict[str, tuple[float, float]] = {}
+        self.lock = threading.Lock()
+        self._script = (
+            redis_client.register_script(DOMAIN_THROTTLE_SCRIPT)
+            if redis_client is not None
+            else None
+        )
+
+    def acquire(self, email: str) -> None:
+        """获取发送令牌，必要时等待."""
+        if self.rate <= 0:
+            return
+
+        domain = email.rsplit("@", 1)[-1].lower()
+        while True:
+            wait_time = self._reserve(domain)
+            if wait_time <= 0:
+                return
+            time.sleep(wait_time)
+
+    def _reserve(self, domain: str) -> float:
+        """尝试取得令牌，返回需要等待的秒数（0表示已取得）."""
+        if self._script is not None:
+            try:
+                return float(
+                    self._script(
+                        keys=[f"{DOMAIN_THROTTLE_KEY_PREFIX}{domain}"],
+                        args=[self.rate, self.capacity],
+                    )
+                )
+            except RedisError as e:
+                logger.warning(f"共享域名限速不可用，使用进程内限速: {e}")
+
+        with self.lock:
+            now = time.monotonic()
+            tokens, updated_at = self.buckets.get(domain, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                self.buckets[domain] = (tokens - 1, now)
+                return 0.0
+            self.buckets[domain] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+class SMTPConnectionPool:
+    """进程级SMTP连接池 - 复用已认证的SMTP会话，避免每封邮件重新握手和登录."""
+
+    def __init__(self, max_size: int, idle_check_seconds: float = 30.0) -> None:
+        """初始化连接池."""
+        self.max_size = max_size
+        self.idle_check_seconds = idle_check_seconds
+        self.idle: list[tuple[smtplib.SMTP, float]] = []
+        self.semaphore = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        """建立新的SMTP连接."""
+        server = smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT, timeout=30)
+        if settings.EMAIL_USE_TLS:
+            server.starttls()
+        if settings.EMAIL_USERNAME and settings.EMAIL_PASSWORD:
+            server.login(settings.EMAIL_USERNAME, settings.EMAIL_PASSWORD)
+        return server
+
+    def _checkout(self) -> smtplib.SMTP:
+        """取出空闲连接，空闲过久的连接先探活."""
+        while True:
+            with self.lock:
+                if not self.idle:
+                    break
+                server, last_used = self.idle.pop()
+
+            if time.monotonic() - last_used < self.idle_check_seconds:
+                return server
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close(server)
+
+        return self._connect()
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """借用一个SMTP连接，出错的连接不会放回连接池."""
+        self.semaphore.acquire()
+        server: smtplib.SMTP | None = None
+        try:
+            server = self._checkout()
+            yield server
+        except (smtplib.SMTPServerDisconnected, OSError):
+            if server is not None:
+                self._close(server)
+                server = None
+            raise
+        finally:
+            if server is not None:
+                with self.lock:
+                    self.idle.append((server, time.monotonic()))
+            self.semaphore.release()
+
+    def close_all(self) -> None:
+        """关闭所有空闲连接."""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for server, _ in idle:
+            self._close(server)
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        """安全关闭连接."""
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+
+_pool: SMTPConnectionPool | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """获取当前工作进程的SMTP连接池（fork后自动重建）."""
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = SMTPConnectionPool(settings.EMAIL_POOL_SIZE)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+_throttle: DomainThrottle | None = None
+
+
+def get_domain_throttle() -> DomainThrottle:
+    """获取进程内共享的域名限速器（按配置速率，令牌桶保存在Redis中）."""
+    global _throttle
+
+    with _pool_lock:
+        if _throttle is None:
+            _throttle = DomainThrottle(
+                settings.EMAIL_DOMAIN_RATE_LIMIT, redis_client=get_sync_redis_client()
+            )
+        return _throttle
+
+
+def send_pooled_message(msg: MIMEMultipart, retries: int = 1) -> None:
+    """通过连接池发送邮件，连接断开时换新连接重试."""
+    pool = get_smtp_pool()
+    for attempt in range(retries + 1):
+        try:
+            with pool.connection() as server:
+                server.send_message(msg)
+            return
+        except (smtplib.SMTPServerDisconnected, OSError):
+            if attempt >= retries:
+                raise
+
+
+class BulkMailSender:
+    """批量邮件发送器 - 多连接并发发送并汇总投递统计."""
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        domain_rate_limit: float | None = None,
+    ) -> None:
+        """初始化批量发送器."""
+        self.concurrency = concurrency or settings.EMAIL_POOL_SIZE
+        self.throttle = (
+            get_domain_throttle()
+            if domain_rate_limit is None
+            else DomainThrottle(domain_rate_limit, redis_client=get_sync_redis_client())
+        )
+
+    def send(
+        self,
+        email_list: list[dict[str, str]],
+        subject: str,
+        html_template: str,
+        text_template: str | None = None,
+    ) -> dict[str, Any]:
+        """并发发送一批邮件并返回投递统计."""
+        html = compile_template(html_template)
+        text = compile_template(text_template) if text_template else None
+        start_time = time.monotonic()
+
+        def deliver(email_data: dict[str, str]) -> dict[str, str] | None:
+            to_email = email_data.get("email", "unknown")
+            try:
+                msg = build_message(
+                    to_email,
+                    subject,
+                    html.render(email_data),
+                    text.render(email_data) if text else None,
+                )
+                self.throttle.acquire(to_email)
+                send_pooled_message(msg)
+                return None
+            except Exception as e:
+                return {"email": to_email, "error": str(e)}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            failures = [
+                failure for failure in executor.map(deliver, email_list) if failure
+            ]
+
+        duration = time.monotonic() - start_time
+        return {
+            "total": len(email_list),
+            "success_count": len(email_list) - len(failures),
+            "failed_count": len(failures),
+            "failed_emails": failures,
+            "duration": duration,
+        }
@@ -8,7 +8,10 @@
 import logging
 from typing import Any
 
+import numpy as np
+
 from app.shared.config.vector_config import EmbeddingConfig, vector_config
+from app.shared.utils.vector_kernels import as_matrix, cosine_one_to_many, normalize_rows
 
 logger = logging.getLogger(__name__)
 
@@ -154,9 +157,9 @@ async def _get_openai_embeddings(
             # 提取向量
             embeddings = [item["embedding"] for item in response["data"]]
 
-            # 归一化（如果需要）
-            if config.normalize:
-                embeddings = [self._normalize_vector(emb) for emb in embeddings]
+            # 归一化（如果需要），整批按行归一化
+            if config.normalize and embeddings:
+                embeddings = normalize_rows(as_matrix(embeddings, np.float64)).tolist()
 
             return embeddings
 
@@ -239,17 +242,12 @@ def encode(self, texts: list[str], options: dict[str, Any]) -> Any:
 
     def _normalize_vector(self, vector: list[float]) -> list[float]:
         """归一化向量"""
-        import math
-
-        # 计算向量长度
-        length = math.sqrt(sum(x * x for x in vector))
-
-        # 避免除零
-        if length == 0:
+        if not vector:
             return vector
 
-        # 归一化
-        return [x / length for x in vector]
+        # 零向量保持为零
+        normalized: list[float] = normalize_rows(as_matrix(vector, np.float64))[0].tolist()
+        return normalized
 
     def _get_cache_key(self, text: str, model_type: str) -> str:
         """生成缓存键"""
@@ -299,16 +297,7 @@ async def compute_similarity(
 
     def _cosine_similarity(self, v1: list[float], v2: list[float]) -> float:
         """计算余弦相似度"""
-        import math
-
-        dot_product = sum(a * b for a, b in zip(v1, v2, strict=False))
-        magnitude1 = math.sqrt(sum(a * a for a in v1))
-        magnitude2 = math.sqrt(sum(b * b for b in v2))
-
-        if magnitude1 == 0 or magnitude2 == 0:
-            return 0.0
-
-        return dot_product / (magnitude1 * magnitude2)
+        return float(cosine_one_to_many(v1, [v2])[0])
 
     def _euclidean_distance(self, v1: list[float], v2: list[float]) -> float:
         """计算欧几里得距离"""
@@ -327,6 +316,14 @@ async def batch_compute_similarities(
         metric: str = "cosine",
     ) -> list[float]:
         """批量计算相似度"""
+        if metric == "cosine":
+            if any(len(vector) != len(query_vector) for vector in vectors):
+                raise EmbeddingError("Vector dimensions mismatch")
+
+            # 余弦相似度整批矩阵计算
+            scores: list[float] = cosine_one_to_many(query_vector, vectors).tolist()
+            return scores
+
         similarities = []
         for vector in vectors:
             similarity = await self.compute_similarity(query_vector, vector, metric)
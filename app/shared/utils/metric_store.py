@@ -0,0 +1,347 @@
+"""
+指标时序存储
+
+为指标收集器提供基于NumPy的底层数据结构：
+- 预分配的环形缓冲区（时间戳 + 数值）
+- 可合并的对数分桶分位数草图（相对误差有界，类似DDSketch/HDR直方图）
+- 按时间槽切分草图的单个指标序列
+"""
+
+import math
+
+import numpy as np
+
+# 小于该值的样本按0计入草图
+MIN_INDEXABLE_VALUE = 1e-9
+
+
+class MetricRingBuffer:
+    """预分配的时间戳/数值环形缓冲区
+
+    容量按需倍增直到上限，达到上限后覆盖最旧的数据。
+    """
+
+    def __init__(self, capacity: int, initial_capacity: int = 256) -> None:
+        self.capacity = capacity
+        size = max(1, min(capacity, initial_capacity))
+        self.timestamps = np.empty(size, dtype=np.float64)
+        self.values = np.empty(size, dtype=np.float64)
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self, required: int) -> None:
+        """扩容并将数据整理为从0开始的连续存储"""
+        new_size = min(self.capacity, max(required, len(self.values) * 2))
+        timestamps, values = self.ordered()
+        self.timestamps = np.empty(new_size, dtype=np.float64)
+        self.values = np.empty(new_size, dtype=np.float64)
+        self.timestamps[: self.size] = timestamps
+        self.values[: self.size] = values
+        self.start = 0
+
+    def append(self, timestamp: float, value: float) -> None:
+        """追加单个样本"""
+        length = len(self.values)
+        if self.size == length and length < self.capacity:
+            self._grow(length + 1)
+            length = len(self.values)
+
+        if self.size < length:
+            index = (self.start + self.size) % length
+            self.size += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % length
+
+        self.timestamps[index] = timestamp
+        self.values[index] = value
+
+    def extend(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """批量追加样本"""
+        count = len(values)
+        if count == 0:
+            return
+
+        if count >= self.capacity:
+            timestamps = timestamps[-self.capacity :]
+            values = values[-self.capacity :]
+            count = self.capacity
+            self.size = 0
+            self.start = 0
+
+        if self.size + count > len(self.values) and len(self.values) < self.capacity:
+            self._grow(self.size + count)
+
+        length = len(self.values)
+        positions = (self.start + self.size + np.arange(count)) % length
+        self.timestamps[positions] = timestamps
+        self.values[positions] = values
+
+        overflow = max(0, self.size + count - length)
+        self.start = (self.start + overflow) % length
+        self.size = min(length, self.size + count)
+
+    def resize(self, capacity: int) -> None:
+        """调整容量上限，缩小时只保留最新的样本"""
+        capacity = max(1, capacity)
+        if capacity == self.capacity:
+            return
+        self.capacity = capacity
+        if len(self.values) <= capacity:
+            return
+
+        timestamps, values = self.ordered()
+        keep = min(self.size, capacity)
+        self.timestamps = np.empty(capacity, dtype=np.float64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.timestamps[:keep] = timestamps[self.size - keep :]
+        self.values[:keep] = values[self.size - keep :]
+        self.start = 0
+        self.size = keep
+
+    def ordered(self) -> tuple[np.ndarray, np.ndarray]:
+        """按写入顺序返回 (时间戳, 数值) 视图或副本"""
+        end = self.start + self.size
+        length = len(self.values)
+        if end <= length:
+            return self.timestamps[self.start : end], self.values[self.start : end]
+
+        wrapped = end - length
+        return (
+            np.concatenate((self.timestamps[self.start :], self.timestamps[:wrapped])),
+            np.concatenate((self.values[self.start :], self.values[:wrapped])),
+        )
+
+    def latest(self) -> tuple[float, float] | None:
+        """最新样本"""
+        if self.size == 0:
+            return None
+        index = (self.start + self.size - 1) % len(self.values)
+        return float(self.timestamps[index]), float(self.values[index])
+
+    def drop_before(self, cutoff: float) -> int:
+        """丢弃早于截止时间的最旧样本，返回丢弃数量"""
+        if self.size == 0:
+            return 0
+
+        timestamps, _ = self.ordered()
+        keep = timestamps >= cutoff
+        dropped = int(np.argmax(keep)) if keep.any() else self.size
+        self.start = (self.start + dropped) % len(self.values)
+        self.size -= dropped
+        return dropped
+
+
+class _BucketStore:
+    """稠密分桶计数（按桶索引偏移存储）"""
+
+    def __init__(self) -> None:
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.offset = 0
+
+    def _ensure_range(self, low: int, high: int) -> None:
+        """扩展桶数组以覆盖 [low, high]"""
+        if len(self.counts) == 0:
+            self.counts = np.zeros(high - low + 1, dtype=np.int64)
+            self.offset = low
+            return
+
+        current_high = self.offset + len(self.counts) - 1
+        if low >= self.offset and high <= current_high:
+            return
+
+        new_low = min(low, self.offset)
+        new_high = max(high, current_high)
+        counts = np.zeros(new_high - new_low + 1, dtype=np.int64)
+        shift = self.offset - new_low
+        counts[shift : shift + len(self.counts)] = self.counts
+        self.counts = counts
+        self.offset = new_low
+
+    def add(self, index: int, count: int = 1) -> None:
+        self._ensure_range(index, index)
+        self.counts[index - self.offset] += count
+
+    def add_many(self, indices: np.ndarray) -> None:
+        low = int(indices.min())
+        high = int(indices.max())
+        self._ensure_range(low, high)
+        self.counts += np.bincount(indices - self.offset, minlength=len(self.counts))
+
+    def merge(self, other: "_BucketStore") -> None:
+        if len(other.counts) == 0:
+            return
+        self._ensure_range(other.offset, other.offset + len(other.counts) - 1)
+        start = other.offset - self.offset
+        self.counts[start : start + len(other.counts)] += other.counts
+
+
+class QuantileSketch:
+    """可合并的流式分位数草图
+
+    按对数分桶计数，分位数估计的相对误差不超过 relative_accuracy，
+    内存与样本数无关；多个草图可直接合并（用于跨时间槽、跨标签汇总）。
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = _BucketStore()
+        self.negative = _BucketStore()
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self.gamma**index / (self.gamma + 1)
+
+    def add(self, value: float) -> None:
+        """添加单个样本"""
+        if value > MIN_INDEXABLE_VALUE:
+            self.positive.add(self._index(value))
+        elif value < -MIN_INDEXABLE_VALUE:
+            self.negative.add(self._index(-value))
+        else:
+            self.zero_count += 1
+
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_many(self, values: np.ndarray) -> None:
+        """批量添加样本"""
+        if len(values) == 0:
+            return
+
+        positive = values[values > MIN_INDEXABLE_VALUE]
+        negative = values[values < -MIN_INDEXABLE_VALUE]
+        if len(positive):
+            self.positive.add_many(
+                np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+            )
+        if len(negative):
+            self.negative.add_many(
+                np.ceil(np.log(-negative) / self.log_gamma).astype(np.int64)
+            )
+        self.zero_count += len(values) - len(positive) - len(negative)
+
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """合并另一个草图（需使用相同精度）"""
+        if other.count == 0:
+            return
+        if other.gamma != self.gamma:
+            raise ValueError("只能合并相同精度的分位数草图")
+
+        self.positive.merge(other.positive)
+        self.negative.merge(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """估计分位数，q取值范围 [0, 1]"""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * (self.count - 1)
+
+        # 负数桶：索引越大数值越小，按索引从大到小累计
+        negative_total = int(self.negative.counts.sum())
+        if rank < negative_total:
+            cumulative = np.cumsum(self.negative.counts[::-1])
+            position = int(np.searchsorted(cumulative, rank, side="right"))
+            index = self.negative.offset + len(self.negative.counts) - 1 - position
+            value = -self._value(index)
+        elif rank < negative_total + self.zero_count:
+            value = 0.0
+        else:
+            cumulative = np.cumsum(self.positive.counts)
+            position = int(
+                np.searchsorted(
+                    cumulative, rank - negative_total - self.zero_count, side="right"
+                )
+            )
+            value = self._value(self.positive.offset + position)
+
+        return min(max(value, self.min), self.max)
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class MetricSeries:
+    """单个指标在某一标签组合下的时序数据
+
+    原始样本写入环形缓冲区，同时按时间槽写入分位数草图，
+    窗口聚合只需合并窗口内各时间槽的草图。
+    """
+
+    def __init__(
+        self,
+        tags: dict[str, str],
+        capacity: int,
+        slot_seconds: float = 10.0,
+        relative_accuracy: float = 0.01,
+    ) -> None:
+        self.tags = tags
+        self.buffer = MetricRingBuffer(capacity)
+        self.slot_seconds = slot_seconds
+        self.relative_accuracy = relative_accuracy
+        self.slots: dict[int, QuantileSketch] = {}
+
+    def _slot_sketch(self, slot: int) -> QuantileSketch:
+        sketch = self.slots.get(slot)
+        if sketch is None:
+            sketch = self.slots[slot] = QuantileSketch(self.relative_accuracy)
+        return sketch
+
+    def record(self, timestamp: float, value: float) -> None:
+        """记录单个样本"""
+        self.buffer.append(timestamp, value)
+        self._slot_sketch(int(timestamp // self.slot_seconds)).add(value)
+
+    def record_many(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """批量记录样本"""
+        self.buffer.extend(timestamps, values)
+
+        slots = (timestamps // self.slot_seconds).astype(np.int64)
+        if slots[0] == slots[-1] and (len(slots) < 3 or (slots == slots[0]).all()):
+            self._slot_sketch(int(slots[0])).add_many(values)
+            return
+
+        unique_slots, inverse = np.unique(slots, return_inverse=True)
+        for position, slot in enumerate(unique_slots):
+            self._slot_sketch(int(slot)).add_many(values[inverse == position])
+
+    def merge_window_into(self, sketch: QuantileSketch, start_time: float) -> None:
+        """将窗口内的时间槽草图合并到目标草图"""
+        start_slot = int(start_time // self.slot_seconds)
+        for slot, slot_sketch in self.slots.items():
+            if slot >= start_slot:
+                sketch.merge(slot_sketch)
+
+    def prune_slots(self, before_time: float) -> None:
+        """移除早于指定时间的时间槽草图"""
+        start_slot = int(before_time // self.slot_seconds)
+        for slot in [slot for slot in self.slots if slot < start_slot]:
+            del self.slots[slot]
@@ -13,17 +13,19 @@
 import asyncio
 import json
 import logging
-import statistics
 import threading
 import time
-from collections import defaultdict, deque
-from collections.abc import Callable
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 from enum import Enum
 from typing import Any
 
+import numpy as np
+
 from app.shared.models.enums import AlertLevel, MetricType
+from app.shared.utils.metric_store import MetricSeries, QuantileSketch
 
 # Prometheus客户端支持
 try:
@@ -113,6 +115,24 @@ def generate_latest(registry: Any) -> bytes:
 
 logger = logging.getLogger(__name__)
 
+# 序列的标签组合键（按标签名排序）
+TagsKey = tuple[tuple[str, str], ...]
+
+
+def _to_epoch(timestamp: datetime) -> float:
+    """转换为Unix时间戳（无时区的时间按UTC处理）"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return timestamp.timestamp()
+
+
+def _next_index(indices: np.ndarray, position: int, skip: bool = False) -> int | None:
+    """有序索引数组中不小于position的第一个索引"""
+    if skip:
+        return None
+    found = int(np.searchsorted(indices, position))
+    return int(indices[found]) if found < len(indices) else None
+
 
 class AggregationType(Enum):
     """聚合类型"""
@@ -193,30 +213,46 @@ class MetricAlert:
 
 
 class MetricsCollector:
-    """指标收集器"""
+    """指标收集器
 
-    def __init__(self, max_points_per_metric: int = 10000) -> None:
+    每个指标按标签组合拆分为独立序列：原始样本存放在NumPy环形缓冲区中，
+    窗口聚合基于按时间槽切分的可合并分位数草图，告警规则按指标名索引。
+    max_points_per_metric 是单个指标所有序列合计的原始样本上限，由存活的序列平分。
+    """
+
+    def __init__(
+        self,
+        max_points_per_metric: int = 10000,
+        aggregation_window: timedelta = timedelta(minutes=5),
+        sketch_slot_seconds: float = 10.0,
+        sketch_relative_accuracy: float = 0.01,
+        max_series_per_metric: int = 1000,
+    ) -> None:
         self.max_points_per_metric = max_points_per_metric
+        self.max_series_per_metric = max_series_per_metric
+        self.aggregation_window = aggregation_window
+        self.sketch_slot_seconds = sketch_slot_seconds
+        self.sketch_relative_accuracy = sketch_relative_accuracy
         self.logger = logging.getLogger(__name__)
 
         # 指标定义注册表
         self.metric_definitions: dict[str, MetricDefinition] = {}
 
-        # 原始指标数据存储
-        self.raw_metrics: dict[str, deque[MetricPoint]] = defaultdict(
-            lambda: deque(maxlen=self.max_points_per_metric)
-        )
+        # 原始指标数据存储：指标名 -> 标签组合 -> 序列（按最近使用排序，超出上限时淘汰最久未用的）
+        self.series: dict[str, OrderedDict[TagsKey, MetricSeries]] = defaultdict(OrderedDict)
 
         # 聚合指标缓存
         self.aggregated_metrics: dict[
             str, dict[AggregationType, AggregatedMetric]
         ] = defaultdict(dict)
 
-        # 告警规则
+        # 告警规则及按指标名的索引
         self.alert_rules: dict[str, dict[str, Any]] = {}
+        self.rules_by_metric: dict[str, list[dict[str, Any]]] = defaultdict(list)
 
-        # 活跃告警
+        # 活跃告警及按指标名、级别的未解决告警索引
         self.active_alerts: dict[str, MetricAlert] = {}
+        self.open_alerts: dict[str, dict[AlertLevel, MetricAlert]] = defaultdict(dict)
 
         # 告警回调
         self.alert_callbacks: list[Callable[[MetricAlert], None]] = []
@@ -249,15 +285,51 @@ def add_alert_rule(
     ) -> None:
         """添加告警规则"""
         rule_id = f"{metric_name}_{level.value}_{int(time.time())}"
-        self.alert_rules[rule_id] = {
+        rule = {
+            "rule_id": rule_id,
             "metric_name": metric_name,
             "threshold": threshold,
             "level": level,
             "comparison": comparison,
             "tags_filter": tags_filter or {},
         }
+
+        # 同名规则重复添加时替换索引中的旧规则
+        previous = self.alert_rules.get(rule_id)
+        if previous is not None:
+            self.rules_by_metric[metric_name].remove(previous)
+
+        self.alert_rules[rule_id] = rule
+        self.rules_by_metric[metric_name].append(rule)
         self.logger.info(f"添加告警规则: {metric_name} {comparison} {threshold}")
 
+    def _get_series(self, name: str, tags: dict[str, str] | None) -> MetricSeries:
+        """获取（必要时创建）指标在某一标签组合下的序列"""
+        key: TagsKey = tuple(sorted(tags.items())) if tags else ()
+        metric_series = self.series[name]
+        series = metric_series.get(key)
+        if series is not None:
+            metric_series.move_to_end(key)
+            return series
+
+        # 标签组合数量失控（如标签中带请求ID）时淘汰最久未用的序列，限制内存占用
+        if len(metric_series) >= self.max_series_per_metric:
+            evicted_key, _ = metric_series.popitem(last=False)
+            self.logger.warning(f"指标 {name} 的标签组合超过上限，淘汰序列: {dict(evicted_key)}")
+
+        # 样本上限由该指标的所有序列平分，新增序列时收缩已有序列
+        capacity = max(1, self.max_points_per_metric // (len(metric_series) + 1))
+        for existing in metric_series.values():
+            existing.buffer.resize(capacity)
+
+        series = metric_series[key] = MetricSeries(
+            dict(tags or {}),
+            capacity,
+            slot_seconds=self.sketch_slot_seconds,
+            relative_accuracy=self.sketch_relative_accuracy,
+        )
+        return series
+
     async def collect_metric(
         self,
         name: str,
@@ -267,43 +339,107 @@ async def collect_metric(
     ) -> None:
         """收集单个指标"""
         try:
-            point = MetricPoint(
-                name=name,
-                value=value,
-                timestamp=timestamp or datetime.utcnow(),
-                tags=tags or {},
-            )
-
-            # 添加到原始数据存储
-            self.raw_metrics[name].append(point)
+            ts = _to_epoch(timestamp) if timestamp else time.time()
+            value = float(value)
+            series = self._get_series(name, tags)
+            series.record(ts, value)
 
             # 更新统计
             self.collection_stats["total_points_collected"] += 1
             self.collection_stats["last_collection_time"] = datetime.utcnow()
 
             # 检查告警
-            await self._check_alerts(point)
+            for rule in self.rules_by_metric.get(name, ()):
+                self._evaluate_rule_value(rule, series.tags, ts, value)
 
         except Exception as e:
             self.logger.error(f"收集指标失败: {name}, 错误: {e}")
             self.collection_stats["collection_errors"] += 1
 
     async def collect_metrics_batch(self, points: list[MetricPoint]) -> None:
-        """批量收集指标"""
+        """批量收集指标
+
+        按 (指标名, 标签组合) 分组后整体写入环形缓冲区和分位数草图，
+        告警规则对每组做一次向量化判断。
+        """
         start_time = time.time()
 
         try:
+            # 同一批次中的标签字典和时间戳对象通常是共享的，转换结果按对象缓存
+            tags_keys: dict[int, TagsKey] = {}
+            epochs: dict[datetime, float] = {}
+            grouped: dict[tuple[str, TagsKey], tuple[list[float], list[float]]] = {}
             for point in points:
-                await self.collect_metric(
-                    point.name, point.value, point.tags, point.timestamp
+                tags_key = tags_keys.get(id(point.tags))
+                if tags_key is None:
+                    tags_key = tags_keys[id(point.tags)] = (
+                        tuple(sorted(point.tags.items())) if point.tags else ()
+                    )
+                epoch = epochs.get(point.timestamp)
+                if epoch is None:
+                    epoch = epochs[point.timestamp] = _to_epoch(point.timestamp)
+
+                group = grouped.get((point.name, tags_key))
+                if group is None:
+                    group = grouped[(point.name, tags_key)] = ([], [])
+                group[0].append(epoch)
+                group[1].append(point.value)
+
+            for (name, tags_key), (timestamps, values) in grouped.items():
+                self._ingest_series(
+                    name,
+                    dict(tags_key),
+                    np.asarray(timestamps, dtype=np.float64),
+                    np.asarray(values, dtype=np.float64),
                 )
 
         except Exception as e:
             self.logger.error(f"批量收集指标失败: {e}")
+            self.collection_stats["collection_errors"] += 1
 
         finally:
             self.collection_stats["collection_duration"] = time.time() - start_time
 
+    async def collect_series_batch(
+        self,
+        name: str,
+        values: Sequence[float] | np.ndarray,
+        tags: dict[str, str] | None = None,
+        timestamps: Sequence[float] | np.ndarray | None = None,
+    ) -> None:
+        """批量收集同一指标、同一标签组合的样本（时间戳为Unix秒，缺省为当前时间）"""
+        try:
+            value_array = np.asarray(values, dtype=np.float64)
+            if timestamps is None:
+                timestamp_array = np.full(len(value_array), time.time())
+            else:
+                timestamp_array = np.asarray(timestamps, dtype=np.float64)
+            self._ingest_series(name, tags or {}, timestamp_array, value_array)
+
+        except Exception as e:
+            self.logger.error(f"批量收集指标失败: {name}, 错误: {e}")
+            self.collection_stats["collection_errors"] += 1
+
+    def _ingest_series(
+        self,
+        name: str,
+        tags: dict[str, str],
+        timestamps: np.ndarray,
+        values: np.ndarray,
+    ) -> None:
+        """写入一组样本并检查告警"""
+        if len(values) == 0:
+            return
+
+        series = self._get_series(name, tags)
+        series.record_many(timestamps, values)
+
+        self.collection_stats["total_points_collected"] += len(values)
+        self.collection_stats["last_collection_time"] = datetime.utcnow()
+
+        for rule in self.rules_by_metric.get(name, ()):
+            self._evaluate_rule_batch(rule, series.tags, timestamps, values)
+
     async def start_collection(self) -> None:
         """启动自动收集"""
         if self.is_collecting:
@@ -393,134 +529,192 @@ async def _auto_collect_system_metrics(self) -> None:
             self.logger.error(f"自动收集系统指标失败: {e}")
 
     async def _update_aggregated_metrics(self) -> None:
-        """更新聚合指标"""
+        """更新聚合指标（合并窗口内各时间槽的草图，不扫描原始样本）"""
         try:
             current_time = datetime.utcnow()
+            window_start = current_time - self.aggregation_window
+            window_start_ts = _to_epoch(window_start)
 
-            for metric_name, points in self.raw_metrics.items():
-                if not points:
-                    continue
-
+            for metric_name, metric_series in self.series.items():
                 # 获取指标定义
                 definition = self.metric_definitions.get(metric_name)
-                if not definition:
+                if not definition or not metric_series:
                     continue
 
-                # 计算时间窗口（最近5分钟）
-                window_start = current_time - timedelta(minutes=5)
-                window_points = [p for p in points if p.timestamp >= window_start]
+                # 合并各标签组合在窗口内的草图
+                sketch = QuantileSketch(self.sketch_relative_accuracy)
+                for series in metric_series.values():
+                    series.merge_window_into(sketch, window_start_ts)
 
-                if not window_points:
+                if sketch.count == 0:
                     continue
 
-                # 计算各种聚合
-                values = [p.value for p in window_points]
-
                 for agg_type in definition.aggregations:
-                    agg_value = self._calculate_aggregation(values, agg_type)
-
-                    aggregated = AggregatedMetric(
+                    self.aggregated_metrics[metric_name][agg_type] = AggregatedMetric(
                         name=metric_name,
                         aggregation_type=agg_type,
-                        value=agg_value,
+                        value=self._calculate_aggregation(sketch, agg_type),
                         start_time=window_start,
                         end_time=current_time,
-                        sample_count=len(values),
+                        sample_count=sketch.count,
                     )
 
-                    self.aggregated_metrics[metric_name][agg_type] = aggregated
-
         except Exception as e:
             self.logger.error(f"更新聚合指标失败: {e}")
 
     def _calculate_aggregation(
-        self, values: list[float], agg_type: AggregationType
+        self, sketch: QuantileSketch, agg_type: AggregationType
     ) -> float:
-        """计算聚合值"""
-        if not values:
+        """根据草图计算聚合值"""
+        if sketch.count == 0:
             return 0.0
 
         if agg_type == AggregationType.SUM:
-            return sum(values)
+            return sketch.sum
         elif agg_type == AggregationType.AVERAGE:
-            return statistics.mean(values)
+            return sketch.mean
         elif agg_type == AggregationType.MIN:
-            return min(values)
+            return sketch.min
         elif agg_type == AggregationType.MAX:
-            return max(values)
+            return sketch.max
         elif agg_type == AggregationType.COUNT:
-            return float(len(values))
+            return float(sketch.count)
         elif agg_type == AggregationType.PERCENTILE_95:
-            return statistics.quantiles(values, n=20)[18]  # 95th percentile
+            return sketch.quantile(0.95)
         elif agg_type == AggregationType.PERCENTILE_99:
-            return statistics.quantiles(values, n=100)[98]  # 99th percentile
+            return sketch.quantile(0.99)
 
         # 对于未知的聚合类型，返回平均值
-        return statistics.mean(values)  # type: ignore[unreachable]
+        return sketch.mean  # type: ignore[unreachable]
 
-    async def _check_alerts(self, point: MetricPoint) -> None:
-        """检查告警条件"""
+    @staticmethod
+    def _matches_tags(rule: dict[str, Any], tags: dict[str, str]) -> bool:
+        """检查标签过滤（按序列判断一次）"""
+        tags_filter = rule["tags_filter"]
+        return not tags_filter or all(tags.get(k) == v for k, v in tags_filter.items())
+
+    def _evaluate_rule_value(
+        self, rule: dict[str, Any], tags: dict[str, str], timestamp: float, value: float
+    ) -> None:
+        """对单个样本判断告警规则"""
         try:
-            for rule_id, rule in self.alert_rules.items():
-                if rule["metric_name"] != point.name:
-                    continue
+            if not self._matches_tags(rule, tags):
+                return
+
+            threshold = rule["threshold"]
+            comparison = rule["comparison"]
+
+            if comparison == "greater":
+                triggered = value > threshold
+                resolving = value <= threshold * 0.9
+            elif comparison == "less":
+                triggered = value < threshold
+                resolving = value >= threshold * 1.1
+            else:
+                triggered = comparison == "equal" and abs(value - threshold) < 0.001
+                resolving = False
+
+            if triggered:
+                self._create_alert(rule, tags, timestamp, value)
+            elif resolving:
+                # 值回到正常范围，解决该指标的告警
+                self._resolve_alerts(rule["metric_name"], value)
+
+        except Exception as e:
+            self.logger.error(f"检查告警失败: {e}")
+
+    def _evaluate_rule_batch(
+        self,
+        rule: dict[str, Any],
+        tags: dict[str, str],
+        timestamps: np.ndarray,
+        values: np.ndarray,
+    ) -> None:
+        """对一组样本向量化判断告警规则，只逐个处理状态可能变化的样本"""
+        try:
+            if not self._matches_tags(rule, tags):
+                return
+
+            threshold = rule["threshold"]
+            comparison = rule["comparison"]
+
+            if comparison == "greater":
+                triggered = values > threshold
+                resolving = values <= threshold * 0.9
+            elif comparison == "less":
+                triggered = values < threshold
+                resolving = values >= threshold * 1.1
+            elif comparison == "equal":
+                triggered = np.abs(values - threshold) < 0.001
+                resolving = np.zeros(len(values), dtype=bool)
+            else:
+                return
 
-                # 检查标签过滤
-                tags_filter = rule["tags_filter"]
-                if tags_filter:
-                    if not all(point.tags.get(k) == v for k, v in tags_filter.items()):
-                        continue
-
-                # 检查阈值
-                threshold = rule["threshold"]
-                comparison = rule["comparison"]
-                triggered = False
-
-                if comparison == "greater" and point.value > threshold:
-                    triggered = True
-                elif comparison == "less" and point.value < threshold:
-                    triggered = True
-                elif comparison == "equal" and abs(point.value - threshold) < 0.001:
-                    triggered = True
-
-                if triggered:
-                    await self._create_alert(rule, point)
+            # 告警状态只在触发/恢复时变化：未告警时跳到下一个触发点，
+            # 告警中跳到下一个恢复点，每一步都是二分查找
+            metric_name = rule["metric_name"]
+            level = rule["level"]
+            trigger_indices = np.flatnonzero(triggered)
+            resolve_indices = np.flatnonzero(resolving)
+            position = 0
+            while True:
+                open_alerts = self.open_alerts.get(metric_name)
+                next_trigger = _next_index(
+                    trigger_indices,
+                    position,
+                    skip=open_alerts is not None and level in open_alerts,
+                )
+                next_resolve = _next_index(
+                    resolve_indices, position, skip=not open_alerts
+                )
+                if next_trigger is not None and (
+                    next_resolve is None or next_trigger < next_resolve
+                ):
+                    self._create_alert(
+                        rule,
+                        tags,
+                        float(timestamps[next_trigger]),
+                        float(values[next_trigger]),
+                    )
+                    position = next_trigger + 1
+                elif next_resolve is not None:
+                    self._resolve_alerts(metric_name, float(values[next_resolve]))
+                    position = next_resolve + 1
                 else:
-                    # 检查是否需要解决告警
-                    await self._resolve_alert(rule_id, point)
+                    break
 
         except Exception as e:
             self.logger.error(f"检查告警失败: {e}")
 
-    async def _create_alert(self, rule: dict[str, Any], point: MetricPoint) -> None:
+    def _create_alert(
+        self,
+        rule: dict[str, Any],
+        tags: dict[str, str],
+        timestamp: float,
+        value: float,
+    ) -> None:
         """创建告警"""
         try:
-            alert_id = f"{rule['metric_name']}_{rule['level'].value}_{int(time.time())}"
+            metric_name = rule["metric_name"]
+            level = rule["level"]
 
             # 避免重复告警
-            existing_alerts = [
-                alert
-                for alert in self.active_alerts.values()
-                if alert.metric_name == rule["metric_name"]
-                and alert.level == rule["level"]
-                and not alert.resolved
-            ]
-
-            if existing_alerts:
+            if level in self.open_alerts[metric_name]:
                 return
 
             alert = MetricAlert(
-                alert_id=alert_id,
-                metric_name=rule["metric_name"],
-                level=rule["level"],
+                alert_id=f"{metric_name}_{level.value}_{int(time.time())}",
+                metric_name=metric_name,
+                level=level,
                 threshold=rule["threshold"],
-                current_value=point.value,
-                message=f"指标 {rule['metric_name']} {rule['comparison']} {rule['threshold']}: 当前值 {point.value}",
-                timestamp=point.timestamp,
-                tags=point.tags,
+                current_value=value,
+                message=f"指标 {metric_name} {rule['comparison']} {rule['threshold']}: 当前值 {value}",
+                timestamp=datetime.utcfromtimestamp(timestamp),
+                tags=dict(tags),
             )
 
-            self.active_alerts[alert_id] = alert
+            self.active_alerts[alert.alert_id] = alert
+            self.open_alerts[metric_name][level] = alert
 
             # 触发告警回调
             for callback in self.alert_callbacks:
@@ -534,50 +728,38 @@ async def _create_alert(self, rule: dict[str, Any], point: MetricPoint) -> None:
         except Exception as e:
             self.logger.error(f"创建告警失败: {e}")
 
-    async def _resolve_alert(self, rule_id: str, point: MetricPoint) -> None:
-        """解决告警"""
-        try:
-            alerts_to_resolve = []
-
-            for alert in self.active_alerts.values():
-                if alert.metric_name == point.name and not alert.resolved:
-                    # 检查是否满足解决条件（值回到正常范围）
-                    rule = self.alert_rules.get(rule_id)
-                    if rule:
-                        threshold = rule["threshold"]
-                        comparison = rule["comparison"]
-                        should_resolve = False
-
-                        if comparison == "greater" and point.value <= threshold * 0.9:
-                            should_resolve = True
-                        elif comparison == "less" and point.value >= threshold * 1.1:
-                            should_resolve = True
-
-                        if should_resolve:
-                            alerts_to_resolve.append(alert)
-
-            # 解决告警
-            for alert in alerts_to_resolve:
-                alert.resolved = True
-                self.logger.info(f"告警已解决: {alert.message}")
+    def _resolve_alerts(self, metric_name: str, value: float) -> None:
+        """解决指标的未解决告警"""
+        open_alerts = self.open_alerts.get(metric_name)
+        if not open_alerts:
+            return
 
-        except Exception as e:
-            self.logger.error(f"解决告警失败: {e}")
+        for alert in open_alerts.values():
+            alert.resolved = True
+            self.logger.info(f"告警已解决: {alert.message} (当前值 {value})")
+        open_alerts.clear()
 
     async def _cleanup_expired_data(self) -> None:
         """清理过期数据"""
         try:
-            current_time = datetime.utcnow()
+            current_ts = time.time()
+            window_start_ts = current_ts - self.aggregation_window.total_seconds()
 
-            for metric_name, points in self.raw_metrics.items():
+            for metric_name, metric_series in self.series.items():
                 definition = self.metric_definitions.get(metric_name)
-                if not definition:
-                    continue
+                cutoff_ts = (
+                    current_ts - definition.retention_period.total_seconds()
+                    if definition
+                    else None
+                )
+
+                for series in metric_series.values():
+                    # 聚合窗口之外的草图不再需要
+                    series.prune_slots(window_start_ts)
 
-                # 清理超过保留期的数据
-                cutoff_time = current_time - definition.retention_period
-                while points and points[0].timestamp < cutoff_time:
-                    points.popleft()
+                    # 清理超过保留期的数据
+                    if cutoff_ts is not None:
+                        series.buffer.drop_before(cutoff_ts)
 
         except Exception as e:
             self.logger.error(f"清理过期数据失败: {e}")
@@ -590,28 +772,39 @@ def get_metric_values(
         tags_filter: dict[str, str] | None = None,
     ) -> list[MetricPoint]:
         """获取指标值"""
-        points: list[MetricPoint] = list(self.raw_metrics.get(metric_name, []))
-
-        # 时间过滤
-        if start_time or end_time:
-            filtered_points = []
-            for point in points:
-                if start_time and point.timestamp < start_time:
-                    continue
-                if end_time and point.timestamp > end_time:
-                    continue
-                filtered_points.append(point)
-            points = filtered_points
-
-        # 标签过滤
-        if tags_filter:
-            filtered_points = []
-            for point in points:
-                if all(point.tags.get(k) == v for k, v in tags_filter.items()):
-                    filtered_points.append(point)
-            points = filtered_points
+        start_ts = _to_epoch(start_time) if start_time else None
+        end_ts = _to_epoch(end_time) if end_time else None
+
+        points: list[MetricPoint] = []
+        for series in self.series.get(metric_name, {}).values():
+            # 标签过滤
+            if tags_filter and not all(
+                series.tags.get(k) == v for k, v in tags_filter.items()
+            ):
+                continue
+
+            # 时间过滤
+            timestamps, values = series.buffer.ordered()
+            mask = np.ones(len(values), dtype=bool)
+            if start_ts is not None:
+                mask &= timestamps >= start_ts
+            if end_ts is not None:
+                mask &= timestamps <= end_ts
+
+            points.extend(
+                MetricPoint(
+                    name=metric_name,
+                    value=value,
+                    timestamp=datetime.utcfromtimestamp(ts),
+                    tags=dict(series.tags),
+                )
+                for ts, value in zip(
+                    timestamps[mask].tolist(), values[mask].tolist(), strict=True
+                )
+            )
 
-        return list(points)
+        points.sort(key=lambda point: point.timestamp)
+        return points
 
     def get_aggregated_metric(
         self, metric_name: str, aggregation_type: AggregationType
@@ -619,31 +812,39 @@ def get_aggregated_metric(
         """获取聚合指标"""
         return self.aggregated_metrics.get(metric_name, {}).get(aggregation_type)
 
+    def _metric_arrays(self, metric_name: str) -> tuple[np.ndarray, np.ndarray]:
+        """合并指标各标签组合的原始样本（按时间排序）"""
+        parts = [series.buffer.ordered() for series in self.series[metric_name].values()]
+        timestamps = np.concatenate([part[0] for part in parts])
+        values = np.concatenate([part[1] for part in parts])
+        order = np.argsort(timestamps, kind="stable")
+        return timestamps[order], values[order]
+
     def get_metrics_summary(self) -> dict[str, Any]:
         """获取指标摘要"""
         summary: dict[str, Any] = {
             "timestamp": datetime.utcnow().isoformat(),
             "total_metrics": len(self.metric_definitions),
             "total_data_points": sum(
-                len(points) for points in self.raw_metrics.values()
-            ),
-            "active_alerts": len(
-                [a for a in self.active_alerts.values() if not a.resolved]
+                len(series.buffer)
+                for metric_series in self.series.values()
+                for series in metric_series.values()
             ),
+            "active_alerts": sum(len(alerts) for alerts in self.open_alerts.values()),
             "collection_stats": self.collection_stats,
             "metrics": {},
         }
 
         # 各指标的基本统计
-        for name, points in self.raw_metrics.items():
-            if points:
-                values = [p.value for p in points]
+        for name in self.series:
+            _, values = self._metric_arrays(name)
+            if len(values):
                 summary["metrics"][name] = {
                     "count": len(values),
-                    "latest_value": values[-1],
-                    "min": min(values),
-                    "max": max(values),
-                    "average": statistics.mean(values),
+                    "latest_value": float(values[-1]),
+                    "min": float(values.min()),
+                    "max": float(values.max()),
+                    "average": float(values.mean()),
                 }
 
         return summary
@@ -684,16 +885,17 @@ def export_metrics(
 
         # 可选导出原始数据
         if include_raw_data:
-            export_data["raw_data"] = {}
-            for metric_name, points in self.raw_metrics.items():
-                export_data["raw_data"][metric_name] = [
+            export_data["raw_data"] = {
+                metric_name: [
                     {
                         "value": p.value,
                         "timestamp": p.timestamp.isoformat(),
                         "tags": p.tags,
                     }
-                    for p in points
+                    for p in self.get_metric_values(metric_name)
                 ]
+                for metric_name in self.series
+            }
 
         if format_type == "json":
             return json.dumps(export_data, indent=2, ensure_ascii=False)
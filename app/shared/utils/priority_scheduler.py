@@ -7,18 +7,27 @@
 - 负载均衡算法
 - 公平性保证
 - 饥饿预防机制
+- 出站调用准入控制（并发上限、按类别排队、截止时间与负载卸载）
 """
 
 import asyncio
 import heapq
 import logging
+import random
 import time
+import uuid
 from collections import defaultdict, deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any
 
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
 from app.shared.models.enums import PriorityLevel
 
 
@@ -603,3 +612,277 @@ async def schedule_batch_task(task_id: str, payload: dict[str, Any]) -> str:
     return await schedule_task(
         task_id, PriorityLevel.NORMAL, TaskCategory.BATCH, payload
     )
+
+
+# ==================== 出站调用准入控制 ====================
+
+# 类别排序：数值越小越先获得执行槽位
+CATEGORY_RANKS = {
+    TaskCategory.REAL_TIME: 0,
+    TaskCategory.INTERACTIVE: 1,
+    TaskCategory.BATCH: 2,
+    TaskCategory.BACKGROUND: 3,
+}
+
+# 各类别（连同比它更低的类别）最多占用的槽位比例，保证交互请求始终有空闲槽位
+CATEGORY_SLOT_SHARES = {
+    TaskCategory.REAL_TIME: 1.0,
+    TaskCategory.INTERACTIVE: 1.0,
+    TaskCategory.BATCH: 0.75,
+    TaskCategory.BACKGROUND: 0.5,
+}
+
+# 集群租约：有序集合按租约到期时间排序，进程崩溃后租约自然过期
+# KEYS[1]: 租约集合  ARGV: 当前时间、租约到期时间、租约ID、该类别可用上限
+CLUSTER_ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[4]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+return 1
+"""
+
+
+class AdmissionRejectedError(Exception):
+    """准入被拒绝（负载卸载）"""
+
+    def __init__(self, category: TaskCategory, reason: str) -> None:
+        self.category = category
+        self.reason = reason
+        super().__init__(f"{category.value} 请求被拒绝: {reason}")
+
+
+@dataclass(order=True)
+class _AdmissionWaiter:
+    """排队中的准入请求，按类别、截止时间、到达顺序排序"""
+
+    rank: int
+    deadline: float
+    sequence: int
+    category: TaskCategory = field(compare=False)
+    future: "asyncio.Future[None]" = field(compare=False)
+
+
+class AdmissionController:
+    """出站调用准入控制器
+
+    - 进程内最多 max_inflight 个调用同时执行，批处理和后台类别只能占用部分槽位
+    - 槽位不足时按类别优先、截止时间先到先服务排队
+    - 预计等待超过截止时间或等待超时的请求直接拒绝，不再占用上游
+    - 配置 cluster_max_inflight 时再通过Redis租约限制全集群并发，Redis不可用时只做进程内限制
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_inflight: int,
+        max_wait: dict[TaskCategory, float],
+        cluster_max_inflight: int = 0,
+        redis_client: Any = None,
+        lease_seconds: float = 300.0,
+    ) -> None:
+        self.name = name
+        self.max_inflight = max_inflight
+        self.max_wait = max_wait
+        self.cluster_max_inflight = cluster_max_inflight
+        self.lease_seconds = lease_seconds
+        self.logger = logging.getLogger(__name__)
+
+        self.active: dict[TaskCategory, int] = defaultdict(int)
+        self._waiters: list[_AdmissionWaiter] = []
+        self._sequence = 0
+
+        # 单次调用耗时的指数滑动平均，用于估算排队时间
+        self.service_time = 1.0
+        self.stats: dict[TaskCategory, dict[str, int]] = defaultdict(
+            lambda: {"admitted": 0, "shed": 0, "expired": 0}
+        )
+
+        self._redis = redis_client
+        self._cluster_script: Any = None
+        self._leases_key = f"admission:{name}:leases"
+
+    def _slot_limit(self, category: TaskCategory, capacity: int) -> int:
+        return max(1, int(capacity * CATEGORY_SLOT_SHARES[category]))
+
+    def _can_start(self, category: TaskCategory) -> bool:
+        """总槽位未满，且该类别及更低类别的占用未超过其份额"""
+        if sum(self.active.values()) >= self.max_inflight:
+            return False
+        rank = CATEGORY_RANKS[category]
+        shared = sum(
+            count for other, count in self.active.items() if CATEGORY_RANKS[other] >= rank
+        )
+        return shared < self._slot_limit(category, self.max_inflight)
+
+    def _dispatch(self) -> None:
+        """按排队顺序放行可以开始的请求"""
+        remaining = []
+        for waiter in sorted(self._waiters):
+            if not waiter.future.done() and self._can_start(waiter.category):
+                self.active[waiter.category] += 1
+                waiter.future.set_result(None)
+            elif not waiter.future.done():
+                remaining.append(waiter)
+        heapq.heapify(remaining)
+        self._waiters = remaining
+
+    def _estimated_wait(self, waiter: _AdmissionWaiter) -> float:
+        ahead = sum(1 for other in self._waiters if other < waiter)
+        slots = self._slot_limit(waiter.category, self.max_inflight)
+        return (ahead + 1) * self.service_time / slots
+
+    async def acquire(
+        self, category: TaskCategory, timeout: float | None = None
+    ) -> str | None:
+        """获取执行槽位，返回集群租约ID（未启用集群限制时为None）
+
+        Raises:
+            AdmissionRejectedError: 预计等待或实际等待超过截止时间
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self.max_wait[category] if timeout is None else timeout
+        deadline = loop.time() + timeout
+
+        self._sequence += 1
+        waiter = _AdmissionWaiter(
+            rank=CATEGORY_RANKS[category],
+            deadline=deadline,
+            sequence=self._sequence,
+            category=category,
+            future=loop.create_future(),
+        )
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+
+        if not waiter.future.done():
+            if self._estimated_wait(waiter) > timeout:
+                self._remove_waiter(waiter)
+                self.stats[category]["shed"] += 1
+                raise AdmissionRejectedError(category, "排队已满")
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            except TimeoutError:
+                self._remove_waiter(waiter)
+                self.stats[category]["expired"] += 1
+                raise AdmissionRejectedError(category, "等待超时") from None
+            except asyncio.CancelledError:
+                self._remove_waiter(waiter)
+                raise
+
+        try:
+            lease_id = await self._acquire_cluster_lease(category, deadline)
+        except BaseException:
+            self._release_local(category)
+            raise
+
+        self.stats[category]["admitted"] += 1
+        return lease_id
+
+    def _remove_waiter(self, waiter: _AdmissionWaiter) -> None:
+        """撤销排队；若已被放行则归还槽位"""
+        if waiter.future.done() and not waiter.future.cancelled():
+            self._release_local(waiter.category)
+            return
+        waiter.future.cancel()
+        self._dispatch()
+
+    def _release_local(self, category: TaskCategory) -> None:
+        self.active[category] = max(0, self.active[category] - 1)
+        self._dispatch()
+
+    async def _acquire_cluster_lease(
+        self, category: TaskCategory, deadline: float
+    ) -> str | None:
+        """获取集群租约，租约满时退避重试直到截止时间"""
+        if self.cluster_max_inflight <= 0:
+            return None
+
+        loop = asyncio.get_running_loop()
+        limit = self._slot_limit(category, self.cluster_max_inflight)
+        lease_id = str(uuid.uuid4())
+        delay = 0.05
+        while True:
+            try:
+                if self._cluster_script is None:
+                    if self._redis is None:
+                        self._redis = get_redis_client()
+                    self._cluster_script = self._redis.register_script(CLUSTER_ACQUIRE_SCRIPT)
+                now = time.time()
+                granted = await self._cluster_script(
+                    keys=[self._leases_key],
+                    args=[now, now + self.lease_seconds, lease_id, limit],
+                )
+            except RedisError as e:
+                # Redis不可用时退化为只做进程内限制
+                self.logger.warning(f"集群准入不可用，仅做进程内限制: {e}")
+                return None
+
+            if granted:
+                return lease_id
+            if loop.time() + delay > deadline:
+                self.stats[category]["shed"] += 1
+                raise AdmissionRejectedError(category, "集群并发已满")
+            await asyncio.sleep(delay * (0.5 + random.random()))
+            delay = min(delay * 2, 1.0)
+
+    async def release(
+        self, category: TaskCategory, lease_id: str | None, elapsed: float | None = None
+    ) -> None:
+        """归还槽位和集群租约"""
+        if elapsed is not None:
+            self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+        self._release_local(category)
+        if lease_id is not None and self._redis is not None:
+            try:
+                await self._redis.zrem(self._leases_key, lease_id)
+            except RedisError as e:
+                self.logger.warning(f"归还集群租约失败，等待租约过期: {e}")
+
+    @asynccontextmanager
+    async def admit(
+        self, category: TaskCategory, timeout: float | None = None
+    ) -> AsyncIterator[None]:
+        """在准入控制下执行一次调用"""
+        lease_id = await self.acquire(category, timeout)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            await self.release(category, lease_id, time.monotonic() - start)
+
+    def get_status(self) -> dict[str, Any]:
+        """获取准入状态"""
+        return {
+            "name": self.name,
+            "max_inflight": self.max_inflight,
+            "cluster_max_inflight": self.cluster_max_inflight,
+            "active": {category.value: count for category, count in self.active.items()},
+            "waiting": len(self._waiters),
+            "service_time": self.service_time,
+            "stats": {category.value: dict(stats) for category, stats in self.stats.items()},
+        }
+
+
+_admission_controllers: dict[str, AdmissionController] = {}
+
+
+def get_admission_controller(name: str = "ai") -> AdmissionController:
+    """获取出站AI调用的准入控制器（进程内共享）"""
+    controller = _admission_controllers.get(name)
+    if controller is None:
+        controller = AdmissionController(
+            name,
+            max_inflight=settings.AI_MAX_INFLIGHT_CALLS,
+            max_wait={
+                TaskCategory.REAL_TIME: settings.AI_INTERACTIVE_MAX_WAIT,
+                TaskCategory.INTERACTIVE: settings.AI_INTERACTIVE_MAX_WAIT,
+                TaskCategory.BATCH: settings.AI_BATCH_MAX_WAIT,
+                TaskCategory.BACKGROUND: settings.AI_BACKGROUND_MAX_WAIT,
+            },
+            cluster_max_inflight=settings.AI_CLUSTER_MAX_INFLIGHT_CALLS,
+            lease_seconds=settings.DEEPSEEK_TIMEOUT * 4,
+        )
+        _admission_controllers[name] = controller
+    return controller
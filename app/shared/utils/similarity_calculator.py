@@ -1,6 +1,7 @@
 """相似度计算器模块
 
 提供多种相似度计算方法，支持向量相似度、文本相似度等。
+余弦相似度、编辑距离和批量计算委托给 vector_kernels 的 NumPy 实现。
 """
 
 import asyncio
@@ -9,6 +10,13 @@
 from dataclasses import dataclass
 from typing import Any
 
+from app.shared.utils.vector_kernels import (
+    cosine_one_to_many,
+    levenshtein_distance,
+    mean_pairwise_cosine,
+    top_k_indices,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -82,14 +90,7 @@ def _compute_vector_similarity_sync(
 
     def _cosine_similarity(self, v1: list[float], v2: list[float]) -> float:
         """计算余弦相似度"""
-        dot_product = sum(a * b for a, b in zip(v1, v2, strict=False))
-        magnitude1 = math.sqrt(sum(a * a for a in v1))
-        magnitude2 = math.sqrt(sum(b * b for b in v2))
-
-        if magnitude1 == 0 or magnitude2 == 0:
-            return 0.0
-
-        return dot_product / (magnitude1 * magnitude2)
+        return float(cosine_one_to_many(v1, [v2])[0])
 
     def _euclidean_distance(self, v1: list[float], v2: list[float]) -> float:
         """计算欧几里得距离（转换为相似度）"""
@@ -197,23 +198,7 @@ async def _levenshtein_similarity(self, text1: str, text2: str) -> float:
 
     def _levenshtein_distance(self, s1: str, s2: str) -> int:
         """计算编辑距离"""
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
-
-        if len(s2) == 0:
-            return len(s1)
-
-        previous_row = list(range(len(s2) + 1))
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-
-        return previous_row[-1]
+        return levenshtein_distance(s1, s2)
 
     async def batch_compute_similarities(
         self,
@@ -223,6 +208,14 @@ async def batch_compute_similarities(
         top_k: int | None = None,
     ) -> list[tuple[int, SimilarityResult]]:
         """批量计算相似度并排序"""
+        if metric == "cosine":
+            # 余弦相似度整批矩阵计算，部分排序取top_k
+            scores = await self._batch_cosine(query_vector, candidate_vectors)
+            return [
+                (int(i), self._vector_result(float(scores[i]), metric, query_vector))
+                for i in top_k_indices(scores, top_k)
+            ]
+
         results = []
 
         for i, candidate_vector in enumerate(candidate_vectors):
@@ -284,6 +277,18 @@ async def find_most_similar(
         threshold: float = 0.0,
     ) -> list[tuple[int, SimilarityResult]]:
         """找到最相似的候选项"""
+        if (
+            metric == "cosine"
+            and isinstance(query, list)
+            and all(isinstance(candidate, list) for candidate in candidates)
+        ):
+            scores = await self._batch_cosine(query, candidates)  # type: ignore[arg-type]
+            return [
+                (int(i), self._vector_result(float(scores[i]), metric, query))
+                for i in top_k_indices(scores, None)
+                if scores[i] >= threshold
+            ]
+
         results = []
 
         for i, candidate in enumerate(candidates):
@@ -308,6 +313,32 @@ async def find_most_similar(
 
         return results
 
+    async def _batch_cosine(
+        self, query_vector: list[float], candidate_vectors: list[list[float]]
+    ) -> Any:
+        """在线程池中批量计算余弦相似度"""
+        if any(len(vector) != len(query_vector) for vector in candidate_vectors):
+            raise ValueError("Vector dimensions must match")
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, cosine_one_to_many, query_vector, candidate_vectors
+        )
+
+    def _vector_result(
+        self, score: float, metric: str, query_vector: list[float]
+    ) -> SimilarityResult:
+        """构造批量计算中单个候选的结果"""
+        return SimilarityResult(
+            score=score,
+            metric=metric,
+            details={
+                "vector1_dim": len(query_vector),
+                "vector2_dim": len(query_vector),
+                "computation_method": "vector_similarity",
+            },
+        )
+
     def get_supported_metrics(self) -> list[str]:
         """获取支持的相似度度量"""
         return self.supported_metrics.copy()
@@ -319,6 +350,12 @@ async def compute_diversity_score(
         if len(vectors) < 2:
             return 0.0
 
+        if metric == "cosine":
+            # 平均两两余弦相似度由单位向量之和直接得到，无需逐对计算
+            loop = asyncio.get_event_loop()
+            average_similarity = await loop.run_in_executor(None, mean_pairwise_cosine, vectors)
+            return 1.0 - average_similarity
+
         total_similarity = 0.0
         count = 0
 
@@ -0,0 +1,318 @@
+"""向量计算内核模块
+
+基于 NumPy 的批量向量运算，供相似度计算器、向量工具和向量化工具共用：
+- 一对多、多对多余弦相似度（float32 矩阵，分块计算控制内存）
+- 基于部分排序的 top-k
+- Mini-batch K-means 聚类
+- 随机化 SVD 的 PCA 降维
+- 编辑距离（优先使用 rapidfuzz 的 C 实现，否则为带状动态规划）
+"""
+
+import logging
+from collections.abc import Iterator, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from rapidfuzz.distance import Levenshtein as _rapidfuzz_levenshtein
+
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+# 多对多计算时每块的行数，块大小 × 候选数 × 4 字节即单块相似度矩阵的内存
+DEFAULT_BLOCK_SIZE = 1024
+
+
+def as_matrix(
+    vectors: Sequence[Sequence[float]] | Sequence[float] | np.ndarray, dtype: type = np.float32
+) -> np.ndarray:
+    """转换为二维矩阵，一维输入视为单行."""
+    matrix: np.ndarray = np.asarray(vectors, dtype=dtype)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.ndim != 2:
+        raise ValueError("向量集合必须是二维矩阵")
+    return matrix
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """按行归一化为单位向量，零向量保持为零."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+# ==================== 余弦相似度 ====================
+
+
+def cosine_one_to_many(
+    query: Sequence[float] | np.ndarray, candidates: Sequence[Sequence[float]] | np.ndarray
+) -> np.ndarray:
+    """查询向量与每个候选向量的余弦相似度，零向量相似度为0，结果截断到 [-1, 1]."""
+    if len(candidates) == 0:
+        return np.empty(0, dtype=np.float32)
+    query_vector = normalize_rows(as_matrix(query))[0]
+    matrix = as_matrix(candidates)
+    if matrix.shape[1] != query_vector.shape[0]:
+        raise ValueError("向量维度不匹配")
+    return np.clip(normalize_rows(matrix) @ query_vector, -1.0, 1.0)
+
+
+def iter_cosine_blocks(
+    left: Sequence[Sequence[float]] | np.ndarray,
+    right: Sequence[Sequence[float]] | np.ndarray | None = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """分块计算多对多余弦相似度，逐块产出 (起始行, 相似度块).
+
+    right 为空时计算 left 自身两两之间的相似度。
+    """
+    left_unit = normalize_rows(as_matrix(left))
+    right_unit = left_unit if right is None else normalize_rows(as_matrix(right))
+    if left_unit.shape[1] != right_unit.shape[1]:
+        raise ValueError("向量维度不匹配")
+    for start in range(0, left_unit.shape[0], block_size):
+        yield start, left_unit[start : start + block_size] @ right_unit.T
+
+
+def cosine_many_to_many(
+    left: Sequence[Sequence[float]] | np.ndarray,
+    right: Sequence[Sequence[float]] | np.ndarray | None = None,
+) -> np.ndarray:
+    """完整的多对多余弦相似度矩阵 (len(left) × len(right))."""
+    left_matrix = as_matrix(left)
+    blocks = [block for _, block in iter_cosine_blocks(left_matrix, right)]
+    if not blocks:
+        width = left_matrix.shape[0] if right is None else as_matrix(right).shape[0]
+        return np.empty((0, width), dtype=np.float32)
+    return np.clip(np.vstack(blocks), -1.0, 1.0)
+
+
+def similar_pairs(
+    vectors: Sequence[Sequence[float]] | np.ndarray,
+    threshold: float,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> list[tuple[int, int, float]]:
+    """找出余弦相似度不低于阈值的向量对 (i, j, score)，i < j."""
+    pairs: list[tuple[int, int, float]] = []
+    for start, block in iter_cosine_blocks(as_matrix(vectors), block_size=block_size):
+        rows, cols = np.nonzero(block >= threshold)
+        rows = rows + start
+        upper = cols > rows
+        for i, j in zip(rows[upper].tolist(), cols[upper].tolist(), strict=True):
+            pairs.append((i, j, min(float(block[i - start, j]), 1.0)))
+    return pairs
+
+
+def mean_pairwise_cosine(vectors: Sequence[Sequence[float]] | np.ndarray) -> float:
+    """所有向量对余弦相似度的平均值，O(n·d).
+
+    单位向量之和的模方等于全部有序对相似度之和（含自身），据此扣除对角项。
+    """
+    unit = normalize_rows(as_matrix(vectors, dtype=np.float64))
+    count = unit.shape[0]
+    if count < 2:
+        return 0.0
+    total = unit.sum(axis=0)
+    self_similarity = float(np.einsum("ij,ij->", unit, unit))
+    pair_sum = (float(total @ total) - self_similarity) / 2
+    return pair_sum / (count * (count - 1) / 2)
+
+
+def top_k_indices(scores: np.ndarray, k: int | None) -> np.ndarray:
+    """分数最高的 k 个位置，按分数降序；k 为空时返回全部位置的排序."""
+    scores = np.asarray(scores)
+    if k is None or k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+# ==================== 聚类与降维 ====================
+
+
+def _nearest_centroids(
+    matrix: np.ndarray, centroids: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE
+) -> np.ndarray:
+    """每个向量最近的聚类中心（平方欧氏距离）."""
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(matrix.shape[0], dtype=np.int64)
+    for start in range(0, matrix.shape[0], block_size):
+        block = matrix[start : start + block_size]
+        # ||x||² 对同一行所有中心相同，不影响 argmin
+        distances = centroid_norms - 2 * (block @ centroids.T)
+        labels[start : start + block_size] = np.argmin(distances, axis=1)
+    return labels
+
+
+def _kmeans_plus_plus(
+    matrix: np.ndarray, n_clusters: int, rng: np.random.Generator
+) -> np.ndarray:
+    """K-means++ 初始化聚类中心."""
+    centroids = np.empty((n_clusters, matrix.shape[1]), dtype=matrix.dtype)
+    centroids[0] = matrix[rng.integers(matrix.shape[0])]
+    closest = np.sum((matrix - centroids[0]) ** 2, axis=1)
+    for index in range(1, n_clusters):
+        total = float(closest.sum())
+        if total <= 0:
+            # 剩余点与已有中心重合，随机补齐
+            centroids[index:] = matrix[rng.integers(matrix.shape[0], size=n_clusters - index)]
+            break
+        centroids[index] = matrix[rng.choice(matrix.shape[0], p=closest / total)]
+        closest = np.minimum(closest, np.sum((matrix - centroids[index]) ** 2, axis=1))
+    return centroids
+
+
+def minibatch_kmeans(
+    vectors: Sequence[Sequence[float]] | np.ndarray,
+    n_clusters: int,
+    batch_size: int = DEFAULT_BLOCK_SIZE,
+    max_iter: int = 100,
+    tol: float = 1e-4,
+    seed: int = 42,
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """Mini-batch K-means 聚类，返回 (标签, 聚类中心, 迭代次数).
+
+    数据量不超过 batch_size 时每轮使用全部数据，退化为标准 K-means；
+    否则每轮随机抽取一个批次，中心按各自累计样本数的学习率增量更新。
+    """
+    matrix = as_matrix(vectors)
+    if n_clusters <= 0 or matrix.shape[0] == 0:
+        raise ValueError("聚类数必须为正且向量集合不能为空")
+    n_clusters = min(n_clusters, matrix.shape[0])
+    rng = np.random.default_rng(seed)
+
+    centroids = _kmeans_plus_plus(matrix, n_clusters, rng)
+    counts = np.zeros(n_clusters, dtype=np.float64)
+    full_batch = matrix.shape[0] <= batch_size
+
+    iterations = 0
+    for _ in range(max_iter):
+        iterations += 1
+        if full_batch:
+            batch = matrix
+        else:
+            batch = matrix[rng.choice(matrix.shape[0], batch_size, replace=False)]
+        labels = _nearest_centroids(batch, centroids)
+        batch_counts = np.bincount(labels, minlength=n_clusters).astype(np.float64)
+
+        # 按标签排序后分段求和，得到每个中心本批次的样本和
+        assigned = batch_counts > 0
+        starts = np.concatenate(([0], np.cumsum(batch_counts[assigned])[:-1])).astype(np.int64)
+        batch_sums = np.zeros(centroids.shape, dtype=np.float64)
+        batch_sums[assigned] = np.add.reduceat(
+            batch[np.argsort(labels, kind="stable")].astype(np.float64), starts, axis=0
+        )
+
+        new_centroids = centroids.astype(np.float64)
+        if full_batch:
+            new_centroids[assigned] = batch_sums[assigned] / batch_counts[assigned, None]
+        else:
+            counts += batch_counts
+            new_centroids[assigned] += (
+                batch_sums[assigned] - batch_counts[assigned, None] * new_centroids[assigned]
+            ) / counts[assigned, None]
+
+        shift = float(np.max(np.sum((new_centroids - centroids) ** 2, axis=1)))
+        centroids = new_centroids.astype(matrix.dtype)
+        if shift <= tol:
+            break
+
+    return _nearest_centroids(matrix, centroids), centroids, iterations
+
+
+def randomized_pca(
+    vectors: Sequence[Sequence[float]] | np.ndarray,
+    n_components: int,
+    oversample: int = 10,
+    n_iter: int = 4,
+    seed: int = 42,
+) -> tuple[np.ndarray, np.ndarray]:
+    """随机化 SVD 的 PCA 降维，返回 (投影结果, 主成分).
+
+    目标维度加过采样接近原始规模时直接做精确的截断 SVD。
+    """
+    matrix = as_matrix(vectors)
+    centered = matrix - matrix.mean(axis=0)
+    n_samples, n_features = centered.shape
+    n_components = min(n_components, n_samples, n_features)
+    sketch_size = n_components + oversample
+
+    if sketch_size >= min(n_samples, n_features):
+        _, _, vt = np.linalg.svd(centered, full_matrices=False)
+    else:
+        rng = np.random.default_rng(seed)
+        sketch = centered @ rng.standard_normal((n_features, sketch_size)).astype(matrix.dtype)
+        basis, _ = np.linalg.qr(sketch)
+        # 幂迭代拉开奇异值差距，每步重新正交化保持数值稳定
+        for _ in range(n_iter):
+            basis, _ = np.linalg.qr(centered.T @ basis)
+            basis, _ = np.linalg.qr(centered @ basis)
+        _, _, vt = np.linalg.svd(basis.T @ centered, full_matrices=False)
+
+    components = vt[:n_components]
+    return centered @ components.T, components
+
+
+# ==================== 编辑距离 ====================
+
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+def levenshtein_distance(s1: str, s2: str, max_distance: int | None = None) -> int:
+    """计算编辑距离.
+
+    指定 max_distance 时只计算对角线附近宽度为 max_distance 的带状区域，
+    距离超过上限时返回 max_distance + 1。
+    """
+    if RAPIDFUZZ_AVAILABLE:
+        return int(_rapidfuzz_levenshtein.distance(s1, s2, score_cutoff=max_distance))
+
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    rows, cols = len(s1), len(s2)
+    limit = rows if max_distance is None else max_distance
+    cap = limit + 1
+    if rows - cols > limit:
+        return cap
+    if cols == 0:
+        return rows
+
+    a, b = _codepoints(s1), _codepoints(s2)
+    offsets = np.arange(cols + 1, dtype=np.int64)
+    previous = np.minimum(offsets, cap)
+    for i in range(1, rows + 1):
+        low, high = max(1, i - limit), min(cols, i + limit)
+        current = np.full(cols + 1, cap, dtype=np.int64)
+        current[0] = min(i, cap)
+        if low <= high:
+            # 替换与删除只依赖上一行；插入 current[j] = min(.., current[j-1] + 1)
+            # 等价于 current[j] - j 的前缀最小值
+            candidates = np.minimum(
+                previous[low : high + 1] + 1,
+                previous[low - 1 : high] + (b[low - 1 : high] != a[i - 1]),
+            )
+            shifted = np.concatenate(
+                ([current[low - 1] - (low - 1)], candidates - offsets[low : high + 1])
+            )
+            current[low : high + 1] = np.minimum(
+                np.minimum.accumulate(shifted)[1:] + offsets[low : high + 1], cap
+            )
+        if current[low - 1 : high + 1].min() >= cap:
+            return cap
+        previous = current
+    return int(previous[cols])
+
+
+def levenshtein_similarity(s1: str, s2: str) -> float:
+    """1 - 编辑距离 / 较长文本长度，两段都为空时为1."""
+    max_len = max(len(s1), len(s2))
+    if max_len == 0:
+        return 1.0
+    return 1 - levenshtein_distance(s1, s2) / max_len
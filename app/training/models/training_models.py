@@ -1,5 +1,6 @@
 """训练系统相关的SQLAlchemy模型定义."""
 
+import random
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
@@ -10,9 +11,11 @@
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -164,6 +167,15 @@ class Question(BaseModel):
     """题目模型 - 支持多种题型."""
 
     __tablename__ = "questions"
+    __table_args__ = (
+        # 库存抽题：按库存桶定位后沿抽样键顺序读取
+        Index(
+            "idx_questions_stock_sampling",
+            "stock_key",
+            "sampling_key",
+            postgresql_where=text("is_active"),
+        ),
+    )
 
     # 题目信息
     question_type: Mapped[QuestionType] = mapped_column(
@@ -274,6 +286,47 @@ class Question(BaseModel):
         nullable=False,
         comment="正确率",
     )
+    correct_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="答对次数",
+    )
+    score_sum: Mapped[float] = mapped_column(
+        Float,
+        default=0.0,
+        nullable=False,
+        comment="得分总和",
+    )
+    score_sq_sum: Mapped[float] = mapped_column(
+        Float,
+        default=0.0,
+        nullable=False,
+        comment="得分平方和",
+    )
+    difficulty_index: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+        comment="难度指数（平均得分率）",
+    )
+    discrimination_index: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+        comment="区分度指数（高分组与低分组正确率之差）",
+    )
+
+    # 题库库存
+    stock_key: Mapped[str | None] = mapped_column(
+        String(200),
+        nullable=True,
+        comment="库存桶（训练类型:难度:题型:知识点）",
+    )
+    sampling_key: Mapped[float] = mapped_column(
+        Float,
+        default=random.random,
+        nullable=False,
+        comment="随机抽样键",
+    )
 
     def __repr__(self) -> str:
         """题目模型字符串表示."""
@@ -284,6 +337,10 @@ class TrainingRecord(BaseModel):
     """训练记录模型 - 详细记录每次答题."""
 
     __tablename__ = "training_records"
+    __table_args__ = (
+        # 抽题时排除学生做过的题
+        Index("idx_training_records_student_question", "student_id", "question_id"),
+    )
 
     # 外键
     session_id: Mapped[int] = mapped_column(
@@ -4,6 +4,7 @@
 from datetime import datetime, timedelta
 from typing import Any
 
+import numpy as np
 from sqlalchemy import Float, and_, desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -20,6 +21,7 @@
     DifficultyAdjustment,
     LearningRecommendation,
 )
+from app.training.utils.record_frame import LearningRecordFrame
 
 
 class AdaptiveLearningService:
@@ -114,6 +116,45 @@ async def update_adaptive_config(
             },
         )
 
+    async def suggest_difficulty_adjustment(
+        self, frame: LearningRecordFrame, training_type: TrainingType
+    ) -> DifficultyAdjustment | None:
+        """基于已加载的答题记录给出难度调整建议（与 update_adaptive_config 规则一致）."""
+        recent = frame.latest(10)
+        if not len(recent) or recent.difficulty[-1] < DifficultyLevel.BEGINNER.value:
+            return None
+
+        current_accuracy = recent.accuracy()
+        average_time = float(recent.time_spent.mean())
+        current_level = DifficultyLevel(int(recent.difficulty[-1]))
+        suggested_level = await self._suggest_difficulty_level(
+            current_level, current_accuracy, average_time, training_type
+        )
+
+        time_span_hours = (
+            float((recent.created_at[-1] - recent.created_at[0]) / np.timedelta64(1, "h"))
+            if len(recent) > 1
+            else 24
+        )
+        stability = 1.0 - float(recent.is_correct.max() != recent.is_correct.min())
+
+        return DifficultyAdjustment(
+            current_level=current_level.value,
+            suggested_level=suggested_level.value,
+            adjustment_reason=self._get_adjustment_reason(
+                current_level, suggested_level, current_accuracy
+            ),
+            confidence_score=self._adjustment_confidence(
+                len(recent), time_span_hours, stability
+            ),
+            supporting_data={
+                "accuracy": current_accuracy,
+                "average_time": average_time,
+                "sample_size": len(recent),
+                "trend": "improving" if current_accuracy > 0.8 else "declining",
+            },
+        )
+
     # ==================== 难度调整算法 ====================
 
     async def _calculate_difficulty_adjustment(
@@ -591,6 +632,16 @@ async def _calculate_adjustment_confidence(
             else 24
         )
 
+        # 准确率稳定性
+        accuracies = [1.0 if r.is_correct else 0.0 for r in records]
+        stability = 1.0 - (max(accuracies) - min(accuracies)) if accuracies else 0.5
+
+        return self._adjustment_confidence(sample_size, time_span_hours, stability)
+
+    def _adjustment_confidence(
+        self, sample_size: int, time_span_hours: float, stability: float
+    ) -> float:
+        """由样本量、时间跨度和准确率稳定性计算调整置信度."""
         # 样本量权重
         sample_weight = min(sample_size / 15, 1.0)
 
@@ -599,10 +650,6 @@ async def _calculate_adjustment_confidence(
         time_weight = 1.0 - abs(time_span_hours - optimal_span) / optimal_span
         time_weight = max(0.3, min(1.0, time_weight))
 
-        # 准确率稳定性
-        accuracies = [1.0 if r.is_correct else 0.0 for r in records]
-        stability = 1.0 - (max(accuracies) - min(accuracies)) if accuracies else 0.5
-
         confidence = sample_weight * 0.4 + time_weight * 0.3 + stability * 0.3
 
         return float(round(max(0.2, min(0.9, confidence)), 2))
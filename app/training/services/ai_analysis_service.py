@@ -14,12 +14,24 @@
 from typing import Any, TypedDict
 
 import httpx
-from sqlalchemy import and_, desc, select
+import numpy as np
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.ai.services.token_metering_service import (
+    BudgetExceededError,
+    UsageScope,
+    get_token_metering_service,
+)
 from app.core.config import settings
 from app.shared.models.enums import TrainingType
-from app.training.models.training_models import TrainingRecord, TrainingSession
+from app.shared.utils.priority_scheduler import (
+    AdmissionRejectedError,
+    TaskCategory,
+    get_admission_controller,
+)
+from app.training.models.training_models import TrainingSession
+from app.training.utils.record_frame import LearningRecordFrame, load_learning_record_frame
 
 logger = logging.getLogger(__name__)
 
@@ -215,37 +227,24 @@ async def _collect_learning_data(
                 days=self.analysis_config["analysis_window_days"]
             )
 
-            # 构建查询
-            stmt = (
-                select(TrainingRecord, TrainingSession)
-                .join(TrainingSession, TrainingRecord.session_id == TrainingSession.id)
-                .where(
-                    and_(
-                        TrainingSession.student_id == student_id,
-                        TrainingRecord.created_at >= cutoff_date,
-                    )
-                )
-            )
-
-            if training_type:
-                stmt = stmt.where(TrainingSession.session_type == training_type)
-
-            stmt = stmt.order_by(desc(TrainingRecord.created_at)).limit(
-                self.analysis_config["max_data_points"]
+            # 答题记录一次性加载为列式数据帧，供各分析器共享
+            frame = await load_learning_record_frame(
+                self.db,
+                student_id,
+                training_type=training_type,
+                since=cutoff_date,
+                limit=self.analysis_config["max_data_points"],
             )
 
-            result = await self.db.execute(stmt)
-            data = result.all()
-
-            if not data:
+            if not len(frame):
                 return {"has_sufficient_data": False, "reason": "无学习记录"}
 
-            # 分离记录和会话
-            records = [item[0] for item in data]
-            sessions = [item[1] for item in data]
-            unique_sessions = list(
-                {session.id: session for session in sessions}.values()
+            # 加载记录涉及的会话
+            session_ids = np.unique(frame.session_id).tolist()
+            result = await self.db.execute(
+                select(TrainingSession).where(TrainingSession.id.in_(session_ids))
             )
+            unique_sessions = list(result.scalars().all())
 
             # 检查数据充分性
             has_sufficient_data = (
@@ -253,20 +252,20 @@ async def _collect_learning_data(
                 >= self.analysis_config["pattern_recognition"][
                     "min_sessions_for_pattern"
                 ]
-                and len(records) >= 20
+                and len(frame) >= 20
             )
 
             # 计算数据质量分数
             data_quality_score = self._calculate_data_quality_score(
-                records, unique_sessions
+                frame, unique_sessions
             )
 
             return {
                 "has_sufficient_data": has_sufficient_data,
-                "records": records,
+                "frame": frame,
                 "sessions": unique_sessions,
                 "session_count": len(unique_sessions),
-                "record_count": len(records),
+                "record_count": len(frame),
                 "data_quality_score": data_quality_score,
                 "analysis_period": {
                     "start_date": cutoff_date,
@@ -284,22 +283,22 @@ async def _analyze_learning_patterns(
     ) -> dict[str, Any]:
         """分析学习模式."""
         try:
-            records = learning_data["records"]
+            frame = learning_data["frame"]
             sessions = learning_data["sessions"]
 
             # 1. 学习时间模式分析
-            time_patterns = self._analyze_time_patterns(records, sessions)
+            time_patterns = self._analyze_time_patterns(frame, sessions)
 
             # 2. 答题行为模式分析
-            behavior_patterns = self._analyze_behavior_patterns(records)
+            behavior_patterns = self._analyze_behavior_patterns(frame)
 
             # 3. 难度适应模式分析
             difficulty_patterns = self._analyze_difficulty_adaptation_patterns(
-                sessions, records
+                sessions, frame
             )
 
             # 4. 学习风格识别
-            learning_style = self._identify_learning_style(records, sessions)
+            learning_style = self._identify_learning_style(frame, sessions)
 
             # 5. 计算模式识别置信度
             pattern_confidence = self._calculate_pattern_confidence(
@@ -329,19 +328,19 @@ async def _analyze_knowledge_mastery(
     ) -> dict[str, Any]:
         """分析知识掌握度."""
         try:
-            records = learning_data["records"]
+            frame = learning_data["frame"]
 
             # 1. 按知识点分组分析
-            knowledge_point_analysis = self._analyze_by_knowledge_points(records)
+            knowledge_point_analysis = self._analyze_by_knowledge_points(frame)
 
             # 2. 掌握度等级分类
             mastery_levels = self._classify_mastery_levels(knowledge_point_analysis)
 
             # 3. 知识遗忘分析
-            retention_analysis = self._analyze_knowledge_retention(records)
+            retention_analysis = self._analyze_knowledge_retention(frame)
 
             # 4. 学习进度评估
-            progress_assessment = self._assess_learning_progress(records)
+            progress_assessment = self._assess_learning_progress(frame)
 
             # 5. 薄弱环节识别
             weak_areas = self._identify_weak_areas(knowledge_point_analysis)
@@ -372,20 +371,20 @@ async def _assess_learning_efficiency(
     ) -> dict[str, Any]:
         """评估学习效率."""
         try:
-            records = learning_data["records"]
+            frame = learning_data["frame"]
             sessions = learning_data["sessions"]
 
             # 1. 准确率效率分析
-            accuracy_efficiency = self._analyze_accuracy_efficiency(records)
+            accuracy_efficiency = self._analyze_accuracy_efficiency(frame)
 
             # 2. 速度效率分析
-            speed_efficiency = self._analyze_speed_efficiency(records)
+            speed_efficiency = self._analyze_speed_efficiency(frame)
 
             # 3. 一致性分析
-            consistency_analysis = self._analyze_learning_consistency(records)
+            consistency_analysis = self._analyze_learning_consistency(frame)
 
             # 4. 进步速度分析
-            progress_rate = self._analyze_progress_rate(records, sessions)
+            progress_rate = self._analyze_progress_rate(frame, sessions)
 
             # 5. 综合效率评分
             efficiency_factors = self.analysis_config["efficiency_assessment"][
@@ -488,29 +487,47 @@ async def _call_deepseek_analysis_api(
             # 构建AI分析提示
             analysis_prompt = self._build_analysis_prompt(data_summary)
 
-            # 调用DeepSeek API
-            async with httpx.AsyncClient(
-                timeout=self.analysis_config["analysis_timeout"]
-            ) as client:
-                response = await client.post(
-                    "https://api.deepseek.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {settings.DEEPSEEK_API_KEY}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": self.analysis_config["ai_model"],
-                        "messages": [
-                            {
-                                "role": "system",
-                                "content": "你是一个专业的学习分析专家，擅长分析学生的学习数据并提供个性化建议。",
+            system_prompt = "你是一个专业的学习分析专家，擅长分析学生的学习数据并提供个性化建议。"
+
+            # 调用前预占预算
+            meter = get_token_metering_service()
+            reservation = await meter.reserve(
+                UsageScope(feature="learning_analysis"),
+                system_prompt + analysis_prompt,
+                1000,
+                self.analysis_config["ai_model"],
+            )
+
+            # 调用DeepSeek API（后台分析类别，经过准入控制）
+            response: httpx.Response | None = None
+            try:
+                async with get_admission_controller().admit(TaskCategory.BACKGROUND):
+                    async with httpx.AsyncClient(
+                        timeout=self.analysis_config["analysis_timeout"]
+                    ) as client:
+                        response = await client.post(
+                            "https://api.deepseek.com/v1/chat/completions",
+                            headers={
+                                "Authorization": f"Bearer {settings.DEEPSEEK_API_KEY}",
+                                "Content-Type": "application/json",
                             },
-                            {"role": "user", "content": analysis_prompt},
-                        ],
-                        "temperature": 0.7,
-                        "max_tokens": 1000,
-                    },
-                )
+                            json={
+                                "model": self.analysis_config["ai_model"],
+                                "messages": [
+                                    {"role": "system", "content": system_prompt},
+                                    {"role": "user", "content": analysis_prompt},
+                                ],
+                                "temperature": 0.7,
+                                "max_tokens": 1000,
+                            },
+                        )
+            finally:
+                # 成功时按真实用量结算，其余情况归还预占
+                if response is not None and response.status_code == 200:
+                    await meter.settle(
+                        reservation, response.json().get("usage"), settings.DEEPSEEK_API_KEY
+                    )
+                await meter.release(reservation)
 
             response_time = (datetime.now() - start_time).total_seconds()
 
@@ -527,6 +544,12 @@ async def _call_deepseek_analysis_api(
                 logger.error(f"DeepSeek API调用失败: {response.status_code}")
                 return {"error": "API调用失败", "response_time": response_time}
 
+        except AdmissionRejectedError as e:
+            logger.warning(f"AI分析请求被准入控制拒绝: {e}")
+            return {"error": "AI服务繁忙", "response_time": 0}
+        except BudgetExceededError as e:
+            logger.warning(f"AI分析请求超出预算: {e}")
+            return {"error": "AI调用额度已用完", "response_time": 0}
         except Exception as e:
             logger.error(f"DeepSeek API调用异常: {str(e)}")
             return {"error": str(e), "response_time": 0}
@@ -660,17 +683,14 @@ async def _generate_fallback_insights(
         }
 
     def _calculate_data_quality_score(
-        self, records: list[Any], sessions: list[Any]
+        self, frame: LearningRecordFrame, sessions: list[Any]
     ) -> float:
         """计算数据质量分数."""
         try:
             quality_factors = []
 
             # 数据完整性
-            complete_records = sum(
-                1 for r in records if r.time_spent and r.time_spent > 0
-            )
-            completeness = complete_records / len(records) if records else 0
+            completeness = float(frame.valid_time_mask.mean()) if len(frame) else 0
             quality_factors.append(completeness)
 
             # 数据时间分布
@@ -681,7 +701,7 @@ def _calculate_data_quality_score(
                 quality_factors.append(time_distribution)
 
             # 数据量充分性
-            volume_score = min(1.0, len(records) / 50)  # 50个记录为满分
+            volume_score = min(1.0, len(frame) / 50)  # 50个记录为满分
             quality_factors.append(volume_score)
 
             return sum(quality_factors) / len(quality_factors) if quality_factors else 0
@@ -706,7 +726,7 @@ def _calculate_overall_confidence(
         return sum(confidences) / len(confidences) if confidences else 0
 
     def _analyze_time_patterns(
-        self, records: list[Any], sessions: list[Any]
+        self, frame: LearningRecordFrame, sessions: list[Any]
     ) -> dict[str, Any]:
         """分析学习时间模式."""
         try:
@@ -772,21 +792,19 @@ def _analyze_time_patterns(
                 "session_duration_pattern": "unknown",
             }
 
-    def _analyze_behavior_patterns(self, records: list[Any]) -> dict[str, Any]:
+    def _analyze_behavior_patterns(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """分析答题行为模式."""
         try:
-            if not records:
+            if not len(frame):
                 return {
                     "answer_speed_pattern": "unknown",
                     "accuracy_pattern": "unknown",
                 }
 
             # 分析答题速度模式
-            answer_times: list[float] = [
-                r.time_spent for r in records if r.time_spent and r.time_spent > 0
-            ]
-            if answer_times:
-                avg_time = sum(answer_times) / len(answer_times)
+            answer_times = frame.valid_times
+            avg_time = float(answer_times.mean()) if len(answer_times) else 0.0
+            if len(answer_times):
                 if avg_time < 30:
                     speed_pattern = "fast_answerer"
                 elif avg_time < 90:
@@ -797,8 +815,7 @@ def _analyze_behavior_patterns(self, records: list[Any]) -> dict[str, Any]:
                 speed_pattern = "unknown"
 
             # 分析正确率模式
-            correct_count = sum(1 for r in records if r.is_correct)
-            accuracy = correct_count / len(records) if records else 0
+            accuracy = frame.accuracy()
 
             if accuracy > 0.85:
                 accuracy_pattern = "high_achiever"
@@ -811,9 +828,7 @@ def _analyze_behavior_patterns(self, records: list[Any]) -> dict[str, Any]:
 
             # 分析答题一致性
             if len(answer_times) > 1:
-                import statistics
-
-                time_std = statistics.stdev(answer_times)
+                time_std = float(answer_times.std(ddof=1))
                 consistency = 1 - min(1.0, time_std / avg_time) if avg_time > 0 else 0
             else:
                 consistency = 0
@@ -822,9 +837,7 @@ def _analyze_behavior_patterns(self, records: list[Any]) -> dict[str, Any]:
                 "answer_speed_pattern": speed_pattern,
                 "accuracy_pattern": accuracy_pattern,
                 "consistency_score": consistency,
-                "average_answer_time": (
-                    sum(answer_times) / len(answer_times) if answer_times else 0
-                ),
+                "average_answer_time": avg_time,
                 "accuracy_rate": accuracy,
             }
 
@@ -833,7 +846,7 @@ def _analyze_behavior_patterns(self, records: list[Any]) -> dict[str, Any]:
             return {"answer_speed_pattern": "unknown", "accuracy_pattern": "unknown"}
 
     def _analyze_difficulty_adaptation_patterns(
-        self, sessions: list[Any], records: list[Any]
+        self, sessions: list[Any], frame: LearningRecordFrame
     ) -> dict[str, Any]:
         """分析难度适应模式."""
         try:
@@ -843,6 +856,18 @@ def _analyze_difficulty_adaptation_patterns(
                     "preferred_difficulty": "unknown",
                 }
 
+            # 各会话的答题情况一次分组得到
+            session_groups = frame.group_by_session()
+            session_totals = {
+                int(session_id): (int(attempts), int(correct))
+                for session_id, attempts, correct in zip(
+                    session_groups["session_id"],
+                    session_groups["attempts"],
+                    session_groups["correct"],
+                    strict=True,
+                )
+            }
+
             # 按难度分组统计
             difficulty_stats = {}
             for session in sessions:
@@ -857,11 +882,9 @@ def _analyze_difficulty_adaptation_patterns(
                 difficulty_stats[difficulty]["sessions"] += 1
 
                 # 统计该会话的答题情况
-                session_records = [r for r in records if r.session_id == session.id]
-                difficulty_stats[difficulty]["total_questions"] += len(session_records)
-                difficulty_stats[difficulty]["total_correct"] += sum(
-                    1 for r in session_records if r.is_correct
-                )
+                attempts, correct = session_totals.get(session.id, (0, 0))
+                difficulty_stats[difficulty]["total_questions"] += attempts
+                difficulty_stats[difficulty]["total_correct"] += correct
 
             # 计算各难度的正确率
             difficulty_accuracies = {}
@@ -902,18 +925,15 @@ def _analyze_difficulty_adaptation_patterns(
             return {"adaptation_ability": "unknown", "preferred_difficulty": "unknown"}
 
     def _identify_learning_style(
-        self, records: list[Any], sessions: list[Any]
+        self, frame: LearningRecordFrame, sessions: list[Any]
     ) -> dict[str, Any]:
         """识别学习风格."""
         try:
-            if not records or not sessions:
+            if not len(frame) or not sessions:
                 return {"primary_style": "unknown", "confidence": 0}
 
             # 分析答题速度特征
-            answer_times = [
-                r.time_spent for r in records if r.time_spent and r.time_spent > 0
-            ]
-            avg_time = sum(answer_times) / len(answer_times) if answer_times else 60
+            avg_time = frame.average_time() or 60
 
             # 分析会话时长特征
             session_durations: list[float] = []
@@ -931,8 +951,7 @@ def _identify_learning_style(
             )
 
             # 分析正确率变化特征
-            correct_count = sum(1 for r in records if r.is_correct)
-            accuracy = correct_count / len(records) if records else 0
+            accuracy = frame.accuracy()
 
             # 基于特征判断学习风格
             style_scores = {
@@ -1095,56 +1114,17 @@ def _generate_pattern_summary(
             logger.error(f"生成模式总结失败: {str(e)}")
             return "模式分析异常"
 
-    def _analyze_by_knowledge_points(self, records: list[Any]) -> dict[str, Any]:
+    def _analyze_by_knowledge_points(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """按知识点分组分析."""
         try:
-            if not records:
+            if not len(frame):
                 return {}
 
-            # 按知识点分组（这里假设有knowledge_point字段，实际可能需要根据题目类型推断）
-            knowledge_points: dict[str, dict[str, Any]] = {}
-
-            for record in records:
-                # 这里简化处理，实际应该根据题目内容或标签确定知识点
-                point = getattr(record, "knowledge_point", "general")
-                if point not in knowledge_points:
-                    knowledge_points[point] = {
-                        "total_attempts": 0,
-                        "correct_attempts": 0,
-                        "total_time": 0,
-                        "attempts": [],
-                    }
-
-                point_data = knowledge_points[point]
-                point_data["total_attempts"] += 1
-                if record.is_correct:
-                    point_data["correct_attempts"] += 1
-
-                if record.time_spent:
-                    point_data["total_time"] += record.time_spent
-
-                point_data["attempts"].append(
-                    {
-                        "is_correct": record.is_correct,
-                        "time_spent": record.time_spent,
-                        "created_at": record.created_at,
-                    }
-                )
-
-            # 计算每个知识点的统计信息
-            for _point, data in knowledge_points.items():
-                data["accuracy"] = (
-                    data["correct_attempts"] / data["total_attempts"]
-                    if data["total_attempts"] > 0
-                    else 0
-                )
-                data["average_time"] = (
-                    data["total_time"] / data["total_attempts"]
-                    if data["total_attempts"] > 0
-                    else 0
-                )
+            # 一条记录计入其全部知识点，无标签的记录归入general
+            knowledge_points = frame.group_by_knowledge_point()
 
-                # 计算掌握度
+            # 计算掌握度
+            for data in knowledge_points.values():
                 if data["accuracy"] >= 0.85:
                     data["mastery_level"] = "mastered"
                 elif data["accuracy"] >= 0.7:
@@ -1205,68 +1185,36 @@ def _classify_mastery_levels(
             logger.error(f"分类掌握度等级失败: {str(e)}")
             return {}
 
-    def _analyze_knowledge_retention(self, records: list[Any]) -> dict[str, Any]:
+    def _analyze_knowledge_retention(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """分析知识保持情况."""
         try:
-            if not records:
+            if not len(frame):
                 return {"retention_score": 0, "decay_analysis": {}}
 
-            # 按时间排序
-            sorted_records = sorted(records, key=lambda x: x.created_at)
-
-            # 分析知识遗忘曲线
-            retention_data: dict[str, list[dict[str, Any]]] = {}
             decay_days = self.analysis_config["knowledge_mastery"][
                 "knowledge_decay_days"
             ]
 
-            # 按知识点分析保持情况
-            for record in sorted_records:
-                point = getattr(record, "knowledge_point", "general")
-                if point not in retention_data:
-                    retention_data[point] = []
+            # 遗忘周期内的记录为近期表现，其余为早期表现
+            today = np.datetime64(datetime.now().date(), "D")
+            age_days = (today - frame.created_at.astype("datetime64[D]")).astype(int)
+            recent_mask = age_days <= decay_days
 
-                retention_data[point].append(
-                    {
-                        "date": record.created_at.date(),
-                        "is_correct": record.is_correct,
-                        "time_spent": record.time_spent,
-                    }
-                )
+            overall = frame.group_by_knowledge_point()
+            recent = frame.group_by_knowledge_point(recent_mask)
+            early = frame.group_by_knowledge_point(~recent_mask)
 
             # 计算保持分数
             retention_scores = {}
-            for point, data in retention_data.items():
-                if len(data) < 2:
+            for point, stats in overall.items():
+                if stats["total_attempts"] < 2 or point not in recent or point not in early:
                     retention_scores[point] = 0.5  # 数据不足
                     continue
 
-                # 计算最近表现与早期表现的对比
-                recent_data = [
-                    d
-                    for d in data
-                    if (datetime.now().date() - d["date"]).days <= decay_days
-                ]
-                early_data = [
-                    d
-                    for d in data
-                    if (datetime.now().date() - d["date"]).days > decay_days
-                ]
-
-                if not recent_data or not early_data:
-                    retention_scores[point] = 0.5
-                    continue
-
-                recent_accuracy = sum(1 for d in recent_data if d["is_correct"]) / len(
-                    recent_data
-                )
-                early_accuracy = sum(1 for d in early_data if d["is_correct"]) / len(
-                    early_data
-                )
-
                 # 保持分数 = 最近正确率 / 早期正确率
+                early_accuracy = early[point]["accuracy"]
                 retention_scores[point] = (
-                    recent_accuracy / early_accuracy if early_accuracy > 0 else 0.5
+                    recent[point]["accuracy"] / early_accuracy if early_accuracy > 0 else 0.5
                 )
 
             # 计算整体保持分数
@@ -1294,51 +1242,29 @@ def _analyze_knowledge_retention(self, records: list[Any]) -> dict[str, Any]:
             logger.error(f"分析知识保持失败: {str(e)}")
             return {"retention_score": 0, "decay_analysis": {}}
 
-    def _assess_learning_progress(self, records: list[Any]) -> dict[str, Any]:
+    def _assess_learning_progress(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """评估学习进度."""
         try:
-            if not records:
+            if not len(frame):
                 return {"progress_rate": 0, "trend": "unknown"}
 
-            # 按时间排序
-            sorted_records = sorted(records, key=lambda x: x.created_at)
-
             # 分时间段分析进步情况
-            total_days = (
-                sorted_records[-1].created_at - sorted_records[0].created_at
-            ).days
+            total_days = int(
+                (frame.created_at[-1] - frame.created_at[0]) // np.timedelta64(1, "D")
+            )
             if total_days < 1:
                 return {"progress_rate": 0, "trend": "insufficient_data"}
 
             # 将记录分为前半段和后半段
-            mid_point = len(sorted_records) // 2
-            early_records: list[Any] = sorted_records[:mid_point]
-            recent_records: list[Any] = sorted_records[mid_point:]
+            mid_point = len(frame) // 2
+            early_records = frame.slice_rows(stop=mid_point)
+            recent_records = frame.slice_rows(start=mid_point)
 
             # 计算各阶段的表现
-            early_accuracy = (
-                sum(1 for r in early_records if r.is_correct) / len(early_records)
-                if early_records
-                else 0
-            )
-            recent_accuracy = (
-                sum(1 for r in recent_records if r.is_correct) / len(recent_records)
-                if recent_records
-                else 0
-            )
-
-            early_avg_time = (
-                sum(r.time_spent for r in early_records if r.time_spent)
-                / len([r for r in early_records if r.time_spent])
-                if any(r.time_spent for r in early_records)
-                else 0
-            )
-            recent_avg_time = (
-                sum(r.time_spent for r in recent_records if r.time_spent)
-                / len([r for r in recent_records if r.time_spent])
-                if any(r.time_spent for r in recent_records)
-                else 0
-            )
+            early_accuracy = early_records.accuracy()
+            recent_accuracy = recent_records.accuracy()
+            early_avg_time = early_records.average_time()
+            recent_avg_time = recent_records.average_time()
 
             # 计算进步率
             accuracy_improvement = recent_accuracy - early_accuracy
@@ -1479,29 +1405,21 @@ def _calculate_overall_mastery_score(self, mastery_levels: dict[str, Any]) -> fl
             logger.error(f"计算整体掌握度分数失败: {str(e)}")
             return 0
 
-    def _analyze_accuracy_efficiency(self, records: list[Any]) -> dict[str, Any]:
+    def _analyze_accuracy_efficiency(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """分析准确率效率."""
         try:
-            if not records:
+            if not len(frame):
                 return {"efficiency_score": 0, "accuracy_trend": "unknown"}
 
             # 计算整体准确率
-            correct_count = sum(1 for r in records if r.is_correct)
-            total_count = len(records)
-            overall_accuracy = correct_count / total_count if total_count > 0 else 0
+            overall_accuracy = frame.accuracy()
+            recent_accuracy = frame.latest(10).accuracy()
 
-            # 分析准确率趋势
-            if len(records) >= 10:
-                recent_10 = records[:10]
-                earlier_10 = records[10:20] if len(records) >= 20 else records[10:]
-
-                recent_accuracy = sum(1 for r in recent_10 if r.is_correct) / len(
-                    recent_10
-                )
+            # 分析准确率趋势（最近10题对比此前10题）
+            if len(frame) >= 10:
+                earlier_10 = frame.slice_rows(max(0, len(frame) - 20), len(frame) - 10)
                 earlier_accuracy = (
-                    sum(1 for r in earlier_10 if r.is_correct) / len(earlier_10)
-                    if earlier_10
-                    else recent_accuracy
+                    earlier_10.accuracy() if len(earlier_10) else recent_accuracy
                 )
 
                 if recent_accuracy > earlier_accuracy + 0.1:
@@ -1514,14 +1432,10 @@ def _analyze_accuracy_efficiency(self, records: list[Any]) -> dict[str, Any]:
                 trend = "insufficient_data"
 
             # 计算效率分数 (准确率 * 一致性因子)
-            accuracy_variance = 0
-            if len(records) >= 5:
+            accuracy_variance = 0.0
+            if len(frame) >= 5:
                 # 计算最近5次的准确率方差
-                recent_results = [1 if r.is_correct else 0 for r in records[:5]]
-                mean_recent = sum(recent_results) / len(recent_results)
-                accuracy_variance = sum(
-                    (x - mean_recent) ** 2 for x in recent_results
-                ) / len(recent_results)
+                accuracy_variance = float(frame.latest(5).is_correct.var())
 
             consistency_factor = max(0.5, 1 - accuracy_variance)
             efficiency_score = overall_accuracy * consistency_factor
@@ -1531,46 +1445,34 @@ def _analyze_accuracy_efficiency(self, records: list[Any]) -> dict[str, Any]:
                 "overall_accuracy": overall_accuracy,
                 "accuracy_trend": trend,
                 "consistency_factor": consistency_factor,
-                "recent_accuracy": (
-                    sum(1 for r in records[:10] if r.is_correct) / min(10, len(records))
-                    if records
-                    else 0
-                ),
-                "confidence": min(1.0, len(records) / 20),
+                "recent_accuracy": recent_accuracy,
+                "confidence": min(1.0, len(frame) / 20),
             }
 
         except Exception as e:
             logger.error(f"分析准确率效率失败: {str(e)}")
             return {"efficiency_score": 0, "accuracy_trend": "unknown"}
 
-    def _analyze_speed_efficiency(self, records: list[Any]) -> dict[str, Any]:
+    def _analyze_speed_efficiency(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """分析速度效率."""
         try:
-            if not records:
+            if not len(frame):
                 return {"efficiency_score": 0, "speed_trend": "unknown"}
 
-            # 获取有效的答题时间
-            valid_times = [
-                r.time_spent for r in records if r.time_spent and r.time_spent > 0
-            ]
-            if not valid_times:
+            # 获取有效的答题时间（按时间升序）
+            valid_times = frame.valid_times
+            if not len(valid_times):
                 return {"efficiency_score": 0, "speed_trend": "unknown"}
 
             # 计算平均答题时间
-            avg_time = sum(valid_times) / len(valid_times)
+            avg_time = float(valid_times.mean())
 
-            # 分析速度趋势
+            # 分析速度趋势（最近10次对比此前10次）
             if len(valid_times) >= 10:
-                recent_times = valid_times[:10]
-                earlier_times = (
-                    valid_times[10:20] if len(valid_times) >= 20 else valid_times[10:]
-                )
-
-                recent_avg = sum(recent_times) / len(recent_times)
+                recent_avg = float(valid_times[-10:].mean())
+                earlier_times = valid_times[-20:-10]
                 earlier_avg = (
-                    sum(earlier_times) / len(earlier_times)
-                    if earlier_times
-                    else recent_avg
+                    float(earlier_times.mean()) if len(earlier_times) else recent_avg
                 )
 
                 if recent_avg < earlier_avg * 0.9:
@@ -1593,11 +1495,9 @@ def _analyze_speed_efficiency(self, records: list[Any]) -> dict[str, Any]:
                 # 太慢效率低
                 speed_efficiency = max(0.3, ideal_time_range[1] / avg_time)
 
-            # 考虑一致性
+            # 考虑一致性（最近5次）
             if len(valid_times) >= 5:
-                import statistics
-
-                time_std = statistics.stdev(valid_times[:5])
+                time_std = float(valid_times[-5:].std(ddof=1))
                 consistency_factor = max(0.5, 1 - min(1.0, time_std / avg_time))
             else:
                 consistency_factor = 0.8
@@ -1617,50 +1517,35 @@ def _analyze_speed_efficiency(self, records: list[Any]) -> dict[str, Any]:
             logger.error(f"分析速度效率失败: {str(e)}")
             return {"efficiency_score": 0, "speed_trend": "unknown"}
 
-    def _analyze_learning_consistency(self, records: list[Any]) -> dict[str, Any]:
+    def _analyze_learning_consistency(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """分析学习一致性."""
         try:
-            if not records:
+            if not len(frame):
                 return {"consistency_score": 0, "pattern": "unknown"}
 
             # 分析答题时间一致性
-            valid_times = [
-                r.time_spent for r in records if r.time_spent and r.time_spent > 0
-            ]
-            time_consistency = 0
+            valid_times = frame.valid_times
+            time_consistency = 0.0
             if len(valid_times) >= 3:
-                import statistics
-
-                avg_time = sum(valid_times) / len(valid_times)
-                time_std = statistics.stdev(valid_times)
+                avg_time = float(valid_times.mean())
+                time_std = float(valid_times.std(ddof=1))
                 time_consistency = (
                     max(0, 1 - min(1.0, time_std / avg_time)) if avg_time > 0 else 0
                 )
 
-            # 分析正确率一致性
-            accuracy_consistency = 0
-            if len(records) >= 10:
-                # 将记录分为5个区间，计算每个区间的正确率
-                chunk_size = len(records) // 5
-                chunk_accuracies = []
-                for i in range(5):
-                    start_idx = i * chunk_size
-                    end_idx = start_idx + chunk_size if i < 4 else len(records)
-                    chunk = records[start_idx:end_idx]
-                    chunk_accuracy = (
-                        sum(1 for r in chunk if r.is_correct) / len(chunk)
-                        if chunk
-                        else 0
-                    )
-                    chunk_accuracies.append(chunk_accuracy)
-
-                if chunk_accuracies:
-                    import statistics
-
-                    accuracy_std = statistics.stdev(chunk_accuracies)
-                    accuracy_consistency = max(
-                        0, 1 - min(1.0, accuracy_std / 0.5)
-                    )  # 标准化到0.5
+            # 分析正确率一致性：将记录分为5个区间，最后一个区间包含余数
+            accuracy_consistency = 0.0
+            if len(frame) >= 10:
+                chunk_size = len(frame) // 5
+                starts = np.arange(5) * chunk_size
+                counts = np.diff(np.append(starts, len(frame)))
+                chunk_accuracies = (
+                    np.add.reduceat(frame.is_correct.astype(np.float64), starts) / counts
+                )
+                accuracy_std = float(chunk_accuracies.std(ddof=1))
+                accuracy_consistency = max(
+                    0, 1 - min(1.0, accuracy_std / 0.5)
+                )  # 标准化到0.5
 
             # 综合一致性分数
             consistency_score = time_consistency * 0.4 + accuracy_consistency * 0.6
@@ -1680,7 +1565,7 @@ def _analyze_learning_consistency(self, records: list[Any]) -> dict[str, Any]:
                 "time_consistency": time_consistency,
                 "accuracy_consistency": accuracy_consistency,
                 "pattern": pattern,
-                "confidence": min(1.0, len(records) / 30),
+                "confidence": min(1.0, len(frame) / 30),
             }
 
         except Exception as e:
@@ -1688,58 +1573,35 @@ def _analyze_learning_consistency(self, records: list[Any]) -> dict[str, Any]:
             return {"consistency_score": 0, "pattern": "unknown"}
 
     def _analyze_progress_rate(
-        self, records: list[Any], sessions: list[Any]
+        self, frame: LearningRecordFrame, sessions: list[Any]
     ) -> dict[str, Any]:
         """分析进步速度."""
         try:
-            if not records or not sessions:
+            if not len(frame) or not sessions:
                 return {"progress_rate": 0, "trend": "unknown"}
 
-            # 按时间排序
-            sorted_records = sorted(records, key=lambda x: x.created_at)
-            # sorted_sessions = sorted(sessions, key=lambda x: x.created_at)  # 暂时不使用
-
             # 计算时间跨度
-            if len(sorted_records) < 2:
+            if len(frame) < 2:
                 return {"progress_rate": 0, "trend": "insufficient_data"}
 
-            time_span = (
-                sorted_records[-1].created_at - sorted_records[0].created_at
-            ).total_seconds() / 86400  # 天数
+            time_span = float(
+                (frame.created_at[-1] - frame.created_at[0]) / np.timedelta64(1, "D")
+            )  # 天数
 
             # 分时间段分析进步
-            if len(sorted_records) >= 20:
+            if len(frame) >= 20:
                 # 分为前后两半
-                mid_point = len(sorted_records) // 2
-                early_records = sorted_records[:mid_point]
-                recent_records = sorted_records[mid_point:]
+                mid_point = len(frame) // 2
+                early_records = frame.slice_rows(stop=mid_point)
+                recent_records = frame.slice_rows(start=mid_point)
 
                 # 计算各阶段表现
-                early_accuracy = sum(1 for r in early_records if r.is_correct) / len(
-                    early_records
-                )
-                recent_accuracy = sum(1 for r in recent_records if r.is_correct) / len(
-                    recent_records
-                )
+                early_accuracy = early_records.accuracy()
+                recent_accuracy = recent_records.accuracy()
 
                 # 计算平均答题时间变化
-                early_times = [
-                    r.time_spent
-                    for r in early_records
-                    if r.time_spent and r.time_spent > 0
-                ]
-                recent_times = [
-                    r.time_spent
-                    for r in recent_records
-                    if r.time_spent and r.time_spent > 0
-                ]
-
-                early_avg_time = (
-                    sum(early_times) / len(early_times) if early_times else 0
-                )
-                recent_avg_time = (
-                    sum(recent_times) / len(recent_times) if recent_times else 0
-                )
+                early_avg_time = early_records.average_time()
+                recent_avg_time = recent_records.average_time()
 
                 # 计算进步率
                 accuracy_improvement = recent_accuracy - early_accuracy
@@ -1776,7 +1638,7 @@ def _analyze_progress_rate(
                     "accuracy_improvement": accuracy_improvement,
                     "speed_improvement": speed_improvement,
                     "time_span_days": time_span,
-                    "confidence": min(1.0, len(sorted_records) / 50),
+                    "confidence": min(1.0, len(frame) / 50),
                 }
             else:
                 return {"progress_rate": 0, "trend": "insufficient_data"}
@@ -10,6 +10,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.ai.services.deepseek_service import DeepSeekService
+from app.shared.utils.vector_kernels import levenshtein_similarity
 from app.training.models.assistant_models import (
     KnowledgeBaseModel,
     LearningResourceModel,
@@ -919,33 +920,8 @@ def _calculate_text_similarity(
             if not text1 or not text2:
                 return 0.0
 
-            # 计算Levenshtein距离
-            def levenshtein_distance(s1: str, s2: str) -> int:
-                if len(s1) < len(s2):
-                    return levenshtein_distance(s2, s1)
-
-                if len(s2) == 0:
-                    return len(s1)
-
-                previous_row = list(range(len(s2) + 1))
-                for i, c1 in enumerate(s1):
-                    current_row = [i + 1]
-                    for j, c2 in enumerate(s2):
-                        insertions = previous_row[j + 1] + 1
-                        deletions = current_row[j] + 1
-                        substitutions = previous_row[j] + (c1 != c2)
-                        current_row.append(min(insertions, deletions, substitutions))
-                    previous_row = current_row
-
-                return previous_row[-1]
-
             # 计算相似度（1 - 标准化的编辑距离）
-            max_len = max(len(text1), len(text2))
-            if max_len == 0:
-                return 1.0
-
-            distance = levenshtein_distance(text1, text2)
-            similarity = 1.0 - (distance / max_len)
+            similarity = levenshtein_similarity(text1, text2)
 
             return max(0.0, similarity)
 
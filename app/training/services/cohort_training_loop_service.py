@@ -0,0 +1,386 @@
+"""班级智能训练闭环批量执行服务.
+
+夜间按班级批量执行智能训练闭环，替代逐个学生串行执行：
+
+- 数据采集：一批学生的答题记录和训练会话各用一次查询加载，再按学生拆分
+- AI分析：多名学生的分析数据打包进同一个提示词，并发的AI调用数有上限
+- 策略调整与效果验证：复用已加载的答题记录，不再逐个学生查询近期表现
+- 执行记录：每批学生的闭环记录一次写入、一次提交
+
+定时任务按 (班级, 训练类型) 分发子任务，每个子任务只处理一个班级的一种训练类型。
+AI分析结果按 (班级, 训练类型, 日期) 写入Redis检查点；任务中断后重跑时，
+当天已有闭环记录的学生直接跳过，已完成分析的学生复用检查点，不重复调用AI。
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.courses.models.course_models import Class, ClassStudent
+from app.shared.models.enums import TrainingType
+from app.shared.utils.priority_scheduler import TaskCategory
+from app.training.models.training_models import IntelligentTrainingLoop, TrainingSession
+from app.training.services.intelligent_training_loop_service import (
+    ANALYSIS_REQUIREMENTS,
+    IntelligentTrainingLoopService,
+)
+from app.training.utils.record_frame import LearningRecordFrame, load_learning_record_frames
+
+logger = logging.getLogger(__name__)
+
+# 夜间批量执行默认覆盖的训练类型
+COHORT_TRAINING_TYPES = (
+    TrainingType.VOCABULARY,
+    TrainingType.LISTENING,
+    TrainingType.READING,
+    TrainingType.WRITING,
+    TrainingType.TRANSLATION,
+)
+
+# 打包分析时的返回格式要求
+COHORT_RESPONSE_FORMAT = """
+## 返回格式
+每名学生的分析结果使用上述JSON结构，并增加 student_id 字段，整体返回：
+{"students": [{"student_id": 1001, "knowledge_mastery": {}, "weak_areas": [], ...}]}
+"""
+
+
+def cohort_checkpoint_key(class_id: int, training_type: TrainingType, run_date: date) -> str:
+    """班级闭环AI分析检查点（Redis哈希，字段为学生ID）."""
+    return f"training_loop:cohort:{class_id}:{training_type.name}:{run_date:%Y%m%d}"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _json_safe(value: Any) -> Any:
+    """转换为可写入JSON列的结构，避免批量提交时个别记录序列化失败拖垮整批."""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=_json_default))
+
+
+class CohortTrainingLoopService(IntelligentTrainingLoopService):
+    """班级智能训练闭环批量执行服务."""
+
+    def __init__(self, db: AsyncSession, redis_client: Any = None) -> None:
+        super().__init__(db)
+        self._redis = redis_client
+
+    @property
+    def redis(self) -> Any:
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    # ==================== 批量执行主流程 ====================
+
+    async def active_class_ids(self) -> list[int]:
+        """启用的班级ID（定时任务按班级和训练类型分发子任务）."""
+        stmt = select(Class.id).where(Class.is_active == True).order_by(Class.id)  # noqa: E712
+        return list((await self.db.execute(stmt)).scalars().all())
+
+    async def execute_cohort_training_loop(
+        self,
+        class_id: int,
+        training_type: TrainingType,
+        run_date: date | None = None,
+    ) -> dict[str, int]:
+        """对班级学生分批执行智能训练闭环.
+
+        当天已有闭环记录的学生跳过；AI分析失败的学生不写记录，留待重跑。
+        """
+        run_date = run_date or datetime.now().date()
+        student_ids = await self._class_student_ids(class_id)
+        pending = await self._pending_student_ids(student_ids, training_type, run_date)
+        checkpoint_key = cohort_checkpoint_key(class_id, training_type, run_date)
+
+        summary = {
+            "student_count": len(student_ids),
+            "skipped": len(student_ids) - len(pending),
+            "recorded": 0,
+            "loop_success": 0,
+            "deferred": 0,
+        }
+        batch_size = settings.TRAINING_LOOP_BATCH_SIZE
+        for start in range(0, len(pending), batch_size):
+            result = await self._execute_batch(
+                pending[start : start + batch_size], training_type, checkpoint_key
+            )
+            for key, value in result.items():
+                summary[key] += value
+
+        logger.info(f"班级智能训练闭环执行完成: 班级{class_id}, 训练类型{training_type}, {summary}")
+        return summary
+
+    async def _class_student_ids(self, class_id: int) -> list[int]:
+        """班级中在读的学生."""
+        stmt = (
+            select(ClassStudent.student_id)
+            .where(
+                ClassStudent.class_id == class_id,
+                ClassStudent.enrollment_status == "active",
+            )
+            .order_by(ClassStudent.student_id)
+        )
+        return list((await self.db.execute(stmt)).scalars().all())
+
+    async def _pending_student_ids(
+        self, student_ids: list[int], training_type: TrainingType, run_date: date
+    ) -> list[int]:
+        """当天尚未记录闭环的学生."""
+        if not student_ids:
+            return []
+        stmt = (
+            select(IntelligentTrainingLoop.student_id)
+            .where(
+                IntelligentTrainingLoop.student_id.in_(student_ids),
+                IntelligentTrainingLoop.training_type == training_type,
+                IntelligentTrainingLoop.execution_time >= datetime.combine(run_date, time.min),
+            )
+            .distinct()
+        )
+        done = set((await self.db.execute(stmt)).scalars().all())
+        return [student_id for student_id in student_ids if student_id not in done]
+
+    async def _execute_batch(
+        self, student_ids: list[int], training_type: TrainingType, checkpoint_key: str
+    ) -> dict[str, int]:
+        """执行一批学生的闭环，闭环记录一次写入并提交."""
+        collected = await self._collect_batch(student_ids, training_type)
+        analyses = await self._analyze_batch(collected, checkpoint_key)
+
+        loop_records = []
+        loop_success = 0
+        for student_id in student_ids:
+            if student_id not in analyses:
+                continue
+            frame, collected_data = collected[student_id]
+            analysis_result = analyses[student_id]
+            adjustment_result = await self._strategy_adjustment_phase(
+                student_id, training_type, analysis_result, frame
+            )
+            verification_result = await self._effect_verification_phase(
+                student_id, training_type, adjustment_result, frame
+            )
+            loop_result = self._build_loop_result(
+                student_id,
+                training_type,
+                collected_data,
+                analysis_result,
+                adjustment_result,
+                verification_result,
+            )
+            loop_result["phases"] = _json_safe(loop_result["phases"])
+            loop_records.append(self._build_loop_record(loop_result))
+            loop_success += loop_result["loop_success"]
+
+        if loop_records:
+            self.db.add_all(loop_records)
+            await self.db.commit()
+            await self._clear_checkpoints(
+                checkpoint_key, [record.student_id for record in loop_records]
+            )
+
+        return {
+            "recorded": len(loop_records),
+            "loop_success": loop_success,
+            "deferred": len(student_ids) - len(loop_records),
+        }
+
+    # ==================== 批量数据采集 ====================
+
+    async def _collect_batch(
+        self, student_ids: list[int], training_type: TrainingType
+    ) -> dict[int, tuple[LearningRecordFrame, dict[str, Any]]]:
+        """一次加载整批学生的答题记录和训练会话，按学生组装采集结果."""
+        analysis_window = timedelta(
+            days=self.loop_config["data_collection"]["analysis_window_days"]  # type: ignore
+        )
+        cutoff_date = datetime.now() - analysis_window
+
+        frames = await load_learning_record_frames(
+            self.db, student_ids, training_type=training_type, since=cutoff_date
+        )
+
+        stmt = (
+            select(TrainingSession)
+            .where(
+                TrainingSession.student_id.in_(student_ids),
+                TrainingSession.session_type == training_type,
+                TrainingSession.started_at >= cutoff_date,
+            )
+            .order_by(TrainingSession.student_id, TrainingSession.started_at)
+        )
+        sessions_by_student: dict[int, list[TrainingSession]] = defaultdict(list)
+        for session in (await self.db.execute(stmt)).scalars().all():
+            sessions_by_student[session.student_id].append(session)
+
+        collected = {}
+        for student_id in student_ids:
+            frame = frames[student_id]
+            learning_path_data = self._build_learning_path(
+                sessions_by_student.get(student_id, []), frame
+            )
+            collected[student_id] = (
+                frame,
+                await self._assemble_collected_data(frame, learning_path_data),
+            )
+        return collected
+
+    # ==================== 打包AI分析 ====================
+
+    async def _analyze_batch(
+        self,
+        collected: dict[int, tuple[LearningRecordFrame, dict[str, Any]]],
+        checkpoint_key: str,
+    ) -> dict[int, dict[str, Any]]:
+        """分析整批学生：复用检查点，其余学生打包后有限并发地调用AI.
+
+        返回结果中不包含AI分析失败的学生。
+        """
+        analyses = await self._load_checkpoints(checkpoint_key, list(collected))
+
+        ready = []
+        for student_id, (_, collected_data) in collected.items():
+            if student_id in analyses:
+                continue
+            if collected_data["collection_success"]:
+                ready.append(student_id)
+            else:
+                analyses[student_id] = {
+                    "analysis_success": False,
+                    "error": "数据质量不足，无法进行AI分析",
+                    "accuracy": 0.0,
+                }
+
+        per_call = max(1, settings.TRAINING_LOOP_STUDENTS_PER_CALL)
+        semaphore = asyncio.Semaphore(settings.TRAINING_LOOP_AI_CONCURRENCY)
+
+        async def analyze(group: list[int]) -> dict[int, dict[str, Any]]:
+            async with semaphore:
+                return await self._analyze_group(
+                    {student_id: collected[student_id][1] for student_id in group}
+                )
+
+        groups = [ready[i : i + per_call] for i in range(0, len(ready), per_call)]
+        for task in asyncio.as_completed([analyze(group) for group in groups]):
+            finalized = {
+                student_id: await self._finalize_analysis(analysis, collected[student_id][1])
+                for student_id, analysis in (await task).items()
+            }
+            # 每次调用完成即写入检查点，中断后已完成的分析不再重复调用AI
+            await self._save_checkpoints(checkpoint_key, finalized)
+            analyses.update(finalized)
+
+        return analyses
+
+    async def _analyze_group(
+        self, collected: dict[int, dict[str, Any]]
+    ) -> dict[int, dict[str, Any]]:
+        """用一次AI调用分析多名学生，返回成功解析的学生分析结果."""
+        try:
+            (
+                success,
+                ai_response,
+                error_msg,
+            ) = await self.deepseek_service.generate_completion(
+                prompt=self._build_cohort_analysis_prompt(collected),
+                temperature=0.2,
+                max_tokens=2000 * len(collected),
+                category=TaskCategory.BACKGROUND,
+            )
+            if not success or not ai_response:
+                raise ValueError(f"AI分析失败: {error_msg}")
+
+            content = (
+                ai_response.get("choices", [{}])[0].get("message", {}).get("content", "")
+            )
+            results = {}
+            for item in json.loads(content).get("students", []):
+                student_id = int(item.pop("student_id"))
+                if student_id in collected:
+                    results[student_id] = self._fill_analysis_defaults(item)
+            return results
+
+        except Exception as e:
+            logger.warning(f"打包AI分析失败: 学生{list(collected)}, 错误: {str(e)}")
+            return {}
+
+    def _build_cohort_analysis_prompt(self, collected: dict[int, dict[str, Any]]) -> str:
+        """构建多名学生共用的AI分析prompt."""
+        sections = "".join(
+            f"# 学生 {student_id}\n\n" + self._build_analysis_data_section(collected_data)
+            for student_id, collected_data in collected.items()
+        )
+        return (
+            f"\n请分别分析以下{len(collected)}名学生的英语四级训练数据，"
+            "为每名学生提供准确的学习分析报告。\n\n"
+            + sections
+            + ANALYSIS_REQUIREMENTS
+            + COHORT_RESPONSE_FORMAT
+        )
+
+    # ==================== 检查点 ====================
+
+    async def _load_checkpoints(
+        self, checkpoint_key: str, student_ids: list[int]
+    ) -> dict[int, dict[str, Any]]:
+        """读取已完成的AI分析（读取失败时全部重新分析）."""
+        if not student_ids:
+            return {}
+        try:
+            values = await self.redis.hmget(checkpoint_key, [str(sid) for sid in student_ids])
+        except RedisError as e:
+            logger.warning(f"读取训练闭环检查点失败: {e}")
+            return {}
+        return {
+            student_id: json.loads(value)
+            for student_id, value in zip(student_ids, values, strict=True)
+            if value
+        }
+
+    async def _save_checkpoints(
+        self, checkpoint_key: str, analyses: dict[int, dict[str, Any]]
+    ) -> None:
+        """写入AI分析检查点（失败不影响本次执行）."""
+        if not analyses:
+            return
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    checkpoint_key,
+                    mapping={
+                        str(student_id): json.dumps(
+                            analysis, ensure_ascii=False, default=_json_default
+                        )
+                        for student_id, analysis in analyses.items()
+                    },
+                )
+                pipe.expire(checkpoint_key, settings.TRAINING_LOOP_CHECKPOINT_TTL)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"写入训练闭环检查点失败: {e}")
+
+    async def _clear_checkpoints(self, checkpoint_key: str, student_ids: list[int]) -> None:
+        """闭环记录提交后清理对应学生的检查点."""
+        try:
+            await self.redis.hdel(checkpoint_key, *[str(sid) for sid in student_ids])
+        except RedisError as e:
+            logger.warning(f"清理训练闭环检查点失败: {e}")
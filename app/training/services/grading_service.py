@@ -1,14 +1,16 @@
 """智能批改与反馈系统 - AI驱动的专业评分服务."""
 
+import asyncio
 import json
 import re
-from collections.abc import Awaitable, Callable
+from collections.abc import AsyncGenerator, Awaitable, Callable, Sequence
 from typing import Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.ai.services.deepseek_service import DeepSeekService
 from app.shared.models.enums import GradingStatus, QuestionType
+from app.shared.utils.priority_scheduler import TaskCategory
 from app.training.models.training_models import Question
 from app.training.schemas.training_schemas import GradingResult
 
@@ -28,6 +30,11 @@ def __init__(self, db: AsyncSession) -> None:
             "detailed_feedback_length": 50,  # 详细反馈最短长度
         }
 
+        # 批量批改参数
+        self.batch_config = {
+            "max_concurrency": 8,  # 主观题AI批改最大并发数
+        }
+
     # ==================== 主要批改接口 ====================
 
     async def grade_answer(
@@ -62,6 +69,193 @@ async def grade_answer(
         except Exception as e:
             return self._create_fallback_result(question, str(e))
 
+    # ==================== 整卷批量批改接口 ====================
+
+    async def grade_submission_batch(
+        self,
+        items: Sequence[tuple[Question, dict[str, Any]]],
+        context: dict[str, Any] | None = None,
+        max_concurrency: int | None = None,
+        category: TaskCategory = TaskCategory.BATCH,
+    ) -> AsyncGenerator[tuple[int, GradingResult], None]:
+        """整卷/全班批量批改 - 按完成顺序流式返回 (序号, 批改结果).
+
+        客观题（选择、判断、听力/阅读选择、填空）在一次遍历中按规则直接评分；
+        作文、翻译等主观题以及规则未能判定的填空题进入AI通道，
+        以有限并发发起请求，相同题目的相同（标准化后）答案只批改一次。
+        AI通道的调用按 category 参与准入控制（默认批处理），不占满交互请求的槽位。
+        """
+        batch_context = {**(context or {}), "ai_category": category}
+        semaphore = asyncio.Semaphore(
+            max_concurrency or self.batch_config["max_concurrency"]
+        )
+
+        # 同一题目的标准答案只标准化一次
+        answer_keys: dict[tuple[int, str], Any] = {}
+        pending_keys: dict[tuple[int, str], list[int]] = {}
+        tasks: dict[asyncio.Task[GradingResult], tuple[int, str]] = {}
+
+        try:
+            # 客观题通道：单次遍历完成评分，结果立即返回；
+            # 遇到新的主观题答案时立即发起AI批改，两条通道同时进行
+            for index, (question, user_answer) in enumerate(items):
+                validation_result = await self._validate_answer_format(question, user_answer)
+                if not validation_result["valid"]:
+                    yield index, self._create_error_result(question, validation_result["error"])
+                    continue
+
+                result = self._grade_objective_item(question, user_answer, answer_keys)
+                if result is not None:
+                    yield index, await self._finalize_batch_result(result, question, user_answer)
+                    continue
+
+                cache_key = (question.id, self._normalize_answer_key(question, user_answer))
+                if cache_key not in pending_keys:
+                    pending_keys[cache_key] = []
+                    task = asyncio.create_task(
+                        self._grade_subjective_item(
+                            question, user_answer, batch_context, semaphore
+                        )
+                    )
+                    tasks[task] = cache_key
+                pending_keys[cache_key].append(index)
+
+            # 主观题通道：去重后的AI批改结果按完成顺序返回
+            pending: set[asyncio.Task[GradingResult]] = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    indexes = pending_keys[tasks[task]]
+                    question = items[indexes[0]][0]
+                    try:
+                        shared_result = task.result()
+                    except Exception as e:
+                        shared_result = self._create_fallback_result(question, str(e))
+
+                    for index in indexes:
+                        user_answer = items[index][1]
+                        yield index, await self._finalize_batch_result(
+                            shared_result.model_copy(deep=True), question, user_answer
+                        )
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _grade_objective_item(
+        self,
+        question: Question,
+        user_answer: dict[str, Any],
+        answer_keys: dict[tuple[int, str], Any],
+    ) -> GradingResult | None:
+        """客观题规则评分，无法由规则确定的题目返回None交由AI通道."""
+        question_type = question.question_type
+
+        if question_type in (
+            QuestionType.MULTIPLE_CHOICE,
+            QuestionType.TRUE_FALSE,
+            QuestionType.READING_COMPREHENSION,
+            QuestionType.LISTENING_COMPREHENSION,
+        ):
+            if isinstance(user_answer.get("answers"), list):
+                # 结果中保留原始标准答案，比较时由 _score_answer_set 统一标准化
+                key = (question.id, "answers")
+                if key not in answer_keys:
+                    answer_keys[key] = list(question.correct_answer.get("answers", []))
+                if not user_answer["answers"] or not answer_keys[key]:
+                    return self._create_empty_answer_result(question)
+                return self._score_answer_set(
+                    question, user_answer["answers"], answer_keys[key]
+                )
+
+            key = (question.id, "option")
+            if key not in answer_keys:
+                correct_choice = (
+                    str(question.correct_answer.get("option", "")).upper().strip()
+                )
+                answer_keys[key] = (
+                    correct_choice,
+                    self._normalize_choice_answer(correct_choice),
+                )
+            correct_choice, normalized_correct = answer_keys[key]
+            user_choice = str(user_answer.get("option", "")).upper().strip()
+            return self._score_choice(
+                question,
+                user_choice,
+                correct_choice,
+                self._normalize_choice_answer(user_choice) == normalized_correct,
+            )
+
+        if question_type == QuestionType.FILL_BLANK:
+            key = (question.id, "words")
+            if key not in answer_keys:
+                correct_words = question.correct_answer.get("words", [])
+                if isinstance(correct_words, str):
+                    correct_words = [correct_words]
+                answer_keys[key] = (
+                    correct_words,
+                    [word.strip().lower() for word in correct_words],
+                )
+            correct_words, correct_clean = answer_keys[key]
+
+            user_words = user_answer.get("words", [])
+            if isinstance(user_words, str):
+                user_words = [user_words]
+            user_clean = [str(word).strip().lower() for word in user_words]
+
+            # 全部命中（含常见变形）可直接按规则评分，否则交由AI判断语法变形
+            if (
+                correct_clean
+                and len(user_clean) >= len(correct_clean)
+                and all(
+                    user_word == correct_word
+                    or self._is_acceptable_variation(user_word, correct_word)
+                    for user_word, correct_word in zip(
+                        user_clean, correct_clean, strict=False
+                    )
+                )
+            ):
+                return self._score_fill_blank(question, user_words, correct_words)
+            return None
+
+        return None
+
+    async def _grade_subjective_item(
+        self,
+        question: Question,
+        user_answer: dict[str, Any],
+        context: dict[str, Any],
+        semaphore: asyncio.Semaphore,
+    ) -> GradingResult:
+        """在并发限制下执行单个主观题的AI批改."""
+        async with semaphore:
+            grading_strategy = self._select_grading_strategy(question)
+            try:
+                return await grading_strategy(question, user_answer, context)
+            except Exception as e:
+                return self._create_fallback_result(question, str(e))
+
+    async def _finalize_batch_result(
+        self, result: GradingResult, question: Question, user_answer: dict[str, Any]
+    ) -> GradingResult:
+        """批量批改结果的质量控制和反馈增强."""
+        result = await self._apply_quality_control(result, question)
+        return await self._enhance_feedback(result, question, user_answer)
+
+    def _normalize_answer_key(self, question: Question, user_answer: dict[str, Any]) -> str:
+        """生成答案缓存键 - 合并空白，填空题忽略大小写."""
+        if question.question_type == QuestionType.FILL_BLANK:
+            words = user_answer.get("words", [])
+            if isinstance(words, str):
+                words = [words]
+            return "|".join(str(word).strip().lower() for word in words)
+
+        text = user_answer.get("text")
+        if isinstance(text, str):
+            return " ".join(text.split())
+
+        return json.dumps(user_answer, sort_keys=True, ensure_ascii=False)
+
     # ==================== 题型专门批改方法 ====================
 
     async def _grade_choice_question(
@@ -76,30 +270,8 @@ async def _grade_choice_question(
         normalized_correct = self._normalize_choice_answer(correct_choice)
 
         is_correct = normalized_user == normalized_correct
-        score = question.max_score if is_correct else 0.0
 
-        # 生成详细的选择题反馈
-        detailed_feedback = await self._generate_choice_feedback(
-            question, user_choice, correct_choice, is_correct
-        )
-
-        return GradingResult(
-            is_correct=is_correct,
-            score=score,
-            max_score=question.max_score,
-            grading_status=GradingStatus.COMPLETED,
-            ai_feedback={
-                "user_choice": user_choice,
-                "correct_choice": correct_choice,
-                "explanation": question.correct_answer.get("explanation", ""),
-                "analysis": detailed_feedback.get("analysis", ""),
-            },
-            ai_confidence=0.98,  # 选择题批改置信度很高
-            knowledge_points_mastered=question.knowledge_points if is_correct else [],
-            knowledge_points_weak=[] if is_correct else question.knowledge_points,
-            detailed_feedback=detailed_feedback.get("detailed", ""),
-            improvement_suggestions=detailed_feedback.get("suggestions", []),
-        )
+        return self._score_choice(question, user_choice, correct_choice, is_correct)
 
     async def _grade_fill_blank_question(
         self, question: Question, user_answer: dict[str, Any], context: dict[str, Any]
@@ -115,7 +287,10 @@ async def _grade_fill_blank_question(
 
         # 使用AI辅助批改，处理语法变形等情况
         ai_grading_result = await self._ai_assisted_fill_blank_grading(
-            question, user_words, correct_words
+            question,
+            user_words,
+            correct_words,
+            context.get("ai_category", TaskCategory.INTERACTIVE),
         )
 
         if ai_grading_result:
@@ -147,6 +322,7 @@ async def _grade_essay_question(
                 prompt=grading_prompt,
                 temperature=0.2,  # 较低温度确保批改一致性
                 max_tokens=1500,
+                category=context.get("ai_category", TaskCategory.INTERACTIVE),
             )
 
             if success and ai_response:
@@ -182,6 +358,7 @@ async def _grade_translation_question(
                 prompt=grading_prompt,
                 temperature=0.1,  # 更低温度确保翻译评估准确性
                 max_tokens=1200,
+                category=context.get("ai_category", TaskCategory.INTERACTIVE),
             )
 
             if success and ai_response:
@@ -216,7 +393,11 @@ async def _grade_listening_comprehension(
     # ==================== AI辅助批改方法 ====================
 
     async def _ai_assisted_fill_blank_grading(
-        self, question: Question, user_words: list[str], correct_words: list[str]
+        self,
+        question: Question,
+        user_words: list[str],
+        correct_words: list[str],
+        category: TaskCategory = TaskCategory.INTERACTIVE,
     ) -> GradingResult | None:
         """AI辅助填空题批改 - 处理语法变形."""
         if not user_words or not correct_words:
@@ -250,7 +431,7 @@ async def _ai_assisted_fill_blank_grading(
 
         try:
             success, ai_response, _ = await self.deepseek_service.generate_completion(
-                prompt=prompt, temperature=0.3, max_tokens=800
+                prompt=prompt, temperature=0.3, max_tokens=800, category=category
             )
 
             if success and ai_response:
@@ -493,8 +674,14 @@ async def _rule_based_fill_blank_grading(
         if not user_words or not correct_words:
             return self._create_empty_answer_result(question)
 
+        return self._score_fill_blank(question, user_words, correct_words)
+
+    def _score_fill_blank(
+        self, question: Question, user_words: list[str], correct_words: list[str]
+    ) -> GradingResult:
+        """生成填空题规则批改结果."""
         # 确保长度一致
-        user_words = user_words[: len(correct_words)]
+        user_words = list(user_words[: len(correct_words)])
         while len(user_words) < len(correct_words):
             user_words.append("")
 
@@ -700,7 +887,40 @@ def _calculate_text_similarity(self, text1: str, text2: str) -> float:
 
         return intersection / union if union > 0 else 0.0
 
-    async def _generate_choice_feedback(
+    def _score_choice(
+        self,
+        question: Question,
+        user_choice: str,
+        correct_choice: str,
+        is_correct: bool,
+    ) -> GradingResult:
+        """生成选择题批改结果."""
+        score = question.max_score if is_correct else 0.0
+
+        # 生成详细的选择题反馈
+        detailed_feedback = self._generate_choice_feedback(
+            question, user_choice, correct_choice, is_correct
+        )
+
+        return GradingResult(
+            is_correct=is_correct,
+            score=score,
+            max_score=question.max_score,
+            grading_status=GradingStatus.COMPLETED,
+            ai_feedback={
+                "user_choice": user_choice,
+                "correct_choice": correct_choice,
+                "explanation": question.correct_answer.get("explanation", ""),
+                "analysis": detailed_feedback.get("analysis", ""),
+            },
+            ai_confidence=0.98,  # 选择题批改置信度很高
+            knowledge_points_mastered=question.knowledge_points if is_correct else [],
+            knowledge_points_weak=[] if is_correct else question.knowledge_points,
+            detailed_feedback=detailed_feedback.get("detailed", ""),
+            improvement_suggestions=detailed_feedback.get("suggestions", []),
+        )
+
+    def _generate_choice_feedback(
         self,
         question: Question,
         user_choice: str,
@@ -735,8 +955,14 @@ async def _grade_multiple_choice_set(
         if not user_answers or not correct_answers:
             return self._create_empty_answer_result(question)
 
+        return self._score_answer_set(question, user_answers, correct_answers)
+
+    def _score_answer_set(
+        self, question: Question, user_answers: list[Any], correct_answers: list[Any]
+    ) -> GradingResult:
+        """生成多选题组批改结果."""
         # 确保长度一致
-        user_answers = user_answers[: len(correct_answers)]
+        user_answers = list(user_answers[: len(correct_answers)])
         while len(user_answers) < len(correct_answers):
             user_answers.append("")
 
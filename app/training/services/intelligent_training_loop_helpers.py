@@ -187,8 +187,10 @@ async def calculate_difficulty_adjustment_strategy(
 
         # 计算近10次正确率
         correct_count = sum(1 for r in recent_records if r.is_correct)
-        accuracy_rate = correct_count / len(recent_records)
+        return self.difficulty_adjustment_for_accuracy(correct_count / len(recent_records))
 
+    def difficulty_adjustment_for_accuracy(self, accuracy_rate: float) -> dict[str, Any]:
+        """按近10次正确率确定难度调整策略."""
         # 应用🔥需求21的调整规则：>90%升级，<60%降级
         should_adjust = False
         adjustment_direction = "maintain"
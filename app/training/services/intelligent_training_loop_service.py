@@ -5,27 +5,68 @@
 
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 from typing import Any
 
-from sqlalchemy import and_, desc, select
+import numpy as np
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.ai.services.deepseek_service import DeepSeekService
 from app.shared.models.enums import TrainingType
-from app.training.models.training_models import (
-    Question,
-    TrainingRecord,
-    TrainingSession,
-)
+from app.shared.utils.priority_scheduler import TaskCategory
+from app.training.models.training_models import IntelligentTrainingLoop, TrainingSession
 from app.training.services.adaptive_service import AdaptiveLearningService
 from app.training.services.analytics_service import AnalyticsService
 from app.training.services.intelligent_training_loop_helpers import (
     IntelligentTrainingLoopHelpers,
 )
+from app.training.utils.record_frame import (
+    LearningRecordFrame,
+    load_learning_record_frame,
+    run_lengths,
+)
 
 logger = logging.getLogger(__name__)
 
+# AI分析的输出要求，批量分析时多个学生共用一份
+ANALYSIS_REQUIREMENTS = """## 分析要求
+请基于以上数据进行深度分析，返回JSON格式结果：
+
+{
+    "knowledge_mastery": {
+        "强项知识点": ["知识点1", "知识点2"],
+        "掌握中知识点": ["知识点3", "知识点4"],
+        "薄弱知识点": ["知识点5", "知识点6"]
+    },
+    "weak_areas": [
+        {
+            "area": "薄弱环节名称",
+            "severity": "high/medium/low",
+            "evidence": "支撑证据",
+            "impact_score": 0.8
+        }
+    ],
+    "learning_patterns": {
+        "学习风格": "visual/auditory/kinesthetic",
+        "学习偏好": "短时高频/长时低频",
+        "最佳学习时间": "morning/afternoon/evening"
+    },
+    "improvement_suggestions": [
+        {
+            "suggestion": "具体建议",
+            "priority": "high/medium/low",
+            "expected_improvement": 0.15,
+            "implementation_difficulty": "easy/medium/hard"
+        }
+    ],
+    "confidence": 0.95,
+    "analysis_quality": "high/medium/low"
+}
+
+请确保分析的准确性和实用性，置信度应基于数据质量和分析深度。
+"""
+
 
 class IntelligentTrainingLoopService:
     """智能训练闭环服务 - 系统核心."""
@@ -39,7 +80,7 @@ def __init__(self, db: AsyncSession) -> None:
         self.helpers = IntelligentTrainingLoopHelpers(db)
 
         # 闭环配置参数
-        self.loop_config = {
+        self.loop_config: dict[str, dict[str, Any]] = {
             "data_collection": {
                 "min_records_for_analysis": 10,  # 最少记录数
                 "analysis_window_days": 7,  # 分析窗口
@@ -90,24 +131,14 @@ async def execute_training_loop(
             )
 
             # 构建闭环结果
-            loop_result = {
-                "student_id": student_id,
-                "training_type": training_type.value,
-                "execution_time": datetime.now(),
-                "phases": {
-                    "data_collection": collected_data,
-                    "ai_analysis": analysis_result,
-                    "strategy_adjustment": adjustment_result,
-                    "effect_verification": verification_result,
-                },
-                "loop_success": self._evaluate_loop_success(
-                    analysis_result, adjustment_result, verification_result
-                ),
-                "next_execution_time": datetime.now()
-                + timedelta(
-                    days=self.loop_config["effect_verification"]["verification_period_days"]  # type: ignore
-                ),
-            }
+            loop_result = self._build_loop_result(
+                student_id,
+                training_type,
+                collected_data,
+                analysis_result,
+                adjustment_result,
+                verification_result,
+            )
 
             # 记录闭环执行结果
             await self._record_loop_execution(loop_result)
@@ -130,40 +161,21 @@ async def _data_collection_phase(
             analysis_window = timedelta(days=collection_config["analysis_window_days"])  # type: ignore
             cutoff_date = datetime.now() - analysis_window
 
-            # 收集训练记录
-            training_records = await self._collect_training_records(
-                student_id, training_type, cutoff_date
+            # 窗口内的答题记录只加载一次，训练记录、学习路径和行为分析共用
+            frame = await load_learning_record_frame(
+                self.db, student_id, training_type=training_type, since=cutoff_date
             )
 
             # 收集学习路径数据
             learning_path_data = await self._collect_learning_path_data(
-                student_id, training_type, cutoff_date
+                student_id, training_type, cutoff_date, frame
             )
 
-            # 收集答题行为数据
-            behavior_data = await self._collect_behavior_data(
-                student_id, training_type, cutoff_date
-            )
-
-            # 数据质量检查
-            data_quality = await self._assess_data_quality(
-                training_records, learning_path_data, behavior_data
-            )
-
-            collected_data = {
-                "collection_time": datetime.now(),
-                "data_window_days": collection_config["analysis_window_days"],  # type: ignore
-                "training_records": training_records,
-                "learning_path_data": learning_path_data,
-                "behavior_data": behavior_data,
-                "data_quality": data_quality,
-                "total_records": len(training_records),
-                "collection_success": data_quality["overall_quality"] >= 0.8,
-            }
+            collected_data = await self._assemble_collected_data(frame, learning_path_data)
 
             logger.info(
-                f"数据采集完成: 学生{student_id}, 记录数{len(training_records)}, "
-                f"质量{data_quality['overall_quality']:.2f}"
+                f"数据采集完成: 学生{student_id}, 记录数{collected_data['total_records']}, "
+                f"质量{collected_data['data_quality']['overall_quality']:.2f}"
             )
             return collected_data
 
@@ -171,49 +183,64 @@ async def _data_collection_phase(
             logger.error(f"数据采集失败: 学生{student_id}, 错误: {str(e)}")
             raise
 
-    async def _collect_training_records(
-        self, student_id: int, training_type: TrainingType, cutoff_date: datetime
-    ) -> list[dict[str, Any]]:
-        """收集训练记录数据."""
-        stmt = (
-            select(TrainingRecord, Question)
-            .join(Question, TrainingRecord.question_id == Question.id)
-            .join(TrainingSession, TrainingRecord.session_id == TrainingSession.id)
-            .where(
-                and_(
-                    TrainingRecord.student_id == student_id,
-                    TrainingSession.session_type == training_type,
-                    TrainingRecord.created_at >= cutoff_date,
-                )
-            )
-            .order_by(desc(TrainingRecord.created_at))
+    async def _assemble_collected_data(
+        self, frame: LearningRecordFrame, learning_path_data: dict[str, Any]
+    ) -> dict[str, Any]:
+        """由答题记录数据帧和学习路径组装采集结果."""
+        # 收集训练记录
+        training_records = self._collect_training_records(frame)
+
+        # 收集答题行为数据
+        behavior_data = self._collect_behavior_data(frame)
+
+        # 数据质量检查
+        data_quality = await self._assess_data_quality(
+            training_records, learning_path_data, behavior_data
         )
 
-        result = await self.db.execute(stmt)
-        records = result.all()
+        return {
+            "collection_time": datetime.now(),
+            "data_window_days": self.loop_config["data_collection"]["analysis_window_days"],
+            "training_records": training_records,
+            "learning_path_data": learning_path_data,
+            "behavior_data": behavior_data,
+            "data_quality": data_quality,
+            "total_records": len(training_records),
+            "collection_success": data_quality["overall_quality"] >= 0.8,
+        }
 
+    def _collect_training_records(self, frame: LearningRecordFrame) -> list[dict[str, Any]]:
+        """收集训练记录数据（按时间倒序）."""
+        created_at = frame.to_datetimes()
+        offsets = frame.kp_offsets
         training_data = []
-        for record, question in records:
+        for i in reversed(range(len(frame))):
             training_data.append(
                 {
-                    "record_id": record.id,
-                    "session_id": record.session_id,
-                    "question_id": record.question_id,
-                    "is_correct": record.is_correct,
-                    "score": record.score,
-                    "time_spent": record.time_spent,
-                    "difficulty_level": question.difficulty_level.value,
-                    "knowledge_points": record.knowledge_points_mastered
-                    + record.knowledge_points_weak,
-                    "ai_confidence": record.ai_confidence,
-                    "created_at": record.created_at,
+                    "record_id": int(frame.record_id[i]),
+                    "session_id": int(frame.session_id[i]),
+                    "question_id": int(frame.question_id[i]),
+                    "is_correct": bool(frame.is_correct[i]),
+                    "score": float(frame.score[i]),
+                    "time_spent": int(frame.time_spent[i]),
+                    "difficulty_level": int(frame.difficulty[i]),
+                    "knowledge_points": [
+                        frame.kp_labels[code]
+                        for code in frame.kp_codes[offsets[i] : offsets[i + 1]]
+                    ],
+                    "ai_confidence": float(frame.ai_confidence[i]),
+                    "created_at": created_at[i],
                 }
             )
 
         return training_data
 
     async def _collect_learning_path_data(
-        self, student_id: int, training_type: TrainingType, cutoff_date: datetime
+        self,
+        student_id: int,
+        training_type: TrainingType,
+        cutoff_date: datetime,
+        frame: LearningRecordFrame,
     ) -> dict[str, Any]:
         """收集学习路径数据."""
         # 获取学习会话序列
@@ -232,6 +259,12 @@ async def _collect_learning_path_data(
         result = await self.db.execute(stmt)
         sessions = list(result.scalars().all())
 
+        return self._build_learning_path(sessions, frame)
+
+    def _build_learning_path(
+        self, sessions: list[TrainingSession], frame: LearningRecordFrame
+    ) -> dict[str, Any]:
+        """由训练会话序列和答题记录构建学习路径数据."""
         learning_path = {
             "session_sequence": [
                 {
@@ -249,37 +282,18 @@ async def _collect_learning_path_data(
                 for session in sessions
             ],
             "difficulty_progression": self._analyze_difficulty_progression(sessions),
-            "learning_velocity": self._calculate_learning_velocity(sessions),
+            "learning_velocity": self._calculate_learning_velocity(frame),
         }
 
         return learning_path
 
-    async def _collect_behavior_data(
-        self, student_id: int, training_type: TrainingType, cutoff_date: datetime
-    ) -> dict[str, Any]:
+    def _collect_behavior_data(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """收集答题行为数据."""
-        # 分析答题模式
-        stmt = (
-            select(TrainingRecord)
-            .join(TrainingSession, TrainingRecord.session_id == TrainingSession.id)
-            .where(
-                and_(
-                    TrainingRecord.student_id == student_id,
-                    TrainingSession.session_type == training_type,
-                    TrainingRecord.created_at >= cutoff_date,
-                )
-            )
-            .order_by(TrainingRecord.created_at)
-        )
-
-        result = await self.db.execute(stmt)
-        records = list(result.scalars().all())
-
         behavior_data = {
-            "answer_patterns": self._analyze_answer_patterns(records),
-            "time_patterns": self._analyze_time_patterns(records),
-            "error_patterns": self._analyze_error_patterns(records),
-            "engagement_metrics": self._calculate_engagement_metrics(records),
+            "answer_patterns": self._analyze_answer_patterns(frame),
+            "time_patterns": self._analyze_time_patterns(frame),
+            "error_patterns": self._analyze_error_patterns(frame),
+            "engagement_metrics": self._calculate_engagement_metrics(frame),
         }
 
         return behavior_data
@@ -291,8 +305,6 @@ async def _ai_analysis_phase(
     ) -> dict[str, Any]:
         """AI分析阶段 - 智能分析知识点掌握度和薄弱环节."""
         try:
-            analysis_config = self.loop_config["ai_analysis"]
-
             # 检查数据质量
             if not collected_data["collection_success"]:
                 return {
@@ -313,6 +325,7 @@ async def _ai_analysis_phase(
                 prompt=analysis_prompt,
                 temperature=0.2,  # 低温度确保分析准确性
                 max_tokens=2000,
+                category=TaskCategory.BACKGROUND,  # 闭环分析不与学生交互请求争抢槽位
             )
 
             if not success or not ai_response:
@@ -320,33 +333,7 @@ async def _ai_analysis_phase(
 
             # 解析AI分析结果
             analysis_result = await self._parse_ai_analysis_result(ai_response)
-
-            # 验证AI分析准确率
-            accuracy_verification = await self._verify_ai_analysis_accuracy(
-                analysis_result, collected_data
-            )
-
-            # 构建分析结果
-            final_analysis = {
-                "analysis_time": datetime.now(),
-                "ai_analysis": analysis_result,
-                "accuracy_verification": accuracy_verification,
-                "analysis_accuracy": accuracy_verification["accuracy_score"],
-                "analysis_success": accuracy_verification["accuracy_score"]
-                >= analysis_config["accuracy_threshold"],  # type: ignore
-                "confidence_score": analysis_result.get("confidence", 0.0),
-                "knowledge_mastery": analysis_result.get("knowledge_mastery", {}),
-                "weak_areas": analysis_result.get("weak_areas", []),
-                "improvement_suggestions": analysis_result.get(
-                    "improvement_suggestions", []
-                ),
-            }
-
-            logger.info(
-                f"AI分析完成: 准确率{accuracy_verification['accuracy_score']:.2f}, "
-                f"成功={final_analysis['analysis_success']}"
-            )
-            return final_analysis
+            return await self._finalize_analysis(analysis_result, collected_data)
 
         except Exception as e:
             logger.error(f"AI分析失败: 错误: {str(e)}")
@@ -356,8 +343,47 @@ async def _ai_analysis_phase(
                 "accuracy": 0.0,
             }
 
+    async def _finalize_analysis(
+        self, analysis_result: dict[str, Any], collected_data: dict[str, Any]
+    ) -> dict[str, Any]:
+        """验证AI分析准确率并构建分析阶段结果."""
+        analysis_config = self.loop_config["ai_analysis"]
+
+        # 验证AI分析准确率
+        accuracy_verification = await self._verify_ai_analysis_accuracy(
+            analysis_result, collected_data
+        )
+
+        # 构建分析结果
+        final_analysis = {
+            "analysis_time": datetime.now(),
+            "ai_analysis": analysis_result,
+            "accuracy_verification": accuracy_verification,
+            "analysis_accuracy": accuracy_verification["accuracy_score"],
+            "analysis_success": accuracy_verification["accuracy_score"]
+            >= analysis_config["accuracy_threshold"],  # type: ignore
+            "confidence_score": analysis_result.get("confidence", 0.0),
+            "knowledge_mastery": analysis_result.get("knowledge_mastery", {}),
+            "weak_areas": analysis_result.get("weak_areas", []),
+            "improvement_suggestions": analysis_result.get("improvement_suggestions", []),
+        }
+
+        logger.info(
+            f"AI分析完成: 准确率{accuracy_verification['accuracy_score']:.2f}, "
+            f"成功={final_analysis['analysis_success']}"
+        )
+        return final_analysis
+
     async def _build_ai_analysis_prompt(self, collected_data: dict[str, Any]) -> str:
         """构建AI分析prompt."""
+        return (
+            "\n请分析以下学生的英语四级训练数据，提供准确的学习分析报告。\n\n"
+            + self._build_analysis_data_section(collected_data)
+            + ANALYSIS_REQUIREMENTS
+        )
+
+    def _build_analysis_data_section(self, collected_data: dict[str, Any]) -> str:
+        """构建AI分析prompt的数据部分（学生训练数据概览和行为分析）."""
         training_records = collected_data["training_records"]
         learning_path = collected_data["learning_path_data"]
         behavior_data = collected_data["behavior_data"]
@@ -382,10 +408,7 @@ async def _build_ai_analysis_prompt(self, collected_data: dict[str, Any]) -> str
                 "accuracy": kp_correct / len(kp_records) if kp_records else 0,
             }
 
-        prompt = f"""
-请分析以下学生的英语四级训练数据，提供准确的学习分析报告。
-
-## 训练数据概览
+        return f"""## 训练数据概览
 - 分析时间窗口: {collected_data["data_window_days"]}天
 - 总题目数: {total_questions}
 - 正确答案数: {correct_answers}
@@ -403,43 +426,7 @@ async def _build_ai_analysis_prompt(self, collected_data: dict[str, Any]) -> str
 - 时间模式: {behavior_data.get("time_patterns", {})}
 - 错误模式: {behavior_data.get("error_patterns", {})}
 
-## 分析要求
-请基于以上数据进行深度分析，返回JSON格式结果：
-
-{{
-    "knowledge_mastery": {{
-        "强项知识点": ["知识点1", "知识点2"],
-        "掌握中知识点": ["知识点3", "知识点4"],
-        "薄弱知识点": ["知识点5", "知识点6"]
-    }},
-    "weak_areas": [
-        {{
-            "area": "薄弱环节名称",
-            "severity": "high/medium/low",
-            "evidence": "支撑证据",
-            "impact_score": 0.8
-        }}
-    ],
-    "learning_patterns": {{
-        "学习风格": "visual/auditory/kinesthetic",
-        "学习偏好": "短时高频/长时低频",
-        "最佳学习时间": "morning/afternoon/evening"
-    }},
-    "improvement_suggestions": [
-        {{
-            "suggestion": "具体建议",
-            "priority": "high/medium/low",
-            "expected_improvement": 0.15,
-            "implementation_difficulty": "easy/medium/hard"
-        }}
-    ],
-    "confidence": 0.95,
-    "analysis_quality": "high/medium/low"
-}}
-
-请确保分析的准确性和实用性，置信度应基于数据质量和分析深度。
 """
-        return prompt
 
     async def _parse_ai_analysis_result(
         self, ai_response: dict[str, Any]
@@ -455,19 +442,7 @@ async def _parse_ai_analysis_result(
 
             # 解析JSON结果
             analysis_data: dict[str, Any] = json.loads(content)
-
-            # 验证必要字段
-            required_fields = [
-                "knowledge_mastery",
-                "weak_areas",
-                "improvement_suggestions",
-                "confidence",
-            ]
-            for field in required_fields:
-                if field not in analysis_data:
-                    analysis_data[field] = {} if field == "knowledge_mastery" else []
-
-            return analysis_data
+            return self._fill_analysis_defaults(analysis_data)
 
         except json.JSONDecodeError as e:
             logger.error(f"AI分析结果解析失败: {str(e)}")
@@ -479,6 +454,20 @@ async def _parse_ai_analysis_result(
                 "parse_error": str(e),
             }
 
+    def _fill_analysis_defaults(self, analysis_data: dict[str, Any]) -> dict[str, Any]:
+        """补全AI分析结果缺失的必要字段."""
+        required_fields = [
+            "knowledge_mastery",
+            "weak_areas",
+            "improvement_suggestions",
+            "confidence",
+        ]
+        for field in required_fields:
+            if field not in analysis_data:
+                analysis_data[field] = {} if field == "knowledge_mastery" else []
+
+        return analysis_data
+
     async def _verify_ai_analysis_accuracy(
         self, analysis_result: dict[str, Any], collected_data: dict[str, Any]
     ) -> dict[str, Any]:
@@ -536,8 +525,12 @@ async def _strategy_adjustment_phase(
         student_id: int,
         training_type: TrainingType,
         analysis_result: dict[str, Any],
+        frame: LearningRecordFrame | None = None,
     ) -> dict[str, Any]:
-        """策略调整阶段 - 基于AI分析结果自动调整训练策略."""
+        """策略调整阶段 - 基于AI分析结果自动调整训练策略.
+
+        传入分析窗口内已加载的答题记录（frame）时，不再逐个学生查询近期表现。
+        """
         try:
             # 检查AI分析是否成功
             if not analysis_result.get("analysis_success", False):
@@ -548,12 +541,12 @@ async def _strategy_adjustment_phase(
 
             # 生成调整策略
             adjustment_strategy = await self._generate_adjustment_strategy(
-                student_id, training_type, analysis_result
+                student_id, training_type, analysis_result, frame
             )
 
             # 应用策略调整
             applied_adjustments = await self._apply_strategy_adjustments(
-                student_id, training_type, adjustment_strategy
+                student_id, training_type, adjustment_strategy, frame
             )
 
             # 记录调整历史
@@ -589,6 +582,7 @@ async def _generate_adjustment_strategy(
         student_id: int,
         training_type: TrainingType,
         analysis_result: dict[str, Any],
+        frame: LearningRecordFrame | None = None,
     ) -> dict[str, Any]:
         """生成调整策略."""
         weak_areas = analysis_result.get("weak_areas", [])
@@ -596,11 +590,18 @@ async def _generate_adjustment_strategy(
         improvement_suggestions = analysis_result.get("improvement_suggestions", [])
 
         # 难度调整策略
-        difficulty_adjustment = (
-            await self.helpers.calculate_difficulty_adjustment_strategy(
-                student_id, training_type, analysis_result
+        if frame is None:
+            difficulty_adjustment = (
+                await self.helpers.calculate_difficulty_adjustment_strategy(
+                    student_id, training_type, analysis_result
+                )
             )
-        )
+        elif len(frame):
+            difficulty_adjustment = self.helpers.difficulty_adjustment_for_accuracy(
+                frame.latest(10).accuracy()
+            )
+        else:
+            difficulty_adjustment = {"should_adjust": False, "reason": "insufficient_data"}
 
         # 内容调整策略
         content_adjustment = await self.helpers.calculate_content_adjustment_strategy(
@@ -631,7 +632,11 @@ async def _generate_adjustment_strategy(
         return strategy
 
     async def _apply_strategy_adjustments(
-        self, student_id: int, training_type: TrainingType, strategy: dict[str, Any]
+        self,
+        student_id: int,
+        training_type: TrainingType,
+        strategy: dict[str, Any],
+        frame: LearningRecordFrame | None = None,
     ) -> dict[str, Any]:
         """应用策略调整."""
         try:
@@ -639,13 +644,18 @@ async def _apply_strategy_adjustments(
 
             # 应用难度调整
             if strategy["difficulty_adjustment"]["should_adjust"]:
-                difficulty_result = await self.adaptive_service.update_adaptive_config(
-                    student_id=student_id,
-                    training_type=training_type,
-                    session_results=strategy["difficulty_adjustment"][
-                        "adjustment_data"
-                    ],
-                )
+                if frame is None:
+                    difficulty_result = await self.adaptive_service.update_adaptive_config(
+                        student_id=student_id,
+                        training_type=training_type,
+                        session_results=strategy["difficulty_adjustment"][
+                            "adjustment_data"
+                        ],
+                    )
+                else:
+                    difficulty_result = await self.adaptive_service.suggest_difficulty_adjustment(
+                        frame, training_type
+                    )
                 applied_changes.append(
                     {
                         "type": "difficulty",
@@ -699,6 +709,7 @@ async def _effect_verification_phase(
         student_id: int,
         training_type: TrainingType,
         adjustment_result: dict[str, Any],
+        frame: LearningRecordFrame | None = None,
     ) -> dict[str, Any]:
         """效果验证阶段 - 7天调整效果评估周期."""
         try:
@@ -711,19 +722,24 @@ async def _effect_verification_phase(
                     "error": "策略调整失败，无法进行效果验证",
                 }
 
-            # 获取调整前的基线数据
-            baseline_data = await self.helpers.get_baseline_performance(
-                student_id,
-                training_type,
-                verification_config["verification_period_days"],  # type: ignore
-            )
+            verification_days: int = verification_config["verification_period_days"]  # type: ignore
+            if frame is None:
+                # 获取调整前的基线数据
+                baseline_data = await self.helpers.get_baseline_performance(
+                    student_id,
+                    training_type,
+                    verification_days,
+                )
 
-            # 获取调整后的表现数据
-            current_data = await self.helpers.get_current_performance(
-                student_id,
-                training_type,
-                days=3,  # 获取最近3天的数据
-            )
+                # 获取调整后的表现数据
+                current_data = await self.helpers.get_current_performance(
+                    student_id,
+                    training_type,
+                    days=3,  # 获取最近3天的数据
+                )
+            else:
+                baseline_data = self._performance_from_frame(frame, verification_days)
+                current_data = self._performance_from_frame(frame, 3)
 
             # 计算改进效果
             improvement_analysis = await self.helpers.calculate_improvement_effect(
@@ -773,36 +789,79 @@ def _evaluate_loop_success(
             and verification_result.get("verification_success", False)
         )
 
+    def _build_loop_result(
+        self,
+        student_id: int,
+        training_type: TrainingType,
+        collected_data: dict[str, Any],
+        analysis_result: dict[str, Any],
+        adjustment_result: dict[str, Any],
+        verification_result: dict[str, Any],
+    ) -> dict[str, Any]:
+        """汇总四个阶段的结果."""
+        verification_days = self.loop_config["effect_verification"]["verification_period_days"]
+        return {
+            "student_id": student_id,
+            "training_type": training_type.value,
+            "execution_time": datetime.now(),
+            "phases": {
+                "data_collection": collected_data,
+                "ai_analysis": analysis_result,
+                "strategy_adjustment": adjustment_result,
+                "effect_verification": verification_result,
+            },
+            "loop_success": self._evaluate_loop_success(
+                analysis_result, adjustment_result, verification_result
+            ),
+            "next_execution_time": datetime.now()
+            + timedelta(days=verification_days),  # type: ignore
+        }
+
+    def _build_loop_record(self, loop_result: dict[str, Any]) -> IntelligentTrainingLoop:
+        """由闭环结果构建执行记录."""
+        return IntelligentTrainingLoop(
+            student_id=loop_result["student_id"],
+            training_type=TrainingType(loop_result["training_type"]),
+            execution_time=loop_result["execution_time"],
+            next_execution_time=loop_result["next_execution_time"],
+            data_collection_result=loop_result["phases"]["data_collection"],
+            ai_analysis_result=loop_result["phases"]["ai_analysis"],
+            strategy_adjustment_result=loop_result["phases"]["strategy_adjustment"],
+            effect_verification_result=loop_result["phases"]["effect_verification"],
+            loop_success=loop_result["loop_success"],
+            ai_analysis_accuracy=loop_result["phases"]["ai_analysis"].get(
+                "analysis_accuracy", 0.0
+            ),
+            improvement_rate=loop_result["phases"]["effect_verification"]
+            .get("improvement_analysis", {})
+            .get("improvement_rate", 0.0),
+        )
+
     async def _record_loop_execution(self, loop_result: dict[str, Any]) -> None:
         """记录闭环执行结果."""
         try:
-            from app.training.models.training_models import IntelligentTrainingLoop
-
-            loop_record = IntelligentTrainingLoop(
-                student_id=loop_result["student_id"],
-                training_type=TrainingType(loop_result["training_type"]),
-                execution_time=loop_result["execution_time"],
-                next_execution_time=loop_result["next_execution_time"],
-                data_collection_result=loop_result["phases"]["data_collection"],
-                ai_analysis_result=loop_result["phases"]["ai_analysis"],
-                strategy_adjustment_result=loop_result["phases"]["strategy_adjustment"],
-                effect_verification_result=loop_result["phases"]["effect_verification"],
-                loop_success=loop_result["loop_success"],
-                ai_analysis_accuracy=loop_result["phases"]["ai_analysis"].get(
-                    "analysis_accuracy", 0.0
-                ),
-                improvement_rate=loop_result["phases"]["effect_verification"]
-                .get("improvement_analysis", {})
-                .get("improvement_rate", 0.0),
-            )
-
-            self.db.add(loop_record)
+            self.db.add(self._build_loop_record(loop_result))
             await self.db.commit()
 
         except Exception as e:
             logger.error(f"记录闭环执行结果失败: {str(e)}")
             await self.db.rollback()
 
+    def _performance_from_frame(self, frame: LearningRecordFrame, days: int) -> dict[str, Any]:
+        """最近 days 天的表现（与 helpers.get_baseline_performance 口径一致）."""
+        recent_mask = frame.created_since(datetime.now(UTC) - timedelta(days=days))
+        if not recent_mask.any():
+            return {"accuracy": 0.0, "total_questions": 0, "avg_time": 0.0}
+
+        # 记录按时间升序，窗口内的记录是末尾的连续区间
+        recent = frame.slice_rows(int(recent_mask.argmax()))
+        return {
+            "accuracy": recent.accuracy(),
+            "total_questions": len(recent),
+            "avg_time": recent.average_time(),
+            "period_days": days,
+        }
+
     async def _assess_data_quality(
         self,
         training_records: list[dict[str, Any]],
@@ -880,31 +939,25 @@ def _analyze_difficulty_progression(
             "difficulty_range": [min(difficulty_levels), max(difficulty_levels)],
         }
 
-    def _calculate_learning_velocity(
-        self, sessions: list[TrainingSession]
-    ) -> dict[str, Any]:
-        """计算学习速度."""
-        if not sessions:
+    def _calculate_learning_velocity(self, frame: LearningRecordFrame) -> dict[str, Any]:
+        """计算学习速度 - 按会话统计每分钟正确答题数."""
+        if not len(frame):
             return {"velocity": 0.0, "trend": "no_data"}
 
-        # 计算每个会话的效率
-        velocities = []
-        for session in sessions:
-            if session.time_spent and session.time_spent > 0:
-                velocity = session.correct_answers / (
-                    session.time_spent / 60
-                )  # 每分钟正确答题数
-                velocities.append(velocity)
+        # 按会话分组，会话按首题时间排序
+        sessions = frame.group_by_session()
+        timed = sessions["total_time"] > 0
+        velocities = sessions["correct"][timed] / (sessions["total_time"][timed] / 60)
 
-        if not velocities:
+        if not len(velocities):
             return {"velocity": 0.0, "trend": "no_data"}
 
-        avg_velocity = sum(velocities) / len(velocities)
+        avg_velocity = float(velocities.mean())
 
         # 分析趋势
         if len(velocities) >= 3:
-            recent_avg = sum(velocities[-3:]) / 3
-            early_avg = sum(velocities[:3]) / 3
+            recent_avg = float(velocities[-3:].mean())
+            early_avg = float(velocities[:3].mean())
             trend = (
                 "improving"
                 if recent_avg > early_avg * 1.1
@@ -918,39 +971,24 @@ def _calculate_learning_velocity(
         return {
             "velocity": avg_velocity,
             "trend": trend,
-            "velocity_range": [min(velocities), max(velocities)],
+            "velocity_range": [float(velocities.min()), float(velocities.max())],
         }
 
-    def _analyze_answer_patterns(self, records: list[TrainingRecord]) -> dict[str, Any]:
+    def _analyze_answer_patterns(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """分析答题模式."""
-        if not records:
+        if not len(frame):
             return {"pattern": "no_data"}
 
-        correct_count = sum(1 for r in records if r.is_correct)
-        accuracy_rate = correct_count / len(records)
+        accuracy_rate = frame.accuracy()
 
         # 分析连续正确/错误模式
-        max_correct_streak = 0
-        max_incorrect_streak = 0
-        current_correct_streak = 0
-        current_incorrect_streak = 0
-
-        for record in records:
-            if record.is_correct:
-                current_correct_streak += 1
-                current_incorrect_streak = 0
-                max_correct_streak = max(max_correct_streak, current_correct_streak)
-            else:
-                current_incorrect_streak += 1
-                current_correct_streak = 0
-                max_incorrect_streak = max(
-                    max_incorrect_streak, current_incorrect_streak
-                )
+        correct_streaks = run_lengths(frame.is_correct)
+        incorrect_streaks = run_lengths(~frame.is_correct)
 
         return {
             "accuracy_rate": accuracy_rate,
-            "max_correct_streak": max_correct_streak,
-            "max_incorrect_streak": max_incorrect_streak,
+            "max_correct_streak": int(correct_streaks.max(initial=0)),
+            "max_incorrect_streak": int(incorrect_streaks.max(initial=0)),
             "pattern": (
                 "consistent"
                 if accuracy_rate > 0.8
@@ -960,73 +998,62 @@ def _analyze_answer_patterns(self, records: list[TrainingRecord]) -> dict[str, A
             ),
         }
 
-    def _analyze_time_patterns(self, records: list[TrainingRecord]) -> dict[str, Any]:
+    def _analyze_time_patterns(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """分析时间模式."""
-        if not records:
+        if not len(frame):
             return {"pattern": "no_data"}
 
-        time_spent_list = [r.time_spent for r in records if r.time_spent]
-        if not time_spent_list:
+        time_spent = frame.valid_times
+        if not len(time_spent):
             return {"pattern": "no_time_data"}
 
-        avg_time = sum(time_spent_list) / len(time_spent_list)
+        avg_time = float(time_spent.mean())
 
         return {
             "average_time": avg_time,
-            "time_range": [min(time_spent_list), max(time_spent_list)],
+            "time_range": [float(time_spent.min()), float(time_spent.max())],
             "pattern": (
                 "fast" if avg_time < 30 else "slow" if avg_time > 120 else "normal"
             ),
         }
 
-    def _analyze_error_patterns(self, records: list[TrainingRecord]) -> dict[str, Any]:
+    def _analyze_error_patterns(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """分析错误模式."""
-        incorrect_records = [r for r in records if not r.is_correct]
-        if not incorrect_records:
+        incorrect = ~frame.is_correct
+        error_count = int(incorrect.sum())
+        if not error_count:
             return {"pattern": "no_errors"}
 
         # 分析错误的知识点分布
-        error_knowledge_points = []
-        for record in incorrect_records:
-            error_knowledge_points.extend(record.knowledge_points_weak)
-
-        from collections import Counter
-
-        error_distribution = Counter(error_knowledge_points)
+        error_distribution = frame.group_by_knowledge_point(incorrect)
+        top_error_areas = sorted(
+            error_distribution.items(),
+            key=lambda item: item[1]["total_attempts"],
+            reverse=True,
+        )[:5]
 
         return {
-            "error_count": len(incorrect_records),
-            "error_rate": len(incorrect_records) / len(records),
-            "top_error_areas": dict(error_distribution.most_common(5)),
+            "error_count": error_count,
+            "error_rate": error_count / len(frame),
+            "top_error_areas": {
+                point: stats["total_attempts"] for point, stats in top_error_areas
+            },
             "pattern": "concentrated" if len(error_distribution) <= 3 else "scattered",
         }
 
-    def _calculate_engagement_metrics(
-        self, records: list[TrainingRecord]
-    ) -> dict[str, Any]:
+    def _calculate_engagement_metrics(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """计算参与度指标."""
-        if not records:
+        if not len(frame):
             return {"engagement": "no_data"}
 
-        # 基于答题时间和AI置信度计算参与度
-        engagement_scores = []
-        for record in records:
-            score = 0.5  # 基础分
-
-            # 时间因素
-            if record.time_spent:
-                if 30 <= record.time_spent <= 120:  # 合理时间范围
-                    score += 0.3
-                elif record.time_spent < 10:  # 过快可能不认真
-                    score -= 0.2
-
-            # AI置信度因素
-            if record.ai_confidence and record.ai_confidence > 0.8:
-                score += 0.2
-
-            engagement_scores.append(max(0, min(1, score)))
+        # 基于答题时间和AI置信度计算参与度，基础分0.5
+        time_spent = frame.time_spent
+        scores = np.full(len(frame), 0.5)
+        scores += np.where((time_spent >= 30) & (time_spent <= 120), 0.3, 0.0)  # 合理时间范围
+        scores -= np.where((time_spent > 0) & (time_spent < 10), 0.2, 0.0)  # 过快可能不认真
+        scores += np.where(frame.ai_confidence > 0.8, 0.2, 0.0)
 
-        avg_engagement = sum(engagement_scores) / len(engagement_scores)
+        avg_engagement = float(scores.clip(0, 1).mean())
 
         return {
             "engagement_score": avg_engagement,
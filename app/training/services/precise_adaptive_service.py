@@ -20,6 +20,13 @@
     TrainingRecord,
     TrainingSession,
 )
+from app.training.utils.record_frame import (
+    DEFAULT_KNOWLEDGE_POINT,
+    LearningRecordFrame,
+    chunk_means,
+    load_learning_record_frame,
+    run_lengths,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +34,9 @@
 class PreciseAdaptiveService:
     """精确自适应算法服务 - 基于近10次正确率的精确调整."""
 
+    # 个性化学习档案使用的最近记录数
+    PROFILE_RECORDS_COUNT = 50
+
     def __init__(self, db: AsyncSession) -> None:
         self.db = db
 
@@ -47,11 +57,12 @@ async def execute_precise_adjustment(
         try:
             logger.info(f"开始执行精确自适应调整: 学生{student_id}, 训练类型{training_type}")
 
-            # 第一步：获取近10次答题记录
-            recent_records = await self._get_recent_training_records(
-                student_id,
-                training_type,
-                int(self.precise_config["recent_attempts_count"]),
+            # 第一步：一次加载个性化档案所需的记录，近10次答题取其末尾
+            profile_records = await self._load_recent_records(
+                student_id, training_type, self.PROFILE_RECORDS_COUNT
+            )
+            recent_records = profile_records.latest(
+                int(self.precise_config["recent_attempts_count"])
             )
 
             if len(recent_records) < self.precise_config["min_attempts_for_adjustment"]:
@@ -78,7 +89,7 @@ async def execute_precise_adjustment(
 
             # 第五步：计算个性化程度
             personalization_score = await self._calculate_personalization_score(
-                student_id, training_type, adjustment_decision
+                student_id, training_type, adjustment_decision, profile_records
             )
 
             # 第六步：应用调整（如果需要）
@@ -106,40 +117,25 @@ async def execute_precise_adjustment(
             logger.error(f"精确自适应调整执行失败: {str(e)}")
             raise
 
-    async def _get_recent_training_records(
+    async def _load_recent_records(
         self, student_id: int, training_type: TrainingType, count: int
-    ) -> list[TrainingRecord]:
-        """获取近N次训练记录."""
-        stmt = (
-            select(TrainingRecord)
-            .join(TrainingSession, TrainingRecord.session_id == TrainingSession.id)
-            .where(
-                and_(
-                    TrainingSession.student_id == student_id,
-                    TrainingSession.session_type == training_type,
-                )
-            )
-            .order_by(desc(TrainingRecord.created_at))
-            .limit(count)
+    ) -> LearningRecordFrame:
+        """加载近N次训练记录（列式，按时间升序）."""
+        return await load_learning_record_frame(
+            self.db, student_id, training_type=training_type, limit=count
         )
 
-        result = await self.db.execute(stmt)
-        return list(result.scalars().all())
-
-    def _calculate_recent_accuracy(
-        self, records: list[TrainingRecord]
-    ) -> dict[str, Any]:
+    def _calculate_recent_accuracy(self, frame: LearningRecordFrame) -> dict[str, Any]:
         """计算近期答题正确率分析."""
-        if not records:
+        if not len(frame):
             return {"accuracy": 0.0, "total_attempts": 0, "correct_attempts": 0}
 
-        correct_count = sum(1 for record in records if record.is_correct)
-        total_count = len(records)
+        correct_count = int(frame.is_correct.sum())
+        total_count = len(frame)
         accuracy = correct_count / total_count
 
         # 分析答题模式
-        recent_5 = records[:5] if len(records) >= 5 else records
-        recent_5_accuracy = sum(1 for r in recent_5 if r.is_correct) / len(recent_5)
+        recent_5_accuracy = frame.latest(5).accuracy()
 
         return {
             "accuracy": accuracy,
@@ -149,32 +145,22 @@ def _calculate_recent_accuracy(
             "accuracy_trend": (
                 "improving" if recent_5_accuracy > accuracy else "declining"
             ),
-            "consistency_score": self._calculate_consistency_score(records),
+            "consistency_score": self._calculate_consistency_score(frame),
         }
 
-    def _calculate_consistency_score(self, records: list[TrainingRecord]) -> float:
+    def _calculate_consistency_score(self, frame: LearningRecordFrame) -> float:
         """计算答题一致性分数."""
-        if len(records) < 5:
+        if len(frame) < 5:
             return 0.5
 
-        # 计算每5题的正确率方差
-        chunk_size = 5
-        chunk_accuracies = []
-
-        for i in range(0, len(records), chunk_size):
-            chunk = records[i : i + chunk_size]
-            if len(chunk) >= 3:  # 至少3题才计算
-                accuracy = sum(1 for r in chunk if r.is_correct) / len(chunk)
-                chunk_accuracies.append(accuracy)
+        # 从最近一题起每5题一组计算正确率，至少3题才计算
+        chunk_accuracies = chunk_means(frame.is_correct[::-1], size=5, min_size=3)
 
         if len(chunk_accuracies) < 2:
             return 0.5
 
         # 计算方差，方差越小一致性越高
-        mean_accuracy = sum(chunk_accuracies) / len(chunk_accuracies)
-        variance = sum((acc - mean_accuracy) ** 2 for acc in chunk_accuracies) / len(
-            chunk_accuracies
-        )
+        variance = float(chunk_accuracies.var())
 
         # 将方差转换为一致性分数（0-1）
         consistency = max(0.0, 1.0 - variance * 4)  # 方差*4作为惩罚因子
@@ -314,12 +300,13 @@ async def _calculate_personalization_score(
         student_id: int,
         training_type: TrainingType,
         adjustment_decision: dict[str, Any],
+        profile_records: LearningRecordFrame | None = None,
     ) -> float:
         """计算个性化程度>80%量化机制."""
         try:
             # 获取学生个人学习特征
             learning_profile = await self._build_learning_profile(
-                student_id, training_type
+                student_id, training_type, profile_records
             )
 
             # 计算个性化匹配度
@@ -492,15 +479,19 @@ async def _get_records_after_time(
         return list(result.scalars().all())
 
     async def _build_learning_profile(
-        self, student_id: int, training_type: TrainingType
+        self,
+        student_id: int,
+        training_type: TrainingType,
+        recent_records: LearningRecordFrame | None = None,
     ) -> dict[str, Any]:
         """构建学生个人学习特征档案."""
-        # 获取最近30天的训练记录
-        recent_records = await self._get_recent_training_records(
-            student_id, training_type, 50
-        )
+        # 获取最近50次的训练记录，调用方已加载时直接复用
+        if recent_records is None:
+            recent_records = await self._load_recent_records(
+                student_id, training_type, self.PROFILE_RECORDS_COUNT
+            )
 
-        if not recent_records:
+        if not len(recent_records):
             return {
                 "learning_pace": "unknown",
                 "difficulty_preference": "unknown",
@@ -535,25 +526,20 @@ async def _build_learning_profile(
             "profile_confidence": min(1.0, len(recent_records) / 30),  # 数据越多置信度越高
         }
 
-    def _analyze_learning_pace(self, records: list[TrainingRecord]) -> str:
+    def _analyze_learning_pace(self, frame: LearningRecordFrame) -> str:
         """分析学习节奏."""
-        if len(records) < 10:
+        if len(frame) < 10:
             return "unknown"
 
-        # 计算平均答题时间
-        avg_time = sum(r.time_spent for r in records if r.time_spent) / len(records)
+        # 计算平均答题时间（缺失用时按0计）
+        times = frame.time_spent.clip(min=0)
+        avg_time = float(times.mean())
 
-        # 分析时间趋势
-        recent_10 = records[:10]
-        early_10 = records[-10:] if len(records) >= 20 else records[10:]
-
-        if early_10:
-            recent_avg = sum(r.time_spent for r in recent_10 if r.time_spent) / len(
-                recent_10
-            )
-            early_avg = sum(r.time_spent for r in early_10 if r.time_spent) / len(
-                early_10
-            )
+        # 分析时间趋势：最近10题对比最早10题
+        early_10 = times[:10] if len(frame) >= 20 else times[:-10]
+        if len(early_10):
+            recent_avg = float(times[-10:].mean())
+            early_avg = float(early_10.mean())
 
             if recent_avg < early_avg * 0.8:
                 return "accelerating"  # 越来越快
@@ -619,55 +605,30 @@ async def _analyze_difficulty_preference(
 
         return best_difficulty.name.lower()
 
-    def _identify_knowledge_gaps(self, records: list[TrainingRecord]) -> list[str]:
-        """识别知识薄弱点."""
-        knowledge_stats = {}
-
-        for record in records:
-            if hasattr(record, "knowledge_points") and record.knowledge_points:
-                for point in record.knowledge_points:
-                    if point not in knowledge_stats:
-                        knowledge_stats[point] = {"total": 0, "correct": 0}
-
-                    knowledge_stats[point]["total"] += 1
-                    if record.is_correct:
-                        knowledge_stats[point]["correct"] += 1
-
-        # 识别薄弱点（正确率<70%且至少做过5题）
-        weak_points = []
-        for point, stats in knowledge_stats.items():
-            if stats["total"] >= 5:
-                accuracy = stats["correct"] / stats["total"]
-                if accuracy < 0.7:
-                    weak_points.append(point)
-
-        return weak_points
-
-    def _analyze_learning_style(self, records: list[TrainingRecord]) -> str:
+    def _identify_knowledge_gaps(self, frame: LearningRecordFrame) -> list[str]:
+        """识别知识薄弱点（正确率<70%且至少做过5题）."""
+        knowledge_stats = frame.group_by_knowledge_point()
+        return [
+            point
+            for point, stats in knowledge_stats.items()
+            if point != DEFAULT_KNOWLEDGE_POINT
+            and stats["total_attempts"] >= 5
+            and stats["accuracy"] < 0.7
+        ]
+
+    def _analyze_learning_style(self, frame: LearningRecordFrame) -> str:
         """分析学习风格."""
-        if len(records) < 10:
+        if len(frame) < 10:
             return "unknown"
 
-        # 分析答题模式
-        correct_streak_lengths = []
-        current_streak = 0
-
-        for record in records:
-            if record.is_correct:
-                current_streak += 1
-            else:
-                if current_streak > 0:
-                    correct_streak_lengths.append(current_streak)
-                current_streak = 0
-
-        if current_streak > 0:
-            correct_streak_lengths.append(current_streak)
+        # 分析连续正确模式
+        correct_streak_lengths = run_lengths(frame.is_correct)
 
-        if not correct_streak_lengths:
+        if not len(correct_streak_lengths):
             return "struggling"
 
-        avg_streak = sum(correct_streak_lengths) / len(correct_streak_lengths)
-        max_streak = max(correct_streak_lengths)
+        avg_streak = float(correct_streak_lengths.mean())
+        max_streak = int(correct_streak_lengths.max())
 
         # 基于连续正确模式判断学习风格
         if avg_streak >= 5 and max_streak >= 8:
@@ -0,0 +1,304 @@
+"""预生成题库库存服务.
+
+题目按 (训练类型, 难度, 题型, 知识点) 划分为库存桶（Question.stock_key），
+训练会话开始时只从库存中抽题，不等待AI生成：
+
+- 每道题带一个随机抽样键（Question.sampling_key），抽题时取随机起点沿索引顺序读取，
+  不足时从头回绕，是一次索引定位而不是 ORDER BY random() 全量排序；
+  抽中的题目重新生成抽样键，避免同一批题总是一起出现
+- 排除学生做过的题；未做过的题不足时再放宽为允许重复
+- 后台补货任务把各桶维持在低水位之上，抽题不足的桶额外补一批
+"""
+
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any, cast
+
+from redis.exceptions import RedisError
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.shared.models.enums import DifficultyLevel, QuestionType, TrainingType
+from app.training.models.training_models import Question, TrainingRecord
+
+logger = logging.getLogger(__name__)
+
+GENERAL_KNOWLEDGE_POINT = "*"
+
+# 各训练类型的题型分布（权重）
+QUESTION_TYPE_MIX: dict[TrainingType, dict[QuestionType, int]] = {
+    TrainingType.VOCABULARY: {
+        QuestionType.MULTIPLE_CHOICE: 6,
+        QuestionType.FILL_BLANK: 3,
+        QuestionType.TRANSLATION_EN_TO_CN: 1,
+    },
+    TrainingType.LISTENING: {QuestionType.LISTENING_COMPREHENSION: 1},
+    TrainingType.READING: {QuestionType.READING_COMPREHENSION: 1},
+    TrainingType.WRITING: {QuestionType.ESSAY: 1},
+    TrainingType.TRANSLATION: {
+        QuestionType.TRANSLATION_EN_TO_CN: 1,
+        QuestionType.TRANSLATION_CN_TO_EN: 1,
+    },
+}
+
+TRACKED_BUCKETS_KEY = "question_inventory:tracked"  # 被请求过的知识点库存桶
+SHORT_BUCKETS_KEY = "question_inventory:short"  # 抽题时未做过的题不足的库存桶
+
+StockGenerator = Callable[
+    [TrainingType, DifficultyLevel, QuestionType, str | None, int],
+    Awaitable[list[Question]],
+]
+
+
+def stock_key(
+    training_type: TrainingType,
+    difficulty_level: DifficultyLevel,
+    question_type: QuestionType,
+    knowledge_point: str | None = None,
+) -> str:
+    """库存桶标识（使用枚举名，与数据库中枚举列的存储值一致）."""
+    return (
+        f"{training_type.name}:{difficulty_level.name}:{question_type.name}:"
+        f"{knowledge_point or GENERAL_KNOWLEDGE_POINT}"
+    )
+
+
+def parse_stock_key(
+    key: str,
+) -> tuple[TrainingType, DifficultyLevel, QuestionType, str | None]:
+    """解析库存桶标识."""
+    training_type, difficulty_level, question_type, knowledge_point = key.split(":", 3)
+    return (
+        TrainingType[training_type],
+        DifficultyLevel[difficulty_level],
+        QuestionType[question_type],
+        None if knowledge_point == GENERAL_KNOWLEDGE_POINT else knowledge_point,
+    )
+
+
+def allocate_question_types(
+    training_type: TrainingType, count: int
+) -> dict[QuestionType, int]:
+    """按题型权重分配题量，余数按权重随机分配."""
+    mix = QUESTION_TYPE_MIX[training_type]
+    total = sum(mix.values())
+    allocation = {question_type: count * weight // total for question_type, weight in mix.items()}
+    remainder = count - sum(allocation.values())
+    if remainder > 0:
+        for question_type in random.choices(list(mix), weights=list(mix.values()), k=remainder):
+            allocation[question_type] += 1
+    return {question_type: n for question_type, n in allocation.items() if n > 0}
+
+
+def general_stock_keys() -> list[str]:
+    """所有通用（不限知识点）库存桶."""
+    return [
+        stock_key(training_type, difficulty_level, question_type)
+        for training_type, mix in QUESTION_TYPE_MIX.items()
+        for difficulty_level in DifficultyLevel
+        for question_type in mix
+    ]
+
+
+class QuestionInventoryService:
+    """预生成题库库存服务."""
+
+    def __init__(self, db: AsyncSession, redis_client: Any = None) -> None:
+        self.db = db
+        self._redis = redis_client
+
+    @property
+    def redis(self) -> Any:
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    # ==================== 抽题 ====================
+
+    async def draw(
+        self,
+        training_type: TrainingType,
+        difficulty_level: DifficultyLevel,
+        count: int,
+        knowledge_points: list[str] | None = None,
+        student_id: int | None = None,
+    ) -> list[Question]:
+        """按题型分布从库存抽题，优先知识点桶，其次通用桶"""
+        knowledge_point = knowledge_points[0] if knowledge_points else None
+        drawn: list[Question] = []
+        tracked_keys: list[str] = []
+        short_keys: list[str] = []
+
+        for question_type, type_count in allocate_question_types(training_type, count).items():
+            keys = [stock_key(training_type, difficulty_level, question_type)]
+            if knowledge_point:
+                keys.insert(
+                    0, stock_key(training_type, difficulty_level, question_type, knowledge_point)
+                )
+                tracked_keys.append(keys[0])
+
+            picked: list[Question] = []
+            # 先只抽学生没做过的题，不足时再允许重复
+            for unseen_only in (True, False):
+                for key in keys:
+                    need = type_count - len(picked)
+                    if need <= 0:
+                        break
+                    batch = await self._draw_from_stock(
+                        key,
+                        need,
+                        student_id if unseen_only else None,
+                        [question.id for question in drawn + picked],
+                    )
+                    picked.extend(batch)
+                    if unseen_only and len(batch) < need:
+                        short_keys.append(key)
+            drawn.extend(picked)
+
+        if drawn:
+            # 抽中的题目换新的抽样键，打散下一次抽题的相邻关系
+            await self.db.execute(
+                update(Question)
+                .where(Question.id.in_([question.id for question in drawn]))
+                .values(sampling_key=func.random())
+                .execution_options(synchronize_session=False)
+            )
+        await self._mark_buckets(tracked_keys, short_keys)
+        return drawn
+
+    async def _draw_from_stock(
+        self,
+        key: str,
+        count: int,
+        student_id: int | None,
+        exclude_ids: Sequence[int],
+    ) -> list[Question]:
+        """从随机起点沿抽样键索引读取，不足时回绕到开头"""
+        conditions = [Question.stock_key == key, Question.is_active == True]  # noqa: E712
+        if student_id is not None:
+            conditions.append(
+                ~exists().where(
+                    TrainingRecord.student_id == student_id,
+                    TrainingRecord.question_id == Question.id,
+                )
+            )
+        if exclude_ids:
+            conditions.append(Question.id.notin_(exclude_ids))
+
+        pivot = random.random()
+        questions: list[Question] = []
+        for window in (Question.sampling_key >= pivot, Question.sampling_key < pivot):
+            stmt = (
+                select(Question)
+                .where(*conditions, window)
+                .order_by(Question.sampling_key)
+                .limit(count - len(questions))
+            )
+            result = await self.db.execute(stmt)
+            questions.extend(result.scalars().all())
+            if len(questions) >= count:
+                break
+        return questions
+
+    async def _mark_buckets(self, tracked_keys: list[str], short_keys: list[str]) -> None:
+        """登记被请求的知识点桶和库存不足的桶，供补货任务使用（失败不影响抽题）"""
+        if not tracked_keys and not short_keys:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                if tracked_keys:
+                    pipe.sadd(TRACKED_BUCKETS_KEY, *tracked_keys)
+                if short_keys:
+                    pipe.sadd(SHORT_BUCKETS_KEY, *short_keys)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"登记题库库存需求失败: {e}")
+
+    # ==================== 补货 ====================
+
+    async def stock_levels(self) -> dict[str, int]:
+        """各库存桶的可用题目数"""
+        stmt = (
+            select(Question.stock_key, func.count(Question.id))
+            .where(Question.stock_key.isnot(None), Question.is_active == True)  # noqa: E712
+            .group_by(Question.stock_key)
+        )
+        result = await self.db.execute(stmt)
+        # 已排除 stock_key 为空的题目
+        return dict(cast(Sequence[tuple[str, int]], result.all()))
+
+    async def plan_replenishment(self) -> dict[str, int]:
+        """计算各库存桶需要补充的题量，库存最少的桶优先，总量不超过单轮上限"""
+        levels = await self.stock_levels()
+        try:
+            tracked = set(await self.redis.smembers(TRACKED_BUCKETS_KEY))
+            short = set(await self.redis.smembers(SHORT_BUCKETS_KEY))
+        except RedisError as e:
+            logger.warning(f"读取题库库存需求失败，仅补充通用库存: {e}")
+            tracked, short = set(), set()
+
+        low_water = settings.QUESTION_INVENTORY_LOW_WATER
+        high_water = settings.QUESTION_INVENTORY_HIGH_WATER
+        deficits: dict[str, int] = {}
+        for key in sorted(set(general_stock_keys()) | tracked | short):
+            level = levels.get(key, 0)
+            deficit = high_water - level if level < low_water else 0
+            if key in short:
+                # 学生抽不到新题：在上限内额外补一批
+                deficit = max(
+                    deficit,
+                    min(high_water - low_water, settings.QUESTION_INVENTORY_MAX_STOCK - level),
+                )
+            if deficit > 0:
+                deficits[key] = deficit
+
+        plan: dict[str, int] = {}
+        budget = settings.QUESTION_INVENTORY_MAX_PER_RUN
+        for key in sorted(deficits, key=lambda k: levels.get(k, 0)):
+            if budget <= 0:
+                break
+            plan[key] = min(deficits[key], budget)
+            budget -= plan[key]
+        return plan
+
+    async def replenish(self, generator: StockGenerator) -> dict[str, int]:
+        """按补货计划并发生成题目，每个库存桶生成完成后单独提交
+
+        generator 只调用AI构造题目、不访问数据库；并发度由 generator 自行限制。
+        """
+        plan = await self.plan_replenishment()
+        if not plan:
+            return {"bucket_count": 0, "question_count": 0}
+
+        async def generate(key: str, count: int) -> tuple[str, list[Question]]:
+            training_type, difficulty_level, question_type, knowledge_point = parse_stock_key(key)
+            return key, await generator(
+                training_type, difficulty_level, question_type, knowledge_point, count
+            )
+
+        question_count = 0
+        completed: list[str] = []
+        for task in asyncio.as_completed([generate(key, n) for key, n in plan.items()]):
+            try:
+                key, questions = await task
+            except Exception as e:
+                logger.warning(f"题库补货生成失败: {e}")
+                continue
+            if not questions:
+                continue
+            self.db.add_all(questions)
+            await self.db.commit()
+            question_count += len(questions)
+            completed.append(key)
+
+        if completed:
+            try:
+                await self.redis.srem(SHORT_BUCKETS_KEY, *completed)
+            except RedisError as e:
+                logger.warning(f"清理题库库存需求失败: {e}")
+
+        return {"bucket_count": len(completed), "question_count": question_count}
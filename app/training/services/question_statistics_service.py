@@ -0,0 +1,325 @@
+"""题目统计累计服务.
+
+答题时不再对题目的全部答题记录做聚合，而是维护可交换的累计量：
+答题次数、答对次数、得分总和、得分平方和；平均分、正确率和难度指数由累计量推导。
+
+- 提交答案后把增量累加到Redis哈希，提交耗时与题目被做过多少次无关，
+  也不会在请求事务里争用热门题目的行锁；Redis不可用时直接做原子自增（col = col + delta）
+- 定时任务把缓冲的增量按题目ID顺序批量写入
+- 对账任务按答题记录重算累计值以纠正漂移（如写入后进程崩溃导致的重复累加），
+  并计算区分度指数：按学生整体正确率排名，高分组与低分组在该题上的正确率之差
+- 批量写入与对账共用一把Redis锁，对账期间增量不会在读取与替换之间被写入题目表
+"""
+
+import logging
+from dataclasses import dataclass
+from collections.abc import Sequence
+from typing import Any
+
+from redis.exceptions import RedisError
+from sqlalchemy import (
+    Float,
+    Integer,
+    Table,
+    any_,
+    bindparam,
+    cast,
+    func,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import SWAP_HASH_SCRIPT, get_redis_client
+from app.training.models.training_models import Question, TrainingRecord
+
+logger = logging.getLogger(__name__)
+
+STATS_DELTA_KEY = "question_stats:deltas"  # 待写入的增量
+STATS_FLUSHING_KEY = "question_stats:flushing"  # 正在写入的增量
+STATS_LOCK_KEY = "question_stats:lock"  # 批量写入与对账互斥
+STATS_LOCK_TIMEOUT = 600  # 秒，持锁进程崩溃后锁自动过期
+
+
+@dataclass
+class StatisticsDelta:
+    """单道题目的统计增量"""
+
+    count: int = 0
+    correct: int = 0
+    score_sum: float = 0.0
+    score_sq_sum: float = 0.0
+
+
+def parse_deltas(*counters: dict[str, str]) -> dict[int, StatisticsDelta]:
+    """解析Redis哈希中的增量（字段格式：题目ID|指标），多个哈希的增量相加"""
+    deltas: dict[int, StatisticsDelta] = {}
+    for fields in counters:
+        for field_name, value in fields.items():
+            question_id, metric = field_name.split("|", 1)
+            delta = deltas.setdefault(int(question_id), StatisticsDelta())
+            if metric in ("count", "correct"):
+                setattr(delta, metric, getattr(delta, metric) + int(value))
+            elif metric in ("score_sum", "score_sq_sum"):
+                setattr(delta, metric, getattr(delta, metric) + float(value))
+    return deltas
+
+
+def _increment_statement() -> Any:
+    """按题目ID累加增量并重算推导指标（executemany）"""
+    questions: Table = Question.__table__  # type: ignore[assignment]
+    count = questions.c.usage_count + bindparam("d_count")
+    correct = questions.c.correct_count + bindparam("d_correct")
+    score_sum = questions.c.score_sum + bindparam("d_score_sum", type_=Float)
+    return (
+        update(questions)
+        .where(questions.c.id == bindparam("b_id"))
+        .values(
+            usage_count=count,
+            correct_count=correct,
+            score_sum=score_sum,
+            score_sq_sum=questions.c.score_sq_sum + bindparam("d_score_sq_sum", type_=Float),
+            average_score=score_sum / func.greatest(count, 1),
+            correct_rate=cast(correct, Float) / func.greatest(count, 1),
+            difficulty_index=score_sum / func.nullif(count * questions.c.max_score, 0),
+        )
+    )
+
+
+def _replace_statement() -> Any:
+    """按题目ID整体替换累计值（对账用，executemany）"""
+    questions: Table = Question.__table__  # type: ignore[assignment]
+    score_sum = bindparam("r_score_sum", type_=Float)
+    return (
+        update(questions)
+        .where(questions.c.id == bindparam("b_id"))
+        .values(
+            usage_count=bindparam("r_count"),
+            correct_count=bindparam("r_correct"),
+            score_sum=score_sum,
+            score_sq_sum=bindparam("r_score_sq_sum", type_=Float),
+            average_score=bindparam("r_average_score", type_=Float),
+            correct_rate=bindparam("r_correct_rate", type_=Float),
+            difficulty_index=score_sum
+            / func.nullif(bindparam("r_count") * questions.c.max_score, 0),
+            discrimination_index=bindparam("r_discrimination", type_=Float),
+        )
+    )
+
+
+class QuestionStatisticsService:
+    """题目统计累计服务"""
+
+    def __init__(self, db: AsyncSession, redis_client: Any = None) -> None:
+        self.db = db
+        self._redis = redis_client
+        self._swap_script: Any = None
+
+    @property
+    def redis(self) -> Any:
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    async def record_attempt(
+        self, question_id: int, score: float, is_correct: bool | None
+    ) -> None:
+        """记录一次答题（答题记录提交后调用）"""
+        delta = StatisticsDelta(
+            count=1,
+            correct=1 if is_correct else 0,
+            score_sum=float(score),
+            score_sq_sum=float(score) ** 2,
+        )
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hincrby(STATS_DELTA_KEY, f"{question_id}|count", delta.count)
+                if delta.correct:
+                    pipe.hincrby(STATS_DELTA_KEY, f"{question_id}|correct", delta.correct)
+                pipe.hincrbyfloat(STATS_DELTA_KEY, f"{question_id}|score_sum", delta.score_sum)
+                pipe.hincrbyfloat(
+                    STATS_DELTA_KEY, f"{question_id}|score_sq_sum", delta.score_sq_sum
+                )
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"缓冲题目统计增量失败，直接写入: {e}")
+            await self._apply_deltas({question_id: delta})
+            await self.db.commit()
+
+    async def flush(self) -> dict[str, int]:
+        """把缓冲的增量批量写入题目表
+
+        写入提交后、清理Redis前进程崩溃会导致下次重复累加，由对账任务纠正。
+        对账正在进行时跳过本次写入，增量留到下次。
+        """
+        lock = self.redis.lock(STATS_LOCK_KEY, timeout=STATS_LOCK_TIMEOUT)
+        if not await lock.acquire(blocking=False):
+            logger.info("题目统计对账进行中，跳过本次增量写入")
+            return {"question_count": 0, "attempt_count": 0}
+        try:
+            if self._swap_script is None:
+                self._swap_script = self.redis.register_script(SWAP_HASH_SCRIPT)
+            if not await self._swap_script(keys=[STATS_DELTA_KEY, STATS_FLUSHING_KEY]):
+                return {"question_count": 0, "attempt_count": 0}
+
+            deltas = parse_deltas(await self.redis.hgetall(STATS_FLUSHING_KEY))
+            if deltas:
+                await self._apply_deltas(deltas)
+                await self.db.commit()
+            await self.redis.delete(STATS_FLUSHING_KEY)
+        finally:
+            await lock.release()
+
+        return {
+            "question_count": len(deltas),
+            "attempt_count": sum(delta.count for delta in deltas.values()),
+        }
+
+    async def _apply_deltas(self, deltas: dict[int, StatisticsDelta]) -> None:
+        """原子累加增量，按题目ID顺序加锁避免并发写入互相死锁"""
+        rows = [
+            {
+                "b_id": question_id,
+                "d_count": delta.count,
+                "d_correct": delta.correct,
+                "d_score_sum": delta.score_sum,
+                "d_score_sq_sum": delta.score_sq_sum,
+            }
+            for question_id, delta in sorted(deltas.items())
+        ]
+        await self.db.execute(_increment_statement(), rows)
+
+    async def pending_deltas(self) -> dict[int, StatisticsDelta]:
+        """尚未写入题目表的增量"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(STATS_DELTA_KEY)
+            pipe.hgetall(STATS_FLUSHING_KEY)
+            pending, flushing = await pipe.execute()
+        return parse_deltas(pending, flushing)
+
+    async def reconcile(self, batch_size: int | None = None) -> dict[str, int]:
+        """按答题记录重算题目累计值和区分度，按题目ID分批提交
+
+        答题记录中已包含、但增量尚未写入的部分先扣除，避免写入后重复计算。
+        学生能力分组在分批前计算一次，各批只聚合本批题目的答题记录。
+        每批持有与批量写入共用的锁，聚合前后各读取一次待写入增量：
+        聚合期间有新答题的题目无法确定增量是否已计入聚合结果，跳过留待下次对账。
+        """
+        batch_size = batch_size or settings.QUESTION_STATS_RECONCILE_BATCH_SIZE
+        correct = cast(TrainingRecord.is_correct, Float)
+        upper_ids, lower_ids = await self._ability_groups()
+        upper = bindparam("upper_ids", upper_ids, type_=ARRAY(Integer))
+        lower = bindparam("lower_ids", lower_ids, type_=ARRAY(Integer))
+
+        after_id = 0
+        question_count = 0
+        skipped_count = 0
+        while True:
+            stmt = (
+                select(
+                    TrainingRecord.question_id,
+                    func.count(TrainingRecord.id).label("attempt_count"),
+                    func.count(TrainingRecord.id)
+                    .filter(TrainingRecord.is_correct == True)  # noqa: E712
+                    .label("correct_count"),
+                    func.coalesce(func.sum(TrainingRecord.score), 0).label("score_sum"),
+                    func.coalesce(
+                        func.sum(TrainingRecord.score * TrainingRecord.score), 0
+                    ).label("score_sq_sum"),
+                    func.avg(correct)
+                    .filter(TrainingRecord.student_id == any_(upper))
+                    .label("upper_rate"),
+                    func.avg(correct)
+                    .filter(TrainingRecord.student_id == any_(lower))
+                    .label("lower_rate"),
+                )
+                .where(TrainingRecord.question_id > after_id)
+                .group_by(TrainingRecord.question_id)
+                .order_by(TrainingRecord.question_id)
+                .limit(batch_size)
+            )
+            async with self.redis.lock(
+                STATS_LOCK_KEY, timeout=STATS_LOCK_TIMEOUT, blocking_timeout=STATS_LOCK_TIMEOUT
+            ):
+                pending = await self.pending_deltas()
+                rows = (await self.db.execute(stmt)).all()
+                if not rows:
+                    break
+                latest = await self.pending_deltas()
+                params, skipped = self._reconcile_params(rows, pending, latest)
+                if params:
+                    await self.db.execute(_replace_statement(), params)
+                await self.db.commit()
+
+            question_count += len(params)
+            skipped_count += skipped
+            after_id = rows[-1].question_id
+            if len(rows) < batch_size:
+                break
+
+        if skipped_count:
+            logger.info(f"题目统计对账跳过{skipped_count}道对账期间有新答题的题目")
+        return {"question_count": question_count, "skipped_count": skipped_count}
+
+    async def _ability_groups(self) -> tuple[list[int], list[int]]:
+        """按整体正确率的百分位排名划分高分组和低分组学生（每次对账只计算一次）"""
+        group = settings.QUESTION_STATS_DISCRIMINATION_GROUP
+        ranks = (
+            select(
+                TrainingRecord.student_id,
+                func.percent_rank()
+                .over(order_by=func.avg(cast(TrainingRecord.is_correct, Float)))
+                .label("ability_rank"),
+            )
+            .group_by(TrainingRecord.student_id)
+            .subquery()
+        )
+        rows = (
+            await self.db.execute(
+                select(ranks.c.student_id, ranks.c.ability_rank).where(
+                    or_(ranks.c.ability_rank >= 1 - group, ranks.c.ability_rank <= group)
+                )
+            )
+        ).all()
+        upper_ids = [row.student_id for row in rows if row.ability_rank >= 1 - group]
+        lower_ids = [row.student_id for row in rows if row.ability_rank <= group]
+        return upper_ids, lower_ids
+
+    @staticmethod
+    def _reconcile_params(
+        rows: Sequence[Any],
+        pending: dict[int, StatisticsDelta],
+        latest: dict[int, StatisticsDelta],
+    ) -> tuple[list[dict[str, Any]], int]:
+        """由聚合结果扣除待写入增量得到替换参数，返回参数和跳过的题目数"""
+        params = []
+        skipped = 0
+        for row in rows:
+            delta = pending.get(row.question_id, StatisticsDelta())
+            if latest.get(row.question_id, StatisticsDelta()) != delta:
+                skipped += 1
+                continue
+            count = max(0, row.attempt_count - delta.count)
+            correct_count = max(0, row.correct_count - delta.correct)
+            score_sum = max(0.0, float(row.score_sum) - delta.score_sum)
+            discrimination = (
+                float(row.upper_rate) - float(row.lower_rate)
+                if row.upper_rate is not None and row.lower_rate is not None
+                else None
+            )
+            params.append(
+                {
+                    "b_id": row.question_id,
+                    "r_count": count,
+                    "r_correct": correct_count,
+                    "r_score_sum": score_sum,
+                    "r_score_sq_sum": max(0.0, float(row.score_sq_sum) - delta.score_sq_sum),
+                    "r_average_score": score_sum / count if count else 0.0,
+                    "r_correct_rate": correct_count / count if count else 0.0,
+                    "r_discrimination": discrimination,
+                }
+            )
+        return params, skipped
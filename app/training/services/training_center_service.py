@@ -1,21 +1,24 @@
 """学生综合训练中心核心服务."""
 
+import asyncio
 import json
-import random
 from datetime import datetime
-from typing import Any, cast
+from typing import Any
 from loguru import logger
-from sqlalchemy import Float, and_, desc, func, select
+from sqlalchemy import and_, desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.ai.services.deepseek_service import DeepSeekService
+from app.analytics.services.learning_analytics_service import invalidate_user_analysis
+from app.core.config import settings
 from app.shared.models.enums import (
     DifficultyLevel,
     GradingStatus,
     QuestionType,
     TrainingType,
 )
+from app.shared.utils.priority_scheduler import TaskCategory
 from app.training.models.training_models import (
     Question,
     TrainingRecord,
@@ -29,6 +32,73 @@
     TrainingSessionRequest,
     TrainingSessionResponse,
 )
+from app.training.services.question_inventory_service import (
+    QUESTION_TYPE_MIX,
+    QuestionInventoryService,
+    stock_key,
+)
+from app.training.services.question_statistics_service import QuestionStatisticsService
+
+# 各训练类型库存题目的生成参数
+STOCK_QUESTION_PROFILES: dict[TrainingType, dict[str, Any]] = {
+    TrainingType.VOCABULARY: {
+        "max_score": 10.0,
+        "time_limit": 180,  # 选择题120秒
+        "knowledge_points": ["vocabulary", "基础词汇"],
+        "grading_criteria": {"accuracy": 1.0},
+        "max_tokens": 800,
+        "temperature": 0.7,
+        "questions_per_request": 1,
+    },
+    TrainingType.LISTENING: {
+        "max_score": 15.0,
+        "time_limit": 300,  # 5分钟
+        "knowledge_points": ["listening", "英语听力"],
+        "grading_criteria": {"accuracy": 0.7, "comprehension": 0.3},
+        "max_tokens": 1000,
+        "temperature": 0.7,
+        "questions_per_request": 1,
+    },
+    TrainingType.READING: {
+        "max_score": 12.0,
+        "time_limit": 400,  # 6分40秒
+        "knowledge_points": ["reading", "英语阅读"],
+        "grading_criteria": {"comprehension": 1.0},
+        "max_tokens": 1500,
+        "temperature": 0.7,
+        "questions_per_request": 4,  # 每篇阅读材料对应4个题目
+    },
+    TrainingType.WRITING: {
+        "max_score": 25.0,  # 按四级写作评分标准
+        "time_limit": 1800,  # 30分钟
+        "knowledge_points": ["writing", "英语写作"],
+        "grading_criteria": {"content": 0.35, "language": 0.35, "structure": 0.3},
+        "max_tokens": 600,
+        "temperature": 0.8,
+        "questions_per_request": 1,
+    },
+    TrainingType.TRANSLATION: {
+        "max_score": 20.0,
+        "time_limit": 600,  # 10分钟
+        "knowledge_points": ["translation", "英汉翻译"],
+        "grading_criteria": {"accuracy": 0.5, "fluency": 0.3, "completeness": 0.2},
+        "max_tokens": 800,
+        "temperature": 0.7,
+        "questions_per_request": 1,
+    },
+}
+
+# 库存题目content中必须非空的字段（对应出题prompt的JSON格式），其余字段为可选
+STOCK_REQUIRED_CONTENT_KEYS: dict[tuple[TrainingType, QuestionType], tuple[str, ...]] = {
+    (TrainingType.VOCABULARY, QuestionType.MULTIPLE_CHOICE): ("text", "options"),
+    (TrainingType.VOCABULARY, QuestionType.FILL_BLANK): ("text",),
+    (TrainingType.VOCABULARY, QuestionType.TRANSLATION_EN_TO_CN): ("text",),
+    (TrainingType.LISTENING, QuestionType.LISTENING_COMPREHENSION): ("audio_script", "questions"),
+    (TrainingType.READING, QuestionType.READING_COMPREHENSION): ("passage", "question", "options"),
+    (TrainingType.WRITING, QuestionType.ESSAY): ("instruction", "requirements"),
+    (TrainingType.TRANSLATION, QuestionType.TRANSLATION_EN_TO_CN): ("source_text",),
+    (TrainingType.TRANSLATION, QuestionType.TRANSLATION_CN_TO_EN): ("source_text",),
+}
 
 
 class TrainingCenterService:
@@ -38,6 +108,9 @@ def __init__(self, db: AsyncSession) -> None:
         """初始化训练中心服务."""
         self.db = db
         self.deepseek_service = DeepSeekService()
+        self.inventory = QuestionInventoryService(db)
+        self.statistics = QuestionStatisticsService(db)
+        self._generation_slots = asyncio.Semaphore(settings.QUESTION_INVENTORY_CONCURRENCY)
 
     # ==================== 训练会话管理 ====================
 
@@ -171,33 +244,19 @@ async def generate_questions(
         knowledge_points: list[str] | None = None,
         student_id: int | None = None,
     ) -> list[QuestionResponse]:
-        """生成训练题目."""
-        # 根据训练类型调用相应的生成方法
-        if training_type == TrainingType.VOCABULARY:
-            return await self._generate_vocabulary_questions(
-                difficulty_level, question_count, knowledge_points, student_id
-            )
-        elif training_type == TrainingType.LISTENING:
-            return await self._generate_listening_questions(
-                difficulty_level, question_count, knowledge_points, student_id
-            )
-        elif training_type == TrainingType.READING:
-            return await self._generate_reading_questions(
-                difficulty_level, question_count, knowledge_points, student_id
-            )
-        elif training_type == TrainingType.WRITING:
-            return await self._generate_writing_questions(
-                difficulty_level, question_count, knowledge_points, student_id
-            )
-        elif training_type == TrainingType.TRANSLATION:
-            return await self._generate_translation_questions(
-                difficulty_level, question_count, knowledge_points, student_id
+        """从预生成题库库存抽取训练题目（请求路径上不调用AI）."""
+        if training_type in QUESTION_TYPE_MIX:
+            questions = await self.inventory.draw(
+                training_type, difficulty_level, question_count, knowledge_points, student_id
             )
         else:
-            return await self._generate_comprehensive_questions(
+            questions = await self._draw_comprehensive_questions(
                 difficulty_level, question_count, knowledge_points, student_id
             )
 
+        await self.db.commit()
+        return [await self._build_question_response(question) for question in questions]
+
     async def get_question_by_id(self, question_id: int) -> Question | None:
         """根据ID获取题目."""
         stmt = select(Question).where(Question.id == question_id)
@@ -279,417 +338,95 @@ async def submit_answer(
         record.knowledge_points_weak = grading_result.knowledge_points_weak
 
         self.db.add(record)
-
-        # 更新题目统计
-        question.usage_count += 1
-        await self._update_question_statistics(question)
-
         await self.db.commit()
 
-        return record, grading_result
-
-    # ==================== 私有方法：题目生成 ====================
-
-    async def _generate_vocabulary_questions(
-        self,
-        difficulty_level: DifficultyLevel,
-        question_count: int,
-        knowledge_points: list[str] | None,
-        student_id: int | None,
-    ) -> list[QuestionResponse]:
-        """生成词汇训练题目."""
-        questions: list[QuestionResponse] = []
-
-        # 题型分布：60%选择题，30%填空题，10%翻译题
-        question_types = (
-            [QuestionType.MULTIPLE_CHOICE] * 6
-            + [QuestionType.FILL_BLANK] * 3
-            + [QuestionType.TRANSLATION_EN_TO_CN] * 1
+        # 题目统计只累加增量，耗时与题目的答题记录数无关
+        await self.statistics.record_attempt(
+            question.id, grading_result.score, grading_result.is_correct
         )
 
-        for _ in range(question_count):
-            question_type = random.choice(question_types)
-
-            # 使用AI生成题目内容
-            prompt = await self._build_vocabulary_prompt(
-                question_type, difficulty_level, knowledge_points
-            )
-
-            try:
-                ai_response = await self._safe_ai_completion(prompt)
-
-                if ai_response:
-                    question_data = self._parse_ai_question_response(
-                        ai_response,
-                        question_type,
-                        TrainingType.VOCABULARY,
-                        difficulty_level,
-                    )
-
-                    # 创建并保存题目
-                    question = Question(
-                        question_type=question_type,
-                        training_type=TrainingType.VOCABULARY,
-                        title=question_data["title"],
-                        content=question_data["content"],
-                        difficulty_level=difficulty_level,
-                        max_score=10.0,
-                        time_limit=(
-                            120
-                            if question_type == QuestionType.MULTIPLE_CHOICE
-                            else 180
-                        ),
-                        knowledge_points=knowledge_points or ["vocabulary", "基础词汇"],
-                        tags=["ai_generated", "vocabulary"],
-                        correct_answer=question_data["correct_answer"],
-                        answer_analysis=question_data.get("analysis", ""),
-                        grading_criteria=question_data.get("grading_criteria", {}),
-                    )
-
-                    self.db.add(question)
-                    await self.db.flush()
-
-                    questions.append(await self._build_question_response(question))
-
-            except Exception as e:
-                # ✅ 添加日志记录
-                logger.warning(
-                    f"AI生成词汇题目失败，使用备用题目: {str(e)}",
-                    extra={
-                        "difficulty": difficulty_level.value,
-                        "question_type": question_type.value,
-                    },
-                )
-                # AI生成失败时使用备用题目
-                backup_question = await self._get_backup_question(
-                    TrainingType.VOCABULARY, difficulty_level, question_type
-                )
-                if backup_question:
-                    questions.append(
-                        await self._build_question_response(backup_question)
-                    )
-
-        await self.db.commit()
-        return questions[:question_count]
+        # 新的答题记录使本进程缓存的学习分析失效（其他进程通过数据版本失效）
+        invalidate_user_analysis(student_id)
 
-    async def _generate_listening_questions(
-        self,
-        difficulty_level: DifficultyLevel,
-        question_count: int,
-        knowledge_points: list[str] | None,
-        student_id: int | None,
-    ) -> list[QuestionResponse]:
-        """生成听力训练题目."""
-        questions: list[QuestionResponse] = []
-        question_type = QuestionType.LISTENING_COMPREHENSION
-
-        for _ in range(question_count):
-            # 生成听力材料和题目
-            prompt = await self._build_listening_prompt(
-                difficulty_level, knowledge_points
-            )
-
-            try:
-                ai_response = await self._safe_ai_completion(prompt, max_tokens=1000)
-
-                if ai_response:
-                    question_data = self._parse_ai_question_response(
-                        ai_response,
-                        question_type,
-                        TrainingType.LISTENING,
-                        difficulty_level,
-                    )
-
-                    question = Question(
-                        question_type=question_type,
-                        training_type=TrainingType.LISTENING,
-                        title=question_data["title"],
-                        content=question_data["content"],
-                        difficulty_level=difficulty_level,
-                        max_score=15.0,
-                        time_limit=300,  # 5分钟
-                        knowledge_points=knowledge_points or ["listening", "英语听力"],
-                        tags=["ai_generated", "listening"],
-                        correct_answer=question_data["correct_answer"],
-                        answer_analysis=question_data.get("analysis", ""),
-                        grading_criteria={"accuracy": 0.7, "comprehension": 0.3},
-                    )
-
-                    self.db.add(question)
-                    await self.db.flush()
-
-                    questions.append(await self._build_question_response(question))
-
-            except Exception as e:
-                # ✅ 添加日志记录
-                logger.warning(
-                    f"AI生成听力题目失败，使用备用题目: {str(e)}",
-                    extra={
-                        "difficulty": difficulty_level.value,
-                        "question_type": question_type.value,
-                    },
-                )
-                backup_question = await self._get_backup_question(
-                    TrainingType.LISTENING, difficulty_level, question_type
-                )
-                if backup_question:
-                    questions.append(
-                        await self._build_question_response(backup_question)
-                    )
-
-        await self.db.commit()
-        return questions[:question_count]
-
-    async def _generate_reading_questions(
-        self,
-        difficulty_level: DifficultyLevel,
-        question_count: int,
-        knowledge_points: list[str] | None,
-        student_id: int | None,
-    ) -> list[QuestionResponse]:
-        """生成阅读训练题目."""
-        questions: list[QuestionResponse] = []
-        question_type = QuestionType.READING_COMPREHENSION
-
-        # 一般每篇阅读材料对应3-5个题目
-        passage_count = max(1, question_count // 4)
-
-        for _ in range(passage_count):
-            # 生成阅读材料
-            prompt = await self._build_reading_prompt(
-                difficulty_level, knowledge_points
-            )
-
-            try:
-                ai_response = await self._safe_ai_completion(prompt, max_tokens=1500)
-
-                if ai_response:
-                    passage_data = self._parse_ai_reading_response(
-                        ai_response, difficulty_level
-                    )
-
-                    # 为每篇文章生成多个题目
-                    questions_per_passage = min(4, question_count - len(questions))
-
-                    for q_idx in range(questions_per_passage):
-                        if q_idx < len(passage_data["questions"]):
-                            question = Question(
-                                question_type=question_type,
-                                training_type=TrainingType.READING,
-                                title=passage_data["questions"][q_idx]["title"],
-                                content={
-                                    "passage": passage_data["passage"],
-                                    "question": passage_data["questions"][q_idx][
-                                        "question"
-                                    ],
-                                    "options": passage_data["questions"][q_idx][
-                                        "options"
-                                    ],
-                                },
-                                difficulty_level=difficulty_level,
-                                max_score=12.0,
-                                time_limit=400,  # 6分40秒
-                                knowledge_points=knowledge_points
-                                or ["reading", "英语阅读"],
-                                tags=["ai_generated", "reading"],
-                                correct_answer=passage_data["questions"][q_idx][
-                                    "correct_answer"
-                                ],
-                                answer_analysis=passage_data["questions"][q_idx].get(
-                                    "analysis", ""
-                                ),
-                                grading_criteria={"comprehension": 1.0},
-                            )
-
-                            self.db.add(question)
-                            await self.db.flush()
-
-                            questions.append(
-                                await self._build_question_response(question)
-                            )
-
-            except Exception as e:
-                # ✅ 添加日志记录
-                logger.warning(
-                    f"AI生成阅读题目失败，使用备用题目: {str(e)}",
-                    extra={
-                        "difficulty": difficulty_level.value,
-                        "question_type": question_type.value,
-                    },
-                )
-                # 使用备用题目
-                for _ in range(min(4, question_count - len(questions))):
-                    backup_question = await self._get_backup_question(
-                        TrainingType.READING, difficulty_level, question_type
-                    )
-                    if backup_question:
-                        questions.append(
-                            await self._build_question_response(backup_question)
-                        )
+        return record, grading_result
 
-        await self.db.commit()
-        return questions[:question_count]
+    # ==================== 题库库存生成 ====================
 
-    async def _generate_writing_questions(
+    async def generate_stock_questions(
         self,
+        training_type: TrainingType,
         difficulty_level: DifficultyLevel,
-        question_count: int,
-        knowledge_points: list[str] | None,
-        student_id: int | None,
-    ) -> list[QuestionResponse]:
-        """生成写作训练题目."""
-        questions: list[QuestionResponse] = []
-        question_type = QuestionType.ESSAY
-
-        for _ in range(question_count):
-            prompt = await self._build_writing_prompt(
-                difficulty_level, knowledge_points
+        question_type: QuestionType,
+        knowledge_point: str | None,
+        count: int,
+    ) -> list[Question]:
+        """为题库库存桶批量生成题目（供后台补货任务调用，不访问数据库）.
+
+        AI请求并发数受 QUESTION_INVENTORY_CONCURRENCY 限制，并以后台优先级排队。
+        """
+        profile = STOCK_QUESTION_PROFILES[training_type]
+        knowledge_points = [knowledge_point] if knowledge_point else None
+        request_count = -(-count // profile["questions_per_request"])
+        bucket = stock_key(training_type, difficulty_level, question_type, knowledge_point)
+
+        async def generate_batch() -> list[dict[str, Any]]:
+            prompt = await self._build_stock_prompt(
+                training_type, question_type, difficulty_level, knowledge_points
             )
-
-            try:
+            async with self._generation_slots:
+                # 相同提示词需要得到不同的题目，不读写AI响应缓存
                 ai_response = await self._safe_ai_completion(
-                    prompt, temperature=0.8, max_tokens=600
+                    prompt,
+                    temperature=profile["temperature"],
+                    max_tokens=profile["max_tokens"],
+                    category=TaskCategory.BACKGROUND,
+                    use_cache=False,
                 )
-
-                if ai_response:
-                    question_data = self._parse_ai_question_response(
-                        ai_response,
-                        question_type,
-                        TrainingType.WRITING,
-                        difficulty_level,
-                    )
-
-                    question = Question(
-                        question_type=question_type,
-                        training_type=TrainingType.WRITING,
-                        title=question_data["title"],
-                        content=question_data["content"],
-                        difficulty_level=difficulty_level,
-                        max_score=25.0,  # 按四级写作评分标准
-                        time_limit=1800,  # 30分钟
-                        knowledge_points=knowledge_points or ["writing", "英语写作"],
-                        tags=["ai_generated", "writing"],
-                        correct_answer=question_data["correct_answer"],
-                        answer_analysis=question_data.get("analysis", ""),
-                        grading_criteria={
-                            "content": 0.35,
-                            "language": 0.35,
-                            "structure": 0.3,
-                        },
-                    )
-
-                    self.db.add(question)
-                    await self.db.flush()
-
-                    questions.append(await self._build_question_response(question))
-
-            except Exception as e:
-                # ✅ 添加日志记录
-                logger.warning(
-                    f"AI生成写作题目失败，使用备用题目: {str(e)}",
-                    extra={
-                        "difficulty": difficulty_level.value,
-                        "question_type": question_type.value,
-                    },
-                )
-                backup_question = await self._get_backup_question(
-                    TrainingType.WRITING, difficulty_level, question_type
-                )
-                if backup_question:
-                    questions.append(
-                        await self._build_question_response(backup_question)
-                    )
-
-        await self.db.commit()
-        return questions[:question_count]
-
-    async def _generate_translation_questions(
-        self,
-        difficulty_level: DifficultyLevel,
-        question_count: int,
-        knowledge_points: list[str] | None,
-        student_id: int | None,
-    ) -> list[QuestionResponse]:
-        """生成翻译训练题目."""
-        questions: list[QuestionResponse] = []
-
-        # 翻译题型：50%英译中，50%中译英
-        question_types = [
-            QuestionType.TRANSLATION_EN_TO_CN,
-            QuestionType.TRANSLATION_CN_TO_EN,
-        ]
-
-        for i in range(question_count):
-            question_type = question_types[i % 2]
-
-            prompt = await self._build_translation_prompt(
-                question_type, difficulty_level, knowledge_points
+            if not ai_response:
+                return []
+            return self._parse_stock_items(ai_response, training_type, question_type)
+
+        batches = await asyncio.gather(*(generate_batch() for _ in range(request_count)))
+
+        # 并发请求可能生成相同的题目，按题目内容去重
+        items: dict[str, dict[str, Any]] = {}
+        for batch in batches:
+            for item in batch:
+                content_key = json.dumps(item["content"], ensure_ascii=False, sort_keys=True)
+                items.setdefault(content_key, item)
+
+        return [
+            Question(
+                question_type=question_type,
+                training_type=training_type,
+                title=item["title"],
+                content=item["content"],
+                difficulty_level=difficulty_level,
+                max_score=profile["max_score"],
+                time_limit=(
+                    120
+                    if question_type == QuestionType.MULTIPLE_CHOICE
+                    else profile["time_limit"]
+                ),
+                knowledge_points=knowledge_points or profile["knowledge_points"],
+                tags=["ai_generated", training_type.value],
+                correct_answer=item["correct_answer"],
+                answer_analysis=item.get("analysis", ""),
+                grading_criteria=item.get("grading_criteria") or profile["grading_criteria"],
+                stock_key=bucket,
             )
+            for item in list(items.values())[:count]
+        ]
 
-            try:
-                ai_response = await self._safe_ai_completion(prompt)
-
-                if ai_response:
-                    question_data = self._parse_ai_question_response(
-                        ai_response,
-                        question_type,
-                        TrainingType.TRANSLATION,
-                        difficulty_level,
-                    )
-
-                    question = Question(
-                        question_type=question_type,
-                        training_type=TrainingType.TRANSLATION,
-                        title=question_data["title"],
-                        content=question_data["content"],
-                        difficulty_level=difficulty_level,
-                        max_score=20.0,
-                        time_limit=600,  # 10分钟
-                        knowledge_points=knowledge_points or ["translation", "英汉翻译"],
-                        tags=["ai_generated", "translation"],
-                        correct_answer=question_data["correct_answer"],
-                        answer_analysis=question_data.get("analysis", ""),
-                        grading_criteria={
-                            "accuracy": 0.5,
-                            "fluency": 0.3,
-                            "completeness": 0.2,
-                        },
-                    )
-
-                    self.db.add(question)
-                    await self.db.flush()
-
-                    questions.append(await self._build_question_response(question))
-
-            except Exception as e:
-                # ✅ 添加日志记录
-                logger.warning(
-                    f"AI生成翻译题目失败，使用备用题目: {str(e)}",
-                    extra={
-                        "difficulty": difficulty_level.value,
-                        "question_type": question_type.value,
-                    },
-                )
-                backup_question = await self._get_backup_question(
-                    TrainingType.TRANSLATION, difficulty_level, question_type
-                )
-                if backup_question:
-                    questions.append(
-                        await self._build_question_response(backup_question)
-                    )
-
-        await self.db.commit()
-        return questions[:question_count]
-
-    async def _generate_comprehensive_questions(
+    async def _draw_comprehensive_questions(
         self,
         difficulty_level: DifficultyLevel,
         question_count: int,
         knowledge_points: list[str] | None,
         student_id: int | None,
-    ) -> list[QuestionResponse]:
-        """生成综合训练题目."""
-        questions: list[QuestionResponse] = []
+    ) -> list[Question]:
+        """综合训练：按比例从各训练类型的库存抽题."""
+        questions: list[Question] = []
 
         # 综合训练包含各种题型 - 按比例分配题目数量
         allocation = {
@@ -704,19 +441,43 @@ async def _generate_comprehensive_questions(
             if len(questions) >= question_count:
                 break
 
-            type_questions = await self.generate_questions(
-                training_type,
-                difficulty_level,
-                min(count, question_count - len(questions)),
-                knowledge_points,
-                student_id,
+            questions.extend(
+                await self.inventory.draw(
+                    training_type,
+                    difficulty_level,
+                    min(count, question_count - len(questions)),
+                    knowledge_points,
+                    student_id,
+                )
             )
-            questions.extend(type_questions)
 
         return questions[:question_count]
 
     # ==================== 私有方法：Prompt构建 ====================
 
+    async def _build_stock_prompt(
+        self,
+        training_type: TrainingType,
+        question_type: QuestionType,
+        difficulty_level: DifficultyLevel,
+        knowledge_points: list[str] | None,
+    ) -> str:
+        """按训练类型选择题目生成prompt."""
+        if training_type == TrainingType.VOCABULARY:
+            return await self._build_vocabulary_prompt(
+                question_type, difficulty_level, knowledge_points
+            )
+        elif training_type == TrainingType.LISTENING:
+            return await self._build_listening_prompt(difficulty_level, knowledge_points)
+        elif training_type == TrainingType.READING:
+            return await self._build_reading_prompt(difficulty_level, knowledge_points)
+        elif training_type == TrainingType.WRITING:
+            return await self._build_writing_prompt(difficulty_level, knowledge_points)
+        else:
+            return await self._build_translation_prompt(
+                question_type, difficulty_level, knowledge_points
+            )
+
     async def _build_vocabulary_prompt(
         self,
         question_type: QuestionType,
@@ -925,9 +686,18 @@ async def _build_translation_prompt(
     # ==================== 私有方法：AI调用辅助 ====================
 
     async def _safe_ai_completion(
-        self, prompt: str, temperature: float = 0.7, max_tokens: int = 800
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 800,
+        category: TaskCategory = TaskCategory.INTERACTIVE,
+        use_cache: bool | None = None,
     ) -> dict[str, Any] | None:
-        """安全的AI调用包装器."""
+        """安全的AI调用包装器.
+
+        库存补货出题传入 TaskCategory.BACKGROUND，排在学生交互的批改请求之后；
+        use_cache 原样传给 generate_completion。
+        """
         try:
             (
                 success,
@@ -937,6 +707,8 @@ async def _safe_ai_completion(
                 prompt=prompt,
                 temperature=temperature,
                 max_tokens=max_tokens,
+                category=category,
+                use_cache=use_cache,
             )
 
             if success and ai_response:
@@ -952,84 +724,63 @@ async def _safe_ai_completion(
 
     # ==================== 私有方法：AI响应解析 ====================
 
-    def _parse_ai_question_response(
+    def _parse_stock_items(
         self,
         ai_response: dict[str, Any],
-        question_type: QuestionType,
         training_type: TrainingType,
-        difficulty_level: DifficultyLevel,
-    ) -> dict[str, Any]:
-        """解析AI生成的题目响应."""
-        try:
-            # 从AI响应中提取内容
-            content = (
-                ai_response.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content", "")
-            )
-
-            # 尝试解析JSON格式
-            if content.strip().startswith("{"):
-                return json.loads(content)  # type: ignore[no-any-return]
-            else:
-                # 如果不是JSON格式，进行简单解析
-                return self._parse_plain_text_response(content, question_type)
-
-        except (json.JSONDecodeError, KeyError, IndexError):
-            # AI响应解析失败，返回默认结构
-            return self._get_default_question_structure(question_type, training_type)
+        question_type: QuestionType,
+    ) -> list[dict[str, Any]]:
+        """解析AI生成的题目，格式不完整的题目直接丢弃（不入库存）.
 
-    def _parse_ai_reading_response(
-        self, ai_response: dict[str, Any], difficulty_level: DifficultyLevel
-    ) -> dict[str, Any]:
-        """解析AI生成的阅读理解响应."""
+        只校验 STOCK_REQUIRED_CONTENT_KEYS 中的必填字段，空的可选字段（如填空题的
+        首字母提示）从content中去掉，不会导致整道题被丢弃。
+        """
         try:
-            content = (
-                ai_response.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content", "")
+            content = ai_response["choices"][0]["message"]["content"].strip()
+            if content.startswith("```"):
+                content = content.strip("`").removeprefix("json").strip()
+            data = json.loads(content)
+        except (json.JSONDecodeError, KeyError, IndexError, TypeError, AttributeError) as e:
+            logger.warning(f"AI题目响应解析失败: {str(e)}")
+            return []
+
+        if not isinstance(data, dict):
+            return []
+
+        if training_type == TrainingType.READING:
+            # 一篇阅读材料拆成多道题，每道题都带原文
+            items = [
+                {
+                    "title": item.get("title"),
+                    "content": {
+                        "passage": data.get("passage"),
+                        "question": item.get("question"),
+                        "options": item.get("options"),
+                    },
+                    "correct_answer": item.get("correct_answer"),
+                    "analysis": item.get("analysis", ""),
+                }
+                for item in data.get("questions") or []
+                if isinstance(item, dict)
+            ]
+        else:
+            items = [data]
+
+        parsed: list[dict[str, Any]] = []
+        for item in items:
+            if not (
+                item.get("title")
+                and isinstance(item.get("content"), dict)
+                and isinstance(item.get("correct_answer"), dict)
+            ):
+                continue
+            content = {key: value for key, value in item["content"].items() if value}
+            required_keys = STOCK_REQUIRED_CONTENT_KEYS.get(
+                (training_type, question_type), tuple(item["content"])
             )
-            return cast(dict[str, Any], json.loads(content))
-        except Exception as e:
-            # ✅ 添加日志记录
-            logger.warning(f"AI阅读响应解析失败: {str(e)}")
-            # 返回默认阅读材料
-            return {
-                "passage": "默认阅读材料...",
-                "questions": [
-                    {
-                        "title": "阅读理解",
-                        "question": "根据文章内容，以下说法正确的是：",
-                        "options": ["选项A", "选项B", "选项C", "选项D"],
-                        "correct_answer": {"option": "A"},
-                        "analysis": "答案解析",
-                    }
-                ],
-            }
-
-    def _parse_plain_text_response(
-        self, content: str, question_type: QuestionType
-    ) -> dict[str, Any]:
-        """解析纯文本格式的AI响应."""
-        # 简单的文本解析逻辑
-        return {
-            "title": f"{question_type.value} 题目",
-            "content": {"text": content[:200] + "..."},
-            "correct_answer": {"answer": "默认答案"},
-            "analysis": "AI生成的解析",
-        }
-
-    def _get_default_question_structure(
-        self, question_type: QuestionType, training_type: TrainingType
-    ) -> dict[str, Any]:
-        """获取默认题目结构."""
-        return {
-            "title": f"{training_type.value} - {question_type.value}",
-            "content": {"text": "默认题目内容"},
-            "correct_answer": {"answer": "默认答案"},
-            "analysis": "默认解析",
-            "grading_criteria": {"accuracy": 1.0},
-        }
+            if content and all(key in content for key in required_keys):
+                parsed.append({**item, "content": content})
+        return parsed
 
     # ==================== 私有方法：批改和评分 ====================
 
@@ -1374,45 +1125,6 @@ def _calculate_text_similarity(self, text1: str, text2: str) -> float:
 
         return intersection / union if union > 0 else 0.0
 
-    async def _get_backup_question(
-        self,
-        training_type: TrainingType,
-        difficulty_level: DifficultyLevel,
-        question_type: QuestionType,
-    ) -> Question | None:
-        """获取备用题目."""
-        stmt = (
-            select(Question)
-            .where(
-                and_(
-                    Question.training_type == training_type,
-                    Question.difficulty_level == difficulty_level,
-                    Question.question_type == question_type,
-                    Question.is_active == True,  # noqa: E712
-                )
-            )
-            .order_by(func.random())
-            .limit(1)
-        )
-
-        result = await self.db.execute(stmt)
-        return result.scalar_one_or_none()  # type: ignore[no-any-return]
-
-    async def _update_question_statistics(self, question: Question) -> None:
-        """更新题目统计数据."""
-        # 计算平均分数和正确率
-        stmt = select(
-            func.avg(TrainingRecord.score).label("avg_score"),
-            func.avg(func.cast(TrainingRecord.is_correct, Float)).label("correct_rate"),
-        ).where(TrainingRecord.question_id == question.id)
-
-        result = await self.db.execute(stmt)
-        stats = result.first()
-
-        if stats:
-            question.average_score = float(stats.avg_score or 0)
-            question.correct_rate = float(stats.correct_rate or 0)
-
     async def _build_session_response(
         self, session: TrainingSession
     ) -> TrainingSessionResponse:
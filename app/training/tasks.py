@@ -0,0 +1,125 @@
+"""训练模块定时任务."""
+
+import logging
+from typing import Any
+
+from celery import shared_task
+
+from app.shared.models.enums import TrainingType
+from app.shared.tasks.async_task import AsyncTask
+from app.training.services.cohort_training_loop_service import (
+    COHORT_TRAINING_TYPES,
+    CohortTrainingLoopService,
+)
+from app.training.services.question_inventory_service import QuestionInventoryService
+from app.training.services.question_statistics_service import QuestionStatisticsService
+from app.training.services.training_center_service import TrainingCenterService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, base=AsyncTask, name="training.replenish_question_inventory")
+def replenish_question_inventory(self: AsyncTask) -> dict[str, Any]:
+    """为低于低水位或抽题不足的库存桶补充预生成题目."""
+    try:
+
+        async def _replenish() -> dict[str, int]:
+            async with self.session() as db:
+                center = TrainingCenterService(db)
+                inventory = QuestionInventoryService(db, self.redis_client)
+                return await inventory.replenish(center.generate_stock_questions)
+
+        result = self.run_async(_replenish())
+        logger.info(f"题库补货完成: {result}")
+        return {"status": "success", **result}
+
+    except Exception as e:
+        logger.error(f"题库补货失败: {str(e)}")
+        return {"status": "failed", "error": str(e)}
+
+
+@shared_task(bind=True, base=AsyncTask, name="training.flush_question_statistics")
+def flush_question_statistics(self: AsyncTask) -> dict[str, Any]:
+    """把缓冲的题目统计增量批量写入题目表."""
+    try:
+
+        async def _flush() -> dict[str, int]:
+            async with self.session() as db:
+                return await QuestionStatisticsService(db, self.redis_client).flush()
+
+        result = self.run_async(_flush())
+        logger.info(f"题目统计增量写入完成: {result}")
+        return {"status": "success", **result}
+
+    except Exception as e:
+        logger.error(f"题目统计增量写入失败: {str(e)}")
+        return {"status": "failed", "error": str(e)}
+
+
+@shared_task(bind=True, base=AsyncTask, name="training.reconcile_question_statistics")
+def reconcile_question_statistics(self: AsyncTask) -> dict[str, Any]:
+    """按答题记录重算题目统计累计值和区分度，纠正增量累加的漂移."""
+    try:
+
+        async def _reconcile() -> dict[str, int]:
+            async with self.session() as db:
+                return await QuestionStatisticsService(db, self.redis_client).reconcile()
+
+        result = self.run_async(_reconcile())
+        logger.info(f"题目统计对账完成: {result}")
+        return {"status": "success", **result}
+
+    except Exception as e:
+        logger.error(f"题目统计对账失败: {str(e)}")
+        return {"status": "failed", "error": str(e)}
+
+
+@shared_task(bind=True, base=AsyncTask, name="training.run_cohort_training_loop")
+def run_cohort_training_loop(self: AsyncTask, class_id: int, training_type: str) -> dict[str, Any]:
+    """对一个班级执行一种训练类型的智能训练闭环（超时后重跑会跳过已完成的学生）."""
+    try:
+
+        async def _run() -> dict[str, int]:
+            async with self.session() as db:
+                service = CohortTrainingLoopService(db, self.redis_client)
+                return await service.execute_cohort_training_loop(
+                    class_id, TrainingType(training_type)
+                )
+
+        result = self.run_async(_run())
+        logger.info(f"班级智能训练闭环执行完成: 班级{class_id}, 训练类型{training_type}, {result}")
+        return {"status": "success", **result}
+
+    except Exception as e:
+        logger.error(
+            f"班级智能训练闭环执行失败: 班级{class_id}, 训练类型{training_type}, 错误: {str(e)}"
+        )
+        return {"status": "failed", "error": str(e)}
+
+
+@shared_task(bind=True, base=AsyncTask, name="training.run_cohort_training_loops")
+def run_cohort_training_loops(
+    self: AsyncTask, class_id: int | None = None, training_type: str | None = None
+) -> dict[str, Any]:
+    """按 (班级, 训练类型) 分发智能训练闭环子任务（默认所有启用的班级和主要训练类型）."""
+    try:
+        training_types = (
+            [TrainingType(training_type)] if training_type else list(COHORT_TRAINING_TYPES)
+        )
+
+        async def _class_ids() -> list[int]:
+            async with self.session() as db:
+                return await CohortTrainingLoopService(db, self.redis_client).active_class_ids()
+
+        class_ids = [class_id] if class_id is not None else self.run_async(_class_ids())
+        for cid in class_ids:
+            for item in training_types:
+                run_cohort_training_loop.delay(cid, item.value)
+
+        dispatched = len(class_ids) * len(training_types)
+        logger.info(f"班级智能训练闭环子任务已分发: {len(class_ids)}个班级, {dispatched}个子任务")
+        return {"status": "dispatched", "class_count": len(class_ids), "task_count": dispatched}
+
+    except Exception as e:
+        logger.error(f"班级智能训练闭环分发失败: {str(e)}")
+        return {"status": "failed", "error": str(e)}
@@ -3,9 +3,12 @@
 from .data_analyzer import DataAnalyzer
 from .difficulty_calculator import DifficultyCalculator
 from .progress_tracker import ProgressTracker
+from .record_frame import LearningRecordFrame, load_learning_record_frame
 
 __all__ = [
     "DifficultyCalculator",
     "ProgressTracker",
     "DataAnalyzer",
+    "LearningRecordFrame",
+    "load_learning_record_frame",
 ]
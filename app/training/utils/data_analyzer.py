@@ -5,7 +5,10 @@
 from datetime import datetime, timedelta
 from typing import Any
 
+import numpy as np
+
 from app.shared.models.enums import DifficultyLevel, TrainingType
+from app.training.utils.record_frame import LearningRecordFrame, rolling_mean
 
 
 class DataAnalyzer:
@@ -82,6 +85,63 @@ def analyze_learning_effectiveness(
             ),
         }
 
+    def analyze_record_frame(
+        self, frame: LearningRecordFrame, window_size: int = 10
+    ) -> dict[str, Any]:
+        """
+        基于答题记录数据帧的逐题分析.
+
+        Args:
+            frame: 学生答题记录（列式，按时间升序）
+            window_size: 学习曲线的滑动窗口大小
+
+        Returns:
+            逐题分析结果
+        """
+        if len(frame) < self.analysis_config["min_questions_for_analysis"]:
+            return {"error": "没有足够的数据进行分析"}
+
+        valid_times = frame.valid_times
+
+        # 学习曲线：滑动窗口正确率
+        window_size = min(window_size, len(frame))
+        rolling_accuracy = rolling_mean(frame.is_correct, window_size)
+
+        # 各难度正确率
+        difficulty_attempts = np.bincount(frame.difficulty)
+        difficulty_correct = np.bincount(frame.difficulty, weights=frame.is_correct)
+        difficulty_accuracy = {
+            DifficultyLevel(level).name.lower(): float(
+                difficulty_correct[level] / difficulty_attempts[level]
+            )
+            for level in np.flatnonzero(difficulty_attempts)
+            if level in DifficultyLevel._value2member_map_
+        }
+
+        # 答题时段分布
+        hours = (frame.created_at.astype("datetime64[h]").astype(np.int64) % 24).astype(int)
+        hour_counts = np.bincount(hours, minlength=24)
+
+        return {
+            "record_count": len(frame),
+            "accuracy": frame.accuracy(),
+            "time_per_question": {
+                "mean": float(valid_times.mean()) if len(valid_times) else 0,
+                "median": float(np.median(valid_times)) if len(valid_times) else 0,
+                "std_dev": float(valid_times.std(ddof=1)) if len(valid_times) > 1 else 0,
+            },
+            "learning_curve": {
+                "window_size": window_size,
+                "rolling_accuracy": rolling_accuracy.tolist(),
+                "trend": self._calculate_trend(rolling_accuracy.tolist()),
+            },
+            "knowledge_points": frame.group_by_knowledge_point(),
+            "difficulty_accuracy": difficulty_accuracy,
+            "hour_distribution": {
+                int(hour): int(hour_counts[hour]) for hour in np.flatnonzero(hour_counts)
+            },
+        }
+
     def compare_performance_periods(
         self,
         sessions: list[dict[str, Any]],
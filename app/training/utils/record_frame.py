@@ -0,0 +1,341 @@
+"""学习记录列式数据帧 - 各分析服务共享的答题记录表示.
+
+一个学生的答题记录按列存放为 NumPy 数组（得分、正误、用时、难度、知识点、时间戳），
+按答题时间升序排列。记录只用一次仅含所需列的查询加载，各分析器在同一个数据帧上做
+向量化的分组和窗口计算，不再各自查询并逐条遍历 ORM 对象。
+
+知识点为变长列表，采用 CSR 方式存储：kp_codes 为所有记录知识点编码的拼接，
+第 i 条记录的知识点为 kp_codes[kp_offsets[i]:kp_offsets[i + 1]]，编码对应 kp_labels。
+"""
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from itertools import groupby
+from operator import itemgetter
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Select, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.shared.models.enums import TrainingType
+from app.training.models.training_models import Question, TrainingRecord, TrainingSession
+
+# 记录没有任何知识点标签时归入的分组
+DEFAULT_KNOWLEDGE_POINT = "general"
+
+_records = TrainingRecord.__table__
+_questions = Question.__table__
+_sessions = TrainingSession.__table__
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """带时区的时间转为UTC无时区时间，与 datetime64 的存储方式一致."""
+    if value.tzinfo is not None:
+        return value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """滑动窗口均值（累积和实现），结果长度为 len(values) - window + 1."""
+    if window <= 0 or len(values) < window:
+        return np.empty(0, dtype=np.float64)
+    cumsum = np.concatenate((np.zeros(1), np.cumsum(values, dtype=np.float64)))
+    return (cumsum[window:] - cumsum[:-window]) / window
+
+
+def chunk_means(values: np.ndarray, size: int, min_size: int = 1) -> np.ndarray:
+    """按固定大小分块求均值，丢弃不足 min_size 的尾块."""
+    if size <= 0 or not len(values):
+        return np.empty(0, dtype=np.float64)
+    starts = np.arange(0, len(values), size)
+    sums = np.add.reduceat(values.astype(np.float64), starts)
+    counts = np.minimum(size, len(values) - starts)
+    keep = counts >= min_size
+    return sums[keep] / counts[keep]
+
+
+def run_lengths(flags: np.ndarray) -> np.ndarray:
+    """连续为真的区间长度，按出现顺序返回."""
+    edge = np.zeros(1, dtype=bool)
+    padded = np.concatenate((edge, flags.astype(bool), edge))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[1::2] - edges[::2]
+
+
+@dataclass(frozen=True)
+class LearningRecordFrame:
+    """学生答题记录的列式表示 - 各列等长，按答题时间升序"""
+
+    record_id: np.ndarray
+    session_id: np.ndarray
+    question_id: np.ndarray
+    score: np.ndarray
+    is_correct: np.ndarray
+    time_spent: np.ndarray
+    difficulty: np.ndarray
+    ai_confidence: np.ndarray
+    created_at: np.ndarray
+    kp_offsets: np.ndarray
+    kp_codes: np.ndarray
+    kp_labels: tuple[str, ...]
+
+    @classmethod
+    def empty(cls) -> "LearningRecordFrame":
+        return cls.from_rows([])
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> "LearningRecordFrame":
+        """由记录行构建数据帧，行需按答题时间升序.
+
+        每行包含 id、session_id、question_id、score、is_correct、time_spent、
+        difficulty_level、ai_confidence、created_at 和 knowledge_points。
+        """
+        rows = list(rows)
+        labels: dict[str, int] = {}
+        codes: list[int] = []
+        offsets = [0]
+        for row in rows:
+            points = row.get("knowledge_points") or [DEFAULT_KNOWLEDGE_POINT]
+            for point in dict.fromkeys(points):
+                codes.append(labels.setdefault(point, len(labels)))
+            offsets.append(len(codes))
+
+        def column(name: str, dtype: Any, default: Any = 0) -> np.ndarray:
+            return np.fromiter(
+                (default if row.get(name) is None else row[name] for row in rows),
+                dtype=dtype,
+                count=len(rows),
+            )
+
+        return cls(
+            record_id=column("id", np.int64),
+            session_id=column("session_id", np.int64),
+            question_id=column("question_id", np.int64),
+            score=column("score", np.float64),
+            is_correct=column("is_correct", np.bool_, False),
+            time_spent=column("time_spent", np.float64),
+            difficulty=np.fromiter(
+                (int(row.get("difficulty_level") or 0) for row in rows),
+                dtype=np.int8,
+                count=len(rows),
+            ),
+            ai_confidence=column("ai_confidence", np.float64),
+            created_at=np.array(
+                [_to_naive_utc(row["created_at"]) for row in rows], dtype="datetime64[s]"
+            ),
+            kp_offsets=np.asarray(offsets, dtype=np.int64),
+            kp_codes=np.asarray(codes, dtype=np.int32),
+            kp_labels=tuple(labels),
+        )
+
+    def __len__(self) -> int:
+        return len(self.record_id)
+
+    # ==================== 切片 ====================
+
+    def slice_rows(
+        self, start: int | None = None, stop: int | None = None
+    ) -> "LearningRecordFrame":
+        """按位置取连续区间，列为原数组的视图."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        kp_start, kp_stop = self.kp_offsets[start], self.kp_offsets[stop]
+        return LearningRecordFrame(
+            record_id=self.record_id[start:stop],
+            session_id=self.session_id[start:stop],
+            question_id=self.question_id[start:stop],
+            score=self.score[start:stop],
+            is_correct=self.is_correct[start:stop],
+            time_spent=self.time_spent[start:stop],
+            difficulty=self.difficulty[start:stop],
+            ai_confidence=self.ai_confidence[start:stop],
+            created_at=self.created_at[start:stop],
+            kp_offsets=self.kp_offsets[start : stop + 1] - kp_start,
+            kp_codes=self.kp_codes[kp_start:kp_stop],
+            kp_labels=self.kp_labels,
+        )
+
+    def latest(self, count: int) -> "LearningRecordFrame":
+        """最近的 count 条记录."""
+        return self.slice_rows(max(0, len(self) - count))
+
+    # ==================== 列派生 ====================
+
+    @property
+    def valid_time_mask(self) -> np.ndarray:
+        """用时有效（大于0）的记录."""
+        return self.time_spent > 0
+
+    @property
+    def valid_times(self) -> np.ndarray:
+        return self.time_spent[self.valid_time_mask]
+
+    @property
+    def kp_record_index(self) -> np.ndarray:
+        """kp_codes 中每个元素所属的记录位置."""
+        return np.repeat(np.arange(len(self)), np.diff(self.kp_offsets))
+
+    def accuracy(self) -> float:
+        return float(self.is_correct.mean()) if len(self) else 0.0
+
+    def average_time(self) -> float:
+        """有效用时的平均值，无有效用时返回0."""
+        valid_times = self.valid_times
+        return float(valid_times.mean()) if len(valid_times) else 0.0
+
+    def created_since(self, cutoff: datetime) -> np.ndarray:
+        """答题时间不早于 cutoff 的记录."""
+        return self.created_at >= np.datetime64(_to_naive_utc(cutoff), "s")
+
+    def to_datetimes(self) -> list[datetime]:
+        return self.created_at.astype(datetime).tolist()
+
+    # ==================== 分组 ====================
+
+    def group_by_knowledge_point(
+        self, mask: np.ndarray | None = None
+    ) -> dict[str, dict[str, Any]]:
+        """按知识点汇总作答次数、正确次数和有效用时，一条记录计入其全部知识点.
+
+        Args:
+            mask: 只统计为真的记录
+        """
+        record_index = self.kp_record_index
+        codes = self.kp_codes
+        if mask is not None:
+            keep = mask[record_index]
+            record_index, codes = record_index[keep], codes[keep]
+
+        size = len(self.kp_labels)
+        attempts = np.bincount(codes, minlength=size)
+        correct = np.bincount(codes, weights=self.is_correct[record_index], minlength=size)
+        total_time = np.bincount(
+            codes, weights=self.time_spent[record_index].clip(min=0), minlength=size
+        )
+
+        stats = {}
+        for code in np.flatnonzero(attempts):
+            stats[self.kp_labels[code]] = {
+                "total_attempts": int(attempts[code]),
+                "correct_attempts": int(correct[code]),
+                "total_time": float(total_time[code]),
+                "accuracy": float(correct[code] / attempts[code]),
+                "average_time": float(total_time[code] / attempts[code]),
+            }
+        return stats
+
+    def group_by_session(self) -> dict[str, np.ndarray]:
+        """按会话汇总，会话按首条记录的时间排序."""
+        session_ids, first_index, inverse = np.unique(
+            self.session_id, return_index=True, return_inverse=True
+        )
+        order = np.argsort(first_index, kind="stable")
+        attempts = np.bincount(inverse, minlength=len(session_ids))
+        correct = np.bincount(inverse, weights=self.is_correct, minlength=len(session_ids))
+        total_time = np.bincount(
+            inverse, weights=self.time_spent.clip(min=0), minlength=len(session_ids)
+        )
+        return {
+            "session_id": session_ids[order],
+            "attempts": attempts[order],
+            "correct": correct[order],
+            "total_time": total_time[order],
+        }
+
+
+def _record_frame_query(
+    training_type: TrainingType | None, since: datetime | None
+) -> Select[Any]:
+    """答题记录数据帧所需列的查询（未加学生条件和排序）."""
+    source = _records.outerjoin(_questions, _records.c.question_id == _questions.c.id)
+    stmt = select(
+        _records.c.id,
+        _records.c.student_id,
+        _records.c.session_id,
+        _records.c.question_id,
+        _records.c.score,
+        _records.c.is_correct,
+        _records.c.time_spent,
+        _records.c.ai_confidence,
+        _records.c.created_at,
+        _records.c.knowledge_points_mastered,
+        _records.c.knowledge_points_weak,
+        _questions.c.difficulty_level,
+        _questions.c.knowledge_points,
+    )
+
+    if training_type is not None:
+        source = source.join(_sessions, _records.c.session_id == _sessions.c.id)
+        stmt = stmt.where(_sessions.c.session_type == training_type)
+    if since is not None:
+        stmt = stmt.where(_records.c.created_at >= since)
+
+    return stmt.select_from(source)
+
+
+def _frame_row(row: Mapping[Any, Any]) -> dict[str, Any]:
+    """知识点优先取题目标签，题目无标签时取记录的掌握/薄弱知识点."""
+    knowledge_points = row["knowledge_points"] or (
+        (row["knowledge_points_mastered"] or []) + (row["knowledge_points_weak"] or [])
+    )
+    return {**row, "knowledge_points": knowledge_points}
+
+
+async def load_learning_record_frame(
+    db: AsyncSession,
+    student_id: int,
+    *,
+    training_type: TrainingType | None = None,
+    since: datetime | None = None,
+    limit: int | None = None,
+) -> LearningRecordFrame:
+    """用一次仅含所需列的查询加载学生的答题记录.
+
+    知识点优先取题目标签，题目无标签时取记录的掌握/薄弱知识点。
+
+    Args:
+        training_type: 只加载该训练类型会话中的记录
+        since: 只加载此时间之后的记录
+        limit: 只加载最近的 limit 条记录
+    """
+    stmt = (
+        _record_frame_query(training_type, since)
+        .where(_records.c.student_id == student_id)
+        .order_by(desc(_records.c.created_at), desc(_records.c.id))
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    result = await db.execute(stmt)
+    return LearningRecordFrame.from_rows(
+        _frame_row(row) for row in reversed(result.mappings().all())
+    )
+
+
+async def load_learning_record_frames(
+    db: AsyncSession,
+    student_ids: Iterable[int],
+    *,
+    training_type: TrainingType | None = None,
+    since: datetime | None = None,
+) -> dict[int, LearningRecordFrame]:
+    """用一次查询加载一批学生的答题记录，按学生拆分为各自的数据帧.
+
+    没有记录的学生对应空数据帧。
+    """
+    student_ids = list(student_ids)
+    frames = dict.fromkeys(student_ids, LearningRecordFrame.empty())
+    if not student_ids:
+        return frames
+
+    stmt = (
+        _record_frame_query(training_type, since)
+        .where(_records.c.student_id.in_(student_ids))
+        .order_by(_records.c.student_id, _records.c.created_at, _records.c.id)
+    )
+    result = await db.execute(stmt)
+    for student_id, rows in groupby(result.mappings().all(), key=itemgetter("student_id")):
+        frames[student_id] = LearningRecordFrame.from_rows(_frame_row(row) for row in rows)
+    return frames
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+指标收集器微基准
+
+测量单个收集、MetricPoint批量收集、数组批量收集的单样本开销，
+以及聚合刷新（草图合并）的耗时。
+
+用法: python scripts/benchmark_metrics_collector.py [样本数]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.shared.models.enums import AlertLevel, MetricType
+from app.shared.utils.metrics_collector import (
+    AggregationType,
+    MetricDefinition,
+    MetricPoint,
+    MetricsCollector,
+    MetricUnit,
+)
+
+ENDPOINTS = [f"/api/v1/resource/{i}" for i in range(20)]
+
+
+def create_collector() -> MetricsCollector:
+    """创建带指标定义和告警规则的收集器"""
+    collector = MetricsCollector()
+    collector.register_metric(
+        MetricDefinition(
+            name="http.response_time",
+            metric_type=MetricType.RESPONSE_TIME,
+            unit=MetricUnit.SECONDS,
+            description="HTTP响应时间",
+            aggregations=list(AggregationType),
+        )
+    )
+    collector.add_alert_rule("http.response_time", 2.0, AlertLevel.WARNING)
+    collector.add_alert_rule("http.error_rate", 0.05, AlertLevel.ERROR)
+    return collector
+
+
+def report(label: str, elapsed: float, samples: int) -> None:
+    print(f"{label:<28} {elapsed * 1e9 / samples:>10.0f} ns/样本  ({samples} 个样本)")
+
+
+async def main(samples: int) -> None:
+    # 告警日志会干扰计时
+    logging.getLogger("app.shared.utils.metrics_collector").setLevel(logging.ERROR)
+    values = np.random.default_rng(42).lognormal(mean=-2, sigma=1, size=samples)
+    tags = [{"endpoint": endpoint} for endpoint in ENDPOINTS]
+
+    # 单个收集
+    collector = create_collector()
+    start = time.perf_counter()
+    for i, value in enumerate(values.tolist()):
+        await collector.collect_metric("http.response_time", value, tags[i % len(tags)])
+    report("collect_metric", time.perf_counter() - start, samples)
+
+    # MetricPoint批量收集（含对象构造之外的分组开销）
+    collector = create_collector()
+    now = datetime.utcnow()
+    points = [
+        MetricPoint("http.response_time", value, now, tags[i % len(tags)])
+        for i, value in enumerate(values.tolist())
+    ]
+    start = time.perf_counter()
+    for offset in range(0, samples, 1000):
+        await collector.collect_metrics_batch(points[offset : offset + 1000])
+    report("collect_metrics_batch", time.perf_counter() - start, samples)
+
+    # 数组批量收集
+    collector = create_collector()
+    start = time.perf_counter()
+    for chunk in np.array_split(values, max(1, samples // 1000)):
+        await collector.collect_series_batch("http.response_time", chunk, tags[0])
+    report("collect_series_batch", time.perf_counter() - start, samples)
+
+    # 聚合刷新
+    start = time.perf_counter()
+    await collector._update_aggregated_metrics()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    p99 = collector.get_aggregated_metric("http.response_time", AggregationType.PERCENTILE_99)
+    print(f"{'_update_aggregated_metrics':<28} {elapsed_ms:>10.2f} ms  (p99={p99.value:.4f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000))
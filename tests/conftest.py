@@ -34,6 +34,33 @@
 )
 
 
+class RecordingPipeline:
+    """记录排队命令的Redis管道替身.
+
+    命令记录为 (命令名, *位置参数)，带关键字参数时再追加参数字典；
+    execute 返回构造时给定的结果列表。
+    """
+
+    def __init__(self, results: list | None = None) -> None:
+        self.commands: list[tuple] = []
+        self.results = results or []
+
+    async def __aenter__(self) -> "RecordingPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    def __getattr__(self, name: str) -> Any:
+        def record(*args: Any, **kwargs: Any) -> None:
+            self.commands.append((name, *args, kwargs) if kwargs else (name, *args))
+
+        return record
+
+    async def execute(self) -> list:
+        return self.results
+
+
 @pytest.fixture(scope="session")
 def event_loop() -> Generator:
     """创建事件循环夹具."""
@@ -8,10 +8,16 @@
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from datetime import datetime, timedelta
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock
 
 from app.shared.models.enums import DifficultyLevel, TrainingType
 from app.training.services.precise_adaptive_service import PreciseAdaptiveService
+from app.training.utils.record_frame import LearningRecordFrame
+
+
+def build_frame(rows: list[dict]) -> LearningRecordFrame:
+    """由记录行构建按时间升序的数据帧."""
+    return LearningRecordFrame.from_rows(sorted(rows, key=lambda row: row["created_at"]))
 
 
 class IntegrationTestPreciseAdaptive:
@@ -31,15 +37,18 @@ async def test_complete_adjustment_workflow(self):
         # 模拟近10次训练记录（9次正确，1次错误 = 90%正确率）
         mock_records = []
         for i in range(10):
-            record = MagicMock()
-            record.is_correct = i < 9  # 前9次正确，最后1次错误
-            record.time_spent = 60 + i * 2
-            record.created_at = datetime.now() - timedelta(minutes=i * 10)
-            record.knowledge_points = ["vocabulary_basic", "word_meaning"]
-            mock_records.append(record)
-
-        # 模拟数据库查询返回
-        self.mock_db.execute.return_value.scalars.return_value.all.return_value = (
+            mock_records.append(
+                {
+                    "id": i + 1,
+                    "is_correct": i < 9,  # 前9次正确，最后1次错误
+                    "time_spent": 60 + i * 2,
+                    "created_at": datetime.now() - timedelta(minutes=i * 10),
+                    "knowledge_points": ["vocabulary_basic", "word_meaning"],
+                }
+            )
+
+        # 模拟数据库查询返回（按时间倒序）
+        self.mock_db.execute.return_value.mappings.return_value.all.return_value = (
             mock_records
         )
 
@@ -77,15 +86,17 @@ async def test_upgrade_scenario(self):
         # 模拟95%正确率的记录
         mock_records = []
         for i in range(10):
-            record = MagicMock()
-            record.is_correct = i < 9 or i == 9  # 10次全对 = 100%
-            record.time_spent = 45 + i
-            record.created_at = datetime.now() - timedelta(minutes=i * 5)
-            mock_records.append(record)
+            mock_records.append(
+                {
+                    "is_correct": i < 9 or i == 9,  # 10次全对 = 100%
+                    "time_spent": 45 + i,
+                    "created_at": datetime.now() - timedelta(minutes=i * 5),
+                }
+            )
 
         # 计算正确率
         accuracy_analysis = self.precise_service._calculate_recent_accuracy(
-            mock_records
+            build_frame(mock_records)
         )
 
         # 验证升级逻辑
@@ -108,15 +119,17 @@ async def test_downgrade_scenario(self):
         # 模拟50%正确率的记录
         mock_records = []
         for i in range(10):
-            record = MagicMock()
-            record.is_correct = i < 5  # 前5次正确，后5次错误 = 50%
-            record.time_spent = 90 + i * 5
-            record.created_at = datetime.now() - timedelta(minutes=i * 8)
-            mock_records.append(record)
+            mock_records.append(
+                {
+                    "is_correct": i < 5,  # 前5次正确，后5次错误 = 50%
+                    "time_spent": 90 + i * 5,
+                    "created_at": datetime.now() - timedelta(minutes=i * 8),
+                }
+            )
 
         # 计算正确率
         accuracy_analysis = self.precise_service._calculate_recent_accuracy(
-            mock_records
+            build_frame(mock_records)
         )
 
         # 验证降级逻辑
@@ -139,25 +152,17 @@ async def test_stable_scenario(self):
         # 模拟75%正确率的记录
         mock_records = []
         for i in range(10):
-            record = MagicMock()
-            # 创建75%正确率：前7次正确，后3次错误，再加1次正确
-            if i < 7:
-                record.is_correct = True
-            elif i < 9:
-                record.is_correct = False
-            else:
-                record.is_correct = True  # 最后一次正确，总计7.5次正确
-            record.time_spent = 70 + i * 3
-            record.created_at = datetime.now() - timedelta(minutes=i * 6)
-            mock_records.append(record)
-
-        # 重新调整为精确的75%
-        for i in range(10):
-            mock_records[i].is_correct = i < 7 or i == 9  # 8次正确，2次错误 = 80%
+            mock_records.append(
+                {
+                    "is_correct": i < 7 or i == 9,  # 8次正确，2次错误 = 80%
+                    "time_spent": 70 + i * 3,
+                    "created_at": datetime.now() - timedelta(minutes=i * 6),
+                }
+            )
 
         # 计算正确率
         accuracy_analysis = self.precise_service._calculate_recent_accuracy(
-            mock_records
+            build_frame(mock_records)
         )
 
         # 验证稳定逻辑
@@ -1,11 +1,24 @@
 """精确自适应算法测试 - 🔥需求21第二阶段验证."""
 
-from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
 
 import pytest
 
 from app.shared.models.enums import DifficultyLevel
 from app.training.services.precise_adaptive_service import PreciseAdaptiveService
+from app.training.utils.record_frame import LearningRecordFrame
+
+
+def make_frame(**columns: list) -> LearningRecordFrame:
+    """按列构造答题记录数据帧，列表第一项为最近一次作答."""
+    count = len(next(iter(columns.values())))
+    latest = datetime(2025, 1, 1)
+    rows = [
+        {"created_at": latest - timedelta(minutes=i), **{k: v[i] for k, v in columns.items()}}
+        for i in reversed(range(count))
+    ]
+    return LearningRecordFrame.from_rows(rows)
 
 
 class TestPreciseAdaptiveAlgorithm:
@@ -36,12 +49,10 @@ def test_precise_config_validation(self, precise_service):
     def test_recent_accuracy_calculation(self, precise_service):
         """测试近期正确率计算."""
         # 模拟10次答题记录：8次正确，2次错误
-        mock_records = []
-        for i in range(10):
-            record = MagicMock()
-            record.is_correct = i < 8  # 前8次正确，后2次错误
-            record.time_spent = 60 + i * 5  # 模拟时间
-            mock_records.append(record)
+        mock_records = make_frame(
+            is_correct=[i < 8 for i in range(10)],  # 前8次正确，后2次错误
+            time_spent=[60 + i * 5 for i in range(10)],  # 模拟时间
+        )
 
         accuracy_analysis = precise_service._calculate_recent_accuracy(mock_records)
 
@@ -168,21 +179,13 @@ def test_personalization_target(self, precise_service):
     def test_learning_pace_analysis(self, precise_service):
         """测试学习节奏分析."""
         # 模拟快节奏学习记录
-        fast_records = []
-        for i in range(15):
-            record = MagicMock()
-            record.time_spent = 30 + i  # 30-45秒，快节奏
-            fast_records.append(record)
+        fast_records = make_frame(time_spent=[30 + i for i in range(15)])  # 30-45秒，快节奏
 
         pace = precise_service._analyze_learning_pace(fast_records)
         assert pace == "fast", "应该识别为快节奏学习"
 
         # 模拟慢节奏学习记录
-        slow_records = []
-        for i in range(15):
-            record = MagicMock()
-            record.time_spent = 200 + i * 10  # 200-340秒，慢节奏
-            slow_records.append(record)
+        slow_records = make_frame(time_spent=[200 + i * 10 for i in range(15)])  # 200-340秒，慢节奏
 
         pace = precise_service._analyze_learning_pace(slow_records)
         assert pace == "slow", "应该识别为慢节奏学习"
@@ -190,21 +193,15 @@ def test_learning_pace_analysis(self, precise_service):
     def test_consistency_score_calculation(self, precise_service):
         """测试一致性分数计算."""
         # 模拟高一致性记录（连续正确）
-        consistent_records = []
-        for _i in range(20):
-            record = MagicMock()
-            record.is_correct = True  # 全部正确
-            consistent_records.append(record)
+        consistent_records = make_frame(is_correct=[True] * 20)  # 全部正确
 
         consistency = precise_service._calculate_consistency_score(consistent_records)
         assert consistency > 0.8, "高一致性记录应该有高一致性分数"
 
         # 模拟低一致性记录（随机正确/错误）
-        inconsistent_records = []
-        for i in range(20):
-            record = MagicMock()
-            record.is_correct = i % 2 == 0  # 交替正确/错误
-            inconsistent_records.append(record)
+        inconsistent_records = make_frame(
+            is_correct=[i % 2 == 0 for i in range(20)]  # 交替正确/错误
+        )
 
         consistency = precise_service._calculate_consistency_score(inconsistent_records)
         assert consistency < 0.7, "低一致性记录应该有低一致性分数"
@@ -212,12 +209,8 @@ def test_consistency_score_calculation(self, precise_service):
     def test_learning_style_identification(self, precise_service):
         """测试学习风格识别."""
         # 模拟稳定学习者记录
-        steady_records = []
-        for i in range(20):
-            record = MagicMock()
-            # 创建稳定的正确模式：每5题中4题正确
-            record.is_correct = (i % 5) != 4
-            steady_records.append(record)
+        # 创建稳定的正确模式：每5题中4题正确
+        steady_records = make_frame(is_correct=[(i % 5) != 4 for i in range(20)])
 
         style = precise_service._analyze_learning_style(steady_records)
         assert style in [
@@ -0,0 +1,98 @@
+"""出站调用准入控制测试."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from redis.exceptions import RedisError
+
+from app.shared.utils.priority_scheduler import (
+    AdmissionController,
+    AdmissionRejectedError,
+    TaskCategory,
+)
+
+MAX_WAIT = {
+    TaskCategory.REAL_TIME: 1.0,
+    TaskCategory.INTERACTIVE: 1.0,
+    TaskCategory.BATCH: 5.0,
+    TaskCategory.BACKGROUND: 5.0,
+}
+
+
+def make_controller(max_inflight: int = 4, **kwargs) -> AdmissionController:
+    return AdmissionController("test", max_inflight=max_inflight, max_wait=MAX_WAIT, **kwargs)
+
+
+class TestAdmissionController:
+    """准入控制器测试类."""
+
+    @pytest.mark.asyncio
+    async def test_batch_share_keeps_interactive_headroom(self):
+        """测试批处理最多占用部分槽位，释放后先放行交互请求."""
+        controller = make_controller()
+        for _ in range(3):
+            await controller.acquire(TaskCategory.BATCH)
+
+        # 批处理份额已满（4 × 0.75），新的批处理请求排队
+        queued_batch = asyncio.create_task(controller.acquire(TaskCategory.BATCH))
+        await asyncio.sleep(0)
+        assert not queued_batch.done()
+
+        # 交互请求仍可立即获得剩余槽位
+        await asyncio.wait_for(controller.acquire(TaskCategory.INTERACTIVE), 0.1)
+        queued_interactive = asyncio.create_task(controller.acquire(TaskCategory.INTERACTIVE))
+        await asyncio.sleep(0)
+
+        # 释放一个批处理槽位：排队的交互请求优先于先到的批处理请求
+        await controller.release(TaskCategory.BATCH, None)
+        await asyncio.wait_for(queued_interactive, 0.1)
+        assert not queued_batch.done()
+
+        await controller.release(TaskCategory.INTERACTIVE, None)
+        await asyncio.wait_for(queued_batch, 0.1)
+        assert controller.active[TaskCategory.BATCH] == 3
+
+    @pytest.mark.asyncio
+    async def test_deadline_and_load_shedding(self):
+        """测试等待超过截止时间被拒绝，预计等待过长时直接卸载."""
+        controller = make_controller(max_inflight=1)
+        controller.service_time = 0.01
+        await controller.acquire(TaskCategory.INTERACTIVE)
+
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            await controller.acquire(TaskCategory.INTERACTIVE, timeout=0.05)
+        assert exc_info.value.reason == "等待超时"
+        assert controller.stats[TaskCategory.INTERACTIVE]["expired"] == 1
+        assert not controller._waiters
+
+        controller.service_time = 10.0
+        with pytest.raises(AdmissionRejectedError) as exc_info:
+            await controller.acquire(TaskCategory.BACKGROUND)
+        assert exc_info.value.reason == "排队已满"
+
+        # 放弃排队的请求不占用槽位
+        await controller.release(TaskCategory.INTERACTIVE, None)
+        async with controller.admit(TaskCategory.INTERACTIVE):
+            assert sum(controller.active.values()) == 1
+        assert sum(controller.active.values()) == 0
+
+    @pytest.mark.asyncio
+    async def test_cluster_lease_retry_and_fail_open(self):
+        """测试集群租约已满时退避重试，Redis不可用时只做进程内限制."""
+        redis_client = AsyncMock()
+        script = AsyncMock(side_effect=[0, 1])
+        redis_client.register_script = MagicMock(return_value=script)
+        controller = make_controller(cluster_max_inflight=8, redis_client=redis_client)
+
+        lease_id = await controller.acquire(TaskCategory.BATCH)
+        assert lease_id is not None
+        assert script.await_count == 2
+        assert script.await_args.kwargs["args"][3] == 6  # 批处理可用集群槽位 8 × 0.75
+
+        await controller.release(TaskCategory.BATCH, lease_id)
+        redis_client.zrem.assert_awaited_once_with("admission:test:leases", lease_id)
+
+        script.side_effect = RedisError("down")
+        assert await controller.acquire(TaskCategory.INTERACTIVE) is None
+        assert controller.active[TaskCategory.INTERACTIVE] == 1
@@ -0,0 +1,163 @@
+"""指标收集器测试."""
+
+import statistics
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.shared.models.enums import AlertLevel, MetricType
+from app.shared.utils.metric_store import MetricRingBuffer, QuantileSketch
+from app.shared.utils.metrics_collector import (
+    AggregationType,
+    MetricDefinition,
+    MetricPoint,
+    MetricsCollector,
+    MetricUnit,
+)
+
+
+class TestMetricStore:
+    """指标时序存储测试类."""
+
+    def test_ring_buffer_keeps_latest_samples(self):
+        """测试环形缓冲区扩容和覆盖后保持写入顺序."""
+        buffer = MetricRingBuffer(capacity=100, initial_capacity=8)
+        for i in range(30):
+            buffer.append(float(i), float(i))
+        buffer.extend(np.arange(30, 130, dtype=float), np.arange(30, 130, dtype=float))
+
+        timestamps, values = buffer.ordered()
+        assert len(buffer) == 100
+        assert values.tolist() == list(range(30, 130))
+
+        assert buffer.drop_before(50.0) == 20
+        assert buffer.ordered()[0][0] == 50.0
+
+    def test_sketch_quantiles_within_relative_error(self):
+        """测试合并后的草图分位数误差在精度范围内."""
+        rng = np.random.default_rng(7)
+        samples = rng.lognormal(mean=3, sigma=1, size=20000)
+
+        merged = QuantileSketch(relative_accuracy=0.01)
+        for chunk in np.array_split(samples, 4):
+            sketch = QuantileSketch(relative_accuracy=0.01)
+            sketch.add_many(chunk)
+            merged.merge(sketch)
+
+        for q in (0.5, 0.95, 0.99):
+            expected = float(np.quantile(samples, q))
+            assert merged.quantile(q) == pytest.approx(expected, rel=0.02)
+        assert merged.count == len(samples)
+        assert merged.max == pytest.approx(samples.max())
+
+
+class TestMetricsCollector:
+    """指标收集器测试类."""
+
+    @pytest.fixture
+    def collector(self) -> MetricsCollector:
+        """创建注册了响应时间指标的收集器."""
+        collector = MetricsCollector()
+        collector.register_metric(
+            MetricDefinition(
+                name="http.response_time",
+                metric_type=MetricType.RESPONSE_TIME,
+                unit=MetricUnit.SECONDS,
+                description="响应时间",
+                aggregations=[
+                    AggregationType.AVERAGE,
+                    AggregationType.COUNT,
+                    AggregationType.PERCENTILE_95,
+                ],
+            )
+        )
+        return collector
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_single_collection(self, collector):
+        """测试批量收集与逐个收集的聚合结果一致."""
+        now = datetime.utcnow()
+        values = [0.01 * (i % 100 + 1) for i in range(1000)]
+        tags = [{"endpoint": "/a"}, {"endpoint": "/b"}]
+
+        await collector.collect_metrics_batch(
+            [
+                MetricPoint("http.response_time", value, now, tags[i % 2])
+                for i, value in enumerate(values)
+            ]
+        )
+        await collector._update_aggregated_metrics()
+
+        count = collector.get_aggregated_metric(
+            "http.response_time", AggregationType.COUNT
+        )
+        average = collector.get_aggregated_metric(
+            "http.response_time", AggregationType.AVERAGE
+        )
+        p95 = collector.get_aggregated_metric(
+            "http.response_time", AggregationType.PERCENTILE_95
+        )
+        assert count.value == 1000
+        assert average.value == pytest.approx(statistics.mean(values))
+        assert p95.value == pytest.approx(
+            statistics.quantiles(values, n=20)[18], rel=0.02
+        )
+        assert len(collector.get_metric_values("http.response_time", tags_filter=tags[0])) == 500
+
+    @pytest.mark.asyncio
+    async def test_series_per_metric_evicts_least_recently_used(self):
+        """测试标签组合超过上限时淘汰最久未用的序列."""
+        collector = MetricsCollector(max_series_per_metric=2)
+
+        await collector.collect_metric("http.requests", 1.0, tags={"id": "a"})
+        await collector.collect_metric("http.requests", 1.0, tags={"id": "b"})
+        await collector.collect_metric("http.requests", 1.0, tags={"id": "a"})
+        await collector.collect_metric("http.requests", 1.0, tags={"id": "c"})
+
+        assert list(collector.series["http.requests"]) == [(("id", "a"),), (("id", "c"),)]
+        assert len(collector.get_metric_values("http.requests", tags_filter={"id": "a"})) == 2
+
+    @pytest.mark.asyncio
+    async def test_point_budget_is_shared_across_series(self):
+        """测试单个指标的样本上限由各序列平分，新增序列时已有序列只保留最新样本."""
+        collector = MetricsCollector(max_points_per_metric=10)
+
+        await collector.collect_series_batch("http.requests", list(range(10)), tags={"id": "a"})
+        await collector.collect_metric("http.requests", 1.0, tags={"id": "b"})
+        await collector.collect_metric("http.requests", 1.0, tags={"id": "c"})
+
+        buffers = [series.buffer for series in collector.series["http.requests"].values()]
+        assert [buffer.capacity for buffer in buffers] == [3, 3, 3]
+        assert buffers[0].ordered()[1].tolist() == [7, 8, 9]
+
+    @pytest.mark.asyncio
+    async def test_alert_rules_trigger_and_resolve(self, collector):
+        """测试按指标索引的告警规则触发、去重与解决."""
+        alerts = []
+        collector.add_alert_callback(alerts.append)
+        collector.add_alert_rule("http.response_time", 2.0, AlertLevel.WARNING)
+
+        await collector.collect_series_batch("http.response_time", [0.5, 2.5, 3.0])
+        await collector.collect_metric("other.metric", 100.0)
+
+        assert len(alerts) == 1
+        assert alerts[0].current_value == 2.5
+
+        await collector.collect_metric("http.response_time", 1.0)
+        assert alerts[0].resolved
+
+    @pytest.mark.asyncio
+    async def test_batch_per_sample_cost(self, collector):
+        """测试批量收集的单样本开销."""
+        collector.add_alert_rule("http.response_time", 2.0, AlertLevel.WARNING)
+        values = np.random.default_rng(1).random(100000)
+
+        start = time.perf_counter()
+        for chunk in np.array_split(values, 100):
+            await collector.collect_series_batch("http.response_time", chunk)
+        per_sample = (time.perf_counter() - start) / len(values)
+
+        assert collector.collection_stats["total_points_collected"] == len(values)
+        assert per_sample < 5e-6
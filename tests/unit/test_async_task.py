@@ -0,0 +1,39 @@
+"""异步任务基类测试."""
+
+import asyncio
+
+from app.shared.tasks.async_task import (
+    AsyncTask,
+    get_worker_runtime,
+    shutdown_worker_runtime,
+)
+
+
+class TestAsyncTask:
+    """异步任务基类测试类."""
+
+    def test_event_loop_reused_across_runs(self):
+        """测试多次执行复用同一个常驻事件循环."""
+
+        async def current_loop() -> asyncio.AbstractEventLoop:
+            await asyncio.sleep(0)
+            return asyncio.get_running_loop()
+
+        task = AsyncTask()
+        try:
+            first = task.run_async(current_loop())
+            second = task.run_async(current_loop())
+
+            assert first is second
+            assert first is get_worker_runtime().loop
+        finally:
+            shutdown_worker_runtime()
+
+    def test_shutdown_stops_loop(self):
+        """测试关闭运行时后下次执行重建事件循环."""
+        runtime = get_worker_runtime()
+        shutdown_worker_runtime()
+
+        assert runtime.loop.is_closed()
+        assert get_worker_runtime() is not runtime
+        shutdown_worker_runtime()
@@ -0,0 +1,132 @@
+"""流式备份管道测试."""
+
+import gzip
+import os
+import subprocess
+
+import pytest
+
+from app.backup.utils.backup_utils import (
+    ZSTD_AVAILABLE,
+    BackupCompression,
+    BackupEncryption,
+    BackupValidator,
+    DatabaseDumper,
+    StreamingBackupWriter,
+    open_backup_stream,
+)
+
+
+def read_backup(path: str, compression: str | None, encryption: BackupEncryption | None) -> bytes:
+    """读取备份明文."""
+    source, reader = open_backup_stream(path, compression, encryption)
+    try:
+        return reader.read()
+    finally:
+        source.close()
+
+
+class TestStreamingBackup:
+    """流式备份管道测试类."""
+
+    @pytest.fixture
+    def payload(self) -> bytes:
+        """模拟pg_dump输出."""
+        return b"".join(
+            f"INSERT INTO users VALUES ({i}, 'student_{i}');\n".encode() for i in range(20000)
+        )
+
+    def write_backup(
+        self,
+        path: str,
+        payload: bytes,
+        compression: str | None,
+        encryption: BackupEncryption | None,
+    ) -> dict:
+        """分块写入备份."""
+        writer = StreamingBackupWriter(
+            path, compression=compression, encryption=encryption, chunk_size=64 * 1024
+        )
+        for offset in range(0, len(payload), 10000):
+            writer.write(payload[offset : offset + 10000])
+        return writer.close()
+
+    @pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+    def test_roundtrip_with_encryption(self, tmp_path, payload, compression):
+        """测试压缩加密后可流式还原，且校验和与落盘文件一致."""
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            pytest.skip("zstandard未安装")
+
+        path = str(tmp_path / "backup.sql.enc")
+        encryption = BackupEncryption()
+        stats = self.write_backup(path, payload, compression, encryption)
+
+        assert stats["original_size"] == len(payload)
+        assert stats["file_size"] == os.path.getsize(path)
+        assert stats["checksum"] == BackupValidator.calculate_checksum(path)
+        assert BackupEncryption.is_stream_encrypted(path)
+        assert read_backup(path, compression, encryption) == payload
+
+    def test_gzip_output_is_standard(self, tmp_path, payload):
+        """测试未加密的gzip备份可被标准工具解压."""
+        path = str(tmp_path / "backup.sql.gz")
+        stats = self.write_backup(path, payload, "gzip", None)
+
+        with gzip.open(path, "rb") as f:
+            assert f.read() == payload
+        assert stats["compression_ratio"] < 1
+
+    def test_truncated_backup_rejected(self, tmp_path, payload):
+        """测试截断的加密备份无法通过认证."""
+        path = str(tmp_path / "backup.sql.enc")
+        encryption = BackupEncryption()
+        self.write_backup(path, payload, None, encryption)
+
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 100)
+
+        with pytest.raises(ValueError):
+            read_backup(path, None, encryption)
+
+    def test_legacy_fernet_backup_readable(self, tmp_path, payload):
+        """测试整文件Fernet加密的旧备份仍可恢复."""
+        path = str(tmp_path / "legacy.sql.gz.enc")
+        encryption = BackupEncryption()
+        with open(path, "wb") as f:
+            f.write(encryption.fernet.encrypt(gzip.compress(payload)))
+
+        compression = BackupCompression.detect_algorithm(path)
+        assert compression == "gzip"
+        assert read_backup(path, compression, encryption) == payload
+
+    def test_incremental_restore_clears_and_loads_in_one_transaction(self, tmp_path, monkeypatch):
+        """测试增量恢复在同一个psql事务中清空目标表并导入数据，回放失败时不再单独清表."""
+        commands: list[list[str]] = []
+        returncodes = [0, 0]
+
+        def fake_run(cmd, **kwargs):
+            commands.append(cmd)
+            return subprocess.CompletedProcess(cmd, returncodes.pop(0), "", "error")
+
+        monkeypatch.setattr(subprocess, "run", fake_run)
+        dumper = DatabaseDumper({"database": "cet", "username": "postgres"})
+        dump_dir = str(tmp_path / "dump")
+
+        result = dumper.restore_directory_dump(
+            dump_dir, tables=["public.users"], data_only=True
+        )
+
+        assert result["success"]
+        pg_restore_cmd, psql_cmd = commands
+        script = next(arg for arg in pg_restore_cmd if arg.startswith("--file="))
+        assert pg_restore_cmd[0] == "pg_restore" and pg_restore_cmd[-1] == dump_dir
+        assert not any(arg.startswith("--dbname") for arg in pg_restore_cmd)
+        assert psql_cmd[0] == "psql" and "--single-transaction" in psql_cmd
+        assert psql_cmd[-1] == script
+        assert 'DELETE FROM "public"."users"' in psql_cmd[-2]
+
+        # 生成数据脚本失败时不执行清表
+        commands.clear()
+        returncodes[:] = [1]
+        result = dumper.restore_directory_dump(dump_dir, tables=["users"], data_only=True)
+        assert not result["success"] and len(commands) == 1
@@ -0,0 +1,72 @@
+"""批量邮件发送引擎测试."""
+
+from unittest.mock import MagicMock, patch
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.shared.utils.bulk_mailer import (
+    DOMAIN_THROTTLE_KEY_PREFIX,
+    BulkMailSender,
+    DomainThrottle,
+    compile_template,
+)
+
+
+class TestBulkMailer:
+    """批量邮件发送引擎测试类."""
+
+    def test_compiled_template_render(self):
+        """测试预编译模板渲染，缺失字段保留占位符."""
+        template = compile_template("<p>{name}，您好！{code} {missing}</p>")
+
+        assert template.render({"name": "张三", "code": 42}) == "<p>张三，您好！42 {missing}</p>"
+        assert compile_template("<p>{name}，您好！{code} {missing}</p>") is template
+
+    def test_bulk_send_collects_failures(self):
+        """测试批量发送汇总成功与失败统计."""
+        sent: list[str] = []
+
+        def fake_send(msg, retries=1):
+            if msg["To"].startswith("bad"):
+                raise OSError("connection refused")
+            sent.append(msg["To"])
+
+        email_list = [{"email": f"user{i}@example.com", "name": f"U{i}"} for i in range(10)]
+        email_list.append({"email": "bad@example.com", "name": "Bad"})
+
+        with patch("app.shared.utils.bulk_mailer.send_pooled_message", side_effect=fake_send):
+            stats = BulkMailSender(concurrency=4, domain_rate_limit=0).send(
+                email_list, "通知", "<p>{name}</p>"
+            )
+
+        assert stats["success_count"] == 10
+        assert stats["failed_count"] == 1
+        assert stats["failed_emails"][0]["email"] == "bad@example.com"
+        assert sorted(sent) == sorted(item["email"] for item in email_list[:10])
+
+    def test_domain_throttle_shares_bucket_in_redis(self):
+        """测试域名令牌桶保存在Redis中，按脚本返回的等待时间休眠后重试."""
+        script = MagicMock(side_effect=["0.25", "0"])
+        redis_client = MagicMock()
+        redis_client.register_script.return_value = script
+
+        with patch("app.shared.utils.bulk_mailer.time.sleep") as sleep:
+            DomainThrottle(2, redis_client=redis_client).acquire("user@Example.com")
+
+        sleep.assert_called_once_with(0.25)
+        assert script.call_args.kwargs == {
+            "keys": [f"{DOMAIN_THROTTLE_KEY_PREFIX}example.com"],
+            "args": [2, 2.0],
+        }
+
+    def test_domain_throttle_falls_back_to_local_bucket(self):
+        """测试Redis不可用时退回进程内令牌桶."""
+        redis_client = MagicMock()
+        redis_client.register_script.return_value = MagicMock(
+            side_effect=RedisConnectionError("down")
+        )
+        throttle = DomainThrottle(1, redis_client=redis_client)
+
+        assert throttle._reserve("example.com") == 0
+        assert throttle._reserve("example.com") > 0
+        assert throttle._reserve("other.com") == 0
@@ -0,0 +1,170 @@
+"""班级智能训练闭环批量执行测试."""
+
+import json
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.config import settings
+from app.shared.models.enums import TrainingType
+from app.training.services.cohort_training_loop_service import (
+    CohortTrainingLoopService,
+    cohort_checkpoint_key,
+)
+from app.training.utils.record_frame import LearningRecordFrame, load_learning_record_frames
+from tests.conftest import RecordingPipeline
+
+
+def make_record(record_id: int, student_id: int, is_correct: bool) -> dict:
+    return {
+        "id": record_id,
+        "student_id": student_id,
+        "session_id": 1,
+        "question_id": record_id,
+        "score": 1.0 if is_correct else 0.0,
+        "is_correct": is_correct,
+        "time_spent": 30,
+        "ai_confidence": 0.9,
+        "created_at": datetime.now() - timedelta(hours=record_id),
+        "knowledge_points_mastered": None,
+        "knowledge_points_weak": None,
+        "difficulty_level": None,
+        "knowledge_points": ["时态"],
+    }
+
+
+def make_service(monkeypatch, redis_client: AsyncMock) -> CohortTrainingLoopService:
+    monkeypatch.setattr(settings, "TRAINING_LOOP_STUDENTS_PER_CALL", 2)
+    monkeypatch.setattr(settings, "TRAINING_LOOP_AI_CONCURRENCY", 2)
+    service = CohortTrainingLoopService(AsyncMock(), redis_client)
+    service.deepseek_service = AsyncMock()
+    return service
+
+
+class TestCohortTrainingLoop:
+    """班级智能训练闭环批量执行测试类."""
+
+    @pytest.mark.asyncio
+    async def test_load_frames_splits_one_query_by_student(self):
+        """测试一次查询加载整批学生的记录，并按学生拆分，无记录的学生得到空数据帧."""
+        result = MagicMock()
+        result.mappings.return_value.all.return_value = [
+            make_record(3, 1, True),
+            make_record(2, 1, False),
+            make_record(1, 2, True),
+        ]
+        db = AsyncMock()
+        db.execute.return_value = result
+
+        frames = await load_learning_record_frames(db, [1, 2, 3])
+
+        db.execute.assert_awaited_once()
+        assert "IN" in str(db.execute.await_args.args[0].whereclause)
+        assert [len(frames[sid]) for sid in (1, 2, 3)] == [2, 1, 0]
+        assert frames[1].record_id.tolist() == [3, 2]
+        assert list(frames[2].kp_labels) == ["时态"]
+
+    @pytest.mark.asyncio
+    async def test_analyze_batch_packs_students_and_reuses_checkpoints(self, monkeypatch):
+        """测试已有检查点的学生不再调用AI，其余学生打包分析，解析失败的学生不返回结果."""
+        redis_client = AsyncMock()
+        pipeline = RecordingPipeline()
+        redis_client.pipeline = MagicMock(return_value=pipeline)
+        redis_client.hmget.return_value = [json.dumps({"analysis_success": True})] + [None] * 4
+        service = make_service(monkeypatch, redis_client)
+        content = {"students": [{"student_id": 2, "confidence": 0.9}, {"student_id": 99}]}
+        prompts: list[str] = []
+
+        async def generate_completion(prompt, **kwargs):
+            prompts.append(prompt)
+            if "# 学生 6" in prompt:
+                return False, None, "timeout"
+            assert kwargs["max_tokens"] == 4000
+            return True, {"choices": [{"message": {"content": json.dumps(content)}}]}, None
+
+        service.deepseek_service.generate_completion.side_effect = generate_completion
+        monkeypatch.setattr(
+            service, "_build_analysis_data_section", lambda data: f"数据{data['id']}\n"
+        )
+
+        async def finalize(analysis, collected_data):
+            return {"analysis_success": True, "ai_analysis": analysis}
+
+        monkeypatch.setattr(service, "_finalize_analysis", finalize)
+        collected = {
+            sid: (LearningRecordFrame.empty(), {"id": sid, "collection_success": sid != 5})
+            for sid in (1, 2, 3, 5, 6)
+        }
+
+        analyses = await service._analyze_batch(collected, "key")
+
+        assert sorted(analyses) == [1, 2, 5]
+        assert analyses[2]["ai_analysis"] == {
+            "confidence": 0.9,
+            "knowledge_mastery": {},
+            "weak_areas": [],
+            "improvement_suggestions": [],
+        }
+        assert analyses[5]["analysis_success"] is False
+        assert len(prompts) == 2
+        assert any("# 学生 2\n\n数据2\n# 学生 3\n\n数据3\n" in prompt for prompt in prompts)
+        (hset, expire) = pipeline.commands
+        assert list(hset[2]["mapping"]) == ["2"]
+        assert expire[1:3] == ("key", settings.TRAINING_LOOP_CHECKPOINT_TTL)
+
+    @pytest.mark.asyncio
+    async def test_execute_records_batches_and_defers_failed_analyses(self, monkeypatch):
+        """测试跳过当天已记录的学生，每批闭环记录一次写入提交，AI分析失败的学生留待重跑."""
+        monkeypatch.setattr(settings, "TRAINING_LOOP_BATCH_SIZE", 2)
+        redis_client = AsyncMock()
+        service = make_service(monkeypatch, redis_client)
+        service.db.add_all = MagicMock()
+        ids_result, done_result = MagicMock(), MagicMock()
+        ids_result.scalars.return_value.all.return_value = [1, 2, 3, 4]
+        done_result.scalars.return_value.all.return_value = [4]
+        service.db.execute.side_effect = [ids_result, done_result]
+
+        async def collect(student_ids, training_type):
+            return {sid: (LearningRecordFrame.empty(), {"sid": sid}) for sid in student_ids}
+
+        async def analyze(collected, checkpoint_key):
+            return {sid: {"analysis_success": True} for sid in collected if sid != 2}
+
+        async def adjust(student_id, training_type, analysis, frame):
+            assert frame is not None
+            return {"adjustment_success": True, "adjustment_time": datetime(2025, 3, 10)}
+
+        async def verify(student_id, training_type, adjustment, frame):
+            return {"verification_success": student_id == 1}
+
+        monkeypatch.setattr(service, "_collect_batch", collect)
+        monkeypatch.setattr(service, "_analyze_batch", analyze)
+        monkeypatch.setattr(service, "_strategy_adjustment_phase", adjust)
+        monkeypatch.setattr(service, "_effect_verification_phase", verify)
+        records: list = []
+        service.db.add_all.side_effect = records.append
+        monkeypatch.setattr(
+            service, "_build_loop_record", lambda result: SimpleNamespace(**result)
+        )
+
+        summary = await service.execute_cohort_training_loop(
+            7, TrainingType.READING, date(2025, 3, 10)
+        )
+
+        assert summary == {
+            "student_count": 4,
+            "skipped": 1,
+            "recorded": 2,
+            "loop_success": 1,
+            "deferred": 1,
+        }
+        assert [[record.student_id for record in batch] for batch in records] == [[1], [3]]
+        assert records[0][0].phases["strategy_adjustment"]["adjustment_time"] == (
+            "2025-03-10T00:00:00"
+        )
+        assert service.db.commit.await_count == 2
+        key = cohort_checkpoint_key(7, TrainingType.READING, date(2025, 3, 10))
+        assert key == "training_loop:cohort:7:READING:20250310"
+        assert redis_client.hdel.await_args_list[1].args == (key, "3")
@@ -0,0 +1,49 @@
+"""敏感词自动机匹配与内容安全检查测试."""
+
+from app.ai.services.content_security_service import ContentSecurityService
+from app.ai.utils.sensitive_matcher import SensitiveWordMatcher, normalize_text
+
+
+class TestSensitiveWordMatcher:
+    """敏感词匹配器测试类."""
+
+    def test_overlapping_matches_with_positions(self):
+        """测试重叠词单次扫描全部命中，位置对应原文."""
+        matcher = SensitiveWordMatcher({"考试作弊": "misconduct", "作弊": "cheating"})
+        text = "禁止考试作弊"
+        matches = matcher.find_all(text)
+        assert [(m.word, m.category, m.start, m.end) for m in matches] == [
+            ("考试作弊", "misconduct", 2, 6),
+            ("作弊", "cheating", 4, 6),
+        ]
+        assert text[matches[0].start : matches[0].end] == "考试作弊"
+
+    def test_full_width_and_word_boundaries(self):
+        """测试全角和大小写归一，英文词按单词边界匹配."""
+        assert normalize_text("ＣＨＥＡＴ　１２") == "cheat 12"
+        matcher = SensitiveWordMatcher({"cheat": "en", "ass": "en", "代写essay": "mixed"})
+        matches = matcher.find_all("Don't ＣＨＥＡＴ in class, 找人代写Essay")
+        assert [(m.word, m.start) for m in matches] == [("cheat", 6), ("代写essay", 24)]
+
+
+class TestContentSecurityService:
+    """内容安全服务测试类."""
+
+    def test_categories_and_whitelist(self):
+        """测试命中报告分类，白名单覆盖的命中不计入."""
+        service = ContentSecurityService()
+        service.update_sensitive_words({"技巧": "custom"})
+        service.update_whitelist_words(["考试技巧"])
+
+        result = service._check_sensitive_words("分享考试技巧，拒绝论文代写和其他技巧")
+        assert result["details"]["matched_words"] == ["论文代写", "技巧"]
+        assert result["details"]["categories"] == {"academic_misconduct": 1, "custom": 1}
+        assert result["risk_score"] == 40.0
+
+    def test_rebuild_replaces_matcher(self):
+        """测试词库变更时整体替换匹配器."""
+        service = ContentSecurityService()
+        matcher = service._matcher
+        service.remove_sensitive_words(["论文代写"])
+        assert service._matcher is not matcher
+        assert service._check_sensitive_words("论文代写")["violations"] == []
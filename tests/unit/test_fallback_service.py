@@ -0,0 +1,171 @@
+"""AI响应缓存与熔断器测试."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from redis.exceptions import RedisError
+
+from app.ai.services import deepseek_service, fallback_service
+from app.ai.services.deepseek_service import DeepSeekService
+from app.ai.services.fallback_service import (
+    RESPONSE_CACHE_PREFIX,
+    CircuitBreaker,
+    CircuitState,
+    FallbackService,
+    build_response_cache_key,
+)
+from app.ai.services.token_metering_service import BudgetExceededError
+from app.shared.services.cache_service import LRUCache
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """使用独立进程内缓存和模拟Redis的降级服务."""
+    monkeypatch.setattr(fallback_service, "_circuit_breakers", {})
+    redis_client = AsyncMock()
+    redis_client.get.return_value = None
+    instance = FallbackService(redis_client)
+    instance.fallback_cache = LRUCache(max_size=2)
+    return instance
+
+
+class TestResponseCache:
+    """响应缓存测试类."""
+
+    def test_cache_key_uses_full_prompt(self):
+        """测试缓存键覆盖完整提示词和生成参数，忽略行尾空白差异."""
+        preamble = "你是一名英语四级出题专家。" * 20
+        first = {"task_type": "qg", "prompt": preamble + "题型：听力"}
+        second = {"task_type": "qg", "prompt": preamble + "题型：阅读"}
+        assert build_response_cache_key(first) != build_response_cache_key(second)
+        assert build_response_cache_key(first) == build_response_cache_key(
+            {"task_type": "qg", "prompt": preamble + "题型：听力  \r\n"}
+        )
+        assert build_response_cache_key(first) != build_response_cache_key(
+            {**first, "parameters": {"temperature": 0.2}}
+        )
+
+    @pytest.mark.asyncio
+    async def test_two_tier_cache(self, service):
+        """测试写入两级缓存，进程内未命中时从Redis回填."""
+        request = {"task_type": "grading", "prompt": "essay"}
+        await service.update_cache(request, {"score": 80})
+
+        key = build_response_cache_key(request)
+        redis_key, raw = service.redis.set.await_args.args
+        assert redis_key == RESPONSE_CACHE_PREFIX + key
+        assert (await service.get_cached_response(request))["score"] == 80
+
+        service.fallback_cache.clear()
+        service.redis.get.return_value = raw
+        cached = await service.get_cached_response(request)
+        assert cached["score"] == 80
+        assert cached["from_cache"] is True
+        assert service.fallback_cache.get(key)["score"] == 80
+        assert "from_cache" not in json.loads(raw)
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_and_redis_failure(self, service):
+        """测试超出容量时淘汰最久未使用项，Redis故障按未命中处理."""
+        for prompt in ("a", "b", "c"):
+            await service.update_cache({"prompt": prompt}, {"text": prompt})
+        assert len(service.fallback_cache.cache) == 2
+
+        service.redis.get.side_effect = RedisError("down")
+        assert await service.get_cached_response({"prompt": "a"}) is None
+        assert (await service.get_cached_response({"prompt": "c"}))["text"] == "c"
+
+    @pytest.mark.asyncio
+    async def test_fallback_response_marks_cached_entry(self, service):
+        """测试降级响应返回缓存过的响应并标记为降级，未命中时返回None."""
+        request = {"task_type": "content_analysis", "prompt": "x"}
+        assert await service.get_fallback_response(request) is None
+
+        await service.update_cache(request, {"text": "ok"})
+        fallback = await service.get_fallback_response(request)
+        assert fallback["text"] == "ok"
+        assert fallback["is_fallback"] is True
+
+
+class TestCircuitBreaker:
+    """熔断器测试类."""
+
+    def test_half_open_allows_single_probe(self, monkeypatch):
+        """测试冷却后只放行一个试探请求，成功后恢复."""
+        now = [0.0]
+        monkeypatch.setattr(fallback_service.time, "monotonic", lambda: now[0])
+        breaker = CircuitBreaker("deepseek", failure_threshold=1, recovery_timeout=10)
+
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.allow_request()
+
+        now[0] = 11.0
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.allow_request()
+
+
+@pytest.mark.asyncio
+async def test_completion_cache_defaults_to_low_temperature_calls(monkeypatch):
+    """测试未指定 use_cache 时只有低温调用读取缓存，显式传入时以参数为准."""
+    cache = AsyncMock()
+    cache.get_cached_response.return_value = {"choices": []}
+    meter = MagicMock()
+    meter.reserve = AsyncMock(side_effect=BudgetExceededError("user", "1", 0))
+    monkeypatch.setattr(deepseek_service, "get_fallback_service", lambda: cache)
+    monkeypatch.setattr(deepseek_service, "get_token_metering_service", lambda: meter)
+    service = DeepSeekService()
+
+    assert await service.generate_completion("出题", temperature=0.7) == (
+        False,
+        None,
+        "AI调用额度已用完，请稍后再试",
+    )
+    cache.get_cached_response.assert_not_awaited()
+
+    assert await service.generate_completion("评分", temperature=0.2) == (
+        True,
+        {"choices": []},
+        None,
+    )
+    assert await service.generate_completion("出题", temperature=0.7, use_cache=True) == (
+        True,
+        {"choices": []},
+        None,
+    )
+    assert cache.get_cached_response.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_serves_fallback_response(monkeypatch):
+    """测试熔断期间不调用上游，返回降级服务缓存过的响应，未命中时返回失败."""
+    monkeypatch.setattr(fallback_service, "_circuit_breakers", {})
+    breaker = fallback_service.get_circuit_breaker("deepseek")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    cache = AsyncMock()
+    cache.get_fallback_response.return_value = {"choices": [], "is_fallback": True}
+    meter = MagicMock()
+    meter.reserve = AsyncMock()
+    meter.release = AsyncMock()
+    pool = AsyncMock()
+    monkeypatch.setattr(deepseek_service, "get_fallback_service", lambda: cache)
+    monkeypatch.setattr(deepseek_service, "get_token_metering_service", lambda: meter)
+    monkeypatch.setattr(deepseek_service, "get_deepseek_pool", pool)
+    service = DeepSeekService()
+
+    success, result, _ = await service.generate_completion("出题", temperature=0.7)
+    assert success is True
+    assert result["is_fallback"] is True
+    cache.get_cached_response.assert_not_awaited()
+
+    cache.get_fallback_response.return_value = None
+    success, result, error = await service.generate_completion("出题", temperature=0.7)
+    assert (success, result) == (False, None)
+    assert "熔断" in error
+    pool.assert_not_awaited()
+    assert meter.release.await_count == 2
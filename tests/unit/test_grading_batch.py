@@ -0,0 +1,206 @@
+"""整卷批量批改测试."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.ai.api.v1 import grading_endpoints
+from app.ai.schemas.grading_schemas import BatchGradingRequest, GradingRequest
+from app.core.config import settings
+from app.shared.models.enums import GradingStatus, QuestionType, TrainingType
+from app.shared.utils.priority_scheduler import TaskCategory
+from app.training.services.grading_service import IntelligentGradingService
+
+
+def make_question(
+    question_id: int,
+    question_type: QuestionType,
+    correct_answer: dict[str, Any],
+    max_score: float = 1.0,
+) -> SimpleNamespace:
+    """创建测试题目."""
+    return SimpleNamespace(
+        id=question_id,
+        question_type=question_type,
+        correct_answer=correct_answer,
+        max_score=max_score,
+        knowledge_points=["词汇"],
+        title="测试题目",
+        content={"text": "测试内容", "instruction": "", "source_text": "原文"},
+        training_type=TrainingType.VOCABULARY,
+    )
+
+
+class TestGradeSubmissionBatch:
+    """整卷批量批改测试类."""
+
+    @pytest.fixture
+    def grading_service(self) -> IntelligentGradingService:
+        """创建带模拟AI的批改服务."""
+        service = IntelligentGradingService(db=None)  # type: ignore[arg-type]
+        ai_content = json.dumps(
+            {"total_score": 12, "confidence": 0.9, "detailed_feedback": "详细批改" * 20}
+        )
+        service.deepseek_service.generate_completion = AsyncMock(  # type: ignore[method-assign]
+            return_value=(True, {"choices": [{"message": {"content": ai_content}}]}, None)
+        )
+        return service
+
+    async def collect(
+        self, service: IntelligentGradingService, items: list[Any]
+    ) -> dict[int, Any]:
+        """收集流式批改结果."""
+        return {index: result async for index, result in service.grade_submission_batch(items)}
+
+    @pytest.mark.asyncio
+    async def test_objective_items_skip_ai(self, grading_service):
+        """测试客观题不调用AI且结果正确."""
+        choice = make_question(1, QuestionType.MULTIPLE_CHOICE, {"option": "B"})
+        listening = make_question(
+            2, QuestionType.LISTENING_COMPREHENSION, {"answers": ["A", "C"]}
+        )
+        fill_blank = make_question(3, QuestionType.FILL_BLANK, {"words": ["apple"]})
+
+        results = await self.collect(
+            grading_service,
+            [
+                (choice, {"option": " b "}),
+                (choice, {"option": "A"}),
+                (listening, {"answers": ["a", "D"]}),
+                (fill_blank, {"words": ["Apples"]}),
+            ],
+        )
+
+        assert results[0].is_correct and results[0].score == 1.0
+        assert not results[1].is_correct and results[1].score == 0.0
+        assert results[2].score == pytest.approx(0.5)
+        assert results[3].is_correct
+        grading_service.deepseek_service.generate_completion.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_subjective_items_deduplicated(self, grading_service):
+        """测试相同作文答案只调用一次AI."""
+        essay = make_question(10, QuestionType.ESSAY, {}, max_score=15.0)
+
+        results = await self.collect(
+            grading_service,
+            [
+                (essay, {"text": "My hobby is reading."}),
+                (essay, {"text": "  My hobby   is reading. "}),
+                (essay, {"text": "I like sports."}),
+            ],
+        )
+
+        assert len(results) == 3
+        assert all(result.score == 12 for result in results.values())
+        assert grading_service.deepseek_service.generate_completion.await_count == 2
+        assert results[0] is not results[1]
+        # 批量批改的AI调用按批处理类别参与准入控制
+        calls = grading_service.deepseek_service.generate_completion.await_args_list
+        assert {call.kwargs["category"] for call in calls} == {TaskCategory.BATCH}
+
+    @pytest.mark.asyncio
+    async def test_category_reaches_fill_blank_ai_grading(self, grading_service):
+        """测试规则未能判定的填空题同样按指定类别调用AI."""
+        fill_blank = make_question(3, QuestionType.FILL_BLANK, {"words": ["apple"]})
+
+        stream = grading_service.grade_submission_batch(
+            [(fill_blank, {"words": ["banana"]})], category=TaskCategory.BACKGROUND
+        )
+        assert [index async for index, _ in stream] == [0]
+
+        call = grading_service.deepseek_service.generate_completion.await_args
+        assert call.kwargs["category"] == TaskCategory.BACKGROUND
+
+    @pytest.mark.asyncio
+    async def test_invalid_answer_returns_error(self, grading_service):
+        """测试答案格式错误时返回失败结果."""
+        choice = make_question(1, QuestionType.MULTIPLE_CHOICE, {"option": "B"})
+
+        results = await self.collect(grading_service, [(choice, {})])
+
+        assert results[0].grading_status == GradingStatus.FAILED
+
+    @pytest.mark.asyncio
+    async def test_lanes_run_together_and_keep_original_answers(self, grading_service):
+        """测试主观题AI批改在客观题返回期间即已开始，结果中保留原始标准答案."""
+        essay = make_question(10, QuestionType.ESSAY, {}, max_score=15.0)
+        listening = make_question(
+            2, QuestionType.LISTENING_COMPREHENSION, {"answers": [" a", "C"]}
+        )
+
+        stream = grading_service.grade_submission_batch(
+            [(essay, {"text": "My hobby is reading."}), (listening, {"answers": ["A", "c"]})]
+        )
+        index, result = await stream.__anext__()
+        await asyncio.sleep(0)
+
+        assert index == 1 and result.is_correct
+        assert result.ai_feedback["correct_answers"] == [" a", "C"]
+        grading_service.deepseek_service.generate_completion.assert_awaited_once()
+        assert [index async for index, _ in stream] == [0]
+
+
+class TestStreamBatchGradingEndpoint:
+    """整卷批改端点测试类."""
+
+    @staticmethod
+    def make_request(count: int, priority: str = "normal") -> BatchGradingRequest:
+        """创建批量批改请求."""
+        return BatchGradingRequest(
+            grading_requests=[
+                GradingRequest(question_id=1, user_answer={"option": "B"}) for _ in range(count)
+            ],
+            priority=priority,
+        )
+
+    @pytest.mark.asyncio
+    async def test_oversized_batch_is_rejected(self, monkeypatch):
+        """测试超过题数上限的请求在查库前被拒绝."""
+        monkeypatch.setattr(settings, "GRADING_BATCH_MAX_ITEMS", 2)
+        db = AsyncMock()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await grading_endpoints.stream_batch_grading(
+                self.make_request(3), current_user=MagicMock(), db=db
+            )
+
+        assert exc_info.value.status_code == 413
+        db.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("priority", "category"),
+        [
+            ("low", TaskCategory.BACKGROUND),
+            ("normal", TaskCategory.BATCH),
+            ("urgent", TaskCategory.INTERACTIVE),
+        ],
+    )
+    async def test_priority_maps_to_admission_category(self, priority, category):
+        """测试请求优先级映射为AI调用准入类别."""
+        question = make_question(1, QuestionType.MULTIPLE_CHOICE, {"option": "B"})
+        db = AsyncMock()
+        db.execute.return_value.scalars = MagicMock(
+            return_value=MagicMock(all=MagicMock(return_value=[question]))
+        )
+
+        async def fake_batch(items: Any, category: TaskCategory) -> Any:
+            for index, _ in enumerate(items):
+                yield index, MagicMock(model_dump=MagicMock(return_value={}))
+
+        service = MagicMock()
+        service.grade_submission_batch = MagicMock(side_effect=fake_batch)
+        with patch.object(grading_endpoints, "IntelligentGradingService", return_value=service):
+            response = await grading_endpoints.stream_batch_grading(
+                self.make_request(1, priority), current_user=MagicMock(), db=db
+            )
+            chunks = [chunk async for chunk in response.body_iterator]
+
+        assert service.grade_submission_batch.call_args.kwargs["category"] == category
+        assert len(chunks) == 2
@@ -0,0 +1,90 @@
+"""热点资源互动计数批量写回与热度衰减测试."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.resources.services.hotspot_service import (
+    ENGAGEMENT_FLUSHING_KEY,
+    ENGAGEMENT_PENDING_KEY,
+    HotspotService,
+    _engagement_update_statement,
+    aggregate_engagement_counts,
+    popularity_decay_factor,
+)
+
+
+class TestHotspotEngagement:
+    """热点互动计数测试类."""
+
+    def test_aggregate_engagement_counts(self):
+        """测试按资源汇总计数."""
+        params = aggregate_engagement_counts(
+            {"1:view": "1000", "1:like": "2", "2:share": "5", "2:unknown": "9"}
+        )
+        by_id = {param["b_id"]: param for param in params}
+
+        assert by_id[1] == {"b_id": 1, "d_view": 1000, "d_like": 2, "d_share": 0, "d_comment": 0}
+        assert by_id[2]["d_share"] == 5
+        assert by_id[2]["d_view"] == 0
+
+    def test_engagement_update_is_set_based(self):
+        """测试互动计数写回为按主键累加的单条UPDATE，热度分数由不封顶的累计值推导."""
+        sql = str(_engagement_update_statement().compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE hotspot_resources SET")
+        assert "view_count=(hotspot_resources.view_count + %(d_view)s)" in sql
+        heat = "hotspot_resources.engagement_heat + %(d_view)s * "
+        assert f"engagement_heat=({heat}" in sql
+        assert f"popularity_score=least({heat}" in sql
+        assert "WHERE hotspot_resources.id = %(b_id)s" in sql
+
+    def test_popularity_decay_factor(self):
+        """测试热度分数按半衰期衰减."""
+        assert popularity_decay_factor(0) == pytest.approx(1.0)
+        assert popularity_decay_factor(24 * 3600) == pytest.approx(0.5)
+
+    @pytest.mark.asyncio
+    async def test_flush_engagement_in_batches(self):
+        """测试待写回计数原子换出后按主键顺序分批写入，一次提交后才删除处理中的键."""
+        redis_client = AsyncMock()
+        script = AsyncMock(return_value=1)
+        redis_client.register_script = MagicMock(return_value=script)
+        redis_client.hgetall.return_value = {
+            "2:view": "5",
+            "1:view": "3",
+            "1:like": "1",
+            "3:share": "2",
+        }
+        db = AsyncMock()
+        service = HotspotService(db, redis_client)
+
+        assert await service.flush_engagement_metrics(batch_size=2) == 3
+
+        assert script.await_args.kwargs["keys"] == [
+            ENGAGEMENT_PENDING_KEY,
+            ENGAGEMENT_FLUSHING_KEY,
+        ]
+        batches = [call.args[1] for call in db.execute.await_args_list]
+        assert [[row["b_id"] for row in batch] for batch in batches] == [[1, 2], [3]]
+        db.commit.assert_awaited_once()
+        redis_client.delete.assert_awaited_once_with(ENGAGEMENT_FLUSHING_KEY)
+
+        script.return_value = 0
+        assert await service.flush_engagement_metrics() == 0
+        assert db.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_flush_failure_keeps_counts_for_retry(self):
+        """测试写入失败时不删除处理中的键，下次优先重试."""
+        redis_client = AsyncMock()
+        redis_client.register_script = MagicMock(return_value=AsyncMock(return_value=1))
+        redis_client.hgetall.return_value = {"1:view": "3"}
+        db = AsyncMock()
+        db.execute.side_effect = RuntimeError("db down")
+        service = HotspotService(db, redis_client)
+
+        with pytest.raises(RuntimeError):
+            await service.flush_engagement_metrics()
+
+        redis_client.delete.assert_not_awaited()
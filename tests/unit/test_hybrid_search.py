@@ -0,0 +1,127 @@
+"""混合检索多路并行、分数融合与查询向量缓存测试."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.ai.services.deepseek_embedding_service import DeepSeekEmbeddingService
+from app.core.config import settings
+from app.resources.services import vector_search_service
+from app.resources.services.vector_search_service import (
+    SearchQuery,
+    SearchResult,
+    VectorSearchService,
+    build_search_cache_key,
+    fuse_search_results,
+)
+
+
+def make_result(chunk_id: int, score: float, highlight: str | None = None) -> SearchResult:
+    """构造检索结果."""
+    return SearchResult(
+        resource_id=1,
+        chunk_id=chunk_id,
+        content=f"chunk {chunk_id}",
+        similarity_score=score,
+        relevance_score=score,
+        final_score=score,
+        highlight=highlight,
+    )
+
+
+class TestHybridSearch:
+    """混合检索测试类."""
+
+    def test_rrf_fusion(self):
+        """测试RRF按排名融合，多路命中的切片排在前面并保留高亮."""
+        fused = fuse_search_results(
+            {
+                "vector": [make_result(1, 0.9), make_result(2, 0.8)],
+                "keyword": [make_result(3, 0.7), make_result(2, 0.2, "<mark>x</mark>")],
+                "semantic": [],
+            },
+            weights={"vector": 1.0, "keyword": 1.0},
+        )
+        assert [r.chunk_id for r in fused] == [2, 1, 3]
+        assert fused[0].final_score == pytest.approx(1.0)
+        assert fused[0].metadata["search_methods"] == ["vector", "keyword"]
+        assert fused[0].metadata["leg_scores"] == {"vector": 0.8, "keyword": 0.2}
+        assert fused[0].highlight == "<mark>x</mark>"
+
+    def test_weighted_fusion(self):
+        """测试加权融合对各路分数归一化后累加."""
+        fused = fuse_search_results(
+            {
+                "vector": [make_result(1, 0.9), make_result(2, 0.5)],
+                "keyword": [make_result(2, 0.3), make_result(3, 0.1)],
+            },
+            method="weighted",
+            weights={"vector": 1.0, "keyword": 0.5},
+        )
+        assert [r.chunk_id for r in fused] == [1, 2, 3]
+        assert fused[1].final_score == pytest.approx(0.5)
+        assert fused[2].final_score == pytest.approx(0.0)
+
+    def test_cache_key_is_stable(self):
+        """测试缓存键与空白和过滤器顺序无关."""
+        first = SearchQuery(query_text="四级  听力", filters={"a": 1, "b": 2})
+        second = SearchQuery(query_text=" 四级 听力", filters={"b": 2, "a": 1})
+        assert build_search_cache_key(first) == build_search_cache_key(second)
+        assert build_search_cache_key(first) != build_search_cache_key(
+            SearchQuery(query_text="四级 听力", top_k=5)
+        )
+
+    @pytest.mark.asyncio
+    async def test_legs_use_own_sessions_and_deadline(self, monkeypatch):
+        """测试各路使用独立会话，超时的检索路被放弃."""
+        monkeypatch.setattr(settings, "HYBRID_SEARCH_LEG_TIMEOUT", 0.05)
+        sessions = []
+
+        def session_factory():
+            session = MagicMock()
+            session.__aenter__ = AsyncMock(return_value=session)
+            session.__aexit__ = AsyncMock(return_value=False)
+            sessions.append(session)
+            return session
+
+        service = VectorSearchService(AsyncMock(), AsyncMock(), session_factory=session_factory)
+        used_sessions = {}
+
+        async def vector_leg(query, db):
+            used_sessions["vector"] = db
+            await asyncio.sleep(1)
+            return [make_result(1, 0.9)]
+
+        async def keyword_leg(query, db):
+            used_sessions["keyword"] = db
+            return [make_result(2, 0.5)]
+
+        async def semantic_leg(query, db):
+            used_sessions["semantic"] = db
+            raise RuntimeError("boom")
+
+        service._vector_search = vector_leg
+        service._keyword_search = keyword_leg
+        service._semantic_search = semantic_leg
+
+        results = await service._hybrid_search_implementation(SearchQuery(query_text="q"))
+
+        assert [r.chunk_id for r in results] == [2]
+        assert len(sessions) == 3
+        assert len({id(db) for db in used_sessions.values()}) == 3
+        assert all(session.__aexit__.await_count == 1 for session in sessions)
+
+    @pytest.mark.asyncio
+    async def test_query_embedding_cache(self, monkeypatch):
+        """测试规范化后相同的查询只向量化一次."""
+        vectorize = AsyncMock(return_value=[0.1, 0.2])
+        monkeypatch.setattr(DeepSeekEmbeddingService, "vectorize_text", vectorize)
+        monkeypatch.setattr(
+            vector_search_service, "_query_embedding_cache", vector_search_service.LRUCache()
+        )
+        service = VectorSearchService(AsyncMock(), AsyncMock())
+
+        assert await service._vectorize_query("cet  listening") == [0.1, 0.2]
+        assert await service._vectorize_query(" cet listening ") == [0.1, 0.2]
+        vectorize.assert_awaited_once_with("cet listening")
@@ -0,0 +1,65 @@
+"""学习分析上下文与共享缓存测试."""
+
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.analytics.services.learning_analytics_service import (
+    LearningAnalysisContext,
+    LearningAnalyticsService,
+    _analysis_cache,
+    invalidate_user_analysis,
+)
+from app.shared.models.enums import DifficultyLevel
+
+
+def make_context(days: int = 14) -> LearningAnalysisContext:
+    """构造前一周答错、后一周答对的分析上下文."""
+    start = datetime(2025, 3, 1)
+    records = [
+        SimpleNamespace(
+            created_at=(start + timedelta(days=day, hours=1)).replace(
+                tzinfo=UTC
+            ),
+            is_correct=day >= 7,
+            time_spent=30,
+            question=SimpleNamespace(difficulty_level=DifficultyLevel.INTERMEDIATE),
+        )
+        for day in range(days)
+    ]
+    return LearningAnalysisContext(
+        user_id="1",
+        start_time=start,
+        end_time=start + timedelta(days=days),
+        sessions=[],
+        records=records,  # type: ignore[arg-type]
+    )
+
+
+class TestLearningAnalysisContext:
+    """学习分析上下文测试类."""
+
+    @pytest.mark.asyncio
+    async def test_progress_and_improvement_from_context(self):
+        """测试进度和改进率基于同一份预加载数据计算."""
+        service = LearningAnalyticsService()
+        context = make_context()
+
+        progress = await service._analyze_learning_progress(context)
+        weeks = list(progress["weekly_progress"].values())
+
+        assert [week["questions_answered"] for week in weeks] == [7, 7]
+        assert [week["accuracy"] for week in weeks] == [0.0, 1.0]
+        assert progress["trend"] == "improving"
+        assert service._calculate_improvement_rate(context) == 1.0
+
+    def test_invalidate_user_analysis(self):
+        """测试按用户使共享缓存失效."""
+        _analysis_cache.set("user_analysis:1:30:v1", {"user_id": "1"})
+        _analysis_cache.set("user_analysis:1:7:v1", {"user_id": "1"})
+        _analysis_cache.set("user_analysis:12:30:v1", {"user_id": "12"})
+
+        assert invalidate_user_analysis(1) == 2
+        assert _analysis_cache.get("user_analysis:12:30:v1") == {"user_id": "12"}
+        assert LearningAnalyticsService().analysis_cache is _analysis_cache
@@ -0,0 +1,50 @@
+"""文档切片关键词检索分词与摘要测试."""
+
+from app.resources.utils.lexical_search import (
+    build_search_document,
+    build_tsquery,
+    extract_query_terms,
+    generate_snippet,
+    tokenize_with_offsets,
+)
+
+
+class TestLexicalSearch:
+    """关键词检索工具测试类."""
+
+    def test_mixed_tokenization_offsets(self):
+        """测试英文按词小写、中文切二元组，偏移对应原文."""
+        text = "CET-4听力理解 Tips"
+        tokens = tokenize_with_offsets(text)
+        assert [token.term for token in tokens] == [
+            "cet",
+            "4",
+            "听力",
+            "力理",
+            "理解",
+            "tips",
+        ]
+        assert all(
+            text[token.start : token.end].lower() == token.term for token in tokens
+        )
+        assert build_search_document("读 Reading") == "读 reading"
+
+    def test_query_terms_and_tsquery(self):
+        """测试查询词项去重并以或连接."""
+        terms = extract_query_terms("听力 listening 听力 Listening")
+        assert terms == ["听力", "listening"]
+        assert build_tsquery(terms) == "听力 | listening"
+        assert extract_query_terms("?!") == []
+
+    def test_snippet_picks_densest_window(self):
+        """测试摘要选择命中最密集的窗口并合并重叠高亮."""
+        content = "听力" + "填充内容" * 30 + "四级听力理解的技巧" + "结尾" * 30
+        snippet = generate_snippet(content, extract_query_terms("听力理解"), 40)
+        assert snippet.startswith("...")
+        assert snippet.endswith("...")
+        assert "<mark>听力理解</mark>" in snippet
+
+    def test_snippet_without_hits(self):
+        """测试无命中时返回截断原文."""
+        assert generate_snippet("abc" * 100, ["zzz"], 10) == "abcabcabca..."
+        assert generate_snippet("short", ["zzz"]) == "short"
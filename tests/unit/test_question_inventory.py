@@ -0,0 +1,217 @@
+"""预生成题库库存测试."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.config import settings
+from app.shared.models.enums import DifficultyLevel, QuestionType, TrainingType
+from app.training.services import training_center_service
+from app.training.services.question_inventory_service import (
+    SHORT_BUCKETS_KEY,
+    TRACKED_BUCKETS_KEY,
+    QuestionInventoryService,
+    allocate_question_types,
+    parse_stock_key,
+    stock_key,
+)
+from tests.conftest import RecordingPipeline
+
+
+def make_result(rows: list) -> MagicMock:
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = rows
+    result.all.return_value = rows
+    return result
+
+
+def make_question(question_id: int) -> SimpleNamespace:
+    # ORM映射在单元测试环境中不完整，题目用简单对象代替
+    return SimpleNamespace(id=question_id)
+
+
+class TestQuestionInventory:
+    """题库库存测试类."""
+
+    def test_stock_key_and_allocation(self):
+        """测试库存桶标识可逆解析，题量按题型权重分配."""
+        key = stock_key(
+            TrainingType.VOCABULARY, DifficultyLevel.INTERMEDIATE, QuestionType.FILL_BLANK
+        )
+        assert key == "VOCABULARY:INTERMEDIATE:FILL_BLANK:*"
+        assert parse_stock_key(key)[3] is None
+        assert parse_stock_key(
+            stock_key(TrainingType.READING, DifficultyLevel.ADVANCED, QuestionType.ESSAY, "a:b")
+        ) == (TrainingType.READING, DifficultyLevel.ADVANCED, QuestionType.ESSAY, "a:b")
+
+        allocation = allocate_question_types(TrainingType.VOCABULARY, 10)
+        assert allocation == {
+            QuestionType.MULTIPLE_CHOICE: 6,
+            QuestionType.FILL_BLANK: 3,
+            QuestionType.TRANSLATION_EN_TO_CN: 1,
+        }
+        assert sum(allocate_question_types(TrainingType.TRANSLATION, 7).values()) == 7
+
+    @pytest.mark.asyncio
+    async def test_draw_from_stock_wraps_around_pivot(self):
+        """测试从随机起点读取不足时回绕到开头补齐."""
+        db = AsyncMock()
+        db.execute.side_effect = [
+            make_result([make_question(1)]),
+            make_result([make_question(2), make_question(3)]),
+        ]
+        service = QuestionInventoryService(db, AsyncMock())
+
+        questions = await service._draw_from_stock("READING:ADVANCED:ESSAY:*", 3, 7, [9])
+
+        assert [question.id for question in questions] == [1, 2, 3]
+        first, second = (call.args[0] for call in db.execute.await_args_list)
+        assert "sampling_key >=" in str(first.whereclause)
+        assert "sampling_key <" in str(second.whereclause)
+        assert "NOT (EXISTS" in str(first.whereclause)
+        assert (first._limit, second._limit) == (3, 2)
+
+    @pytest.mark.asyncio
+    async def test_draw_prefers_unseen_and_marks_buckets(self, monkeypatch):
+        """测试先抽知识点桶和未做过的题，不足时放宽重复并登记库存不足的桶."""
+        redis_client = AsyncMock()
+        pipeline = RecordingPipeline()
+        redis_client.pipeline = MagicMock(return_value=pipeline)
+        service = QuestionInventoryService(AsyncMock(), redis_client)
+
+        calls: list[tuple] = []
+        stock = {
+            ("WRITING:BEGINNER:ESSAY:议论文", 7): [make_question(1)],
+            ("WRITING:BEGINNER:ESSAY:*", None): [make_question(5)],
+        }
+
+        async def draw_from_stock(key, count, student_id, exclude_ids):
+            calls.append((key, count, student_id, list(exclude_ids)))
+            return stock.get((key, student_id), [])[:count]
+
+        monkeypatch.setattr(service, "_draw_from_stock", draw_from_stock)
+
+        questions = await service.draw(
+            TrainingType.WRITING, DifficultyLevel.BEGINNER, 3, ["议论文"], student_id=7
+        )
+
+        kp_key, general_key = "WRITING:BEGINNER:ESSAY:议论文", "WRITING:BEGINNER:ESSAY:*"
+        assert [question.id for question in questions] == [1, 5]
+        assert calls == [
+            (kp_key, 3, 7, []),
+            (general_key, 2, 7, [1]),
+            (kp_key, 2, None, [1]),
+            (general_key, 2, None, [1]),
+        ]
+        assert pipeline.commands == [
+            ("sadd", TRACKED_BUCKETS_KEY, kp_key),
+            ("sadd", SHORT_BUCKETS_KEY, kp_key, general_key),
+        ]
+        service.db.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_replenish_plans_by_depletion_and_commits_per_bucket(self, monkeypatch):
+        """测试补货按库存从少到多排序并受单轮上限限制，每个桶生成后单独提交."""
+        monkeypatch.setattr(settings, "QUESTION_INVENTORY_LOW_WATER", 5)
+        monkeypatch.setattr(settings, "QUESTION_INVENTORY_HIGH_WATER", 10)
+        monkeypatch.setattr(settings, "QUESTION_INVENTORY_MAX_STOCK", 12)
+        monkeypatch.setattr(settings, "QUESTION_INVENTORY_MAX_PER_RUN", 12)
+        monkeypatch.setattr(
+            "app.training.services.question_inventory_service.general_stock_keys",
+            lambda: ["A:x", "B:x", "C:x"],
+        )
+        full, low, empty = "A:x", "B:x", "C:x"
+        short = "WRITING:BEGINNER:ESSAY:议论文"
+        db = AsyncMock()
+        db.add_all = MagicMock()
+        db.execute.return_value = make_result([(full, 9), (low, 4), (short, 11)])
+        redis_client = AsyncMock()
+        redis_client.smembers.side_effect = [{short}, {short}]
+        service = QuestionInventoryService(db, redis_client)
+
+        # 空桶补到高水位，低水位以下的桶补到高水位，抽题不足的桶在上限内再补
+        assert await service.plan_replenishment() == {empty: 10, low: 2}
+
+        monkeypatch.setattr(settings, "QUESTION_INVENTORY_MAX_PER_RUN", 100)
+        redis_client.smembers.side_effect = [{short}, {short}]
+        generated: list[tuple] = []
+
+        async def generator(training_type, difficulty_level, question_type, kp, count):
+            generated.append((training_type, kp, count))
+            return [make_question(n) for n in range(count)]
+
+        monkeypatch.setattr(
+            "app.training.services.question_inventory_service.parse_stock_key",
+            lambda key: (key, None, None, key.rsplit(":", 1)[-1]),
+        )
+        result = await service.replenish(generator)
+
+        assert result == {"bucket_count": 3, "question_count": 10 + 6 + 1}
+        assert sorted(generated) == sorted(
+            [(empty, "x", 10), (low, "x", 6), (short, "议论文", 1)]
+        )
+        assert db.commit.await_count == 3
+        redis_client.srem.assert_awaited_once()
+        assert short in redis_client.srem.await_args.args
+
+    @pytest.mark.asyncio
+    async def test_generate_stock_questions_bypasses_cache_and_dedupes(self, monkeypatch):
+        """测试库存出题不使用AI响应缓存，并发请求生成的重复题目按内容去重."""
+        monkeypatch.setattr(training_center_service, "Question", SimpleNamespace)
+        service = training_center_service.TrainingCenterService(AsyncMock())
+        ai_calls: list[dict] = []
+
+        async def safe_ai_completion(prompt, **kwargs):
+            ai_calls.append(kwargs)
+            return {"choices": []}
+
+        items = [
+            {"title": "t1", "content": {"stem": "A"}, "correct_answer": {"answer": "a"}},
+            {"title": "t2", "content": {"stem": "B"}, "correct_answer": {"answer": "b"}},
+        ]
+        monkeypatch.setattr(service, "_safe_ai_completion", safe_ai_completion)
+        monkeypatch.setattr(service, "_build_stock_prompt", AsyncMock(return_value="prompt"))
+        monkeypatch.setattr(service, "_parse_stock_items", lambda response, training_type, question_type: items)
+        per_request = training_center_service.STOCK_QUESTION_PROFILES[TrainingType.VOCABULARY][
+            "questions_per_request"
+        ]
+
+        questions = await service.generate_stock_questions(
+            TrainingType.VOCABULARY,
+            DifficultyLevel.BEGINNER,
+            QuestionType.MULTIPLE_CHOICE,
+            None,
+            per_request * 2,
+        )
+
+        assert [question.content for question in questions] == [{"stem": "A"}, {"stem": "B"}]
+        assert len(ai_calls) == 2
+        assert all(call["use_cache"] is False for call in ai_calls)
+
+    def test_parse_stock_items_strips_empty_optional_fields(self):
+        """测试空的可选字段被去掉而不是丢弃整道题，缺必填字段的题目仍被丢弃."""
+        service = training_center_service.TrainingCenterService(AsyncMock())
+
+        def ai_response(content: dict) -> dict:
+            data = {"title": "词汇填空题", "content": content, "correct_answer": {"word": "x"}}
+            return {"choices": [{"message": {"content": json.dumps(data)}}]}
+
+        items = service._parse_stock_items(
+            ai_response({"text": "I ___ it.", "hint": ""}),
+            TrainingType.VOCABULARY,
+            QuestionType.FILL_BLANK,
+        )
+        assert [item["content"] for item in items] == [{"text": "I ___ it."}]
+
+        assert not service._parse_stock_items(
+            ai_response({"text": "", "hint": "l"}),
+            TrainingType.VOCABULARY,
+            QuestionType.FILL_BLANK,
+        )
+        assert not service._parse_stock_items(
+            ai_response({"text": "I ___ it.", "options": []}),
+            TrainingType.VOCABULARY,
+            QuestionType.MULTIPLE_CHOICE,
+        )
@@ -0,0 +1,192 @@
+"""题目统计累计测试."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.training.services.question_statistics_service import (
+    STATS_DELTA_KEY,
+    STATS_FLUSHING_KEY,
+    STATS_LOCK_KEY,
+    QuestionStatisticsService,
+    StatisticsDelta,
+    parse_deltas,
+)
+from tests.conftest import RecordingPipeline
+
+
+class TestQuestionStatistics:
+    """题目统计累计测试类."""
+
+    @pytest.mark.asyncio
+    async def test_record_attempt_buffers_delta_or_increments_directly(self):
+        """测试答题增量写入Redis缓冲，Redis不可用时直接原子自增."""
+        pipeline = RecordingPipeline()
+        redis_client = AsyncMock()
+        redis_client.pipeline = MagicMock(return_value=pipeline)
+        db = AsyncMock()
+        service = QuestionStatisticsService(db, redis_client)
+
+        await service.record_attempt(7, 8.0, True)
+
+        assert pipeline.commands == [
+            ("hincrby", STATS_DELTA_KEY, "7|count", 1),
+            ("hincrby", STATS_DELTA_KEY, "7|correct", 1),
+            ("hincrbyfloat", STATS_DELTA_KEY, "7|score_sum", 8.0),
+            ("hincrbyfloat", STATS_DELTA_KEY, "7|score_sq_sum", 64.0),
+        ]
+        db.execute.assert_not_awaited()
+
+        redis_client.pipeline = MagicMock(side_effect=RedisError("down"))
+        await service.record_attempt(7, 3.0, False)
+
+        rows = db.execute.await_args.args[1]
+        assert rows == [
+            {"b_id": 7, "d_count": 1, "d_correct": 0, "d_score_sum": 3.0, "d_score_sq_sum": 9.0}
+        ]
+        assert "usage_count=(questions.usage_count +" in str(db.execute.await_args.args[0])
+        db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_flush_applies_deltas_in_question_order(self):
+        """测试批量写入按题目ID排序，写入提交后才清理Redis中的增量."""
+        redis_client = AsyncMock()
+        lock = AsyncMock()
+        lock.acquire.return_value = True
+        redis_client.lock = MagicMock(return_value=lock)
+        script = AsyncMock(return_value=1)
+        redis_client.register_script = MagicMock(return_value=script)
+        redis_client.hgetall.return_value = {
+            "9|count": "2",
+            "9|score_sum": "15.5",
+            "3|count": "1",
+            "3|correct": "1",
+            "3|score_sq_sum": "4",
+        }
+        db = AsyncMock()
+        service = QuestionStatisticsService(db, redis_client)
+
+        assert await service.flush() == {"question_count": 2, "attempt_count": 3}
+
+        assert script.await_args.kwargs["keys"] == [STATS_DELTA_KEY, STATS_FLUSHING_KEY]
+        rows = db.execute.await_args.args[1]
+        assert [row["b_id"] for row in rows] == [3, 9]
+        assert rows[1]["d_score_sum"] == 15.5
+        db.commit.assert_awaited_once()
+        redis_client.delete.assert_awaited_once_with(STATS_FLUSHING_KEY)
+
+        assert redis_client.lock.call_args.args == (STATS_LOCK_KEY,)
+        assert lock.release.await_count == 1
+
+        script.return_value = 0
+        assert await service.flush() == {"question_count": 0, "attempt_count": 0}
+        assert db.execute.await_count == 1
+
+        # 对账持锁时跳过本次写入
+        lock.acquire.return_value = False
+        assert await service.flush() == {"question_count": 0, "attempt_count": 0}
+        assert script.await_count == 2
+        assert lock.release.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_reconcile_subtracts_pending_deltas(self, monkeypatch):
+        """测试对账扣除尚未写入的增量，学生能力分组只计算一次，由高低分组正确率之差得到区分度."""
+        monkeypatch.setattr(settings, "QUESTION_STATS_RECONCILE_BATCH_SIZE", 2)
+        assert parse_deltas({"5|count": "1"}, {"5|count": "2", "5|x": "9"}) == {
+            5: StatisticsDelta(count=3)
+        }
+
+        redis_client = AsyncMock()
+        redis_client.pipeline = MagicMock(
+            return_value=RecordingPipeline(
+                [{"5|count": "1", "5|correct": "1", "5|score_sum": "10"}, {}]
+            )
+        )
+        redis_client.lock = MagicMock()
+        row = SimpleNamespace(
+            question_id=5,
+            attempt_count=4,
+            correct_count=3,
+            score_sum=30.0,
+            score_sq_sum=250.0,
+            upper_rate=1.0,
+            lower_rate=0.25,
+        )
+        lonely = SimpleNamespace(
+            question_id=8,
+            attempt_count=1,
+            correct_count=0,
+            score_sum=0.0,
+            score_sq_sum=0.0,
+            upper_rate=None,
+            lower_rate=0.0,
+        )
+        ranks, results = MagicMock(), [MagicMock(), MagicMock(), MagicMock()]
+        ranks.all.return_value = [
+            SimpleNamespace(student_id=1, ability_rank=1.0),
+            SimpleNamespace(student_id=2, ability_rank=0.0),
+        ]
+        results[0].all.return_value = [row, lonely]
+        results[2].all.return_value = []
+        db = AsyncMock()
+        db.execute.side_effect = [ranks, *results]
+        service = QuestionStatisticsService(db, redis_client)
+
+        assert await service.reconcile() == {"question_count": 2, "skipped_count": 0}
+
+        batch_stmt = db.execute.await_args_list[1].args[0]
+        columns = batch_stmt.selected_columns
+        assert "percent_rank" not in str(columns.upper_rate)
+        assert columns.upper_rate.compile().params["upper_ids"] == [1]
+        assert columns.lower_rate.compile().params["lower_ids"] == [2]
+        params = db.execute.await_args_list[2].args[1]
+        assert params[0] == {
+            "b_id": 5,
+            "r_count": 3,
+            "r_correct": 2,
+            "r_score_sum": 20.0,
+            "r_score_sq_sum": 250.0,
+            "r_average_score": pytest.approx(20.0 / 3),
+            "r_correct_rate": pytest.approx(2 / 3),
+            "r_discrimination": 0.75,
+        }
+        assert params[1]["r_discrimination"] is None
+        # 第一批满批后继续查询下一批
+        assert "question_id >" in str(db.execute.await_args_list[3].args[0].whereclause)
+        assert db.commit.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_reconcile_skips_questions_answered_during_aggregation(self):
+        """测试聚合前后待写入增量发生变化的题目跳过替换，对账期间持有批量写入锁."""
+        redis_client = AsyncMock()
+        redis_client.pipeline = MagicMock(
+            side_effect=[
+                RecordingPipeline([{"5|count": "1"}, {}]),
+                RecordingPipeline([{"5|count": "2"}, {}]),
+            ]
+        )
+        redis_client.lock = MagicMock()
+        row = SimpleNamespace(
+            question_id=5,
+            attempt_count=4,
+            correct_count=3,
+            score_sum=30.0,
+            score_sq_sum=250.0,
+            upper_rate=None,
+            lower_rate=None,
+        )
+        ranks, result = MagicMock(), MagicMock()
+        ranks.all.return_value = []
+        result.all.return_value = [row]
+        db = AsyncMock()
+        db.execute.side_effect = [ranks, result]
+        service = QuestionStatisticsService(db, redis_client)
+
+        assert await service.reconcile(batch_size=2) == {"question_count": 0, "skipped_count": 1}
+
+        assert db.execute.await_count == 2
+        assert redis_client.lock.call_args.args == (STATS_LOCK_KEY,)
+        redis_client.lock.return_value.__aexit__.assert_awaited_once()
@@ -0,0 +1,160 @@
+"""Redis 阻塞任务队列测试."""
+
+import json
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.shared.models.enums import PriorityLevel, TaskStatus
+from app.shared.services.queue_service import (
+    INFLIGHT_KEY,
+    INFLIGHT_QUEUES_KEY,
+    INFLIGHT_TASKS_KEY,
+    QueueService,
+    QueueTask,
+    TaskType,
+)
+from tests.conftest import RecordingPipeline
+
+
+def make_service(script_result: list | None = None, pipeline_results: list | None = None):
+    redis_client = AsyncMock()
+    script = AsyncMock(return_value=script_result or [0, "", []])
+    redis_client.register_script = MagicMock(return_value=script)
+    pipelines: list[RecordingPipeline] = []
+
+    def pipeline(transaction: bool = True) -> RecordingPipeline:
+        pipelines.append(RecordingPipeline(pipeline_results))
+        return pipelines[-1]
+
+    redis_client.pipeline = MagicMock(side_effect=pipeline)
+    return QueueService(AsyncMock(), redis_client), redis_client, script, pipelines
+
+
+def make_task(**overrides) -> QueueTask:
+    fields = {
+        "task_id": "t-1",
+        "task_type": TaskType.AI_GRADING,
+        "priority": PriorityLevel.NORMAL,
+        "payload": {"answer_id": 7},
+        "created_at": datetime.utcnow(),
+        "timeout": 30,
+    }
+    fields.update(overrides)
+    return QueueTask(**fields)
+
+
+class TestQueueService:
+    """任务队列测试类."""
+
+    @pytest.mark.asyncio
+    async def test_blocking_pop_registers_inflight(self):
+        """测试先执行维护脚本，再按优先级阻塞弹出并登记在途截止时间."""
+        service, redis_client, script, pipelines = make_service()
+        task = make_task()
+        redis_client.blpop.return_value = (
+            "queue:normal_priority",
+            service._serialize_task(task),
+        )
+
+        claimed = await service.get_next_task("worker-1", timeout=2)
+
+        keys = script.await_args.kwargs["keys"]
+        assert keys[:3] == [INFLIGHT_KEY, INFLIGHT_TASKS_KEY, INFLIGHT_QUEUES_KEY]
+        assert keys[3:5] == ["queue:high_priority:delayed", "queue:high_priority"]
+        pop_keys = redis_client.blpop.await_args.args[0]
+        assert pop_keys[0] == "queue:high_priority"
+        assert "queue:dead_letter" not in pop_keys
+        assert redis_client.blpop.await_args.kwargs["timeout"] == 2
+
+        assert claimed.task_id == "t-1"
+        commands = {command[0]: command[1:] for command in pipelines[0].commands}
+        deadline = commands["zadd"][1]["t-1"]
+        assert deadline == pytest.approx(time.time() + 30 + service.visibility_grace, abs=2)
+        assert ("hset", INFLIGHT_QUEUES_KEY, "t-1", "queue:normal_priority") in (
+            pipelines[0].commands
+        )
+
+    @pytest.mark.asyncio
+    async def test_claim_failure_keeps_popped_task(self, monkeypatch):
+        """测试登记在途失败时任务放回原队列队首，无法解析的载荷移到死信队列."""
+        monkeypatch.setattr("app.shared.services.queue_service.asyncio.sleep", AsyncMock())
+        service, redis_client, _, _ = make_service()
+        task_data = service._serialize_task(make_task())
+        redis_client.blpop.return_value = ("queue:normal_priority", task_data)
+        failing = RecordingPipeline()
+        failing.execute = AsyncMock(side_effect=ConnectionError("down"))
+        redis_client.pipeline = MagicMock(return_value=failing)
+
+        assert await service.get_next_task(timeout=1) is None
+        redis_client.lpush.assert_awaited_once_with("queue:normal_priority", task_data)
+
+        dead_letter = RecordingPipeline()
+        redis_client.pipeline = MagicMock(return_value=dead_letter)
+        redis_client.blpop.return_value = ("queue:normal_priority", "{not json")
+        assert await service.get_next_task(timeout=1) is None
+        assert dead_letter.commands[0] == ("rpush", "queue:dead_letter", "{not json")
+        redis_client.lpush.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_maintenance_is_throttled_and_caps_wait(self):
+        """测试维护按间隔限流，阻塞时间不超过下一个延迟任务的到期时间."""
+        due = time.time() + 0.5
+        service, redis_client, script, _ = make_service(script_result=[3, str(due), []])
+        redis_client.blpop.return_value = None
+
+        assert await service.get_next_task(timeout=5) is None
+        assert await service.get_next_task(timeout=5) is None
+
+        assert script.await_count == 1
+        assert redis_client.blpop.await_args.kwargs["timeout"] <= 0.5
+
+    @pytest.mark.asyncio
+    async def test_ack_and_counters(self):
+        """测试完成时确认在途任务并累加计数，重试时确认与延迟入队在同一事务中."""
+        service, _, _, pipelines = make_service()
+        started = datetime.utcnow()
+        task = make_task(
+            status=TaskStatus.COMPLETED,
+            started_at=started,
+            completed_at=started + timedelta(seconds=4),
+        )
+
+        await service.update_task_status(task)
+        names = [command[0] for command in pipelines[0].commands]
+        assert names[:4] == ["setex", "zrem", "hdel", "hdel"]
+        assert ("hincrby", "queue:stats:normal_priority", "completed", 1) in pipelines[0].commands
+        assert (
+            "hincrbyfloat",
+            "queue:stats:normal_priority",
+            "processing_seconds",
+            4.0,
+        ) in pipelines[0].commands
+
+        task.scheduled_at = datetime.utcnow() + timedelta(minutes=2)
+        await service.requeue_task(task)
+        names = [command[0] for command in pipelines[1].commands]
+        assert names == ["zrem", "hdel", "hdel", "zadd", "hincrby"]
+        assert pipelines[1].commands[3][1] == "queue:normal_priority:delayed"
+
+    @pytest.mark.asyncio
+    async def test_queue_stats_from_redis_counters(self):
+        """测试统计来自Redis计数器，在途数按来源队列汇总."""
+        results = []
+        for _ in range(5):
+            results.extend([2, 1, {"enqueued": "10", "completed": "4", "failed": "1"}])
+        results[5] = {"enqueued": "6", "completed": "4", "processing_seconds": "8.0"}
+        results.append(["queue:normal_priority", "queue:normal_priority"])
+        service, _, _, _ = make_service(pipeline_results=results)
+
+        stats = await service.get_queue_stats()
+
+        normal = stats["queues"]["normal_priority"]
+        assert normal["pending_tasks"] == 3
+        assert normal["running_tasks"] == 2
+        assert normal["average_processing_time"] == pytest.approx(2.0)
+        assert normal["throughput"] == pytest.approx(0.5)
+        assert stats["queues"]["high_priority"]["success_rate"] == pytest.approx(0.8)
+        assert json.dumps(stats)
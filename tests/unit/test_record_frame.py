@@ -0,0 +1,121 @@
+"""学习记录列式数据帧测试."""
+
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from app.shared.models.enums import DifficultyLevel, TrainingType
+from app.training.utils.record_frame import (
+    LearningRecordFrame,
+    chunk_means,
+    load_learning_record_frame,
+    rolling_mean,
+    run_lengths,
+)
+
+
+def make_rows(count: int) -> list[dict]:
+    """构造按时间升序的记录行，奇数题带知识点标签."""
+    start = datetime(2025, 3, 1)
+    return [
+        {
+            "id": i + 1,
+            "session_id": i // 4 + 1,
+            "question_id": 100 + i,
+            "score": 1.0,
+            "is_correct": i % 3 != 0,
+            "time_spent": 30 + i if i % 5 else 0,
+            "difficulty_level": DifficultyLevel.INTERMEDIATE,
+            "ai_confidence": 0.9,
+            "created_at": start + timedelta(hours=i),
+            "knowledge_points": ["grammar", "vocabulary"] if i % 2 else [],
+        }
+        for i in range(count)
+    ]
+
+
+class TestLearningRecordFrame:
+    """学习记录数据帧测试类."""
+
+    def test_group_by_knowledge_point(self):
+        """测试按知识点分组与逐条统计一致，无标签记录归入general."""
+        rows = make_rows(12)
+        frame = LearningRecordFrame.from_rows(rows)
+        stats = frame.group_by_knowledge_point()
+
+        tagged = [row for row in rows if row["knowledge_points"]]
+        assert stats["grammar"]["total_attempts"] == len(tagged)
+        assert stats["grammar"]["correct_attempts"] == sum(r["is_correct"] for r in tagged)
+        assert stats["grammar"]["total_time"] == sum(r["time_spent"] for r in tagged)
+        assert stats["general"]["total_attempts"] == len(rows) - len(tagged)
+
+        incorrect = frame.group_by_knowledge_point(~frame.is_correct)
+        assert incorrect["vocabulary"]["correct_attempts"] == 0
+
+    def test_slice_rows_rebases_knowledge_points(self):
+        """测试区间切片后知识点仍与记录对应."""
+        frame = LearningRecordFrame.from_rows(make_rows(12))
+        latest = frame.latest(3)
+
+        assert latest.record_id.tolist() == [10, 11, 12]
+        assert latest.kp_offsets.tolist() == [0, 2, 3, 5]
+        assert latest.group_by_knowledge_point()["grammar"]["total_attempts"] == 2
+        assert len(LearningRecordFrame.empty().latest(5)) == 0
+
+    def test_window_helpers(self):
+        """测试滑动窗口、分块均值与连续区间."""
+        flags = np.array([True, True, False, True, False, False, True, True, True])
+        assert run_lengths(flags).tolist() == [2, 1, 3]
+        assert rolling_mean(np.arange(5), 2).tolist() == [0.5, 1.5, 2.5, 3.5]
+        assert chunk_means(np.array([1, 0, 1, 1, 1, 0, 1]), 3, min_size=2) == pytest.approx(
+            [2 / 3, 2 / 3]
+        )
+
+    @pytest.mark.asyncio
+    async def test_load_frame_with_column_query(self):
+        """测试加载为单条仅含所需列的查询，结果按时间升序，题目无标签时取记录知识点."""
+        result = MagicMock()
+        result.mappings.return_value.all.return_value = [
+            {
+                "id": 2,
+                "session_id": 1,
+                "question_id": 5,
+                "score": 1.0,
+                "is_correct": True,
+                "time_spent": 40,
+                "ai_confidence": 0.5,
+                "created_at": datetime(2025, 3, 2),
+                "knowledge_points_mastered": ["listening"],
+                "knowledge_points_weak": ["reading"],
+                "difficulty_level": DifficultyLevel.ADVANCED,
+                "knowledge_points": [],
+            },
+            {
+                "id": 1,
+                "session_id": 1,
+                "question_id": 4,
+                "score": None,
+                "is_correct": False,
+                "time_spent": None,
+                "ai_confidence": None,
+                "created_at": datetime(2025, 3, 1),
+                "knowledge_points_mastered": [],
+                "knowledge_points_weak": [],
+                "difficulty_level": None,
+                "knowledge_points": ["grammar"],
+            },
+        ]
+        db = AsyncMock()
+        db.execute.return_value = result
+
+        frame = await load_learning_record_frame(
+            db, 7, training_type=TrainingType.VOCABULARY, limit=50
+        )
+
+        assert db.execute.await_count == 1
+        assert frame.record_id.tolist() == [1, 2]
+        assert frame.difficulty.tolist() == [0, DifficultyLevel.ADVANCED.value]
+        assert frame.time_spent.tolist() == [0.0, 40.0]
+        assert set(frame.group_by_knowledge_point()) == {"grammar", "listening", "reading"}
@@ -0,0 +1,151 @@
+"""自定义报表查询引擎与流式导出测试."""
+
+import csv
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.analytics.services.custom_report_service import (
+    GeneratedReport,
+    OutputFormat,
+    ReportColumn,
+    ReportFilter,
+    ReportResultCache,
+    ReportTemplate,
+    ReportType,
+    compute_filter_hash,
+)
+from app.analytics.services.report_query_engine import (
+    ReportQueryError,
+    compile_report_query,
+)
+from app.analytics.utils.report_writers import (
+    CSVReportWriter,
+    JSONLinesReportWriter,
+    JSONReportWriter,
+)
+
+
+def make_template(columns: list[ReportColumn]) -> ReportTemplate:
+    """构造学习进度报表模板."""
+    return ReportTemplate(
+        template_id="learning_progress_test",
+        name="学习进度报表",
+        description="",
+        report_type=ReportType.LEARNING_PROGRESS,
+        columns=columns,
+        default_filters=ReportFilter(),
+    )
+
+
+class TestReportQueryEngine:
+    """报表查询引擎测试类."""
+
+    def test_compile_groups_by_dimensions(self):
+        """测试维度列分组、度量列聚合，过滤条件转换为WHERE子句."""
+        template = make_template(
+            [
+                ReportColumn("user_id", "用户ID", "number"),
+                ReportColumn("training_type", "训练类型", "string"),
+                ReportColumn("total_study_time", "总学习时长", "number", "sum"),
+                ReportColumn("sessions_count", "学习次数", "number", "count"),
+                ReportColumn("hidden", "隐藏列", "string", is_visible=False),
+            ]
+        )
+        query = compile_report_query(
+            template,
+            ReportFilter(
+                start_date=datetime(2025, 1, 1),
+                content_types=["vocabulary", "reading"],
+                difficulty_levels=["3"],
+            ),
+        )
+        sql = str(query.compile(dialect=postgresql.dialect()))
+
+        assert "sum(training_sessions.time_spent" in sql
+        assert "count(1) AS sessions_count" in sql
+        assert (
+            "GROUP BY training_sessions.student_id, training_sessions.session_type"
+            in sql
+        )
+        assert "training_sessions.created_at >=" in sql
+        assert "training_sessions.session_type IN" in sql
+        assert "training_sessions.difficulty_level =" in sql
+
+    def test_compile_rejects_unknown_fields(self):
+        """测试未知字段和不支持的过滤条件."""
+        with pytest.raises(ReportQueryError):
+            compile_report_query(
+                make_template([ReportColumn("unknown", "未知", "string")]),
+                ReportFilter(),
+            )
+
+        template = make_template([ReportColumn("user_id", "用户ID", "number")])
+        with pytest.raises(ReportQueryError):
+            compile_report_query(
+                template, ReportFilter(custom_filters={"total_study_time": 1})
+            )
+
+
+class TestReportExport:
+    """报表流式导出与缓存测试类."""
+
+    ROWS = [
+        {"user_id": 1, "username": "张三", "last_activity": datetime(2025, 1, 1, 8)},
+        {"user_id": 2, "username": "李四", "last_activity": None},
+    ]
+
+    def test_streaming_writers(self, tmp_path):
+        """测试分块写入后文件内容完整."""
+        columns = ["user_id", "username", "last_activity"]
+        writers = {
+            "csv": CSVReportWriter(tmp_path / "r.csv", columns),
+            "jsonl": JSONLinesReportWriter(tmp_path / "r.jsonl", columns),
+            "json": JSONReportWriter(tmp_path / "r.json", columns),
+        }
+        for writer in writers.values():
+            for row in self.ROWS:
+                writer.write_rows([row])
+            writer.close({"name": "测试报表", "charts": []})
+
+        with open(tmp_path / "r.csv", encoding="utf-8") as f:
+            assert [row["username"] for row in csv.DictReader(f)] == ["张三", "李四"]
+
+        with open(tmp_path / "r.jsonl", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert lines[0]["last_activity"] == "2025-01-01T08:00:00"
+
+        with open(tmp_path / "r.json", encoding="utf-8") as f:
+            document = json.load(f)
+        assert len(document["data"]) == 2
+        assert document["report_info"]["name"] == "测试报表"
+
+    def test_result_cache(self, tmp_path):
+        """测试缓存命中、缺失输出文件和模板失效."""
+        filters = ReportFilter(user_ids=[2, 1])
+        filter_hash = compute_filter_hash(filters)
+        assert filter_hash == compute_filter_hash(ReportFilter(user_ids=[1, 2]))
+
+        file_path = tmp_path / "r.csv"
+        file_path.write_text("user_id\n", encoding="utf-8")
+        report = GeneratedReport(
+            report_id="r1",
+            template_id="t1",
+            name="r",
+            generated_at=datetime.now(),
+            filters_applied=filters,
+            data=[],
+            file_paths={OutputFormat.CSV: str(file_path)},
+        )
+
+        cache = ReportResultCache(max_entries=10, ttl_seconds=60)
+        cache.put(report, filter_hash)
+
+        assert cache.get("t1", filter_hash, [OutputFormat.CSV]) is report
+        assert cache.get("t1", filter_hash, [OutputFormat.PARQUET]) is None
+
+        cache.put(report, filter_hash)
+        assert cache.invalidate("t1") == 1
+        assert cache.get("t1", filter_hash, []) is None
@@ -0,0 +1,70 @@
+"""学习数据汇总服务测试."""
+
+from datetime import UTC, datetime
+
+from app.analytics.services.rollup_service import (
+    DAY,
+    HOUR,
+    LearningTotals,
+    _split_rollup_range,
+    ceil_bucket,
+    truncate_bucket,
+)
+
+
+def utc(*args: int) -> datetime:
+    """构造UTC时间."""
+    return datetime(*args, tzinfo=UTC)
+
+
+class TestLearningRollup:
+    """学习汇总测试类."""
+
+    def test_bucket_boundaries(self):
+        """测试时间桶截断和向上取整."""
+        value = datetime(2025, 3, 10, 13, 25, 7)
+
+        assert truncate_bucket(value, HOUR) == utc(2025, 3, 10, 13)
+        assert truncate_bucket(value, DAY) == utc(2025, 3, 10)
+        assert ceil_bucket(value, HOUR) == utc(2025, 3, 10, 14)
+        assert ceil_bucket(value, DAY) == utc(2025, 3, 11)
+        assert ceil_bucket(utc(2025, 3, 10), DAY) == utc(2025, 3, 10)
+
+    def test_split_range_uses_day_rollups_for_whole_days(self):
+        """测试查询范围拆分为整天部分和首尾小时部分."""
+        ranges = _split_rollup_range(utc(2025, 3, 9, 20), utc(2025, 3, 12, 6))
+
+        assert sorted(ranges) == sorted(
+            [
+                (DAY, utc(2025, 3, 10), utc(2025, 3, 12)),
+                (HOUR, utc(2025, 3, 9, 20), utc(2025, 3, 10)),
+                (HOUR, utc(2025, 3, 12), utc(2025, 3, 12, 6)),
+            ]
+        )
+        assert _split_rollup_range(utc(2025, 3, 9, 1), utc(2025, 3, 9, 5)) == [
+            (HOUR, utc(2025, 3, 9, 1), utc(2025, 3, 9, 5))
+        ]
+
+    def test_totals_merge(self):
+        """测试汇总度量合并（小时桶合并为天桶）."""
+        first = LearningTotals()
+        first.add_sessions(2, 1, 600)
+        first.add_answers("3", 10, 7, 300, 70.0)
+
+        second = LearningTotals()
+        second.add_sessions(1, 1, 300)
+        second.add_answers("3", 5, 5, 120, 50.0)
+        second.add_answers("5", 4, 1, 200, 10.0)
+
+        first.merge(second)
+
+        assert first.session_count == 3
+        assert first.completed_session_count == 2
+        assert first.study_time_spent == 900
+        assert first.question_count == 19
+        assert first.correct_count == 13
+        assert first.difficulty_histogram == {
+            "3": {"total": 15, "correct": 12},
+            "5": {"total": 4, "correct": 1},
+        }
+        assert first.to_columns()["score_sum"] == 130.0
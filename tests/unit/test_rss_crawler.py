@@ -0,0 +1,155 @@
+"""RSS抓取器条件请求、条目去重与并发抓取测试."""
+
+import asyncio
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from app.resources.utils.rss_utils import (
+    ExternalResourceCollector,
+    FeedStateStore,
+    RSSFeedParser,
+)
+
+FEED_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+  <channel>
+    <title>Test Feed</title>
+    {items}
+  </channel>
+</rss>"""
+
+ITEM_TEMPLATE = """<item>
+      <title>Article {n}</title>
+      <link>{base}/articles/{n}</link>
+      <guid>article-{n}</guid>
+      <description>Students learning English every day {n}</description>
+    </item>"""
+
+ARTICLE_HTML = """<html><body><nav>menu</nav>
+<article><p>Learning   English</p><script>track()</script><p>is fun.</p></article>
+</body></html>"""
+
+
+class FeedServer:
+    """本地RSS服务 - 支持ETag条件请求并记录正文并发数."""
+
+    ETAG = '"v1"'
+
+    def __init__(self) -> None:
+        self.article_count = 3
+        self.ignore_etag = False
+        self.feed_requests = 0
+        self.article_requests = 0
+        self.active_articles = 0
+        self.max_active_articles = 0
+        self.base_url = ""
+
+    async def feed(self, request: web.Request) -> web.Response:
+        self.feed_requests += 1
+        if not self.ignore_etag and request.headers.get("If-None-Match") == self.ETAG:
+            return web.Response(status=304)
+        items = "".join(
+            ITEM_TEMPLATE.format(n=n, base=self.base_url)
+            for n in range(self.article_count)
+        )
+        return web.Response(
+            text=FEED_TEMPLATE.format(items=items),
+            content_type="application/rss+xml",
+            headers={"ETag": self.ETAG},
+        )
+
+    async def article(self, request: web.Request) -> web.Response:
+        self.article_requests += 1
+        self.active_articles += 1
+        self.max_active_articles = max(self.max_active_articles, self.active_articles)
+        await asyncio.sleep(0.05)
+        self.active_articles -= 1
+        return web.Response(text=ARTICLE_HTML, content_type="text/html")
+
+
+@pytest_asyncio.fixture
+async def feed_server():
+    """启动本地RSS服务."""
+    server = FeedServer()
+    app = web.Application()
+    app.router.add_get("/feed.xml", server.feed)
+    app.router.add_get("/articles/{n}", server.article)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    server.base_url = f"http://127.0.0.1:{port}"
+    yield server
+    await runner.cleanup()
+
+
+class TestRSSCrawler:
+    """RSS抓取器测试类."""
+
+    @pytest.mark.asyncio
+    async def test_conditional_get_and_dedupe(self, feed_server):
+        """测试ETag条件请求、GUID去重和按主机限制的并发抓取."""
+        feed_url = f"{feed_server.base_url}/feed.xml"
+        store = FeedStateStore()
+
+        async with aiohttp.ClientSession() as session:
+            parser = RSSFeedParser(session, store, per_host_limit=2)
+            items = await parser.parse_rss_feed(feed_url)
+            assert [item["title"] for item in items] == [
+                "Article 0",
+                "Article 1",
+                "Article 2",
+            ]
+            assert items[0]["full_content"] == "Learning English is fun."
+            assert feed_server.max_active_articles <= 2
+            # 入库后才记录已抓取条目和校验值
+            assert await store.get_validators(feed_url) == {}
+            await store.mark_seen(item["entry_hash"] for item in items)
+            await store.save_validators(feed_url, parser.fetched_validators[feed_url])
+
+            # 订阅源未变化 - 304，不下载也不抓取正文
+            assert await parser.parse_rss_feed(feed_url) == []
+            assert parser.stats.feeds_not_modified == 1
+            assert feed_server.article_requests == 3
+
+            # 服务器忽略ETag并新增条目 - 只抓取新条目的正文
+            feed_server.ignore_etag = True
+            feed_server.article_count = 4
+            items = await parser.parse_rss_feed(feed_url)
+            assert [item["title"] for item in items] == ["Article 3"]
+            assert feed_server.article_requests == 4
+
+        stats = parser.stats.to_dict()
+        assert stats["feeds_fetched"] == 2
+        assert stats["entries_duplicate"] == 3
+        assert stats["items_parsed"] == 4
+
+    @pytest.mark.asyncio
+    async def test_feed_state_committed_only_for_saved_items(self, feed_server):
+        """测试只标记已入库的条目，有条目未入库的订阅源不保存校验值."""
+        feed_url = f"{feed_server.base_url}/feed.xml"
+        store = FeedStateStore()
+
+        async with aiohttp.ClientSession() as session:
+            collector = ExternalResourceCollector(session, store)
+            collector.rss_feeds = [feed_url]
+            resources = await collector.collect_daily_resources(max_items_per_feed=10)
+            assert len(resources) == 3
+            assert await store.filter_unseen([r["entry_hash"] for r in resources]) == {
+                r["entry_hash"] for r in resources
+            }
+
+            await collector.commit_feed_state({resources[0]["source_url"]})
+            unseen = await store.filter_unseen([r["entry_hash"] for r in resources])
+            assert unseen == {r["entry_hash"] for r in resources[1:]}
+            assert await store.get_validators(feed_url) == {}
+
+            # 重新抓取时只处理未入库的条目，全部入库后保存校验值
+            resources = await collector.collect_daily_resources(max_items_per_feed=10)
+            assert len(resources) == 2
+            await collector.commit_feed_state({r["source_url"] for r in resources})
+            assert await store.get_validators(feed_url) == {"etag": feed_server.ETAG}
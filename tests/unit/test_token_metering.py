@@ -0,0 +1,149 @@
+"""AI token计量与预算测试."""
+
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from redis.exceptions import RedisError
+
+from app.ai.services.token_metering_service import (
+    COST_SCALE,
+    PENDING_BUCKETS_KEY,
+    BudgetExceededError,
+    TokenMeteringService,
+    UsageScope,
+    api_key_fingerprint,
+    parse_feature_budgets,
+)
+from app.ai.utils.cost_calculator import CostCalculator
+from app.core.config import settings
+from app.shared.models.enums import AIModelType
+from tests.conftest import RecordingPipeline
+
+
+def make_service(monkeypatch, script_result: int = 0):
+    monkeypatch.setattr(settings, "AI_USER_DAILY_TOKEN_BUDGET", 10000)
+    monkeypatch.setattr(settings, "AI_COURSE_DAILY_TOKEN_BUDGET", 0)
+    monkeypatch.setattr(settings, "AI_FEATURE_DAILY_TOKEN_BUDGETS", "grading=50000,bad=x")
+    redis_client = AsyncMock()
+    script = AsyncMock(return_value=script_result)
+    redis_client.register_script = MagicMock(return_value=script)
+    pipelines: list[RecordingPipeline] = []
+
+    def pipeline(transaction: bool = True) -> RecordingPipeline:
+        pipelines.append(RecordingPipeline())
+        return pipelines[-1]
+
+    redis_client.pipeline = MagicMock(side_effect=pipeline)
+    service = TokenMeteringService(redis_client, CostCalculator())
+    return service, redis_client, script, pipelines
+
+
+class TestTokenMetering:
+    """token计量测试类."""
+
+    def test_estimate_and_calibrate(self):
+        """测试按字符类别估算token，并由真实用量校准估算系数."""
+        calculator = CostCalculator()
+        text = "这是测试 hello world, 12345!"
+        # 4个汉字*0.6 + 2个单词*1.3 + 2段数字 + 2个标点
+        assert calculator.estimate_tokens(text) == 9
+
+        for _ in range(50):
+            estimated = calculator.estimate_tokens(text)
+            calculator.calibrate(estimated, 18)
+        assert calculator.estimate_tokens(text) == pytest.approx(18, abs=1)
+        assert calculator.estimate_tokens(text, AIModelType.DEEPSEEK_LITE) == 9
+
+        calculator.calibrate(10, 1000)
+        assert calculator.calibration_factors[AIModelType.DEEPSEEK_CHAT] <= 2.0
+
+    @pytest.mark.asyncio
+    async def test_reserve_checks_configured_budgets(self, monkeypatch):
+        """测试预占覆盖全局成本、功能和用户预算，超额时指明维度，Redis不可用时放行."""
+        assert parse_feature_budgets("grading=50000,bad=x, =3") == {"grading": 50000}
+        service, _, script, _ = make_service(monkeypatch)
+
+        reservation = await service.reserve(
+            UsageScope(feature="grading", user_id=7, course_id=3), "hello", 100, "deepseek-chat"
+        )
+
+        keys = script.await_args.kwargs["keys"]
+        assert [key.split(":")[-2:] for key in keys] == [
+            ["global", "cost"],
+            ["global", "cost"],
+            ["feature", "grading"],
+            ["user", "7"],
+        ]
+        args = script.await_args.kwargs["args"]
+        assert args[5:] == [50000, 102, 10000, 102]
+        assert [entry.amount for entry in reservation.entries][2:] == [102, 102]
+
+        script.return_value = 4
+        with pytest.raises(BudgetExceededError) as exc_info:
+            await service.reserve(UsageScope(feature="grading", user_id=7), "hi", 100, "x")
+        assert (exc_info.value.scope_type, exc_info.value.scope_value) == ("user", "7")
+
+        script.side_effect = RedisError("down")
+        reservation = await service.reserve(UsageScope(feature="grading"), "hi", 100, "x")
+        assert reservation.entries == []
+
+    @pytest.mark.asyncio
+    async def test_settle_records_actual_usage_once(self, monkeypatch):
+        """测试按真实用量结算预占并累加各维度的小时计数，结算后释放不再生效."""
+        service, _, _, pipelines = make_service(monkeypatch)
+        reservation = await service.reserve(
+            UsageScope(feature="grading", user_id=7), "hello", 100, "deepseek-chat"
+        )
+
+        usage = {"prompt_tokens": 30, "completion_tokens": 20, "total_tokens": 50}
+        await service.settle(reservation, usage, "sk-secret")
+        await service.release(reservation)
+
+        assert len(pipelines) == 1
+        commands = pipelines[0].commands
+        user_key = reservation.entries[-1].key
+        assert ("hincrby", user_key, "reserved", -102) in commands
+        assert ("hincrby", user_key, "used", 50) in commands
+
+        fields = {command[2]: command[3] for command in commands if command[0] == "hincrby"}
+        fingerprint = api_key_fingerprint("sk-secret")
+        assert fields["user|7|deepseek-chat|prompt_tokens"] == 30
+        assert fields[f"api_key|{fingerprint}|deepseek-chat|requests"] == 1
+        assert fields["global|all|deepseek-chat|cost"] == int(
+            (30 * 0.0014 + 20 * 0.0028) / 1000 * COST_SCALE
+        )
+        assert "sk-secret" not in str(commands)
+        assert ("sadd", PENDING_BUCKETS_KEY) == commands[-1][:2]
+
+    @pytest.mark.asyncio
+    async def test_rollup_replaces_closed_buckets(self, monkeypatch):
+        """测试只落库已结束的小时桶，整体替换写入后删除Redis计数."""
+        service, redis_client, _, pipelines = make_service(monkeypatch)
+        redis_client.smembers.return_value = {"2025031009", "2025031010"}
+        redis_client.hgetall.return_value = {
+            "global|all|deepseek-chat|requests": "2",
+            "global|all|deepseek-chat|prompt_tokens": "300",
+            "user|7|deepseek-chat|cost": "1500",
+        }
+        db = AsyncMock()
+
+        result = await service.rollup(
+            db, now=datetime(2025, 3, 10, 10, 30, tzinfo=UTC)
+        )
+
+        assert result == {"bucket_count": 1, "row_count": 2}
+        redis_client.hgetall.assert_awaited_once_with("ai_usage:2025031009")
+        rows = db.execute.await_args_list[1].args[1]
+        assert {(row["scope_type"], row["scope_value"]) for row in rows} == {
+            ("global", "all"),
+            ("user", "7"),
+        }
+        user_row = next(row for row in rows if row["scope_type"] == "user")
+        assert user_row["cost"] == pytest.approx(0.0015)
+        assert user_row["bucket_start"] == datetime(2025, 3, 10, 9, tzinfo=UTC)
+        db.commit.assert_awaited_once()
+        assert pipelines[-1].commands == [
+            ("delete", "ai_usage:2025031009"),
+            ("srem", PENDING_BUCKETS_KEY, "2025031009"),
+        ]
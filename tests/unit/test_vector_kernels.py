@@ -0,0 +1,103 @@
+"""向量计算内核测试."""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.resources.utils.vector_utils import VectorUtils
+from app.shared.utils.vector_kernels import (
+    cosine_many_to_many,
+    cosine_one_to_many,
+    levenshtein_distance,
+    mean_pairwise_cosine,
+    minibatch_kmeans,
+    randomized_pca,
+    similar_pairs,
+    top_k_indices,
+)
+
+
+def reference_levenshtein(s1: str, s2: str) -> int:
+    """逐格动态规划的编辑距离，作为对照."""
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current = [i + 1]
+        for j, c2 in enumerate(s2):
+            current.append(min(previous[j + 1] + 1, current[j] + 1, previous[j] + (c1 != c2)))
+        previous = current
+    return previous[-1]
+
+
+class TestVectorKernels:
+    """向量计算内核测试类."""
+
+    def test_cosine_and_top_k(self):
+        """测试一对多、多对多余弦相似度与部分排序top-k，零向量相似度为0."""
+        candidates = [[1.0, 0.0], [0.0, 2.0], [-1.0, 0.0], [0.0, 0.0], [3.0, 3.0]]
+        scores = cosine_one_to_many([2.0, 0.0], candidates)
+
+        assert scores.dtype == np.float32
+        assert scores.tolist() == pytest.approx([1.0, 0.0, -1.0, 0.0, 2**-0.5])
+        assert top_k_indices(scores, 2).tolist() == [0, 4]
+        assert top_k_indices(scores, None)[0] == 0
+
+        matrix = cosine_many_to_many(candidates)
+        assert matrix.shape == (5, 5)
+        assert matrix[0].tolist() == pytest.approx(scores.tolist())
+
+    def test_similar_pairs_and_mean_pairwise(self):
+        """测试分块找相似对与平均两两相似度和逐对计算一致."""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((40, 8))
+        vectors[25] = vectors[3] * 2  # 方向相同的重复项
+
+        pairs = similar_pairs(vectors, 0.999, block_size=16)
+        assert [(i, j) for i, j, _ in pairs] == [(3, 25)]
+        assert pairs[0][2] == pytest.approx(1.0, abs=1e-5)
+
+        matrix = cosine_many_to_many(vectors).astype(np.float64)
+        expected = (matrix.sum() - np.trace(matrix)) / (40 * 39)
+        assert mean_pairwise_cosine(vectors) == pytest.approx(expected, abs=1e-5)
+
+    def test_minibatch_kmeans_separates_clusters(self):
+        """测试Mini-batch K-means在分离良好的数据上还原簇划分."""
+        rng = np.random.default_rng(1)
+        centers = rng.standard_normal((4, 16)) * 20
+        truth = np.repeat(np.arange(4), 600)
+        vectors = centers[truth] + rng.standard_normal((2400, 16))
+
+        labels, centroids, iterations = minibatch_kmeans(vectors, 4, batch_size=256)
+
+        assert centroids.shape == (4, 16)
+        assert 1 <= iterations <= 100
+        # 每个真实簇映射到唯一的聚类标签
+        assert {tuple(np.unique(labels[truth == k])) for k in range(4)} == {
+            (label,) for label in range(4)
+        }
+
+        result = VectorUtils.cluster_vectors(vectors[:50].tolist(), num_clusters=3)
+        assert sorted(i for cluster in result["clusters"] for i in cluster) == list(range(50))
+
+    def test_randomized_pca_matches_exact(self):
+        """测试随机化PCA的主成分与精确SVD一致（允许符号差异）."""
+        rng = np.random.default_rng(2)
+        latent = rng.standard_normal((500, 3)) * [10.0, 5.0, 2.0]
+        vectors = latent @ rng.standard_normal((3, 64)) + rng.standard_normal((500, 64)) * 0.01
+
+        projected, components = randomized_pca(vectors, 3)
+
+        centered = vectors - vectors.mean(axis=0)
+        _, _, vt = np.linalg.svd(centered, full_matrices=False)
+        assert projected.shape == (500, 3)
+        assert np.abs(np.sum(components * vt[:3], axis=1)) == pytest.approx([1, 1, 1], abs=1e-3)
+
+    def test_levenshtein_distance_banded(self):
+        """测试编辑距离与逐格计算一致，超过上限时返回上限加一."""
+        rnd = random.Random(3)
+        for _ in range(300):
+            s1 = "".join(rnd.choice("ab词c") for _ in range(rnd.randint(0, 10)))
+            s2 = "".join(rnd.choice("ab词c") for _ in range(rnd.randint(0, 10)))
+            expected = reference_levenshtein(s1, s2)
+            assert levenshtein_distance(s1, s2) == expected
+            assert levenshtein_distance(s1, s2, max_distance=3) == min(expected, 4)
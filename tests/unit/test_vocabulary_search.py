@@ -0,0 +1,134 @@
+"""词汇搜索游标分页、前缀索引与批量导入测试."""
+
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.config import settings
+from app.resources.schemas.resource_schemas import (
+    VocabularyItemBase,
+    VocabularySearchRequest,
+)
+from app.resources.services.vocabulary_service import (
+    KeyWordPrefixIndex,
+    VocabularyService,
+    _escape_like,
+    decode_search_cursor,
+    encode_search_cursor,
+)
+from app.shared.models.enums import DifficultyLevel
+
+
+class TestVocabularySearch:
+    """词汇搜索测试类."""
+
+    def test_cursor_round_trip(self):
+        """测试游标编码解码保留排序值类型."""
+        created_at = datetime(2025, 3, 1, 8, 30, tzinfo=UTC)
+        cursor = encode_search_cursor("created_at", "desc", created_at, 42)
+        assert decode_search_cursor(cursor, "created_at", "desc") == (created_at, 42)
+
+        cursor = encode_search_cursor(
+            "difficulty_level", "asc", DifficultyLevel.ADVANCED, 7
+        )
+        assert decode_search_cursor(cursor, "difficulty_level", "asc") == (
+            DifficultyLevel.ADVANCED,
+            7,
+        )
+
+    def test_cursor_rejects_mismatch(self):
+        """测试排序方式变化或游标损坏时拒绝翻页."""
+        cursor = encode_search_cursor("word", "asc", "apple", 1)
+        with pytest.raises(ValueError):
+            decode_search_cursor(cursor, "word", "desc")
+        with pytest.raises(ValueError):
+            decode_search_cursor("not-a-cursor", "word", "asc")
+
+    def test_key_word_prefix_index(self):
+        """测试前缀索引不区分大小写且按字典序返回."""
+        index = KeyWordPrefixIndex(
+            [(1, "Abandon"), (2, "ability"), (3, "able"), (4, "about"), (5, "zoo")]
+        )
+        assert index.lookup("AB", 10) == [
+            (1, "Abandon"),
+            (2, "ability"),
+            (3, "able"),
+            (4, "about"),
+        ]
+        assert index.lookup("abl", 10) == [(3, "able")]
+        assert index.lookup("ab", 2) == [(1, "Abandon"), (2, "ability")]
+        assert index.lookup("x", 10) == []
+        assert not index.is_expired(60)
+
+    def test_escape_like(self):
+        """测试关键词中的通配符按字面匹配."""
+        assert _escape_like("100%_a/b") == "100/%/_a//b"
+
+    @pytest.mark.asyncio
+    async def test_auto_count_marks_estimate(self, monkeypatch):
+        """测试auto模式超出精确统计上限时返回查询计划估算的总数，并标记为估算值."""
+        monkeypatch.setattr(settings, "VOCABULARY_EXACT_COUNT_LIMIT", 100)
+        count_result, page_result, plan_result = MagicMock(), MagicMock(), MagicMock()
+        count_result.scalar.return_value = 101
+        page_result.scalars.return_value.all.return_value = []
+        plan_result.scalar.return_value = '[{"Plan": {"Plan Rows": 5000}}]'
+        db = AsyncMock()
+        db.execute.side_effect = [count_result, page_result]
+        db.connection.return_value.execute.return_value = plan_result
+
+        page = await VocabularyService(db).search_vocabularies(
+            VocabularySearchRequest(keyword="ab")
+        )
+
+        assert (page.total, page.is_estimate) == (5000, True)
+
+        count_result.scalar.return_value = 42
+        db.execute.side_effect = [count_result, page_result]
+        page = await VocabularyService(db).search_vocabularies(
+            VocabularySearchRequest(keyword="ab")
+        )
+
+        assert (page.total, page.is_estimate) == (42, False)
+
+
+class TestVocabularyBatchImport:
+    """词汇批量导入测试类."""
+
+    @pytest.mark.asyncio
+    async def test_import_chunk_outcomes(self):
+        """测试一次预取已存在单词，新词批量插入，重复词按覆盖模式更新."""
+        db = AsyncMock()
+        db.execute.side_effect = [
+            [SimpleNamespace(id=10, word="apple")],
+            [SimpleNamespace(id=11, word="book")],
+            None,
+        ]
+        service = VocabularyService(db)
+
+        outcomes = await service._import_vocabulary_chunk(
+            library_id=1,
+            chunk=[
+                VocabularyItemBase(word="apple", chinese_meaning="苹果"),
+                VocabularyItemBase(word="book", chinese_meaning="书"),
+                VocabularyItemBase(word="book", chinese_meaning="书本", frequency=5),
+            ],
+            index_offset=100,
+            overwrite_existing=True,
+        )
+
+        assert [(o["index"], o["status"], o["id"]) for o in outcomes] == [
+            (100, "updated", 10),
+            (101, "created", 11),
+            (102, "updated", 11),
+        ]
+        assert db.execute.await_count == 3
+        inserted = db.execute.await_args_list[1].args[1]
+        assert len(inserted) == 1
+        assert inserted[0]["chinese_meaning"] == "书本"
+        assert inserted[0]["frequency"] == 5
+        updated = db.execute.await_args_list[2].args[1]
+        assert [(row["id"], row["chinese_meaning"]) for row in updated] == [(10, "苹果")]
+        assert "english_meaning" not in updated[0]
+